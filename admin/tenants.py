@@ -10,10 +10,14 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 from extensions import db
 from models import Tenant, TenantMembership, User, TenantApiKey
-from middleware import superadmin_required
+from middleware import superadmin_required, invalidate_tenant_context
+from middleware.tenant import disable_tenant_scope
 
 admin_tenants = Blueprint('admin_tenants', __name__, url_prefix='/admin/tenants')
 
+# Tenant management works across tenants: no automatic tenant scoping
+admin_tenants.before_request(disable_tenant_scope)
+
 
 # ============================================================================
 # TENANT LIST & DASHBOARD
@@ -147,6 +151,7 @@ def tenant_edit(tenant_id):
             tenant.logo_data = None
             tenant.logo_mime_type = None
         
+        invalidate_tenant_context(tenant_id=tenant.id)
         db.session.commit()
         
         flash(f'Mandant "{tenant.name}" wurde aktualisiert.', 'success')
@@ -167,6 +172,7 @@ def tenant_archive(tenant_id):
     tenant.archived_by_id = current_user.id
     tenant.is_active = False
     
+    invalidate_tenant_context(tenant_id=tenant.id)
     db.session.commit()
     
     flash(f'Mandant "{tenant.name}" wurde archiviert.', 'success')
@@ -185,6 +191,7 @@ def tenant_restore(tenant_id):
     tenant.archived_by_id = None
     tenant.is_active = True
     
+    invalidate_tenant_context(tenant_id=tenant.id)
     db.session.commit()
     
     flash(f'Mandant "{tenant.name}" wurde wiederhergestellt.', 'success')
@@ -209,6 +216,7 @@ def tenant_delete(tenant_id):
     TenantApiKey.query.filter_by(tenant_id=tenant_id).delete()
     
     db.session.delete(tenant)
+    invalidate_tenant_context(tenant_id=tenant_id)
     db.session.commit()
     
     flash(f'Mandant "{tenant_name}" wurde endgültig gelöscht.', 'success')
@@ -274,6 +282,7 @@ def tenant_add_member(tenant_id):
         role=role
     )
     db.session.add(membership)
+    invalidate_tenant_context(user_id=user_id)
     db.session.commit()
     
     flash(f'{user.name} wurde als {role} hinzugefügt.', 'success')
@@ -291,6 +300,7 @@ def tenant_update_member(tenant_id, user_id):
     
     role = request.form.get('role', 'member')
     membership.role = role
+    invalidate_tenant_context(user_id=user_id)
     db.session.commit()
     
     flash(f'Rolle wurde auf {role} geändert.', 'success')
@@ -308,6 +318,7 @@ def tenant_remove_member(tenant_id, user_id):
     
     user_name = membership.user.name
     db.session.delete(membership)
+    invalidate_tenant_context(user_id=user_id)
     db.session.commit()
     
     flash(f'{user_name} wurde entfernt.', 'success')
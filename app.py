@@ -3,6 +3,7 @@ Deloitte ProjectOps
 Project & Task Management Platform for enterprises.
 """
 import secrets
+import time
 from datetime import datetime
 from functools import wraps
 
@@ -11,13 +12,22 @@ from flask_login import login_required, current_user
 from flask_socketio import emit, join_room, leave_room
 
 from config import config
-from extensions import db, migrate, socketio, login_manager, csrf, limiter
-from models import User, AuditLog
+from extensions import (
+    db, migrate, socketio, login_manager, csrf, limiter, READ_REPLICA,
+    configure_engine_options, apply_sqlite_pragmas, engine_report, db_logger, tenant_bind
+)
+from models import User, AuditLog, Tenant
 from translations import get_translation as t
-from services import ApprovalService, WorkflowService, email_service
+from services import (
+    ApprovalService, WorkflowService, email_service, MailQueueWorkerPool,
+    DueReminderService, NotificationDigestService,
+    TenantShardService, TenantMoveError, ReadReplicaSyncService,
+    JobService, JobWorker, JobWorkerPool
+)
 from modules import ModuleRegistry
 from middleware import load_tenant_context
 from middleware.tenant import inject_tenant_context
+from middleware.read_replica import reset_write_tracking
 
 # Import modules to register them
 import modules.core
@@ -27,7 +37,7 @@ import modules.projects
 # Import project models for migrations
 from modules.projects.models import (
     Project, ProjectMember, ProjectRole,
-    IssueType, IssueStatus, Issue, Sprint,
+    IssueType, IssueStatus, Issue, Sprint, SprintSnapshot,
     StatusCategory, ProjectMethodology,
     create_default_issue_types, create_default_issue_statuses
 )
@@ -101,13 +111,35 @@ def inject_globals():
     }
 
 
-def create_app(config_name='default'):
-    """Application factory"""
+def create_app(config_name='default', start_workers=False):
+    """
+    Application factory.
+    
+    ``start_workers=True`` also starts mail delivery and job workers in
+    this process (see start_background_workers); web processes normally
+    leave them to ``flask run-workers``.
+    """
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
-    # Initialize extensions
+    # Tenant databases are regular Flask-SQLAlchemy binds
+    if app.config.get('TENANT_DATABASES'):
+        app.config['SQLALCHEMY_BINDS'] = {
+            **app.config.get('SQLALCHEMY_BINDS', {}), **app.config['TENANT_DATABASES']
+        }
+    
+    # So is the read replica of the default database
+    if app.config.get('READ_REPLICA_URL'):
+        app.config['SQLALCHEMY_BINDS'] = {
+            **app.config.get('SQLALCHEMY_BINDS', {}), READ_REPLICA: app.config['READ_REPLICA_URL']
+        }
+    
+    # Initialize extensions (engine profile options must be set before the engines exist)
+    configure_engine_options(app)
     db.init_app(app)
+    apply_sqlite_pragmas(app)
+    for line in engine_report(app):
+        db_logger.info(line)
     migrate.init_app(app, db)
     
     # Initialize SocketIO with CORS restrictions
@@ -143,6 +175,7 @@ def create_app(config_name='default'):
 
     # Register tenant middleware and context processors
     app.before_request(load_tenant_context)
+    app.before_request(reset_write_tracking)
     app.context_processor(inject_tenant_context)
     app.context_processor(inject_globals)
 
@@ -221,15 +254,224 @@ def create_app(config_name='default'):
     def logout_alias():
         return redirect(url_for('auth.logout'))
     
+    register_cli_commands(app)
+    
+    if start_workers:
+        email_service.init_app(app)
+        start_background_workers(app)
+    
     return app
 
 
+def start_background_workers(app, mail_workers=None, job_workers=None):
+    """
+    Start mail delivery and job worker threads for an app.
+    
+    Mail workers (MAIL_QUEUE_WORKERS) only start when mail is enabled and
+    queued; job workers (JOB_WORKERS, at least one) also enqueue the
+    JOB_SCHEDULES (due reminders, notification digests, ...).
+    
+    Returns:
+        The started worker pools
+    """
+    pools = []
+    if app.config.get('MAIL_ENABLED') and app.config.get('MAIL_QUEUE_ENABLED'):
+        pools.append(MailQueueWorkerPool(app, mail_workers))
+    pools.append(JobWorkerPool(app, job_workers or max(app.config.get('JOB_WORKERS', 0), 1)))
+    for pool in pools:
+        if pool.size > 0:
+            pool.start()
+    return [pool for pool in pools if pool.size > 0]
+
+
+# ============================================================================
+# CLI COMMANDS
+# ============================================================================
+
+def register_cli_commands(app):
+    """Register maintenance commands (``flask --app app <command>``)"""
+    import click
+    
+    @app.cli.command('send-due-reminders')
+    @click.option('--date', 'run_date', type=click.DateTime(formats=['%Y-%m-%d']),
+                  help='Reminder date (default: today)')
+    def send_due_reminders(run_date):
+        """Send today's due-date reminder digests (safe to re-run)."""
+        totals = DueReminderService.run(today=run_date.date() if run_date else None)
+        click.echo(
+            f"{totals['digests']} digests sent for {totals['tasks']} due tasks in "
+            f"{totals['tenants']} tenants ({totals['skipped']} already reminded)"
+        )
+    
+    @app.cli.command('send-notification-digests')
+    def send_notification_digests():
+        """Fold held notifications of hourly/daily digest users."""
+        totals = NotificationDigestService.run()
+        click.echo(
+            f"{totals['digests']} digests from {totals['folded']} notifications for "
+            f"{totals['users']} users in {totals['batches']} batches"
+        )
+    
+    @app.cli.command('shard-upgrade')
+    @click.argument('names', nargs=-1)
+    def shard_upgrade(names):
+        """Create or migrate tenant databases (default: all TENANT_DATABASES)."""
+        for name in names or TenantShardService.database_names():
+            result = TenantShardService.upgrade(name)
+            click.echo(f"{name}: {result}")
+    
+    @app.cli.command('tenant-move')
+    @click.argument('slug')
+    @click.argument('target')
+    @click.option('--wait', type=float, help='Seconds to wait for other processes '
+                  '(default: TENANT_CONTEXT_CACHE_TTL + 5)')
+    @click.option('--keep-source', is_flag=True, help='Do not delete the rows from the old database')
+    def tenant_move(slug, target, wait, keep_source):
+        """Move a tenant to another database ("default" = main database) while it stays online."""
+        tenant = Tenant.query.filter_by(slug=slug).first()
+        if not tenant:
+            raise click.ClickException(f"Unknown tenant '{slug}'")
+        try:
+            TenantShardService.move(
+                tenant, None if target == 'default' else target,
+                wait=wait, purge=not keep_source, log=click.echo
+            )
+        except TenantMoveError as e:
+            raise click.ClickException(str(e))
+    
+    @app.cli.command('db-settings')
+    def db_settings():
+        """Show the effective engine settings of every database."""
+        for line in engine_report(app):
+            click.echo(line)
+    
+    @app.cli.command('sync-read-replica')
+    def sync_read_replica():
+        """Copy the SQLite database into the SQLite read replica (local replication stand-in)."""
+        if READ_REPLICA not in app.config.get('SQLALCHEMY_BINDS', {}):
+            raise click.ClickException('READ_REPLICA_URL is not configured')
+        try:
+            synced_at = ReadReplicaSyncService.sync()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Read replica synced at {datetime.fromtimestamp(synced_at):%Y-%m-%d %H:%M:%S}")
+    
+    @app.cli.command('run-jobs')
+    @click.option('--workers', type=int, help='Worker threads (default: JOB_WORKERS, at least 1)')
+    @click.option('--once', is_flag=True, help='Exit when no job is due instead of polling')
+    def run_jobs(workers, once):
+        """Run background jobs and periodic schedules until interrupted."""
+        workers = [JobWorker(app) for _ in range(workers or max(app.config.get('JOB_WORKERS', 0), 1))]
+        if once:
+            for worker in workers:
+                worker.run(once=True)
+        else:
+            click.echo(f"Running {len(workers)} job workers (Ctrl+C to stop)")
+            for worker in workers:
+                worker.start()
+            try:
+                for worker in workers:
+                    worker.join()
+            except KeyboardInterrupt:
+                click.echo('Stopping after the current jobs...')
+                for worker in workers:
+                    worker.stop()
+        
+        succeeded = sum(worker.stats['succeeded'] for worker in workers)
+        failed = sum(worker.stats['failed'] for worker in workers)
+        click.echo(f"{succeeded} jobs succeeded, {failed} failed")
+    
+    @app.cli.command('run-workers')
+    @click.option('--mail-workers', type=int, help='Mail delivery threads (default: MAIL_QUEUE_WORKERS)')
+    @click.option('--job-workers', type=int, help='Job worker threads (default: JOB_WORKERS, at least 1)')
+    def run_workers(mail_workers, job_workers):
+        """Deliver queued emails and run background jobs until interrupted."""
+        pools = start_background_workers(app, mail_workers, job_workers)
+        labels = {MailQueueWorkerPool: 'mail workers', JobWorkerPool: 'job workers'}
+        click.echo(f"Running {', '.join(f'{pool.size} {labels[type(pool)]}' for pool in pools)} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            click.echo('Stopping after the current jobs...')
+            for pool in pools:
+                pool.stop()
+    
+    @app.cli.command('enqueue-job')
+    @click.argument('job_type')
+    @click.option('--payload', default='{}', help='JSON payload')
+    def enqueue_job(job_type, payload):
+        """Queue a background job of a registered type."""
+        import json
+        try:
+            job = JobService.enqueue(job_type, json.loads(payload))
+        except (ValueError, TypeError) as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Job {job.id} queued: {job.type}")
+
+    @app.cli.command('backfill-burndown')
+    @click.option('--sprint', 'sprint_id', type=int, help='Only this sprint (default: all started sprints)')
+    def backfill_burndown(sprint_id):
+        """Rebuild daily sprint burndown snapshots from the issue activity log."""
+        from modules.projects.burndown import rebuild_snapshots
+
+        query = Sprint.query.filter(Sprint.state != 'future')
+        if sprint_id:
+            query = query.filter(Sprint.id == sprint_id)
+        sprints = rows = 0
+        for sprint in query.order_by(Sprint.id).all():
+            rows += rebuild_snapshots(sprint)
+            sprints += 1
+            db.session.commit()
+        click.echo(f"{rows} snapshots for {sprints} sprints")
+
+    @app.cli.command('reindex-search')
+    @click.argument('names', nargs=-1)
+    def reindex_search(names):
+        """Rebuild the issue search index ("default" = main database; default: all databases)."""
+        from modules.projects.search import reindex
+
+        for name in names or ['default', *TenantShardService.database_names()]:
+            with tenant_bind(None if name == 'default' else name):
+                count = reindex()
+                db.session.commit()
+            click.echo(f"{name}: {'no search table' if count is None else f'{count} issues indexed'}")
+
+    @app.cli.command('import-issues')
+    @click.argument('tenant_slug')
+    @click.argument('project_key')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--user', 'email', required=True, help='Importing user (default reporter, activity log)')
+    @click.option('--dry-run', is_flag=True, help='Only validate the file')
+    def import_issues_command(tenant_slug, project_key, path, email, dry_run):
+        """Import issues from a CSV, JSON or Excel file into a project."""
+        from modules.projects.importer import IssueImportError, import_issues
+
+        tenant = Tenant.query.filter_by(slug=tenant_slug).first()
+        user = User.query.filter_by(email=email).first()
+        if tenant is None or user is None:
+            raise click.ClickException(f"Unknown {'tenant' if tenant is None else 'user'}")
+        with tenant_bind(tenant.db_bind):
+            project = Project.query.filter_by(tenant_id=tenant.id, key=project_key.upper()).first()
+            if project is None:
+                raise click.ClickException(f"Unknown project '{project_key}'")
+            with open(path, 'rb') as file:
+                try:
+                    result = import_issues(project, file, path, user.id, dry_run=dry_run)
+                except IssueImportError as e:
+                    raise click.ClickException(str(e))
+            db.session.commit()
+        for row, message in result.errors:
+            click.echo(f"Row {row}: {message}", err=True)
+        click.echo(f"{result.rows} rows, {result.valid} valid, {result.created} created")
+
+
 app = create_app()
 
 # Apply WSGI middleware to mask server version
 app.wsgi_app = ServerHeaderMiddleware(app.wsgi_app)
 
-# Initialize email service
+# Initialize email service (queued emails are delivered by `flask run-workers`)
 email_service.init_app(app)
 
 
@@ -273,6 +515,8 @@ def emit_notifications_to_users(notifications: list, lang: str = 'de'):
         lang: Language for localized content
     """
     for notification in notifications:
+        if notification.digest_pending:
+            continue  # Delivered later as part of a digest
         emit_notification(notification.user_id, notification, lang)
 
 
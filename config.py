@@ -3,6 +3,17 @@ Deloitte Flask App Template - Configuration
 """
 import os
 
+
+def _parse_databases(value):
+    """Parse "name=url;name2=url2" into a dict of bind names and URLs"""
+    databases = {}
+    for item in (value or '').split(';'):
+        name, sep, url = item.strip().partition('=')
+        if sep and name.strip() and url.strip():
+            databases[name.strip()] = url.strip()
+    return databases
+
+
 class Config:
     """Base configuration"""
     # App Info - CUSTOMIZE THESE
@@ -17,6 +28,48 @@ class Config:
         'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Engine profile: 'stock' keeps driver defaults, 'tuned' applies the settings below
+    DB_ENGINE_PROFILE = os.environ.get('DB_ENGINE_PROFILE', 'stock')
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')  # readers don't block behind writers
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')  # safe with WAL, fewer fsyncs
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # pages, negative = KiB
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # ms to wait for locks
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))  # server databases (PostgreSQL)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # seconds
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    
+    # Tenant databases ("name=url;name2=url2"), assigned per tenant via Tenant.db_bind.
+    # The position selects the database's id range, so only append new databases.
+    TENANT_DATABASES = _parse_databases(os.environ.get('TENANT_DATABASES'))
+    
+    # Read replica for dashboards, exports, iCal feeds and search (empty = disabled)
+    READ_REPLICA_URL = os.environ.get('READ_REPLICA_URL', '')
+    READ_REPLICA_MAX_LAG = float(os.environ.get('READ_REPLICA_MAX_LAG', 10))  # seconds, staler replicas are skipped
+    READ_REPLICA_SYNC_CRON = os.environ.get('READ_REPLICA_SYNC_CRON', '')  # SQLite copy as a job (empty = off)
+    
+    # Tenant context cache (per process; 0 disables caching)
+    TENANT_CONTEXT_CACHE_TTL = int(os.environ.get('TENANT_CONTEXT_CACHE_TTL', 30))  # seconds
+    
+    # Reference data cache for dropdown lists (0 disables caching)
+    REFERENCE_CACHE_TTL = int(os.environ.get('REFERENCE_CACHE_TTL', 30))  # seconds
+    REFERENCE_CACHE_SIZE = int(os.environ.get('REFERENCE_CACHE_SIZE', 512))  # entries per process
+    REFERENCE_CACHE_REDIS_URL = os.environ.get('REFERENCE_CACHE_REDIS_URL', '')  # shared backend, requires redis
+    
+    # Module access matrix cache for navigation and module guards (0 disables caching)
+    MODULE_ACCESS_CACHE_TTL = int(os.environ.get('MODULE_ACCESS_CACHE_TTL', 30))  # seconds
+    
+    # In-memory issue key index for typeahead (per process; 0 disables caching)
+    ISSUE_KEY_INDEX_TTL = int(os.environ.get('ISSUE_KEY_INDEX_TTL', 300))  # seconds
+    
+    # Board and backlog ranks - longer keys are respread by a background job
+    ISSUE_RANK_REBALANCE_LENGTH = int(os.environ.get('ISSUE_RANK_REBALANCE_LENGTH', 12))  # characters
+    
+    # Bulk issue import - issues per multi-row INSERT batch
+    ISSUE_IMPORT_BATCH_SIZE = int(os.environ.get('ISSUE_IMPORT_BATCH_SIZE', 5000))
+    
     # Language settings
     DEFAULT_LANGUAGE = 'de'
     SUPPORTED_LANGUAGES = ['de', 'en']
@@ -39,6 +92,42 @@ class Config:
     MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'false').lower() == 'true'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME', '')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD', '')
+    MAIL_SMTP_TIMEOUT = int(os.environ.get('MAIL_SMTP_TIMEOUT', 30))  # seconds
+    MAIL_SMTP_IDLE_TIMEOUT = int(os.environ.get('MAIL_SMTP_IDLE_TIMEOUT', 60))  # close idle worker connections
+    
+    # Outbound mail queue - send_email enqueues, `flask run-workers` delivers in the background
+    MAIL_QUEUE_ENABLED = os.environ.get('MAIL_QUEUE_ENABLED', 'false').lower() == 'true'
+    MAIL_QUEUE_WORKERS = int(os.environ.get('MAIL_QUEUE_WORKERS', 2))  # delivery threads of run-workers
+    MAIL_QUEUE_BATCH_SIZE = int(os.environ.get('MAIL_QUEUE_BATCH_SIZE', 50))
+    MAIL_QUEUE_POLL_INTERVAL = float(os.environ.get('MAIL_QUEUE_POLL_INTERVAL', 2))  # seconds
+    MAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get('MAIL_QUEUE_MAX_ATTEMPTS', 5))
+    MAIL_QUEUE_RETRY_BASE = int(os.environ.get('MAIL_QUEUE_RETRY_BASE', 30))  # seconds, doubled per attempt
+    MAIL_QUEUE_LEASE_SECONDS = int(os.environ.get('MAIL_QUEUE_LEASE_SECONDS', 300))  # reclaim stuck messages
+    
+    # Due date reminders - one digest per recipient and day
+    REMINDER_DAYS_AHEAD = int(os.environ.get('REMINDER_DAYS_AHEAD', 3))  # remind about tasks due within N days
+    REMINDER_OVERDUE_DAYS = int(os.environ.get('REMINDER_OVERDUE_DAYS', 14))  # keep reminding N days after due date
+    
+    # Notification digests - folds held notifications of hourly/daily digest users
+    NOTIFICATION_DIGEST_BATCH_SIZE = int(os.environ.get('NOTIFICATION_DIGEST_BATCH_SIZE', 200))  # users per batch
+    NOTIFICATION_DIGEST_MAX_BATCHES = int(os.environ.get('NOTIFICATION_DIGEST_MAX_BATCHES', 50))  # per run
+    NOTIFICATION_DIGEST_TOP_ITEMS = int(os.environ.get('NOTIFICATION_DIGEST_TOP_ITEMS', 3))  # items listed per type
+    
+    # Background jobs - persistent job table, run by `flask run-jobs` or `flask run-workers`
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 0))  # threads of run-workers / run-jobs (at least 1)
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 5))  # seconds
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BASE = int(os.environ.get('JOB_RETRY_BASE', 60))  # seconds, doubled per attempt
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 300))  # reclaim jobs of crashed workers
+    JOB_SCHEDULE_CATCHUP = int(os.environ.get('JOB_SCHEDULE_CATCHUP', 3600))  # seconds; missed slots run once
+    JOB_SCHEDULES = {  # name -> cron expression (UTC), job type and payload
+        'due-reminders': {'cron': '0 6 * * *', 'type': 'reminders.send'},
+        'notification-digests': {'cron': '*/15 * * * *', 'type': 'notifications.digest'},
+        'notification-retention': {'cron': '30 3 * * *', 'type': 'notifications.purge', 'payload': {'days': 90}},
+        'recurring-tasks': {'cron': '0 2 * * *', 'type': 'tasks.generate_recurring'},
+        **({'read-replica-sync': {'cron': READ_REPLICA_SYNC_CRON, 'type': 'replica.sync'}}
+           if READ_REPLICA_SYNC_CRON else {}),
+    }
     
     # SendGrid settings
     SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY', '')
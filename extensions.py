@@ -2,16 +2,232 @@
 Flask Extensions
 Central initialization of all Flask extensions.
 """
+import logging
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_socketio import SocketIO
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 # Database
-db = SQLAlchemy()
+
+# Tables that always live in the default database, even for tenants with
+# their own bind: identities, tenant registry, cross-tenant queues/ledgers.
+# Every other table belongs to the tenant's database.
+SHARED_TABLES = frozenset({
+    'user', 'tenant', 'tenant_membership', 'tenant_api_key', 'module', 'user_module',
+    'notification', 'email_queue', 'reminder_log', 'audit_log', 'reference_application',
+    'job', 'alembic_version',
+})
+
+# Session.info key holding the bind name of the current tenant (None = default database)
+TENANT_BIND = 'tenant_bind'
+
+# Bind name of the read replica (READ_REPLICA_URL), the session.info flag that
+# sends plain SELECTs to it and the flag marking sessions that wrote something
+READ_REPLICA = 'read_replica'
+USE_READ_REPLICA = 'use_read_replica'
+SESSION_WROTE = 'session_wrote'
+
+
+def _touches_tenant_tables(mapper, clause):
+    """True if the mapper or statement involves a table outside SHARED_TABLES"""
+    tables = []
+    if mapper is not None:
+        tables.extend(sa.inspect(mapper).tables)
+    if clause is not None:
+        tables.extend(sa.sql.util.find_tables(
+            clause, include_aliases=True, include_joins=True, include_crud=True
+        ))
+    return any(isinstance(t, sa.Table) and t.name not in SHARED_TABLES for t in tables)
+
+
+class TenantRoutingSession(FlaskSQLAlchemySession):
+    """
+    Session that sends tenant data to the tenant's own database.
+    
+    ``load_tenant_context`` stores the current tenant's bind name (a key of
+    ``SQLALCHEMY_BINDS``, see ``TENANT_DATABASES``) in ``session.info``.
+    Statements on tenant tables then run on that engine, statements that
+    only touch SHARED_TABLES on the default engine. Without a tenant bind
+    the session behaves exactly like the stock Flask-SQLAlchemy session.
+    
+    Inside ``use_read_replica`` (see middleware/read_replica.py) SELECTs
+    that would run on the default database go to the read replica instead,
+    unless the session has written something.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        shard = self.info.get(TENANT_BIND)
+        if bind is None and shard and _touches_tenant_tables(mapper, clause):
+            return self._db.engines[shard]
+        if (bind is None and self.info.get(USE_READ_REPLICA) and not self.info.get(SESSION_WROTE)
+                and isinstance(clause, sa.sql.Select)):
+            return self._db.engines[READ_REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def tenant_bind(name):
+    """Route the session to a tenant database (background jobs, CLI commands)"""
+    previous = db.session.info.get(TENANT_BIND)
+    db.session.info[TENANT_BIND] = name
+    try:
+        yield
+    finally:
+        db.session.info[TENANT_BIND] = previous
+
+
+db = SQLAlchemy(session_options={'class_': TenantRoutingSession})
+
+
+# Session.info key of the callbacks waiting for the commit of the outermost
+# transaction: {(callback, args): transactions (or savepoints) that queued it}
+AFTER_COMMIT = 'after_commit_callbacks'
+
+
+def call_after_commit(callback, *args, session=None):
+    """
+    Call ``callback(*args)`` once the current transaction commits.
+    
+    Queued calls run when the outermost transaction commits, not when a
+    savepoint is released. Rolling back a savepoint only drops the calls
+    queued inside it; rolling back the transaction drops them all. The
+    same call queued several times runs once.
+    """
+    session = db.session() if session is None else session
+    transaction = session.get_nested_transaction() or session.get_transaction() or session.begin()
+    session.info.setdefault(AFTER_COMMIT, {}).setdefault((callback, args), set()).add(transaction)
+
+
+def invalidate_now_and_after_commit(callback, *args, session=None):
+    """
+    Invalidate a cache immediately and once more after the commit, so a
+    concurrent request cannot re-cache the old state in between.
+    """
+    callback(*args)
+    call_after_commit(callback, *args, session=session)
+
+
+@sa.event.listens_for(Session, 'after_commit')
+def _run_after_commit_callbacks(session):
+    if session.get_nested_transaction() is not None:
+        return  # savepoint released, the outer transaction may still roll back
+    for callback, args in session.info.pop(AFTER_COMMIT, {}):
+        callback(*args)
+
+
+def _within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@sa.event.listens_for(Session, 'after_soft_rollback')
+def _discard_after_commit_callbacks(session, previous_transaction):
+    pending = session.info.get(AFTER_COMMIT)
+    if not pending:
+        return
+    if previous_transaction.parent is None:
+        del session.info[AFTER_COMMIT]
+        return
+    for key, transactions in list(pending.items()):
+        transactions.difference_update({t for t in transactions if _within(t, previous_transaction)})
+        if not transactions:
+            del pending[key]
+
+
+db_logger = logging.getLogger('database')
+
+
+# Engine profiles (DB_ENGINE_PROFILE): 'stock' (default) keeps SQLAlchemy/driver
+# defaults, 'tuned' applies the SQLITE_* PRAGMAs and DB_POOL_* settings from the config
+
+def engine_profile(url, config):
+    """Return (engine options, SQLite PRAGMAs) for one database URL"""
+    if config.get('DB_ENGINE_PROFILE', 'stock') != 'tuned':
+        return {}, {}
+    if sa.engine.make_url(url).get_backend_name() == 'sqlite':
+        return {}, {
+            'journal_mode': config['SQLITE_JOURNAL_MODE'],
+            'synchronous': config['SQLITE_SYNCHRONOUS'],
+            'mmap_size': config['SQLITE_MMAP_SIZE'],
+            'cache_size': config['SQLITE_CACHE_SIZE'],
+            'busy_timeout': config['SQLITE_BUSY_TIMEOUT'],
+        }
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }, {}
+
+
+def configure_engine_options(app):
+    """Merge profile pool options into the engine options; call before db.init_app"""
+    options, _ = engine_profile(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    
+    binds = {}
+    for key, bind in app.config.get('SQLALCHEMY_BINDS', {}).items():
+        bind = {'url': bind} if isinstance(bind, str) else dict(bind)
+        options, _ = engine_profile(bind['url'], app.config)
+        binds[key] = {**options, **bind}
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def apply_sqlite_pragmas(app):
+    """Set the profile's PRAGMAs on every new SQLite connection; call after db.init_app"""
+    with app.app_context():
+        for engine in db.engines.values():
+            _, pragmas = engine_profile(engine.url, app.config)
+            if pragmas:
+                sa.event.listen(engine, 'connect', _pragma_setter(pragmas))
+
+
+def _pragma_setter(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+    return set_pragmas
+
+
+def engine_report(app):
+    """
+    Configured settings of every database (startup log, `flask db-settings`).
+    
+    Lists the engine options from SQLALCHEMY_ENGINE_OPTIONS/SQLALCHEMY_BINDS
+    and the profile's SQLite PRAGMAs; no database is connected.
+    """
+    profile = app.config.get('DB_ENGINE_PROFILE', 'stock')
+    databases = {
+        'default': {**app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}), 'url': app.config['SQLALCHEMY_DATABASE_URI']}
+    }
+    for key, bind in app.config.get('SQLALCHEMY_BINDS', {}).items():
+        databases[key] = {'url': bind} if isinstance(bind, str) else bind
+    
+    lines = []
+    for name, options in databases.items():
+        options = dict(options)
+        url = sa.engine.make_url(options.pop('url'))
+        _, pragmas = engine_profile(url, app.config)
+        settings = {**options, **pragmas}
+        lines.append(f"{name} ({url.get_backend_name()}, {profile}): "
+                     + (', '.join(f'{k}={v}' for k, v in settings.items()) or 'driver defaults'))
+    return lines
+
 
 # CSRF Protection
 csrf = CSRFProtect()
@@ -7,7 +7,8 @@ from middleware.tenant import (
     tenant_admin_required,
     superadmin_required,
     get_current_tenant,
-    get_current_tenant_role
+    get_current_tenant_role,
+    invalidate_tenant_context
 )
 
 __all__ = [
@@ -16,5 +17,6 @@ __all__ = [
     'tenant_admin_required', 
     'superadmin_required',
     'get_current_tenant',
-    'get_current_tenant_role'
+    'get_current_tenant_role',
+    'invalidate_tenant_context'
 ]
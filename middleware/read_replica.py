@@ -0,0 +1,154 @@
+"""
+Read Replica Middleware
+
+Routes the plain SELECTs of read-only endpoints (dashboards, exports,
+iCal feeds, search) to the read replica configured in READ_REPLICA_URL.
+Everything else keeps using the primary database.
+
+The replica is skipped when
+- it lags more than READ_REPLICA_MAX_LAG seconds behind the primary,
+- the browser session committed a write the replica has not seen yet
+  (read-your-writes across requests), or
+- the current database session already wrote something (within a request).
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import session, current_app, has_request_context
+from sqlalchemy import event
+
+from extensions import db, call_after_commit, TenantRoutingSession, READ_REPLICA, USE_READ_REPLICA, SESSION_WROTE
+
+replica_logger = logging.getLogger('read_replica')
+
+# Flask session key: time of the browser session's last committed write
+LAST_WRITE_AT = '_last_write_at'
+
+# Heartbeat table the replica sync stamps after every copy (SQLite stand-in)
+HEARTBEAT_TABLE = 'replica_heartbeat'
+
+# Seconds a measured replica position is reused within one process
+POSITION_CHECK_INTERVAL = 1.0
+
+
+class ReplicaPosition:
+    """
+    Per-process view of how current the read replica is.
+    
+    ``get()`` returns the primary's time (epoch seconds) up to which the
+    replica has applied all changes, or None if that is unknown. The value
+    is re-measured at most every POSITION_CHECK_INTERVAL seconds; a cached
+    position is older than the real one, so decisions based on it err
+    towards the primary.
+    """
+    
+    def __init__(self):
+        self._entry = None
+        self._lock = threading.Lock()
+    
+    def get(self):
+        entry = self._entry
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        position = self.measure()
+        with self._lock:
+            self._entry = (time.monotonic() + POSITION_CHECK_INTERVAL, position)
+        return position
+    
+    @staticmethod
+    def measure():
+        """Query the replica for its position"""
+        engine = db.engines[READ_REPLICA]
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == 'sqlite':
+                    return conn.exec_driver_sql(f'SELECT max(synced_at) FROM {HEARTBEAT_TABLE}').scalar()
+                if engine.dialect.name == 'postgresql':
+                    # An idle replica that replayed everything it received is current
+                    return conn.exec_driver_sql(
+                        "SELECT extract(epoch FROM CASE "
+                        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN now() "
+                        "ELSE pg_last_xact_replay_timestamp() END)"
+                    ).scalar()
+                return time.time()
+        except Exception as e:
+            # Missing heartbeat (replica never synced) or replica unreachable
+            replica_logger.warning(f"Read replica position unavailable: {e}")
+            return None
+    
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+
+replica_position = ReplicaPosition()
+
+
+def replica_available():
+    """True if read-only work of the current request may use the replica"""
+    if READ_REPLICA not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return False
+    if db.session.info.get(SESSION_WROTE):
+        return False
+    
+    position = replica_position.get()
+    if position is None or time.time() - position > current_app.config.get('READ_REPLICA_MAX_LAG', 0):
+        return False
+    
+    # Read-your-writes: the replica must contain the session's last write
+    last_write = session.get(LAST_WRITE_AT) if has_request_context() else None
+    return last_write is None or position > last_write
+
+
+@contextmanager
+def use_read_replica():
+    """Route plain SELECTs inside the block to the read replica, if available"""
+    previous = db.session.info.get(USE_READ_REPLICA)
+    db.session.info[USE_READ_REPLICA] = replica_available()
+    try:
+        yield
+    finally:
+        db.session.info[USE_READ_REPLICA] = previous
+
+
+def read_only(f):
+    """Decorator for pure-read endpoints that may be served from the read replica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with use_read_replica():
+            return f(*args, **kwargs)
+    return decorated_function
+
+
+# =============================================================================
+# WRITE TRACKING
+# =============================================================================
+
+def reset_write_tracking():
+    """before_request hook: writes of earlier requests are covered by LAST_WRITE_AT"""
+    db.session.info.pop(SESSION_WROTE, None)
+
+
+def _note_write(session_):
+    session_.info[SESSION_WROTE] = True
+    call_after_commit(_remember_last_write, session=session_)
+
+
+@event.listens_for(TenantRoutingSession, 'after_flush')
+def _track_flush(session_, flush_context):
+    _note_write(session_)
+
+
+@event.listens_for(TenantRoutingSession, 'do_orm_execute')
+def _track_bulk_statement(orm_execute_state):
+    """ORM bulk UPDATE/DELETE statements bypass the flush"""
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        _note_write(orm_execute_state.session)
+
+
+def _remember_last_write():
+    if has_request_context() and READ_REPLICA in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        session[LAST_WRITE_AT] = time.time()
@@ -3,9 +3,15 @@ Multi-Tenancy Middleware
 
 Handles tenant context loading, access control, and query scoping.
 """
+import threading
+import time
 from functools import wraps
-from flask import g, session, redirect, url_for, flash, request, current_app
+from flask import g, session, redirect, url_for, flash, request, current_app, has_request_context, abort
 from flask_login import current_user
+from sqlalchemy import Select, event, inspect, or_
+from sqlalchemy.orm import Session, make_transient_to_detached, with_loader_criteria
+
+from extensions import db, invalidate_now_and_after_commit, TENANT_BIND
 
 
 def get_current_tenant():
@@ -18,6 +24,123 @@ def get_current_tenant_role():
     return getattr(g, 'tenant_role', None)
 
 
+# =============================================================================
+# TENANT CONTEXT CACHE
+# =============================================================================
+
+class TenantContextCache:
+    """
+    Per-process cache of resolved tenant contexts, keyed by (user_id, tenant_id).
+    
+    Entries hold a detached snapshot of the tenant's columns and the user's
+    role. They expire after TENANT_CONTEXT_CACHE_TTL seconds and are dropped
+    explicitly whenever a tenant or membership changes in this process; the
+    short TTL bounds staleness for changes made by other processes.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, user_id, tenant_id):
+        """Return (tenant_snapshot, role) or None if missing/expired"""
+        entry = self._entries.get((user_id, tenant_id))
+        if entry is None or entry[2] < time.monotonic():
+            return None
+        return entry[0], entry[1]
+    
+    def set(self, user_id, tenant_id, tenant, role, ttl):
+        """Cache a snapshot of ``tenant`` and the user's role"""
+        from models import Tenant
+        
+        snapshot = Tenant(**{
+            attr.key: getattr(tenant, attr.key) for attr in Tenant.__mapper__.column_attrs
+        })
+        make_transient_to_detached(snapshot)
+        with self._lock:
+            self._entries[(user_id, tenant_id)] = (snapshot, role, time.monotonic() + ttl)
+    
+    def invalidate(self, tenant_id=None, user_id=None):
+        """Drop entries of a tenant, a user, or both (None matches everything)"""
+        with self._lock:
+            if tenant_id is None and user_id is None:
+                self._entries.clear()
+                return
+            for key, (snapshot, _, _) in list(self._entries.items()):
+                if ((user_id is None or key[0] == user_id) and
+                        (tenant_id is None or snapshot.id == tenant_id)):
+                    del self._entries[key]
+    
+    def clear(self):
+        """Drop all entries"""
+        self.invalidate()
+
+
+tenant_context_cache = TenantContextCache()
+
+
+def invalidate_tenant_context(tenant_id=None, user_id=None):
+    """
+    Drop cached tenant contexts for a tenant and/or user.
+    
+    Invalidates immediately and once more after the current transaction
+    commits, so a concurrent request cannot re-cache the old state in between.
+    """
+    invalidate_now_and_after_commit(tenant_context_cache.invalidate, tenant_id, user_id)
+
+
+def _resolve_tenant_context(user, tenant_id):
+    """
+    Resolve (tenant, role) for a user with queries (cache miss path).
+    
+    ``tenant_id=None`` resolves the user's default tenant. Returns
+    (None, None) if the tenant does not exist, is inactive or the user
+    is not a member.
+    """
+    from models import Tenant, TenantMembership
+    
+    if user.is_superadmin:
+        tenant = db.session.get(Tenant, tenant_id) if tenant_id else None
+        return (tenant, 'admin') if tenant else (None, None)
+    
+    if tenant_id is None:
+        tenant = user.default_tenant
+        if not tenant or not tenant.is_active:
+            return None, None
+        return tenant, user.get_role_in_tenant(tenant.id)
+    
+    # One membership lookup answers both "can access" and "which role"
+    membership = TenantMembership.query.filter_by(user_id=user.id, tenant_id=tenant_id).first()
+    if not membership:
+        return None, None
+    tenant = db.session.get(Tenant, tenant_id)
+    if not tenant or not tenant.is_active:
+        return None, None
+    return tenant, membership.role
+
+
+def get_tenant_context(user, tenant_id):
+    """
+    Cached (tenant, role) lookup for a user.
+    
+    The returned tenant is attached to the current session without a query
+    on cache hits, so relationships still lazy-load as usual.
+    """
+    ttl = current_app.config.get('TENANT_CONTEXT_CACHE_TTL', 0)
+    cached = tenant_context_cache.get(user.id, tenant_id) if ttl > 0 else None
+    if cached:
+        snapshot, role = cached
+        return db.session.merge(snapshot, load=False), role
+    
+    tenant, role = _resolve_tenant_context(user, tenant_id)
+    if tenant and ttl > 0:
+        tenant_context_cache.set(user.id, tenant_id, tenant, role, ttl)
+        if tenant_id is None:
+            # The default tenant is stored in the session and looked up by ID next time
+            tenant_context_cache.set(user.id, tenant.id, tenant, role, ttl)
+    return tenant, role
+
+
 def load_tenant_context():
     """
     Load tenant context for each request.
@@ -27,54 +150,71 @@ def load_tenant_context():
         g.tenant - Current Tenant object or None
         g.tenant_role - User's role in current tenant ('admin', 'manager', 'member', 'viewer')
         g.is_superadmin_mode - True if super-admin is viewing another tenant
-    """
-    from models import Tenant, TenantMembership
     
+    Tenant and role come from the tenant context cache, so a warm request
+    needs no queries here. Finally the session is routed to the tenant's
+    database (see select_tenant_bind).
+    """
     g.tenant = None
     g.tenant_role = None
     g.is_superadmin_mode = False
     
     # Skip for unauthenticated users
     if not current_user.is_authenticated:
+        select_tenant_bind()
         return
     
     # Super-Admin handling
     if current_user.is_superadmin:
         tenant_id = session.get('current_tenant_id') or current_user.current_tenant_id
         if tenant_id:
-            g.tenant = Tenant.query.get(tenant_id)
+            g.tenant, g.tenant_role = get_tenant_context(current_user, tenant_id)
             if g.tenant:
                 # Super-admin always has 'admin' role equivalent
-                g.tenant_role = 'admin'
                 g.is_superadmin_mode = True
+        select_tenant_bind()
         return
     
     # Regular user: Get tenant from session or default
     tenant_id = session.get('current_tenant_id')
     
     if tenant_id:
-        # Verify user still has access to this tenant
-        if current_user.can_access_tenant(tenant_id):
-            tenant = Tenant.query.get(tenant_id)
-            if tenant and tenant.is_active:
-                g.tenant = tenant
-                g.tenant_role = current_user.get_role_in_tenant(tenant_id)
-            else:
-                # Tenant deactivated, clear session
-                session.pop('current_tenant_id', None)
-                tenant_id = None
-        else:
-            # No longer has access, clear session
+        # Verify user still has access to this (active) tenant
+        g.tenant, g.tenant_role = get_tenant_context(current_user, tenant_id)
+        if not g.tenant:
+            # No longer has access or tenant deactivated, clear session
             session.pop('current_tenant_id', None)
             tenant_id = None
     
     # Fallback to default tenant if none set
     if not tenant_id and not g.tenant:
-        default = current_user.default_tenant
-        if default and default.is_active:
+        default, role = get_tenant_context(current_user, None)
+        if default:
             g.tenant = default
             session['current_tenant_id'] = default.id
-            g.tenant_role = current_user.get_role_in_tenant(default.id)
+            g.tenant_role = role
+    
+    select_tenant_bind()
+
+
+def select_tenant_bind():
+    """
+    Route this request's session to the database of g.tenant.
+    
+    Tenants without ``db_bind`` use the default database. While a tenant
+    is being moved to another database (``is_moving``) only reads are
+    served; writes get a 503 until the move has finished.
+    """
+    tenant = g.get('tenant')
+    bind = tenant.db_bind if tenant else None
+    
+    if bind and bind not in db.engines:
+        current_app.logger.error(f"Tenant {tenant.slug}: unknown database bind '{bind}'")
+        abort(503)
+    if tenant and tenant.is_moving and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        abort(503)
+    
+    db.session.info[TENANT_BIND] = bind
 
 
 def tenant_required(f):
@@ -387,6 +527,185 @@ class TenantQueryMixin:
         return cls.query.filter(cls.tenant_id == g.tenant.id)
 
 
+# =============================================================================
+# AUTOMATIC TENANT SCOPING
+# =============================================================================
+
+# Tables with a tenant_id that are deliberately not scoped: memberships and
+# API keys are resolved across tenants, queue/ledger tables are processed by
+# background workers for every tenant.
+TENANT_SCOPE_EXEMPT_TABLES = frozenset({
+    'tenant_membership', 'tenant_api_key', 'email_queue', 'reminder_log', 'job',
+})
+
+# Reference tables whose rows without a tenant form a catalog shared with
+# every tenant (categories and presets of the admin screens). Scoped
+# statements see the tenant's rows plus the shared ones; new rows stay
+# shared unless the code sets a tenant.
+TENANT_SHARED_TABLES = frozenset({
+    'task_category', 'task_preset',
+})
+
+# Where a scoped row written without a tenant belongs: the tenant of the first
+# of these many-to-one relationships that is set (users: their current tenant),
+# otherwise the default tenant. Migration tb001 applies the same rules to rows
+# written before tenant scoping.
+TENANT_OWNERS = {
+    'project': ('created_by', 'lead'),
+    'sprint': ('project',),
+    'issue': ('project',),
+    'task': ('entity', 'owner'),
+    'entity': ('parent',),
+    'team': ('manager',),
+    'notification': ('user',),
+    'audit_log': ('user',),
+}
+
+# Execution option for single statements that must see all tenants:
+#     Task.query.execution_options(skip_tenant_scope=True)
+SKIP_TENANT_SCOPE = 'skip_tenant_scope'
+
+
+def disable_tenant_scope():
+    """
+    Turn off automatic tenant scoping for the rest of the request.
+    
+    Meant for super-admin tooling that works across tenants, e.g. as a
+    blueprint ``before_request`` hook.
+    """
+    g.skip_tenant_scope = True
+
+
+def without_tenant_scope(f):
+    """Decorator: run a view without automatic tenant scoping"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        disable_tenant_scope()
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def tenant_scope_id():
+    """Tenant ID to scope ORM queries to, or None outside a tenant request"""
+    if not has_request_context() or getattr(g, 'skip_tenant_scope', False):
+        return None
+    tenant = getattr(g, 'tenant', None)
+    if tenant is None:
+        return None
+    # Read the key from the identity so an expired tenant is not refreshed mid-query
+    identity = inspect(tenant).identity
+    return identity[0] if identity else None
+
+
+def is_tenant_scoped(mapper):
+    """True for models that are filtered by the current tenant automatically"""
+    return 'tenant_id' in mapper.columns and mapper.local_table.name not in TENANT_SCOPE_EXEMPT_TABLES
+
+
+def _statement_mappers(execute_state):
+    """Mappers of a statement, including entities only selected in FROM subqueries (Query.count())"""
+    mappers = set(execute_state.all_mappers)
+    if execute_state.is_select:
+        froms = list(execute_state.statement.get_final_froms())
+        while froms:
+            element = froms.pop()
+            while not isinstance(element, Select) and hasattr(element, 'element'):
+                element = element.element  # aliases of subqueries
+            if isinstance(element, Select):
+                mappers.update(
+                    inspect(description['entity']).mapper
+                    for description in element.column_descriptions if description.get('entity') is not None
+                )
+                froms.extend(element.get_final_froms())
+    return mappers
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _apply_tenant_scope(execute_state):
+    """
+    Restrict ORM statements to the current tenant.
+    
+    Adds ``tenant_id = :current`` for every tenant-aware model in a SELECT,
+    UPDATE or DELETE issued during a request with a tenant context. The
+    TENANT_SHARED_TABLES also match their shared rows without a tenant;
+    other tables have none (``_stamp_tenant_id``, migration tb001).
+    Hand-written tenant filters stay valid; the criteria only narrow
+    queries that forgot one. Column and relationship loads inherit the
+    scope of the statement that loaded the parent object.
+    """
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if execute_state.execution_options.get(SKIP_TENANT_SCOPE, False):
+        return
+    
+    tenant_id = tenant_scope_id()
+    if tenant_id is None:
+        return
+    
+    def criteria(mapper):
+        if mapper.local_table.name in TENANT_SHARED_TABLES:
+            return lambda cls: or_(cls.tenant_id == tenant_id, cls.tenant_id.is_(None))
+        return lambda cls: cls.tenant_id == tenant_id
+    
+    options = [
+        with_loader_criteria(mapper.class_, criteria(mapper), include_aliases=True)
+        for mapper in _statement_mappers(execute_state)
+        if is_tenant_scoped(mapper)
+    ]
+    if options:
+        execute_state.statement = execute_state.statement.options(*options)
+
+
+def default_tenant_id(session):
+    """The oldest active tenant, which owns rows no other tenant can be derived for"""
+    from models import Tenant
+    
+    return session.query(Tenant.id).filter(Tenant.is_active == True).order_by(Tenant.id).limit(1).scalar()
+
+
+def owning_tenant_id(obj, default=None):
+    """Tenant a row without tenant_id belongs to, following TENANT_OWNERS"""
+    for key in TENANT_OWNERS.get(inspect(obj).mapper.local_table.name, ()):
+        owner = getattr(obj, key)
+        if owner is None:
+            continue
+        tenant_id = owner.current_tenant_id if hasattr(owner, 'current_tenant_id') else owner.tenant_id
+        if tenant_id is None and is_tenant_scoped(inspect(owner).mapper) and owner is not obj:
+            tenant_id = owning_tenant_id(owner)
+        if tenant_id is not None:
+            return tenant_id
+    return default
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_tenant_id(session, flush_context, instances):
+    """
+    Give new rows a tenant when the code creating them left it out.
+    
+    During a tenant request that is the current tenant. Background jobs,
+    CLI commands and code written before multi-tenancy get the owner's
+    tenant (TENANT_OWNERS) or the default tenant. Without this, such rows
+    would be invisible to every tenant. Rows of TENANT_SHARED_TABLES keep
+    NULL, which shares them with every tenant.
+    """
+    pending = [obj for obj in session.new
+               if is_tenant_scoped(inspect(obj).mapper) and obj.tenant_id is None
+               and inspect(obj).mapper.local_table.name not in TENANT_SHARED_TABLES]
+    if not pending:
+        return
+    tenant_id = tenant_scope_id()
+    if tenant_id is None:
+        with session.no_autoflush:
+            default = default_tenant_id(session)
+            for obj in pending:
+                obj.tenant_id = owning_tenant_id(obj, default)
+        return
+    for obj in pending:
+        obj.tenant_id = tenant_id
+
+
 # =============================================================================
 # TEMPLATE HELPERS
 # =============================================================================
@@ -16,6 +16,10 @@ logger = logging.getLogger('alembic.env')
 
 
 def get_engine():
+    shard = context.get_x_argument(as_dictionary=True).get('shard')
+    if shard:
+        # Tenant database: flask shard-upgrade / flask db upgrade -x shard=NAME
+        return current_app.extensions['migrate'].db.engines[shard]
     try:
         # this works with Flask-SQLAlchemy<3 and Alchemical
         return current_app.extensions['migrate'].db.get_engine()
@@ -0,0 +1,42 @@
+"""Add daily sprint burndown snapshots
+
+Revision ID: bd001_sprint_snapshot
+Revises: sa001_sprint_aggregates
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bd001_sprint_snapshot'
+down_revision = 'sa001_sprint_aggregates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # History of running and closed sprints: flask backfill-burndown
+    op.create_table('sprint_snapshot',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sprint_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('remaining_points', sa.Float(), nullable=True),
+        sa.Column('added_points', sa.Float(), nullable=True),
+        sa.Column('removed_points', sa.Float(), nullable=True),
+        sa.Column('completed_points', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['sprint_id'], ['sprint.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sprint_id', 'day', name='uq_sprint_snapshot_day')
+    )
+    with op.batch_alter_table('sprint_snapshot', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sprint_snapshot_sprint_id'), ['sprint_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sprint_snapshot', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sprint_snapshot_sprint_id'))
+
+    op.drop_table('sprint_snapshot')
@@ -0,0 +1,39 @@
+"""Add full-text search index for issues
+
+Revision ID: ft001_issue_search
+Revises: bd001_sprint_snapshot
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'ft001_issue_search'
+down_revision = 'bd001_sprint_snapshot'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by: flask reindex-search
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS issue_search USING fts5("
+            "key, summary, description, comments, tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif dialect == 'postgresql':
+        op.create_table('issue_search',
+            sa.Column('issue_id', sa.Integer(), nullable=False),
+            sa.Column('document', postgresql.TSVECTOR(), nullable=False),
+            sa.ForeignKeyConstraint(['issue_id'], ['issue.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('issue_id')
+        )
+        op.create_index('ix_issue_search_document', 'issue_search', ['document'], postgresql_using='gin')
+
+
+def downgrade():
+    op.execute('DROP TABLE IF EXISTS issue_search')
@@ -0,0 +1,30 @@
+"""Add archived_by_id to Issue
+
+Bulk and single archiving record who archived an issue, like tasks do.
+
+Revision ID: ia001_add_issue_archived_by
+Revises: tb001_backfill_tenant_ids
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ia001_add_issue_archived_by'
+down_revision = 'tb001_backfill_tenant_ids'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('archived_by_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_issue_archived_by_id_user', 'user', ['archived_by_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_issue_archived_by_id_user', type_='foreignkey')
+        batch_op.drop_column('archived_by_id')
@@ -0,0 +1,46 @@
+"""Add composite indexes for hot tenant-scoped queries
+
+Revision ID: ix001_composite_indexes
+Revises: nd001_notification_digest
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ix001_composite_indexes'
+down_revision = 'nd001_notification_digest'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_tenant_archived_due_date', ['tenant_id', 'is_archived', 'due_date'], unique=False)
+        batch_op.create_index('ix_task_tenant_year_status', ['tenant_id', 'year', 'status'], unique=False)
+
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.create_index('ix_issue_project_archived_status_position', ['project_id', 'is_archived', 'status_id', 'board_position'], unique=False)
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_user_read_created', ['user_id', 'is_read', 'created_at'], unique=False)
+
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_log_entity', ['entity_type', 'entity_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_log_entity')
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_read_created')
+
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.drop_index('ix_issue_project_archived_status_position')
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_tenant_year_status')
+        batch_op.drop_index('ix_task_tenant_archived_due_date')
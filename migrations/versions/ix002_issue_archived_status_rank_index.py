@@ -0,0 +1,34 @@
+"""Index the board by archive flag and rank instead of the legacy board_position
+
+board_position is no longer maintained; boards are ordered by board_rank.
+ix_issue_project_archived_status_rank replaces both the board_position index
+and ix_issue_project_status_board_rank, keeping is_archived indexed.
+
+Revision ID: ix002_issue_archived_status_rank
+Revises: ia001_add_issue_archived_by
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ix002_issue_archived_status_rank'
+down_revision = 'ia001_add_issue_archived_by'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.drop_index('ix_issue_project_archived_status_position')
+        batch_op.drop_index('ix_issue_project_status_board_rank')
+        batch_op.create_index('ix_issue_project_archived_status_rank', ['project_id', 'is_archived', 'status_id', 'board_rank'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.drop_index('ix_issue_project_archived_status_rank')
+        batch_op.create_index('ix_issue_project_status_board_rank', ['project_id', 'status_id', 'board_rank'], unique=False)
+        batch_op.create_index('ix_issue_project_archived_status_position', ['project_id', 'is_archived', 'status_id', 'board_position'], unique=False)
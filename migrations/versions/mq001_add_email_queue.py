@@ -0,0 +1,50 @@
+"""Add email_queue table for background mail delivery
+
+Revision ID: mq001_email_queue
+Revises: rt001_board_version
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'mq001_email_queue'
+down_revision = 'rt001_board_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('email_queue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=True),
+        sa.Column('to_email', sa.String(length=255), nullable=False),
+        sa.Column('from_email', sa.String(length=255), nullable=False),
+        sa.Column('subject', sa.String(length=500), nullable=False),
+        sa.Column('html_content', sa.Text(), nullable=False),
+        sa.Column('text_content', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('email_queue', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_email_queue_tenant_id'), ['tenant_id'], unique=False)
+        batch_op.create_index('ix_email_queue_status_next_attempt', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('email_queue', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_queue_status_next_attempt')
+        batch_op.drop_index(batch_op.f('ix_email_queue_tenant_id'))
+
+    op.drop_table('email_queue')
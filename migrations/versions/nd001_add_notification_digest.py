@@ -0,0 +1,44 @@
+"""Add notification digest preference and held notification columns
+
+Revision ID: nd001_notification_digest
+Revises: rm001_reminder_log
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'nd001_notification_digest'
+down_revision = 'rm001_reminder_log'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('notification_digest', sa.String(length=20), nullable=True))
+
+    # Built with sa.table so "user" (reserved on PostgreSQL) is quoted
+    user = sa.table('user', sa.column('notification_digest', sa.String))
+    op.execute(
+        user.update()
+        .where(user.c.notification_digest.is_(None))
+        .values(notification_digest='immediate')
+    )
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('digest_pending', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('digest_count', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_notification_digest_pending', ['digest_pending', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_digest_pending')
+        batch_op.drop_column('digest_count')
+        batch_op.drop_column('digest_pending')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('notification_digest')
@@ -0,0 +1,72 @@
+"""Add fractional board and backlog ranks to Issue
+
+Revision ID: rk001_issue_ranks
+Revises: jb001_job
+Create Date: 2026-10-19
+
+"""
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'rk001_issue_ranks'
+down_revision = 'jb001_job'
+branch_labels = None
+depends_on = None
+
+
+def _spread(count):
+    """Evenly spaced base-36 keys, as modules.projects.ranking.spread_ranks"""
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    step = max(min(36 ** 3, (36 ** 6 - 1) // (count + 1)), 1)
+    keys = []
+    for i in range(count):
+        value, key = (i + 1) * step, ''
+        for _ in range(6):
+            value, digit = divmod(value, 36)
+            key = digits[digit] + key
+        keys.append(key.rstrip('0'))
+    return keys
+
+
+def upgrade():
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('board_rank', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('backlog_rank', sa.String(length=64), nullable=True))
+
+    # Ranks follow the current integer positions
+    conn = op.get_bind()
+    issue = sa.table('issue', sa.column('id'), sa.column('project_id'), sa.column('status_id'),
+                     sa.column('board_position'), sa.column('backlog_position'), sa.column('created_at'),
+                     sa.column('board_rank'), sa.column('backlog_rank'))
+
+    rows = conn.execute(sa.select(issue.c.id, issue.c.project_id, issue.c.status_id).order_by(
+        issue.c.project_id, issue.c.status_id, issue.c.board_position, issue.c.created_at.desc(), issue.c.id
+    )).all()
+    for _, column in groupby(rows, key=lambda r: (r.project_id, r.status_id)):
+        column = list(column)
+        for row, rank in zip(column, _spread(len(column))):
+            conn.execute(issue.update().where(issue.c.id == row.id).values(board_rank=rank))
+
+    rows = conn.execute(sa.select(issue.c.id, issue.c.project_id).order_by(
+        issue.c.project_id, issue.c.backlog_position, issue.c.created_at.desc(), issue.c.id
+    )).all()
+    for _, backlog in groupby(rows, key=lambda r: r.project_id):
+        backlog = list(backlog)
+        for row, rank in zip(backlog, _spread(len(backlog))):
+            conn.execute(issue.update().where(issue.c.id == row.id).values(backlog_rank=rank))
+
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.create_index('ix_issue_project_status_board_rank', ['project_id', 'status_id', 'board_rank'], unique=False)
+        batch_op.create_index('ix_issue_project_backlog_rank', ['project_id', 'backlog_rank'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('issue', schema=None) as batch_op:
+        batch_op.drop_index('ix_issue_project_backlog_rank')
+        batch_op.drop_index('ix_issue_project_status_board_rank')
+        batch_op.drop_column('backlog_rank')
+        batch_op.drop_column('board_rank')
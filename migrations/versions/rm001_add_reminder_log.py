@@ -0,0 +1,48 @@
+"""Add reminder_log ledger and task due date index for due reminders
+
+Revision ID: rm001_reminder_log
+Revises: mq001_email_queue
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'rm001_reminder_log'
+down_revision = 'mq001_email_queue'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reminder_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('reminder_date', sa.Date(), nullable=False),
+        sa.Column('task_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'tenant_id', 'reminder_date', name='uq_reminder_log_user_tenant_date')
+    )
+    with op.batch_alter_table('reminder_log', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_reminder_log_tenant_id'), ['tenant_id'], unique=False)
+        batch_op.create_index('ix_reminder_log_tenant_date', ['tenant_id', 'reminder_date'], unique=False)
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_tenant_due_date', ['tenant_id', 'due_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_tenant_due_date')
+
+    with op.batch_alter_table('reminder_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_reminder_log_tenant_date')
+        batch_op.drop_index(batch_op.f('ix_reminder_log_tenant_id'))
+
+    op.drop_table('reminder_log')
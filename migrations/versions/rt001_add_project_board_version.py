@@ -0,0 +1,26 @@
+"""Add board_version to Project for real-time board deltas
+
+Revision ID: rt001_board_version
+Revises: g1_rename_tax_type_to_category
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'rt001_board_version'
+down_revision = 'g1_rename_tax_type_to_category'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('board_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.drop_column('board_version')
@@ -0,0 +1,58 @@
+"""Add stored aggregates to Sprint
+
+Revision ID: sa001_sprint_aggregates
+Revises: rk001_issue_ranks
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'sa001_sprint_aggregates'
+down_revision = 'rk001_issue_ranks'
+branch_labels = None
+depends_on = None
+
+AGGREGATES = ('points_total', 'points_completed', 'issue_count', 'issues_todo', 'issues_in_progress', 'issues_done')
+
+
+def upgrade():
+    with op.batch_alter_table('sprint', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('committed_points', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('points_total', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('points_completed', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('issue_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('issues_todo', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('issues_in_progress', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('issues_done', sa.Integer(), nullable=True))
+
+    # Backfill all sprints (closed ones included) from their current issues;
+    # the commitment of already started sprints is unknown, so it stays NULL
+    sprint = sa.table('sprint', sa.column('id'), *(sa.column(name) for name in AGGREGATES))
+    issue = sa.table('issue', sa.column('sprint_id'), sa.column('status_id'), sa.column('story_points'))
+    status = sa.table('issue_status', sa.column('id'), sa.column('is_final'), sa.column('category'))
+
+    def total(expression):
+        return sa.select(sa.func.coalesce(sa.func.sum(expression), 0)).select_from(
+            issue.join(status, issue.c.status_id == status.c.id)
+        ).where(issue.c.sprint_id == sprint.c.id).scalar_subquery()
+
+    points = sa.func.coalesce(issue.c.story_points, 0)
+    final = status.c.is_final == sa.true()
+    op.get_bind().execute(sprint.update().values(
+        points_total=total(points),
+        points_completed=total(sa.case((final, points), else_=0)),
+        issue_count=total(1),
+        issues_todo=total(sa.case((status.c.category == 'todo', 1), else_=0)),
+        issues_in_progress=total(sa.case((status.c.category == 'in_progress', 1), else_=0)),
+        issues_done=total(sa.case((final, 1), else_=0)),
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('sprint', schema=None) as batch_op:
+        for name in reversed(AGGREGATES):
+            batch_op.drop_column(name)
+        batch_op.drop_column('committed_points')
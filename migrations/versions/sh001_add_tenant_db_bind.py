@@ -0,0 +1,28 @@
+"""Add tenant database bind for per-tenant databases
+
+Revision ID: sh001_tenant_db_bind
+Revises: ts001_tenant_indexes
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'sh001_tenant_db_bind'
+down_revision = 'ts001_tenant_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('db_bind', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('is_moving', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.drop_column('is_moving')
+        batch_op.drop_column('db_bind')
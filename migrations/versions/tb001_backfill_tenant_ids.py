@@ -0,0 +1,73 @@
+"""Assign rows without a tenant to their owning or default tenant
+
+Automatic tenant scoping filters every tenant-aware table on tenant_id.
+Rows written before multi-tenancy have NULL there and would disappear for
+every tenant. Each row gets the tenant of its owner (see TENANT_OWNERS in
+middleware/tenant.py; users count with their current tenant), rows without
+an owner the default tenant (the oldest active one). Task categories and
+presets are left alone: without a tenant they are the catalog shared with
+every tenant (TENANT_SHARED_TABLES).
+
+Revision ID: tb001_backfill_tenant_ids
+Revises: ft001_issue_search
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'tb001_backfill_tenant_ids'
+down_revision = 'ft001_issue_search'
+branch_labels = None
+depends_on = None
+
+
+# (table, [(foreign key column, owner table)]) in dependency order
+OWNERS = [
+    ('project', [('created_by_id', 'user'), ('lead_id', 'user')]),
+    ('team', [('manager_id', 'user')]),
+    ('entity', [('group_id', 'entity')]),
+    ('task', [('entity_id', 'entity'), ('owner_id', 'user')]),
+    ('sprint', [('project_id', 'project')]),
+    ('issue', [('project_id', 'project')]),
+    ('notification', [('user_id', 'user')]),
+    ('audit_log', [('user_id', 'user')]),
+]
+
+
+def _owner_tenant(table, column, owner_name):
+    tenant_column = 'current_tenant_id' if owner_name == 'user' else 'tenant_id'
+    owner = sa.table(owner_name, sa.column('id', sa.Integer), sa.column(tenant_column, sa.Integer)).alias('owner')
+    return (sa.select(owner.c[tenant_column])
+            .where(owner.c.id == table.c[column])
+            .scalar_subquery())
+
+
+def upgrade():
+    conn = op.get_bind()
+    existing_tables = sa.inspect(conn).get_table_names()
+
+    tenant = sa.table('tenant', sa.column('id', sa.Integer), sa.column('is_active', sa.Boolean))
+    default_tenant_id = conn.execute(
+        sa.select(tenant.c.id).where(tenant.c.is_active == sa.true()).order_by(tenant.c.id).limit(1)
+    ).scalar()
+
+    for name, owners in OWNERS:
+        if name not in existing_tables:
+            continue
+        table = sa.table(name, sa.column('tenant_id', sa.Integer),
+                         *(sa.column(column, sa.Integer) for column, _ in owners))
+        candidates = [_owner_tenant(table, column, owner) for column, owner in owners]
+        if default_tenant_id is not None:
+            candidates.append(sa.literal(default_tenant_id, sa.Integer))
+        if not candidates:
+            continue
+        value = candidates[0] if len(candidates) == 1 else sa.func.coalesce(*candidates)
+        op.execute(table.update().where(table.c.tenant_id.is_(None)).values(tenant_id=value))
+
+
+def downgrade():
+    # Assigned values cannot be told apart from tenant_ids set by the application
+    pass
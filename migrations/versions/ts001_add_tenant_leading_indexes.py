@@ -0,0 +1,56 @@
+"""Add tenant-leading indexes for automatically tenant-scoped queries
+
+Revision ID: ts001_tenant_indexes
+Revises: ix001_composite_indexes
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ts001_tenant_indexes'
+down_revision = 'ix001_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.create_index('ix_project_tenant_archived', ['tenant_id', 'is_archived'], unique=False)
+
+    with op.batch_alter_table('entity', schema=None) as batch_op:
+        batch_op.create_index('ix_entity_tenant_active', ['tenant_id', 'is_active'], unique=False)
+
+    with op.batch_alter_table('team', schema=None) as batch_op:
+        batch_op.create_index('ix_team_tenant_active', ['tenant_id', 'is_active'], unique=False)
+
+    with op.batch_alter_table('task_category', schema=None) as batch_op:
+        batch_op.create_index('ix_task_category_tenant_active', ['tenant_id', 'is_active'], unique=False)
+
+    with op.batch_alter_table('task_preset', schema=None) as batch_op:
+        batch_op.create_index('ix_task_preset_tenant_active', ['tenant_id', 'is_active'], unique=False)
+
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_log_tenant_timestamp', ['tenant_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_log_tenant_timestamp')
+
+    with op.batch_alter_table('task_preset', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_preset_tenant_active')
+
+    with op.batch_alter_table('task_category', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_category_tenant_active')
+
+    with op.batch_alter_table('team', schema=None) as batch_op:
+        batch_op.drop_index('ix_team_tenant_active')
+
+    with op.batch_alter_table('entity', schema=None) as batch_op:
+        batch_op.drop_index('ix_entity_tenant_active')
+
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.drop_index('ix_project_tenant_archived')
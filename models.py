@@ -49,6 +49,10 @@ class Tenant(db.Model):
     # Settings (JSON for flexible config)
     settings = db.Column(db.JSON, default=dict)
     
+    # Database (key of TENANT_DATABASES; None = default database)
+    db_bind = db.Column(db.String(50))
+    is_moving = db.Column(db.Boolean, default=False)  # Writes paused while moving between databases
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
@@ -92,6 +96,8 @@ class Tenant(db.Model):
     
     def add_member(self, user, role='member', invited_by=None, is_default=False):
         """Add a user to this tenant"""
+        from middleware.tenant import invalidate_tenant_context
+        
         existing = TenantMembership.query.filter_by(
             tenant_id=self.id, user_id=user.id
         ).first()
@@ -106,27 +112,37 @@ class Tenant(db.Model):
             invited_by_id=invited_by.id if invited_by else None
         )
         db.session.add(membership)
+        invalidate_tenant_context(user_id=user.id)
         return membership
     
     def remove_member(self, user):
         """Remove a user from this tenant"""
+        from middleware.tenant import invalidate_tenant_context
+        
         TenantMembership.query.filter_by(
             tenant_id=self.id, user_id=user.id
         ).delete()
+        invalidate_tenant_context(user_id=user.id)
     
     def archive(self, user):
         """Archive this tenant (soft-delete)"""
+        from middleware.tenant import invalidate_tenant_context
+        
         self.is_archived = True
         self.is_active = False
         self.archived_at = datetime.utcnow()
         self.archived_by_id = user.id if user else None
+        invalidate_tenant_context(tenant_id=self.id)
     
     def restore(self):
         """Restore tenant from archive"""
+        from middleware.tenant import invalidate_tenant_context
+        
         self.is_archived = False
         self.is_active = True
         self.archived_at = None
         self.archived_by_id = None
+        invalidate_tenant_context(tenant_id=self.id)
     
     def __repr__(self):
         return f'<Tenant {self.name}>'
@@ -439,6 +455,7 @@ class User(UserMixin, db.Model):
     email_on_status_change = db.Column(db.Boolean, default=True)
     email_on_due_reminder = db.Column(db.Boolean, default=True)
     email_on_comment = db.Column(db.Boolean, default=False)  # Off by default (can be noisy)
+    notification_digest = db.Column(db.String(20), default='immediate')  # immediate, hourly, daily
     
     # Relationships
     owned_tasks = db.relationship('Task', foreign_keys='Task.owner_id', backref='owner', lazy='dynamic')
@@ -678,6 +695,10 @@ class Team(db.Model):
     # Tasks assigned to this team
     owned_tasks = db.relationship('Task', foreign_keys='Task.owner_team_id', backref='owner_team', lazy='dynamic')
     
+    __table_args__ = (
+        db.Index('ix_team_tenant_active', 'tenant_id', 'is_active'),
+    )
+    
     def add_member(self, user):
         """Add a user to this team"""
         if not self.is_member(user):
@@ -736,6 +757,13 @@ class AuditLog(db.Model):
     # Relationships
     user = db.relationship('User', backref='audit_logs', lazy=True)
     
+    __table_args__ = (
+        # Per-entity history (task detail, workflow timeline)
+        db.Index('ix_audit_log_entity', 'entity_type', 'entity_id', 'timestamp'),
+        # Tenant audit log, newest first
+        db.Index('ix_audit_log_tenant_timestamp', 'tenant_id', 'timestamp'),
+    )
+    
     def __repr__(self):
         return f'<AuditLog {self.action} {self.entity_type}>'
 
@@ -764,6 +792,10 @@ class Entity(db.Model):
     children = db.relationship('Entity', backref=db.backref('parent', remote_side=[id]), lazy='dynamic')
     tasks = db.relationship('Task', backref='entity', lazy='dynamic')
     
+    __table_args__ = (
+        db.Index('ix_entity_tenant_active', 'tenant_id', 'is_active'),
+    )
+    
     def get_name(self, lang='de'):
         """Get translated name based on language"""
         if lang == 'en' and self.name_en:
@@ -795,6 +827,10 @@ class TaskCategory(db.Model):
     
     templates = db.relationship('TaskTemplate', backref='task_category', lazy='dynamic')
     
+    __table_args__ = (
+        db.Index('ix_task_category_tenant_active', 'tenant_id', 'is_active'),
+    )
+    
     def get_name(self, lang='de'):
         """Get translated name based on language"""
         if lang == 'en' and self.name_en:
@@ -984,6 +1020,10 @@ class TaskPreset(db.Model):
     default_owner = db.relationship('User', foreign_keys=[default_owner_id])
     default_entity = db.relationship('Entity', foreign_keys=[default_entity_id])
     
+    __table_args__ = (
+        db.Index('ix_task_preset_tenant_active', 'tenant_id', 'is_active'),
+    )
+    
     def get_title(self, lang='de'):
         """Get translated title based on language"""
         if lang == 'en' and self.title_en:
@@ -1096,6 +1136,15 @@ class Task(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Due date range scans per tenant (reminders, calendar)
+        db.Index('ix_task_tenant_due_date', 'tenant_id', 'due_date'),
+        # Task lists and dashboards: active tasks of a tenant by due date
+        db.Index('ix_task_tenant_archived_due_date', 'tenant_id', 'is_archived', 'due_date'),
+        # Year views and status charts
+        db.Index('ix_task_tenant_year_status', 'tenant_id', 'year', 'status'),
+    )
+    
     # Relationships
     evidence = db.relationship('TaskEvidence', backref='task', lazy='dynamic', cascade='all, delete-orphan')
     comments = db.relationship('Comment', backref='task', lazy='dynamic', cascade='all, delete-orphan')
@@ -1488,6 +1537,13 @@ class NotificationType(Enum):
         return [(t.value, t.name.replace('_', ' ').title()) for t in cls]
 
 
+class NotificationDigestMode(Enum):
+    """How often a user receives routine notifications"""
+    IMMEDIATE = 'immediate'  # One notification (and email) per event
+    HOURLY = 'hourly'        # Folded into one digest per type every hour
+    DAILY = 'daily'          # Folded into one digest per type every day
+
+
 class Notification(db.Model):
     """In-app notification for users"""
     __tablename__ = 'notification'
@@ -1516,6 +1572,11 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False, index=True)
     read_at = db.Column(db.DateTime)
     
+    # Digest mode: held notifications wait for the aggregator, which replaces
+    # them with one digest notification per type (digest_count = folded events)
+    digest_pending = db.Column(db.Boolean, default=False, nullable=False)
+    digest_count = db.Column(db.Integer)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
@@ -1523,6 +1584,13 @@ class Notification(db.Model):
     user = db.relationship('User', foreign_keys=[user_id], backref='notifications')
     actor = db.relationship('User', foreign_keys=[actor_id])
     
+    __table_args__ = (
+        # Digest aggregator scans held notifications by age
+        db.Index('ix_notification_digest_pending', 'digest_pending', 'created_at'),
+        # Unread badge and notification dropdown
+        db.Index('ix_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+    
     def mark_as_read(self):
         """Mark notification as read"""
         if not self.is_read:
@@ -1588,6 +1656,7 @@ class Notification(db.Model):
             'icon': self.get_icon(),
             'color': self.get_color(),
             'is_read': self.is_read,
+            'digest_count': self.digest_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'time_ago': self._time_ago()
         }
@@ -1614,6 +1683,151 @@ class Notification(db.Model):
         return f'<Notification {self.id} for User {self.user_id}: {self.notification_type}>'
 
 
+# ============================================================================
+# OUTBOUND EMAIL QUEUE
+# ============================================================================
+
+class EmailQueueStatus(Enum):
+    """Delivery states of a queued email"""
+    PENDING = 'pending'    # Waiting for a worker (or for its next retry)
+    SENDING = 'sending'    # Leased by a worker
+    SENT = 'sent'          # Delivered to the mail provider
+    FAILED = 'failed'      # Gave up after max attempts
+
+
+class EmailQueue(db.Model):
+    """Persistent outbound email, delivered by the mail queue workers"""
+    __tablename__ = 'email_queue'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id'), index=True)  # Multi-tenancy
+    
+    # Message
+    to_email = db.Column(db.String(255), nullable=False)
+    from_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(500), nullable=False)
+    html_content = db.Column(db.Text, nullable=False)
+    text_content = db.Column(db.Text)
+    
+    # Delivery state
+    status = db.Column(db.String(20), default=EmailQueueStatus.PENDING.value, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text)
+    
+    # Worker lease
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        # Workers poll for due messages in this order
+        db.Index('ix_email_queue_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self):
+        return f'<EmailQueue {self.id} to {self.to_email}: {self.status}>'
+
+
+class ReminderLog(db.Model):
+    """Ledger of due-date digests sent, one row per recipient, tenant and day"""
+    __tablename__ = 'reminder_log'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id'), index=True)  # Multi-tenancy
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    reminder_date = db.Column(db.Date, nullable=False)
+    task_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'tenant_id', 'reminder_date', name='uq_reminder_log_user_tenant_date'),
+        db.Index('ix_reminder_log_tenant_date', 'tenant_id', 'reminder_date'),
+    )
+    
+    def __repr__(self):
+        return f'<ReminderLog user {self.user_id} on {self.reminder_date}>'
+
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+class JobStatus(Enum):
+    """States of a background job"""
+    PENDING = 'pending'      # Waiting for run_at (or for its next retry)
+    RUNNING = 'running'      # Leased by a worker
+    SUCCEEDED = 'succeeded'  # Handler finished
+    FAILED = 'failed'        # Gave up after max attempts
+    CANCELLED = 'cancelled'  # Cancelled by an administrator before it ran
+
+
+class Job(db.Model):
+    """Persistent background job, executed by the job workers (see JobService)"""
+    __tablename__ = 'job'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id'), index=True)  # Multi-tenancy
+    
+    # What to run
+    type = db.Column(db.String(100), nullable=False)  # Registered handler, e.g. 'reminders.send'
+    payload = db.Column(db.JSON, default=dict)
+    schedule = db.Column(db.String(100))  # Periodic schedule that created the job
+    
+    # Execution state
+    status = db.Column(db.String(20), default=JobStatus.PENDING.value, nullable=False)
+    progress = db.Column(db.Integer, default=0, nullable=False)  # Percent
+    progress_message = db.Column(db.String(255))
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    result = db.Column(db.JSON)
+    last_error = db.Column(db.Text)
+    
+    # Worker lease
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    
+    # Timestamps
+    created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        # Workers poll for due jobs in this order
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+        # One job per schedule slot, however many workers enqueue it
+        db.UniqueConstraint('schedule', 'run_at', name='uq_job_schedule_run_at'),
+    )
+    
+    def to_dict(self):
+        """JSON representation for the admin job list"""
+        return {
+            'id': self.id,
+            'type': self.type,
+            'schedule': self.schedule,
+            'status': self.status,
+            'progress': self.progress,
+            'progress_message': self.progress_message,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'locked_by': self.locked_by,
+            'result': self.result,
+            'last_error': self.last_error,
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.type}: {self.status}>'
+
+
 # ============================================================================
 # ASSOCIATION TABLES
 # ============================================================================
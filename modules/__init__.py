@@ -2,9 +2,114 @@
 Module Registry System
 Central registry for all application modules with dynamic loading.
 """
+import threading
+import time
+from collections import namedtuple
+
 from flask import session, current_app
 
 
+# =============================================================================
+# MODULE ACCESS CACHE
+# =============================================================================
+
+ModuleState = namedtuple('ModuleState', 'id code is_active is_core')
+
+
+class ModuleAccessCache:
+    """
+    Versioned per-process cache of the module access matrix.
+    
+    Holds one snapshot of all ``Module`` rows (code -> ModuleState) and, per
+    user, the frozenset of module codes granted via ``UserModule``. Every
+    global invalidation bumps the version, so entries loaded while a change
+    was being committed are never served. Entries expire after
+    MODULE_ACCESS_CACHE_TTL seconds, which bounds staleness for changes
+    made by other processes.
+    """
+    
+    def __init__(self):
+        self.version = 0
+        self._modules = None
+        self._users = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _ttl():
+        return current_app.config.get('MODULE_ACCESS_CACHE_TTL', 0)
+    
+    def _fresh(self, entry):
+        return entry is not None and entry[0] == self.version and entry[1] > time.monotonic()
+    
+    def modules(self):
+        """Dict of module code -> ModuleState for all modules"""
+        entry = self._modules
+        if self._fresh(entry):
+            return entry[2]
+        
+        from models import Module
+        from extensions import db
+        
+        version = self.version
+        states = {
+            row.code: ModuleState(*row)
+            for row in db.session.query(Module.id, Module.code, Module.is_active, Module.is_core)
+        }
+        if self._ttl() > 0:
+            self._modules = (version, time.monotonic() + self._ttl(), states)
+        return states
+    
+    def granted_codes(self, user_id):
+        """Codes of the modules assigned to a user (regardless of module state)"""
+        entry = self._users.get(user_id)
+        if self._fresh(entry):
+            return entry[2]
+        
+        from models import Module, UserModule
+        from extensions import db
+        
+        version = self.version
+        codes = frozenset(code for (code,) in db.session.query(Module.code).join(
+            UserModule, UserModule.module_id == Module.id
+        ).filter(UserModule.user_id == user_id))
+        if self._ttl() > 0:
+            with self._lock:
+                self._users[user_id] = (version, time.monotonic() + self._ttl(), codes)
+        return codes
+    
+    def invalidate(self, user_id=None):
+        """Drop one user's grants, or everything (user_id=None)"""
+        with self._lock:
+            if user_id is None:
+                self.version += 1
+                self._modules = None
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+    
+    def clear(self):
+        self.invalidate()
+
+
+module_access = ModuleAccessCache()
+
+
+def invalidate_module_access(user_id=None):
+    """
+    Drop cached module access for a user or for everyone.
+    
+    Invalidates immediately and once more after the current transaction
+    commits, so a concurrent request cannot re-cache the old state in between.
+    """
+    from extensions import invalidate_now_and_after_commit
+    
+    invalidate_now_and_after_commit(module_access.invalidate, user_id)
+
+
+# =============================================================================
+# MODULE REGISTRY
+# =============================================================================
+
 class ModuleRegistry:
     """Central registry for all application modules"""
     
@@ -30,9 +135,8 @@ class ModuleRegistry:
     @classmethod
     def get_active(cls):
         """Get all active modules (sorted by nav_order)"""
-        from models import Module
-        active_codes = {m.code for m in Module.query.filter_by(is_active=True).all()}
-        modules = [m for c, m in cls._modules.items() if c in active_codes]
+        states = module_access.modules()
+        modules = [m for c, m in cls._modules.items() if c in states and states[c].is_active]
         return sorted(modules, key=lambda m: m.nav_order)
     
     @classmethod
@@ -41,22 +145,17 @@ class ModuleRegistry:
         if not user or not user.is_authenticated:
             return []
         
-        from models import Module, UserModule
-        
         # Admins get all active modules
         if user.role == 'admin':
             return cls.get_active()
         
-        # Get user's assigned module codes
-        user_module_codes = set()
-        for um in user.user_modules:
-            if um.module and um.module.is_active:
-                user_module_codes.add(um.module.code)
-        
-        # Also include core modules (always available)
-        core_modules = Module.query.filter_by(is_core=True, is_active=True).all()
-        for m in core_modules:
-            user_module_codes.add(m.code)
+        # Assigned modules plus core modules (always available), if active
+        states = module_access.modules()
+        granted = module_access.granted_codes(user.id)
+        user_module_codes = {
+            code for code, state in states.items()
+            if state.is_active and (state.is_core or code in granted)
+        }
         
         modules = [m for c, m in cls._modules.items() if c in user_module_codes]
         return sorted(modules, key=lambda m: m.nav_order)
@@ -144,5 +243,6 @@ class BaseModule:
             module.nav_order = cls.nav_order
             module.is_core = cls.is_core
         
+        invalidate_module_access()
         db.session.commit()
         return module
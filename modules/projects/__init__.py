@@ -55,3 +55,6 @@ class ProjectsModule(BaseModule):
         bp = cls.get_blueprint()
         if bp:
             app.register_blueprint(bp)
+        
+        from .realtime import register_socketio_handlers
+        register_socketio_handlers()
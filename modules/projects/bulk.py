@@ -0,0 +1,150 @@
+"""
+Project Management Module - Set-based bulk changes
+
+Bulk edits from the backlog and sprint planning change hundreds or
+thousands of issues at once. Instead of loading every Issue and flushing
+it separately, the helpers here read the affected rows as plain columns,
+change them with a single UPDATE or DELETE and write the activity log with
+one multi-row INSERT.
+
+The statements bypass the ORM unit of work, so objects already loaded in
+the session are not refreshed; callers work with the returned rows.
+"""
+import os
+from datetime import datetime
+
+from extensions import db
+from .models import (
+    Issue, IssueActivity, IssueAttachment, IssueComment, IssueLink, IssueReviewer, Worklog
+)
+from .key_index import queue_key_changes
+from .search import unindex_issues
+
+# Columns read for every selected issue (the board delta of realtime.issue_delta)
+DELTA_COLUMNS = (
+    Issue.id, Issue.status_id, Issue.backlog_position,
+    Issue.board_rank, Issue.backlog_rank, Issue.assignee_id, Issue.priority,
+)
+
+
+def select_issues(project_id, issue_ids, *columns, **filters):
+    """
+    Rows of the given issues that belong to the project.
+
+    Args:
+        project_id: Project the issues must belong to
+        issue_ids: Requested issue IDs (unknown or foreign IDs are dropped)
+        *columns: Extra columns besides DELTA_COLUMNS
+        **filters: Additional equality filters (e.g. sprint_id=3)
+
+    Returns:
+        List of rows, usable with issue_delta()
+    """
+    if not issue_ids:
+        return []
+    return db.session.query(*DELTA_COLUMNS, *columns).filter(
+        Issue.id.in_(issue_ids), Issue.project_id == project_id
+    ).filter_by(**filters).order_by(Issue.id).all()
+
+
+def update_issues(issue_ids, values):
+    """
+    Apply ``values`` to all given issues with one UPDATE statement.
+
+    ``updated_at`` is set as well. Values may be SQL expressions.
+
+    Returns:
+        Number of updated rows
+    """
+    if not issue_ids:
+        return 0
+    result = db.session.execute(
+        db.update(Issue).where(Issue.id.in_(issue_ids))
+        .values(updated_at=datetime.utcnow(), **values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def resolution_date_for(status):
+    """
+    ``resolution_date`` expression for issues moving to ``status``.
+
+    Final statuses keep an existing resolution date and stamp the others;
+    any other status clears it.
+    """
+    if not status.is_final:
+        return None
+    return db.case((Issue.resolution_date.is_(None), datetime.utcnow()), else_=Issue.resolution_date)
+
+
+def log_activities(activities, user_id):
+    """
+    Insert activity log entries with one multi-row INSERT.
+
+    Args:
+        activities: Dicts with issue_id, activity_type and optionally
+            field_name, old_value, new_value and details
+        user_id: User who performed the change
+    """
+    if not activities:
+        return
+    now = datetime.utcnow()
+    rows = []
+    for activity in activities:
+        old_value, new_value = activity.get('old_value'), activity.get('new_value')
+        rows.append({
+            'issue_id': activity['issue_id'],
+            'user_id': user_id,
+            'activity_type': activity['activity_type'],
+            'field_name': activity.get('field_name'),
+            'old_value': str(old_value) if old_value is not None else None,
+            'new_value': str(new_value) if new_value is not None else None,
+            'details': activity.get('details'),
+            'created_at': now,
+        })
+    db.session.execute(db.insert(IssueActivity), rows)
+
+
+def delete_issues(issue_ids):
+    """
+    Delete issues with their comments, attachments, reviewers, worklogs,
+    links, activity log, search index entries and typeahead keys; sub-tasks
+    of deleted issues lose their parent.
+
+    Attachment files are not touched; remove the returned paths after the
+    commit with remove_files().
+
+    Returns:
+        File paths of the deleted attachments
+    """
+    if not issue_ids:
+        return []
+    paths = [path for path, in db.session.query(IssueAttachment.filepath).filter(
+        IssueAttachment.issue_id.in_(issue_ids)
+    )]
+
+    def delete(model, *criteria):
+        db.session.execute(db.delete(model).where(*criteria).execution_options(synchronize_session=False))
+
+    for model in (IssueComment, IssueAttachment, IssueReviewer, Worklog, IssueActivity):
+        delete(model, model.issue_id.in_(issue_ids))
+    delete(IssueLink, db.or_(IssueLink.source_issue_id.in_(issue_ids), IssueLink.target_issue_id.in_(issue_ids)))
+    db.session.execute(
+        db.update(Issue).where(Issue.parent_id.in_(issue_ids)).values(parent_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    keys = db.session.query(Issue.tenant_id, Issue.key, Issue.project_id).filter(Issue.id.in_(issue_ids)).all()
+    delete(Issue, Issue.id.in_(issue_ids))
+    unindex_issues(issue_ids)
+    queue_key_changes(removed=keys)
+    return paths
+
+
+def remove_files(paths):
+    """Remove files of deleted attachments; missing files are ignored"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,321 @@
+"""
+Project Management Module - Daily sprint burndown snapshots
+
+Each started sprint keeps one SprintSnapshot row per day with the open
+story points at the end of the day and the scope added, scope removed and
+points completed during the day. The report reads these rows instead of
+recomputing the burndown from the current issue state.
+
+Rows are built incrementally: every change of an issue's sprint, status
+or story points while its sprint is active adjusts today's row (flush
+listeners below; bulk statements call record_issue_changes themselves).
+rebuild_snapshots() reconstructs the history of a sprint from the
+IssueActivity log (status and sprint changes, creation), for sprints that
+started before snapshots existed. The log does not record re-estimates,
+so a rebuild uses the current story points.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from .models import (
+    Issue, IssueActivity, IssueStatus, Sprint, SprintSnapshot, SPRINT_AGGREGATE_FIELDS
+)
+
+PENDING_BURNDOWN_CHANGES = 'pending_burndown_changes'
+
+# One issue before and after a change
+IssueChange = namedtuple('IssueChange', 'sprint_before sprint_after status_before status_after points_before points_after')
+
+
+def change_deltas(in_before, final_before, points_before, in_after, final_after, points_after):
+    """
+    Burndown effect of one issue change on one sprint.
+
+    Returns:
+        (added, removed, completed, remaining) deltas in story points
+    """
+    points_before, points_after = points_before or 0, points_after or 0
+    added = removed = completed = 0
+    if in_before and not in_after:
+        removed = points_before
+    elif in_after and not in_before:
+        added = points_after
+    elif in_before and in_after:
+        if final_after and not final_before:
+            completed = points_after
+        elif final_before and not final_after:
+            completed = -points_before
+        else:
+            difference = points_after - points_before  # Re-estimate
+            added, removed = max(difference, 0), max(-difference, 0)
+            if final_after:
+                completed = difference
+
+    remaining = (0 if final_after or not in_after else points_after) - \
+        (0 if final_before or not in_before else points_before)
+    return added, removed, completed, remaining
+
+
+def _final_statuses(status_ids, session):
+    ids = {i for i in status_ids if i is not None}
+    if not ids:
+        return set()
+    return {i for i, in session.execute(
+        db.select(IssueStatus.id).where(IssueStatus.id.in_(ids), IssueStatus.is_final == True)
+    )}
+
+
+def _upsert_snapshots(values, day, session):
+    """Add counter deltas to the day's rows and set their remaining points"""
+    for sprint_id, (added, removed, completed, remaining) in values.items():
+        updated = session.execute(
+            db.update(SprintSnapshot).where(SprintSnapshot.sprint_id == sprint_id, SprintSnapshot.day == day)
+            .values(added_points=SprintSnapshot.added_points + added,
+                    removed_points=SprintSnapshot.removed_points + removed,
+                    completed_points=SprintSnapshot.completed_points + completed,
+                    remaining_points=remaining, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            session.execute(db.insert(SprintSnapshot).values(
+                sprint_id=sprint_id, day=day, added_points=added, removed_points=removed,
+                completed_points=completed, remaining_points=remaining
+            ))
+
+
+def _open_points(sprint_ids, session):
+    """Story points not in a final status, per sprint"""
+    rows = session.execute(
+        db.select(Issue.sprint_id, db.func.coalesce(db.func.sum(Issue.story_points), 0))
+        .join(IssueStatus, Issue.status_id == IssueStatus.id)
+        .where(Issue.sprint_id.in_(sprint_ids), IssueStatus.is_final.isnot(True))
+        .group_by(Issue.sprint_id)
+    )
+    return dict(rows.all())
+
+
+def record_issue_changes(changes, session=None, day=None):
+    """
+    Apply issue changes to today's snapshot of every affected active sprint.
+
+    Must run after the changes were written, since the remaining points are
+    read from the issues.
+
+    Args:
+        changes: IssueChange tuples
+        session: Session to use (default: db.session)
+        day: Snapshot day (default: today, UTC)
+    """
+    session = session or db.session
+    changes = [c for c in changes if c.sprint_before is not None or c.sprint_after is not None]
+    if not changes:
+        return
+    sprint_ids = {c.sprint_before for c in changes} | {c.sprint_after for c in changes}
+    active = {i for i, in session.execute(
+        db.select(Sprint.id).where(Sprint.id.in_(sprint_ids - {None}), Sprint.state == 'active')
+    )}
+    if not active:
+        return
+    final = _final_statuses({c.status_before for c in changes} | {c.status_after for c in changes}, session)
+
+    totals = {}
+    for c in changes:
+        for sprint_id in {c.sprint_before, c.sprint_after} & active:
+            deltas = change_deltas(
+                c.sprint_before == sprint_id, c.status_before in final, c.points_before,
+                c.sprint_after == sprint_id, c.status_after in final, c.points_after,
+            )
+            totals[sprint_id] = [a + b for a, b in zip(totals.get(sprint_id, (0, 0, 0)), deltas[:3])]
+    totals = {k: v for k, v in totals.items() if any(v)}
+    if not totals:
+        return
+
+    remaining = _open_points(totals, session)
+    _upsert_snapshots({k: (*v, remaining.get(k, 0)) for k, v in totals.items()},
+                      day or datetime.utcnow().date(), session)
+
+
+def start_snapshot(sprint):
+    """Snapshot of the commitment on the day a sprint starts"""
+    remaining = _open_points([sprint.id], db.session).get(sprint.id, 0)
+    _upsert_snapshots({sprint.id: (0, 0, 0, remaining)}, datetime.utcnow().date(), db.session)
+
+
+# =============================================================================
+# REBUILD FROM THE ACTIVITY LOG
+# =============================================================================
+
+def rebuild_snapshots(sprint, today=None):
+    """
+    Reconstruct the daily snapshots of a started sprint from the activity log.
+
+    Walks the status changes, sprint changes and creations back from the
+    current state to the sprint start, then forward day by day. Existing
+    rows of the sprint are replaced. The caller commits.
+
+    Returns:
+        Number of snapshot rows written
+    """
+    start = sprint.started_at or (datetime.combine(sprint.start_date, datetime.min.time())
+                                  if sprint.start_date else None)
+    if sprint.state == 'future' or start is None:
+        return 0
+    today = today or datetime.utcnow().date()
+    last_day = sprint.completed_at.date() if sprint.state == 'closed' and sprint.completed_at else today
+
+    statuses = IssueStatus.query.filter_by(project_id=sprint.project_id).all()
+    final_by_id = {s.id: bool(s.is_final) for s in statuses}
+    final_by_name = {}
+    for status in statuses:
+        for name in (status.name, status.name_en):
+            if name:
+                final_by_name[name] = bool(status.is_final)
+
+    # Every issue that was in the sprint at some point
+    moved = db.select(IssueActivity.issue_id).join(Issue, IssueActivity.issue_id == Issue.id).where(
+        Issue.project_id == sprint.project_id, IssueActivity.activity_type == 'sprint_change',
+        db.or_(IssueActivity.old_value == sprint.name, IssueActivity.new_value == sprint.name)
+    )
+    issues = db.session.query(Issue.id, Issue.sprint_id, Issue.status_id, Issue.story_points).filter(
+        db.or_(Issue.sprint_id == sprint.id, Issue.id.in_(moved))
+    ).all()
+    points = {row.id: row.story_points or 0 for row in issues}
+    state = {row.id: (row.sprint_id == sprint.id, final_by_id.get(row.status_id, False)) for row in issues}
+
+    events = IssueActivity.query.filter(
+        IssueActivity.issue_id.in_(list(state)), IssueActivity.created_at >= start,
+        IssueActivity.activity_type.in_(['status_change', 'sprint_change', 'created'])
+    ).order_by(IssueActivity.created_at, IssueActivity.id).all()
+
+    # Backwards: state of each issue before every event
+    transitions = []
+    for activity in reversed(events):
+        after = state[activity.issue_id]
+        in_sprint, final = after
+        if activity.activity_type == 'status_change' and activity.old_value is not None:
+            final = final_by_name.get(activity.old_value, final)
+        elif activity.activity_type == 'sprint_change':
+            in_sprint = activity.old_value == sprint.name
+        elif activity.activity_type == 'created':
+            in_sprint = False
+        state[activity.issue_id] = (in_sprint, final)
+        transitions.append((activity, (in_sprint, final), after))
+    transitions.reverse()
+
+    # Forwards, one row per day; open issues leaving with the completion do not count
+    remaining = sum(points[i] for i, (in_sprint, final) in state.items() if in_sprint and not final)
+    end = sprint.completed_at if sprint.state == 'closed' else None
+    by_day = {}
+    for activity, before, after in transitions:
+        if end and activity.created_at >= end:
+            break
+        deltas = change_deltas(before[0], before[1], points[activity.issue_id],
+                               after[0], after[1], points[activity.issue_id])
+        day = by_day.setdefault(activity.created_at.date(), [0, 0, 0, 0])
+        for i, delta in enumerate(deltas):
+            day[i] += delta
+
+    rows = []
+    day = start.date()
+    while day <= last_day:
+        added, removed, completed, change = by_day.get(day, (0, 0, 0, 0))
+        remaining += change
+        rows.append({'sprint_id': sprint.id, 'day': day, 'added_points': added, 'removed_points': removed,
+                     'completed_points': completed, 'remaining_points': remaining})
+        day += timedelta(days=1)
+
+    db.session.execute(db.delete(SprintSnapshot).where(SprintSnapshot.sprint_id == sprint.id)
+                       .execution_options(synchronize_session=False))
+    if rows:
+        db.session.execute(db.insert(SprintSnapshot), rows)
+    return len(rows)
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+def calculate_burndown_data(sprint):
+    """
+    Burndown chart data for a sprint from its daily snapshots.
+
+    Days without a snapshot carry the previous remaining points forward.
+    Sprints started before snapshots existed are rebuilt once.
+    """
+    empty = {'labels': [], 'ideal': [], 'actual': [], 'added': [], 'removed': [], 'completed': []}
+    if not sprint.start_date or not sprint.end_date:
+        return empty
+    days = (sprint.end_date - sprint.start_date).days + 1
+    if days <= 0:
+        return empty
+
+    snapshots = sprint.snapshots.order_by(SprintSnapshot.day).all()
+    if not snapshots and sprint.state != 'future' and rebuild_snapshots(sprint):
+        db.session.commit()
+        snapshots = sprint.snapshots.order_by(SprintSnapshot.day).all()
+    by_day = {s.day: s for s in snapshots}
+
+    # Commitment: open points on the first snapshot day
+    total_points = snapshots[0].remaining_points if snapshots else sprint.velocity_committed
+    today = datetime.utcnow().date()
+
+    data = {key: [] for key in empty}
+    remaining = None
+    for i in range(days):
+        current_date = sprint.start_date + timedelta(days=i)
+        data['labels'].append(current_date.strftime('%d.%m'))
+        data['ideal'].append(round(total_points - (total_points / (days - 1) * i) if days > 1 else 0, 1))
+        snapshot = by_day.get(current_date)
+        if snapshot is not None:
+            remaining = snapshot.remaining_points
+        future = current_date > today
+        data['actual'].append(None if future else remaining)
+        data['added'].append(snapshot.added_points if snapshot else (None if future else 0))
+        data['removed'].append(snapshot.removed_points if snapshot else (None if future else 0))
+        data['completed'].append(snapshot.completed_points if snapshot else (None if future else 0))
+    return data
+
+
+# =============================================================================
+# LISTENERS
+# =============================================================================
+
+def _history(state, field):
+    """(before, after) of an attribute within the current flush"""
+    history = state.attrs[field].history
+    after = getattr(state.obj(), field)
+    return (history.deleted[0] if history.deleted else after), after
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_burndown_changes(session, flush_context):
+    """Remember sprint, status and points changes of issues"""
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Issue) and obj.sprint_id is not None:
+            changes.append(IssueChange(None, obj.sprint_id, None, obj.status_id, 0, obj.story_points))
+    for obj in session.deleted:
+        if isinstance(obj, Issue) and obj.sprint_id is not None:
+            changes.append(IssueChange(obj.sprint_id, None, obj.status_id, None, obj.story_points, 0))
+    for obj in session.dirty:
+        if isinstance(obj, Issue):
+            state = db.inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in SPRINT_AGGREGATE_FIELDS):
+                (sprint_before, sprint_after), (status_before, status_after), (points_before, points_after) = (
+                    _history(state, field) for field in ('sprint_id', 'status_id', 'story_points')
+                )
+                changes.append(IssueChange(sprint_before, sprint_after, status_before, status_after,
+                                           points_before, points_after))
+    if changes:
+        session.info.setdefault(PENDING_BURNDOWN_CHANGES, []).extend(changes)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _record_burndown_changes(session, flush_context):
+    changes = session.info.pop(PENDING_BURNDOWN_CHANGES, None)
+    if changes:
+        record_issue_changes(changes, session=session)
@@ -0,0 +1,791 @@
+"""
+Project Management Module - Bulk issue import
+
+Moving a project from another tracker creates thousands of issues at once.
+Going through item_new would allocate a key, flush, log the activity and
+commit once per issue. The importer instead:
+
+- reads CSV, JSON (Lines) and Excel files row by row (read_rows)
+- maps types, statuses, priorities, users and sprints to IDs with lookup
+  dicts loaded once per import (ImportLookups)
+- validates every row before writing anything and reports errors per row;
+  a dry run stops after the validation
+- reserves keys in blocks and writes issues, comments, worklogs and one
+  summarized 'created' activity per issue with multi-row INSERTs per batch
+- sets parents and links (keys from the file or existing issues) once all
+  batches are written
+- runs imports outside the request: queue_import stores the upload and
+  queues a job that validates, writes and commits it
+
+The multi-row statements bypass the flush listeners, so ranks, the search
+index, typeahead keys, sprint aggregates and burndown snapshots are updated
+here as well. The caller commits.
+"""
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import uuid
+from collections import Counter, namedtuple
+from datetime import date, datetime
+from itertools import chain
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from extensions import db
+from models import TenantMembership, User
+from services import JobService
+from .models import (
+    Issue, IssueComment, IssueLink, IssueLinkType, IssueStatus, IssueType, Project, ProjectMember, Sprint, Worklog,
+    parse_time_input, refresh_sprint_aggregates
+)
+from .bulk import log_activities
+from .burndown import IssueChange, record_issue_changes
+from .key_index import queue_key_changes
+from .ranking import append_ranks, request_rebalance
+from .realtime import bump_board_version
+from .search import index_issues
+
+IMPORT_FORMATS = ('csv', 'tsv', 'txt', 'json', 'jsonl', 'ndjson', 'xlsx')
+
+# Column headers (lower case, '_' and '-' as spaces) of each field
+FIELD_ALIASES = {
+    'key': ('key', 'issue key', 'schlüssel', 'id'),
+    'summary': ('summary', 'title', 'zusammenfassung', 'titel'),
+    'description': ('description', 'beschreibung'),
+    'type': ('type', 'issue type', 'typ'),
+    'status': ('status',),
+    'priority': ('priority', 'priorität'),
+    'assignee': ('assignee', 'bearbeiter', 'zugewiesen an'),
+    'reporter': ('reporter', 'melder', 'ersteller'),
+    'sprint': ('sprint',),
+    'story_points': ('story points', 'points', 'punkte'),
+    'labels': ('labels', 'label'),
+    'due_date': ('due date', 'due', 'fällig', 'fälligkeitsdatum'),
+    'start_date': ('start date', 'start', 'startdatum'),
+    'original_estimate': ('original estimate', 'estimate', 'schätzung'),
+    'remaining_estimate': ('remaining estimate', 'restaufwand'),
+    'created_at': ('created', 'created at', 'erstellt'),
+    'parent': ('parent', 'parent key', 'übergeordnet'),
+    'links': ('link', 'links', 'verknüpfung', 'verknüpfungen'),
+    'comments': ('comment', 'comments', 'kommentar', 'kommentare'),
+    'worklogs': ('worklog', 'worklogs', 'zeitbuchung', 'zeitbuchungen'),
+}
+HEADER_FIELDS = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+# Fields that may occur in several columns (CSV/Excel) or as lists (JSON)
+REPEATED_FIELDS = ('links', 'comments', 'worklogs')
+
+PRIORITY_NAMES = {
+    'höchste': 1, 'highest': 1, 'hoch': 2, 'high': 2, 'mittel': 3, 'medium': 3,
+    'niedrig': 4, 'low': 4, 'niedrigste': 5, 'lowest': 5,
+}
+LINK_TYPES = {link_type.value for link_type in IssueLinkType}
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d.%m.%y')
+DATETIME_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%d.%m.%Y %H:%M')
+SUMMARY_LENGTH = 500
+ZERO_TIME_RE = re.compile(r'0+\s*[hm]?')
+
+# Chunk size of IN queries for keys referenced by the file
+REFERENCE_CHUNK = 500
+
+IMPORT_JOB = 'projects.import_issues'
+# Row errors kept in the result of an import job (the import page shows these)
+JOB_ERROR_LIMIT = 200
+
+ParsedIssue = namedtuple('ParsedIssue', 'row source_key values parent links comments worklogs')
+ImportResult = namedtuple('ImportResult', 'rows valid created errors')
+
+
+class IssueImportError(ValueError):
+    """The file cannot be read (unknown format, no header, broken JSON)"""
+    pass
+
+
+# =============================================================================
+# READING
+# =============================================================================
+
+def _field(header):
+    name = str(header or '').strip().lower().replace('_', ' ').replace('-', ' ')
+    return HEADER_FIELDS.get(' '.join(name.split()))
+
+
+def _record(pairs):
+    """Issue fields of one row from (field, value) pairs; unknown columns (None) are ignored"""
+    record = {}
+    for field, value in pairs:
+        if field is None or value is None or value == '':
+            continue
+        if field in REPEATED_FIELDS:
+            record.setdefault(field, []).extend(value if isinstance(value, list) else [value])
+        elif field not in record:
+            record[field] = value
+    return record
+
+
+def _object_record(item):
+    """Issue fields of a JSON object (None for anything else)"""
+    if not isinstance(item, dict):
+        return None
+    return _record((_field(key), value) for key, value in item.items())
+
+
+def _table_rows(rows):
+    """Records of a table whose first row holds the headers (row numbers as in a spreadsheet)"""
+    headers = next(rows, None)
+    if headers is None:
+        return
+    fields = [_field(header) for header in headers]
+    if 'summary' not in fields:
+        raise IssueImportError('No summary column (summary, title, Zusammenfassung, Titel)')
+    for number, values in enumerate(rows, start=2):
+        if any(value not in (None, '') for value in values):
+            yield number, _record(zip(fields, values))
+
+
+def _text_stream(file):
+    return io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+
+def _csv_rows(file):
+    text = _text_stream(file)
+    first = text.readline()
+    delimiter = max(',;\t', key=first.count)
+    return _table_rows(csv.reader(chain([first], text), delimiter=delimiter))
+
+
+def _xlsx_rows(file):
+    import openpyxl
+
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise IssueImportError(f'Cannot read Excel file: {e}')
+    try:
+        yield from _table_rows(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def _json_rows(file):
+    try:
+        data = json.load(_text_stream(file))
+    except ValueError as e:
+        raise IssueImportError(f'Invalid JSON: {e}')
+    if isinstance(data, dict):
+        data = data.get('issues')
+    if not isinstance(data, list):
+        raise IssueImportError('Expected a list of issues or {"issues": [...]}')
+    for number, item in enumerate(data, start=1):
+        yield number, _object_record(item)
+
+
+def _json_lines_rows(file):
+    for number, line in enumerate(_text_stream(file), start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise IssueImportError(f'Invalid JSON in line {number}: {e}')
+        yield number, _object_record(item)
+
+
+def _extension(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in IMPORT_FORMATS:
+        raise IssueImportError(f"Unsupported file type '{extension}' (CSV, JSON or Excel)")
+    return extension
+
+
+def read_rows(file, filename):
+    """
+    Read issue records from an uploaded file.
+
+    CSV (comma, semicolon or tab separated, UTF-8), JSON Lines and Excel
+    files are read row by row; JSON documents (a list of issues or
+    ``{"issues": [...]}``) are loaded at once. Columns are matched by
+    their German or English header (FIELD_ALIASES); links, comments and
+    worklogs may repeat.
+
+    Args:
+        file: Binary file object
+        filename: Original file name, its extension selects the format
+
+    Yields:
+        (row number, record dict); the record is None for rows that are no object
+
+    Raises:
+        IssueImportError: Unknown format or unreadable file
+    """
+    extension = _extension(filename)
+    if extension == 'xlsx':
+        return _xlsx_rows(file)
+    if extension == 'json':
+        return _json_rows(file)
+    if extension in ('jsonl', 'ndjson'):
+        return _json_lines_rows(file)
+    return _csv_rows(file)
+
+
+# =============================================================================
+# LOOKUPS
+# =============================================================================
+
+class ImportLookups:
+    """Names of a project's types, statuses, sprints and users mapped to IDs (loaded once per import)"""
+
+    def __init__(self, project, user_id):
+        types = db.session.query(IssueType.id, IssueType.name, IssueType.name_en, IssueType.is_default).filter(
+            IssueType.project_id == project.id
+        ).order_by(IssueType.sort_order, IssueType.id).all()
+        self.types = self._names(types)
+        self.default_type = next((t.id for t in types if t.is_default), types[0].id if types else None)
+
+        statuses = db.session.query(
+            IssueStatus.id, IssueStatus.name, IssueStatus.name_en, IssueStatus.is_initial, IssueStatus.is_final
+        ).filter(IssueStatus.project_id == project.id).order_by(IssueStatus.sort_order, IssueStatus.id).all()
+        self.statuses = self._names(statuses)
+        self.initial_status = next((s.id for s in statuses if s.is_initial), statuses[0].id if statuses else None)
+        self.final_statuses = {s.id for s in statuses if s.is_final}
+
+        self.sprints = {name.lower(): sprint_id for sprint_id, name in db.session.query(Sprint.id, Sprint.name).filter(
+            Sprint.project_id == project.id, Sprint.state != 'closed'
+        )}
+
+        # Tenant and project members; names that several users share only match by email
+        user_ids = {user_id}
+        user_ids.update(i for i, in db.session.query(TenantMembership.user_id).filter(
+            TenantMembership.tenant_id == project.tenant_id
+        ))
+        user_ids.update(i for i, in db.session.query(ProjectMember.user_id).filter(
+            ProjectMember.project_id == project.id
+        ))
+        users = db.session.query(User.id, User.email, User.name).filter(User.id.in_(user_ids)).all()
+        names = Counter(name.lower() for _, _, name in users)
+        self.users = {name.lower(): i for i, _, name in users if names[name.lower()] == 1}
+        self.users.update((email.lower(), i) for i, email, _ in users)
+
+    @staticmethod
+    def _names(rows):
+        names = {}
+        for row in reversed(rows):  # First by sort order wins
+            names.update((name.lower(), row.id) for name in (row.name, row.name_en) if name)
+        return names
+
+    @staticmethod
+    def _find(mapping, value, label):
+        found = mapping.get(value.lower())
+        if found is None:
+            raise ValueError(f"Unknown {label} '{value}'")
+        return found
+
+    def type_id(self, value):
+        return self._find(self.types, value, 'type') if value else self.default_type
+
+    def status_id(self, value):
+        return self._find(self.statuses, value, 'status') if value else self.initial_status
+
+    def sprint_id(self, value):
+        return self._find(self.sprints, value, 'sprint') if value else None
+
+    def user_id(self, value):
+        return self._find(self.users, value, 'user') if value else None
+
+
+# =============================================================================
+# VALUES
+# =============================================================================
+
+def _text(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+
+def _date(value):
+    if value is None or isinstance(value, date):
+        return value.date() if isinstance(value, datetime) else value
+    text = _text(value)
+    if text is None:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date '{text}'")
+
+
+def _datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = _text(value)
+    if text is None:
+        return None
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for fmt in DATETIME_FORMATS + DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date '{text}'")
+
+
+def _minutes(value):
+    """Minutes from a number or time input like '1h 30m'"""
+    if value is None or isinstance(value, (int, float)):
+        return int(value) if value is not None else None
+    text = _text(value)
+    if text is None:
+        return None
+    minutes = parse_time_input(text)
+    if not minutes and not ZERO_TIME_RE.fullmatch(text.lower()):
+        raise ValueError(f"Invalid time '{text}'")
+    return minutes
+
+
+def _priority(value):
+    text = _text(value)
+    if text is None:
+        return 3
+    priority = PRIORITY_NAMES.get(text.lower()) or (int(text) if text.isdigit() else None)
+    if priority not in (1, 2, 3, 4, 5):
+        raise ValueError(f"Invalid priority '{text}'")
+    return priority
+
+
+def _story_points(value):
+    text = _text(value)
+    if text is None:
+        return None
+    try:
+        points = float(text.replace(',', '.'))
+    except ValueError:
+        points = -1
+    if points < 0:
+        raise ValueError(f"Invalid story points '{text}'")
+    return points
+
+
+def _labels(value):
+    if isinstance(value, list):
+        return [label for label in (_text(v) for v in value) if label]
+    return [label.strip() for label in (_text(value) or '').split(',') if label.strip()]
+
+
+# =============================================================================
+# IMPORT
+# =============================================================================
+
+class IssueImport:
+    """
+    One import into a project: validate() all rows, then write() the valid ones.
+
+    Comments and worklogs without an author are attributed to the issue's
+    reporter, issues without a reporter to the importing user.
+    """
+
+    def __init__(self, project, user_id, batch_size=None):
+        self.project = project
+        self.user_id = user_id
+        self.batch_size = batch_size or current_app.config.get('ISSUE_IMPORT_BATCH_SIZE', 5000)
+        self.lookups = ImportLookups(project, user_id)
+        self.rows = 0
+        self.issues = []
+        self.errors = []
+
+    # -- validation -----------------------------------------------------------
+
+    def validate(self, records):
+        """Parse all (row, record) pairs; rows with errors are reported and dropped"""
+        rejected = {}  # source key -> row of dropped rows
+        by_key = {}
+        for row, record in records:
+            self.rows += 1
+            errors = []
+            if record is None:
+                self.errors.append((row, 'Not an object'))
+                continue
+            parsed = self._parse(row, record, errors)
+            if parsed.source_key in by_key:
+                errors.append(f"key: Duplicate of row {by_key[parsed.source_key].row}")
+            if errors:
+                self.errors.extend((row, message) for message in errors)
+                if parsed.source_key and parsed.source_key not in by_key:
+                    rejected[parsed.source_key] = row
+                continue
+            if parsed.source_key:
+                by_key[parsed.source_key] = parsed
+                rejected.pop(parsed.source_key, None)
+            self.issues.append(parsed)
+
+        self.existing = self._existing_issues(
+            {p.parent for p in self.issues} | {target for p in self.issues for _, target in p.links},
+            set(by_key) | set(rejected)
+        )
+        self._reject_unresolved(by_key, rejected)
+        self._reject_parent_cycles(by_key)
+        self.errors.sort(key=lambda error: error[0])
+
+    def _parse(self, row, record, errors):
+        def value(field, convert, *args):
+            try:
+                return convert(record.get(field), *args)
+            except (ValueError, TypeError) as e:
+                errors.append(f'{field}: {e}')
+
+        lookups = self.lookups
+        summary = _text(record.get('summary'))
+        if not summary:
+            errors.append('summary: Required')
+        elif len(summary) > SUMMARY_LENGTH:
+            errors.append(f'summary: Longer than {SUMMARY_LENGTH} characters')
+        reporter_id = value('reporter', lambda v: lookups.user_id(_text(v))) or self.user_id
+        values = {
+            'summary': summary,
+            'description': _text(record.get('description')),
+            'type_id': value('type', lambda v: lookups.type_id(_text(v))),
+            'status_id': value('status', lambda v: lookups.status_id(_text(v))),
+            'priority': value('priority', _priority),
+            'assignee_id': value('assignee', lambda v: lookups.user_id(_text(v))),
+            'reporter_id': reporter_id,
+            'sprint_id': value('sprint', lambda v: lookups.sprint_id(_text(v))),
+            'story_points': value('story_points', _story_points),
+            'labels': value('labels', _labels),
+            'due_date': value('due_date', _date),
+            'start_date': value('start_date', _date),
+            'original_estimate': value('original_estimate', _minutes),
+            'remaining_estimate': value('remaining_estimate', _minutes),
+            'created_at': value('created_at', _datetime),
+        }
+        if values['type_id'] is None and 'type' not in record:
+            errors.append('type: Project has no issue types')
+        if values['status_id'] is None and 'status' not in record:
+            errors.append('status: Project has no statuses')
+
+        source_key = _text(record.get('key'))
+        parent = _text(record.get('parent'))
+        if parent and parent == source_key:
+            errors.append('parent: Issue is its own parent')
+        links = [link for link in (self._link(v, source_key, errors) for v in record.get('links', ())) if link]
+        comments = [c for c in (self._comment(v, reporter_id, errors) for v in record.get('comments', ())) if c]
+        worklogs = [w for w in (self._worklog(v, reporter_id, errors) for v in record.get('worklogs', ())) if w]
+        return ParsedIssue(row, source_key, values, parent, links, comments, worklogs)
+
+    def _link(self, value, source_key, errors):
+        """'type:KEY', 'KEY' (relates_to) or {"type": ..., "key": ...}"""
+        if isinstance(value, dict):
+            link_type, target = _text(value.get('type')) or 'relates_to', _text(value.get('key') or value.get('target'))
+        else:
+            link_type, _, target = (_text(value) or '').rpartition(':')
+        link_type = '_'.join((link_type or 'relates_to').lower().split())
+        target = (target or '').strip()
+        if link_type not in LINK_TYPES:
+            errors.append(f"links: Unknown link type '{link_type}'")
+        elif not target:
+            errors.append('links: Target key missing')
+        elif target == source_key:
+            errors.append('links: Issue links to itself')
+        else:
+            return link_type, target
+
+    def _comment(self, value, reporter_id, errors):
+        """'Text', 'date;author;Text' or {"author": ..., "content": ..., "created": ...}"""
+        try:
+            if isinstance(value, dict):
+                content = _text(value.get('content') or value.get('body') or value.get('text'))
+                author, created = _text(value.get('author')), _datetime(value.get('created') or value.get('created_at'))
+            else:
+                content, author, created = _text(value), None, None
+                parts = (content or '').split(';', 2)
+                if len(parts) == 3:
+                    try:
+                        created = _datetime(parts[0])
+                        author, content = _text(parts[1]), _text(parts[2])
+                    except ValueError:
+                        pass
+            if not content:
+                raise ValueError('Empty comment')
+            return self.lookups.user_id(author) or reporter_id, content, created
+        except (ValueError, TypeError) as e:
+            errors.append(f'comments: {e}')
+
+    def _worklog(self, value, reporter_id, errors):
+        """'1h 30m[;date[;author[;description]]]' or {"time_spent": ..., "date": ..., "author": ..., ...}"""
+        try:
+            if isinstance(value, dict):
+                time_spent, work_date = value.get('time_spent') or value.get('time'), value.get('work_date') or value.get('date')
+                author, description = value.get('author'), value.get('description')
+            else:
+                time_spent, work_date, author, description = ((_text(value) or '').split(';', 3) + [None] * 3)[:4]
+            minutes = _minutes(time_spent)
+            if not minutes or minutes < 0:
+                raise ValueError(f"Invalid time '{time_spent}'")
+            return (self.lookups.user_id(_text(author)) or reporter_id, minutes, _date(work_date),
+                    _text(description))
+        except (ValueError, TypeError) as e:
+            errors.append(f'worklogs: {e}')
+
+    def _existing_issues(self, keys, file_keys):
+        """IDs of referenced issues that are not in the file: {key: (id, project_id)}"""
+        keys = sorted(key for key in keys if key and key not in file_keys)
+        existing = {}
+        for start in range(0, len(keys), REFERENCE_CHUNK):
+            existing.update((key, (issue_id, project_id)) for issue_id, key, project_id in db.session.query(
+                Issue.id, Issue.key, Issue.project_id
+            ).filter(Issue.tenant_id == self.project.tenant_id, Issue.key.in_(keys[start:start + REFERENCE_CHUNK])))
+        return existing
+
+    def _reject_unresolved(self, by_key, rejected):
+        """Drop rows whose parent or link targets are unknown or were dropped themselves (until nothing changes)"""
+        def problem(parsed):
+            for field, key in chain([('parent', parsed.parent)], (('links', target) for _, target in parsed.links)):
+                if not key or key in by_key:
+                    continue
+                if key in rejected:
+                    return f"{field}: Row {rejected[key]} with key '{key}' has errors"
+                existing = self.existing.get(key)
+                if existing is None or (field == 'parent' and existing[1] != self.project.id):
+                    return f"{field}: Unknown issue '{key}'"
+
+        changed = True
+        while changed:
+            changed, valid = False, []
+            for parsed in self.issues:
+                message = problem(parsed)
+                if message:
+                    self.errors.append((parsed.row, message))
+                    if parsed.source_key:
+                        rejected[parsed.source_key] = parsed.row
+                        by_key.pop(parsed.source_key, None)
+                        changed = True
+                else:
+                    valid.append(parsed)
+            self.issues = valid
+
+    def _reject_parent_cycles(self, by_key):
+        """Drop rows whose parents (within the file) lead back to themselves"""
+        state = {}  # key -> True (cycle) / False (reaches an issue outside the file or none)
+        for start in by_key:
+            path, key = [], start
+            while key in by_key and key not in state and key not in path:
+                path.append(key)
+                key = by_key[key].parent
+            cyclic = key in path or state.get(key, False)
+            state.update((k, cyclic) for k in path)
+        cyclic = {key for key, value in state.items() if value}
+        for parsed in self.issues:
+            if parsed.source_key in cyclic:
+                self.errors.append((parsed.row, 'parent: Circular parent chain'))
+        self.issues = [parsed for parsed in self.issues if parsed.source_key not in cyclic]
+
+    # -- writing --------------------------------------------------------------
+
+    def write(self):
+        """Insert the valid issues in batches; returns the number of created issues"""
+        if not self.issues:
+            return 0
+        board_ranks, backlog_ranks = self._ranks()
+        issue_ids = []
+        for start in range(0, len(self.issues), self.batch_size):
+            batch = self.issues[start:start + self.batch_size]
+            issue_ids.extend(self._write_batch(batch, board_ranks, backlog_ranks))
+
+        ids = {key: issue_id for key, (issue_id, _) in self.existing.items()}
+        ids.update((p.source_key, issue_id) for p, issue_id in zip(self.issues, issue_ids) if p.source_key)
+        parents = [
+            {'id': issue_id, 'parent_id': ids[p.parent]}
+            for p, issue_id in zip(self.issues, issue_ids) if p.parent
+        ]
+        if parents:
+            db.session.execute(db.update(Issue), parents)
+        links = [
+            {'source_issue_id': issue_id, 'target_issue_id': ids[target], 'link_type': link_type,
+             'created_by_id': self.user_id}
+            for p, issue_id in zip(self.issues, issue_ids) for link_type, target in p.links
+        ]
+        if links:
+            db.session.execute(db.insert(IssueLink), links)
+
+        sprints = [p.values for p in self.issues if p.values['sprint_id']]
+        if sprints:
+            refresh_sprint_aggregates(sprint_ids={v['sprint_id'] for v in sprints})
+            record_issue_changes([
+                IssueChange(None, v['sprint_id'], None, v['status_id'], 0, v['story_points']) for v in sprints
+            ])
+        bump_board_version(self.project)
+        return len(self.issues)
+
+    def _ranks(self):
+        """Board ranks per status and backlog ranks after the project's last ones, in file order"""
+        last = dict(db.session.query(Issue.status_id, db.func.max(Issue.board_rank)).filter(
+            Issue.project_id == self.project.id
+        ).group_by(Issue.status_id).all())
+        last_backlog = db.session.query(db.func.max(Issue.backlog_rank)).filter(
+            Issue.project_id == self.project.id
+        ).scalar()
+        counts = Counter(p.values['status_id'] for p in self.issues)
+        board = {status_id: append_ranks(last.get(status_id), count) for status_id, count in counts.items()}
+        backlog = append_ranks(last_backlog, len(self.issues))
+        limit = current_app.config.get('ISSUE_RANK_REBALANCE_LENGTH', 12)
+        if any(len(ranks[-1]) > limit for ranks in (backlog, *board.values())):
+            request_rebalance(self.project.id)
+        return {status_id: iter(ranks) for status_id, ranks in board.items()}, iter(backlog)
+
+    def _write_batch(self, batch, board_ranks, backlog_ranks):
+        """Issues of one batch with their comments, worklogs and activities; returns the new IDs"""
+        project, now = self.project, datetime.utcnow()
+        keys = project.reserve_issue_keys(len(batch))
+        rows = []
+        for parsed, key in zip(batch, keys):
+            values = parsed.values
+            created_at = values['created_at'] or now
+            rows.append({
+                **values,
+                'key': key,
+                'tenant_id': project.tenant_id,
+                'project_id': project.id,
+                'labels': values['labels'] or [],
+                'time_spent': sum(minutes for _, minutes, _, _ in parsed.worklogs),
+                'resolution_date': now if values['status_id'] in self.lookups.final_statuses else None,
+                'board_rank': next(board_ranks[values['status_id']]),
+                'backlog_rank': next(backlog_ranks),
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+        # Rows may come back in any order; keys are unique. NULLs are rendered so all rows share one statement.
+        ids = dict(db.session.execute(
+            db.insert(Issue).returning(Issue.key, Issue.id).execution_options(render_nulls=True), rows
+        ).all())
+        issue_ids = [ids[key] for key in keys]
+
+        comments, worklogs, activities = [], [], []
+        for parsed, issue_id in zip(batch, issue_ids):
+            created_at = parsed.values['created_at'] or now
+            comments.extend(
+                {'issue_id': issue_id, 'author_id': author_id, 'content': content,
+                 'created_at': created or created_at, 'updated_at': created or created_at}
+                for author_id, content, created in parsed.comments
+            )
+            worklogs.extend(
+                {'issue_id': issue_id, 'author_id': author_id, 'time_spent': minutes,
+                 'work_date': work_date or created_at.date(), 'description': description}
+                for author_id, minutes, work_date, description in parsed.worklogs
+            )
+            activities.append({'issue_id': issue_id, 'activity_type': 'created', 'details': self._summary(parsed)})
+        if comments:
+            db.session.execute(db.insert(IssueComment), comments)
+        if worklogs:
+            db.session.execute(db.insert(Worklog), worklogs)
+        log_activities(activities, self.user_id)
+
+        index_issues(issue_ids)
+        queue_key_changes(added=[(project.tenant_id, key, project.id) for key in keys])
+        return issue_ids
+
+    @staticmethod
+    def _summary(parsed):
+        """Activity details: source key and the number of imported comments, worklogs and links"""
+        counts = [f'{len(items)} {name}' for items, name in (
+            (parsed.comments, 'comments'), (parsed.worklogs, 'worklogs'), (parsed.links, 'links')
+        ) if items]
+        details = f'Import: {parsed.source_key}' if parsed.source_key else 'Import'
+        return f"{details} ({', '.join(counts)})" if counts else details
+
+
+def import_issues(project, file, filename, user_id, dry_run=False, batch_size=None):
+    """
+    Import issues from a CSV, JSON or Excel file into a project.
+
+    All rows are validated first; only valid rows are imported. The caller
+    commits (or rolls back to discard the import).
+
+    Args:
+        project: Target project
+        file: Binary file object
+        filename: Original file name (selects the format)
+        user_id: Importing user (default reporter, activity log)
+        dry_run: Only validate, write nothing
+        batch_size: Issues per INSERT batch (default: ISSUE_IMPORT_BATCH_SIZE)
+
+    Returns:
+        ImportResult with the number of read, valid and created rows and
+        the errors as (row number, message), sorted by row
+
+    Raises:
+        IssueImportError: Unknown format or unreadable file
+    """
+    issue_import = IssueImport(project, user_id, batch_size)
+    issue_import.validate(read_rows(file, filename))
+    created = 0 if dry_run else issue_import.write()
+    return ImportResult(issue_import.rows, len(issue_import.issues), created, issue_import.errors)
+
+
+# =============================================================================
+# BACKGROUND IMPORT
+# =============================================================================
+
+def queue_import(project, file, filename, user_id):
+    """
+    Store an uploaded file under UPLOAD_FOLDER and queue its import.
+
+    The job is not retried: a failed import is rolled back and reported,
+    the user uploads the file again. The caller commits.
+
+    Returns:
+        The queued Job
+
+    Raises:
+        IssueImportError: Unknown format
+    """
+    _extension(filename)
+    folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'imports')
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{uuid.uuid4().hex}_{secure_filename(filename)}")
+    with open(path, 'wb') as target:
+        shutil.copyfileobj(file, target)
+    return JobService.enqueue(IMPORT_JOB, {
+        'project_id': project.id, 'path': path, 'filename': filename, 'user_id': user_id
+    }, tenant_id=project.tenant_id, max_attempts=1, created_by_id=user_id, commit=False)
+
+
+@JobService.register(IMPORT_JOB)
+def _import_job(payload, progress):
+    """
+    Validate and write a queued import in one transaction.
+
+    Progress is reported once the rows are validated; the batches are
+    committed together, so a failed import writes nothing.
+    """
+    try:
+        project = db.session.get(Project, payload['project_id'])
+        if project is None:
+            raise IssueImportError(f"Project {payload['project_id']} no longer exists")
+        issue_import = IssueImport(project, payload['user_id'])
+        with open(payload['path'], 'rb') as file:
+            issue_import.validate(read_rows(file, payload['filename']))
+        progress(10, f"{len(issue_import.issues)} of {issue_import.rows} rows valid")
+        created = issue_import.write()
+        db.session.commit()
+    finally:
+        if os.path.exists(payload['path']):
+            os.remove(payload['path'])
+    return {
+        'rows': issue_import.rows,
+        'valid': len(issue_import.issues),
+        'created': created,
+        'errors': issue_import.errors[:JOB_ERROR_LIMIT],
+        'error_count': len(issue_import.errors),
+    }
@@ -0,0 +1,238 @@
+"""
+Project Management Module - In-memory issue key index for typeahead
+
+Per tenant, the index holds the sorted project keys and, per key prefix
+(``TAX`` of ``TAX-12``), the sorted issue numbers. Typing ``TAX-12`` in
+the global search or the link dialog is answered from memory with
+bisect instead of an ILIKE query.
+
+A tenant's index is loaded on first use (two column queries) and kept
+current by this process: keys of issues created, deleted or moved are
+applied after the commit (flush listeners below; bulk statements call
+queue_key_changes themselves). Project changes drop the tenant's index.
+Entries expire after ISSUE_KEY_INDEX_TTL seconds, which bounds
+staleness for changes made by other processes.
+"""
+import itertools
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from extensions import call_after_commit
+from .models import Issue, Project
+
+# Numbers queued change sets, so call_after_commit does not merge identical
+# sets of separate flushes (a key added, removed and added again)
+_change_sets = itertools.count()
+
+ProjectKey = namedtuple('ProjectKey', 'key id name is_archived')
+
+# One tenant: project keys (sorted, with a parallel list of ProjectKey),
+# issue numbers per key prefix, the project owning each prefix and the
+# IDs of archived projects
+TenantKeys = namedtuple('TenantKeys', 'expires keys projects numbers owners archived')
+
+
+def split_key(key):
+    """('TAX', 12) for 'TAX-12', None for keys without a number"""
+    prefix, _, number = (key or '').rpartition('-')
+    if not prefix or not number.isdigit():
+        return None
+    return prefix, int(number)
+
+
+def numbers_with_prefix(numbers, prefix, limit):
+    """
+    Numbers of a sorted list whose decimal form starts with prefix,
+    shortest first (12, 120-129, 1200-1299, ...). An empty prefix returns
+    the highest numbers, newest first.
+    """
+    if not numbers:
+        return []
+    if not prefix:
+        return numbers[:-limit - 1:-1]
+    if prefix.startswith('0'):
+        return []
+    result, start, scale = [], int(prefix), 1
+    while len(result) < limit and start * scale <= numbers[-1]:
+        low = bisect_left(numbers, start * scale)
+        high = bisect_left(numbers, (start + 1) * scale, low)
+        result.extend(numbers[low:min(high, low + limit - len(result))])
+        scale *= 10
+    return result
+
+
+class IssueKeyIndex:
+    """Per-process, per-tenant index of project and issue keys"""
+
+    def __init__(self):
+        self._tenants = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ttl():
+        return current_app.config.get('ISSUE_KEY_INDEX_TTL', 0)
+
+    def tenant(self, tenant_id):
+        """TenantKeys of a tenant, loaded if missing or expired"""
+        entry = self._tenants.get(tenant_id)
+        if entry is not None and entry.expires > time.monotonic():
+            return entry
+
+        from extensions import db
+
+        version = self._versions.get(tenant_id, 0)
+        projects = sorted(ProjectKey(*row) for row in db.session.query(
+            Project.key, Project.id, Project.name, Project.is_archived
+        ).filter(Project.tenant_id == tenant_id))
+        numbers, owners = {}, {}
+        for project_id, key in db.session.query(Issue.project_id, Issue.key).filter(Issue.tenant_id == tenant_id):
+            parts = split_key(key)
+            if parts:
+                numbers.setdefault(parts[0], []).append(parts[1])
+                owners[parts[0]] = project_id
+        for values in numbers.values():
+            values.sort()
+        entry = TenantKeys(time.monotonic() + self._ttl(), [p.key for p in projects], projects, numbers, owners,
+                           frozenset(p.id for p in projects if p.is_archived))
+
+        with self._lock:
+            # Keys applied while loading may be missing from the rows read
+            if self._ttl() > 0 and self._versions.get(tenant_id, 0) == version:
+                self._tenants[tenant_id] = entry
+        return entry
+
+    def lookup(self, tenant_id, query, project_ids=None, limit=10):
+        """
+        Typeahead for a project key prefix ('TA') or an issue key prefix
+        ('TAX-', 'TAX-12'). Archived projects are left out.
+
+        Args:
+            project_ids: Projects the user may see (None = all)
+
+        Returns:
+            (matching ProjectKeys, matching (issue key, project_id) pairs)
+        """
+        query = query.strip().upper()
+        if not query:
+            return [], []
+        entry = self.tenant(tenant_id)
+        visible = lambda project_id: project_id not in entry.archived and (
+            project_ids is None or project_id in project_ids
+        )
+
+        if '-' not in query:
+            projects = []
+            for project in entry.projects[bisect_left(entry.keys, query):]:
+                if not project.key.startswith(query) or len(projects) >= limit:
+                    break
+                if visible(project.id):
+                    projects.append(project)
+            return projects, []
+
+        prefix, _, number = query.rpartition('-')
+        project_id = entry.owners.get(prefix)
+        if project_id is None or (number and not number.isdigit()) or not visible(project_id):
+            return [], []
+        return [], [(f'{prefix}-{n}', project_id) for n in numbers_with_prefix(entry.numbers[prefix], number, limit)]
+
+    def apply(self, changes):
+        """Apply committed (tenant_id, added key, removed key, project_id) changes to loaded tenants"""
+        with self._lock:
+            for tenant_id, added, removed, project_id in changes:
+                self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+                entry = self._tenants.get(tenant_id)
+                if entry is None:
+                    continue
+                if removed and split_key(removed):
+                    prefix, number = split_key(removed)
+                    values = entry.numbers.get(prefix, [])
+                    position = bisect_left(values, number)
+                    if position < len(values) and values[position] == number:
+                        del values[position]
+                if added and split_key(added):
+                    prefix, number = split_key(added)
+                    values = entry.numbers.setdefault(prefix, [])
+                    position = bisect_left(values, number)
+                    if position == len(values) or values[position] != number:
+                        insort(values, number)
+                    entry.owners[prefix] = project_id
+
+    def invalidate(self, tenant_id=None):
+        """Drop one tenant's index, or all (tenant_id=None)"""
+        with self._lock:
+            tenant_ids = list(self._tenants) if tenant_id is None else [tenant_id]
+            for tenant_id in tenant_ids:
+                self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+                self._tenants.pop(tenant_id, None)
+
+    def clear(self):
+        self.invalidate()
+
+
+issue_keys = IssueKeyIndex()
+
+
+def queue_key_changes(added=(), removed=(), session=None):
+    """
+    Apply key changes of bulk statements after the commit.
+
+    Args:
+        added: (tenant_id, key, project_id) of inserted issues
+        removed: (tenant_id, key, project_id) of deleted issues
+        session: Session the statements ran in (default: db.session)
+    """
+    _queue_changes(session, [(tenant_id, key, None, project_id) for tenant_id, key, project_id in added] +
+                   [(tenant_id, None, key, project_id) for tenant_id, key, project_id in removed])
+
+
+def _queue_changes(session, changes):
+    if changes:
+        call_after_commit(_apply_key_changes, next(_change_sets), tuple(changes), session=session)
+
+
+# Project fields shown or used by the typeahead
+PROJECT_FIELDS = ('key', 'name', 'is_archived')
+
+
+def _dropped(change):
+    """Changes without keys drop the tenant's index (project changes)"""
+    return change[1] is None and change[2] is None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_key_changes(session, flush_context):
+    """Remember keys of created, deleted and moved issues and changed projects"""
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Issue):
+            changes.append((obj.tenant_id, obj.key, None, obj.project_id))
+        elif isinstance(obj, Project):
+            changes.append((obj.tenant_id, None, None, obj.id))
+    for obj in session.deleted:
+        if isinstance(obj, Issue):
+            changes.append((obj.tenant_id, None, obj.key, obj.project_id))
+        elif isinstance(obj, Project):
+            changes.append((obj.tenant_id, None, None, obj.id))
+    for obj in session.dirty:
+        if isinstance(obj, Issue):
+            history = inspect(obj).attrs.key.history
+            if history.has_changes():
+                changes.append((obj.tenant_id, obj.key, (history.deleted or [None])[0], obj.project_id))
+        elif isinstance(obj, Project):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in PROJECT_FIELDS):
+                changes.append((obj.tenant_id, None, None, obj.id))
+    _queue_changes(session, changes)
+
+
+def _apply_key_changes(change_set, changes):
+    for tenant_id in {change[0] for change in changes if _dropped(change)}:
+        issue_keys.invalidate(tenant_id)
+    issue_keys.apply([change for change in changes if not _dropped(change)])
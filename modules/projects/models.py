@@ -9,6 +9,10 @@ Flexible Architecture:
 from datetime import datetime
 from enum import Enum
 
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
 from extensions import db
 
 
@@ -340,6 +344,9 @@ class Project(db.Model):
     # Issue counter for auto-incrementing issue keys
     issue_counter = db.Column(db.Integer, default=0)
     
+    # Board version, bumped on every board/backlog change (real-time delta sync)
+    board_version = db.Column(db.Integer, default=0, nullable=False)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -353,6 +360,10 @@ class Project(db.Model):
     issue_statuses = db.relationship('IssueStatus', back_populates='project', cascade='all, delete-orphan')
     issues = db.relationship('Issue', back_populates='project', cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_project_tenant_archived', 'tenant_id', 'is_archived'),
+    )
+    
     def get_name(self, lang='de'):
         """Get localized name"""
         if lang == 'en' and self.name_en:
@@ -366,9 +377,12 @@ class Project(db.Model):
         return self.description or ''
     
     def get_next_issue_key(self):
-        """Generate next issue key (e.g., TAX-42)"""
-        self.issue_counter += 1
-        return f"{self.key}-{self.issue_counter}"
+        """Generate next issue key (e.g., TAX-42), see reserve_issue_numbers"""
+        return f"{self.key}-{reserve_issue_numbers(self)[0]}"
+    
+    def reserve_issue_keys(self, count):
+        """Keys for ``count`` new issues, reserved with a single counter update (bulk creates, imports)"""
+        return [f"{self.key}-{number}" for number in reserve_issue_numbers(self, count)]
     
     def get_methodology_config(self):
         """Get the methodology configuration for this project"""
@@ -431,16 +445,13 @@ class Project(db.Model):
         """Check if user is a member of this project"""
         if user.role == 'admin':
             return True
-        return any(m.user_id == user.id for m in self.members)
+        return self.get_member_role(user) is not None
     
     def get_member_role(self, user):
         """Get user's role in this project"""
         if user.role == 'admin':
             return 'admin'
-        for m in self.members:
-            if m.user_id == user.id:
-                return m.role
-        return None
+        return project_member_role(self, user.id)
     
     def can_user_edit(self, user):
         """Check if user can edit project settings"""
@@ -559,12 +570,120 @@ class Project(db.Model):
     @property
     def member_count(self):
         """Get number of members"""
-        return len(self.members)
+        if 'members' in self.__dict__:
+            return len(self.members)
+        return ProjectMember.query.filter_by(project_id=self.id).count()
     
     def __repr__(self):
         return f'<Project {self.key}: {self.name}>'
 
 
+def reserve_issue_numbers(project, count=1):
+    """
+    Reserve ``count`` consecutive issue numbers of a project.
+    
+    The counter is incremented by one ``UPDATE ... RETURNING`` statement,
+    so concurrent creates never get the same number. On server databases
+    the statement runs in its own transaction that is committed at once
+    (like a sequence): the project row is locked for one statement instead
+    of the whole request, and numbers of rolled back creates stay unused.
+    
+    The update joins the current transaction instead when that transaction
+    created or wrote the project row (a separate transaction would not see
+    the new row or wait for its lock forever), and always on SQLite, which
+    locks the whole database for writes. Where RETURNING is not supported
+    the counter is read back under the write lock the update took.
+    
+    Returns:
+        range of the reserved numbers
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    if project.id is None or project in db.session.new:
+        db.session.flush()
+    
+    statement = db.update(Project).where(Project.id == project.id).values(
+        issue_counter=db.func.coalesce(Project.issue_counter, 0) + count
+    )
+    bind = db.session.get_bind(mapper=Project)
+    if bind.dialect.name == 'sqlite' or project.id in db.session.info.get(WRITTEN_PROJECTS, ()):
+        last = _increment_counter(db.session.connection(bind_arguments={'mapper': Project}), statement, project.id)
+        mark_project_written(db.session, project.id)
+    else:
+        with bind.begin() as connection:
+            last = _increment_counter(connection, statement, project.id)
+    
+    # The stored value is current; a stale in-memory counter must not be flushed over it
+    set_committed_value(project, 'issue_counter', last)
+    return range(last - count + 1, last + 1)
+
+
+# Session.info key: ids of projects whose row the current transaction has written
+WRITTEN_PROJECTS = '_written_project_ids'
+
+
+def mark_project_written(session, project_id):
+    """Remember that the current transaction holds the lock on a project row"""
+    session.info.setdefault(WRITTEN_PROJECTS, set()).add(project_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_written_projects(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Project) and (obj not in session.dirty or session.is_modified(obj)):
+            mark_project_written(session, obj.id)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _forget_written_projects(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(WRITTEN_PROJECTS, None)
+
+
+def _increment_counter(connection, statement, project_id):
+    """Run the counter update and return the new counter value"""
+    if connection.dialect.update_returning:
+        return connection.execute(statement.returning(Project.issue_counter)).scalar_one()
+    connection.execute(statement)
+    return connection.execute(
+        db.select(Project.issue_counter).where(Project.id == project_id)
+    ).scalar_one()
+
+
+# Per-request memo of (project_id, user_id) -> role (None = not a member)
+MEMBER_ROLE_MEMO = '_project_member_roles'
+
+
+def project_member_role(project, user_id):
+    """
+    Role of a user in a project, or None if the user is not a member.
+    
+    Looks up the single membership row via the unique (project_id, user_id)
+    index instead of loading ``project.members``; an already loaded member
+    list is used as is. Results are memoized on ``g`` for the current request.
+    """
+    from flask import g, has_app_context
+    
+    key = (project.id, user_id)
+    memo = g.setdefault(MEMBER_ROLE_MEMO, {}) if has_app_context() else {}
+    if key not in memo:
+        if 'members' in project.__dict__:
+            memo[key] = next((m.role for m in project.members if m.user_id == user_id), None)
+        else:
+            memo[key] = db.session.query(ProjectMember.role).filter_by(
+                project_id=project.id, user_id=user_id
+            ).scalar()
+    return memo[key]
+
+
+def reset_member_role_memo():
+    """Forget memoized membership roles (new request or changed memberships)"""
+    from flask import g, has_app_context
+    
+    if has_app_context():
+        g.pop(MEMBER_ROLE_MEMO, None)
+
+
 class ProjectMember(db.Model):
     """Project membership with role"""
     __tablename__ = 'project_member'
@@ -737,8 +856,11 @@ class Issue(db.Model):
     # Issue type (Epic, Story, Task, etc.)
     type_id = db.Column(db.Integer, db.ForeignKey('issue_type.id'), nullable=False)
     
-    # Workflow status
-    status_id = db.Column(db.Integer, db.ForeignKey('issue_status.id'), nullable=False)
+    # Workflow status (active_history: the previous value is loaded for the
+    # sprint aggregate refresh even if it was not loaded before the change)
+    status_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('issue_status.id'), nullable=False), active_history=True
+    )
     
     # Content
     summary = db.Column(db.String(500), nullable=False)  # Title/summary
@@ -764,11 +886,11 @@ class Issue(db.Model):
     start_date = db.Column(db.Date)
     resolution_date = db.Column(db.DateTime)  # When moved to final status
     
-    # Sprint/Iteration (optional, for Scrum)
-    sprint_id = db.Column(db.Integer, db.ForeignKey('sprint.id'), index=True)
+    # Sprint/Iteration (optional, for Scrum; active_history like status_id)
+    sprint_id = db.column_property(db.Column(db.Integer, db.ForeignKey('sprint.id'), index=True), active_history=True)
     
-    # Story points (for Scrum estimation)
-    story_points = db.Column(db.Float)
+    # Story points (for Scrum estimation; active_history like status_id)
+    story_points = db.column_property(db.Column(db.Float), active_history=True)
     
     # Labels (JSON array of strings)
     labels = db.Column(db.JSON, default=list)
@@ -776,15 +898,21 @@ class Issue(db.Model):
     # Custom fields (JSON object for flexible data)
     custom_fields = db.Column(db.JSON, default=dict)
     
-    # Board position (for Kanban ordering within a column)
+    # Legacy board position, no longer maintained or sent to clients (board order is board_rank)
     board_position = db.Column(db.Integer, default=0)
     
     # Backlog position (for prioritization)
     backlog_position = db.Column(db.Integer, default=0)
     
+    # Fractional ranks that define board and backlog order (see ranking.py);
+    # backlog_position above is kept for API compatibility
+    board_rank = db.Column(db.String(64))
+    backlog_rank = db.Column(db.String(64))
+    
     # Archival
     is_archived = db.Column(db.Boolean, default=False)
     archived_at = db.Column(db.DateTime)
+    archived_by_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -800,6 +928,11 @@ class Issue(db.Model):
     reviewers = db.relationship('IssueReviewer', back_populates='issue', lazy='dynamic', cascade='all, delete-orphan')
     # sprint relationship will be added when Sprint model is created
     
+    __table_args__ = (
+        db.Index('ix_issue_project_archived_status_rank', 'project_id', 'is_archived', 'status_id', 'board_rank'),
+        db.Index('ix_issue_project_backlog_rank', 'project_id', 'backlog_rank'),
+    )
+    
     def get_approval_count(self):
         """Get approval count tuple (approved, total)"""
         total = self.reviewers.count()
@@ -1195,6 +1328,20 @@ class IssueLinkType(Enum):
         return inverses.get(link_type, link_type)
 
 
+@event.listens_for(Session, 'after_flush')
+def _forget_member_roles(session, flush_context):
+    """Memoized roles are stale once memberships change"""
+    if any(isinstance(obj, ProjectMember)
+           for obj in (*session.new, *session.dirty, *session.deleted)):
+        reset_member_role_memo()
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_member_roles_after_commit(session):
+    """Bulk statements bypass the flush, so roles are only trusted within a transaction"""
+    reset_member_role_memo()
+
+
 class IssueLink(db.Model):
     """Links between issues"""
     __tablename__ = 'issue_link'
@@ -1286,6 +1433,35 @@ class Worklog(db.Model):
         return f'<Worklog {self.time_spent}m on Issue {self.issue_id} by User {self.author_id}>'
 
 
+def parse_time_input(time_str):
+    """Parse time input like '2h', '30m', '1h 30m', '90' (minutes)"""
+    import re
+    
+    time_str = time_str.strip().lower()
+    
+    # Try hours and minutes pattern (1h 30m, 1h30m)
+    match = re.match(r'(\d+)\s*h\s*(\d+)\s*m?', time_str)
+    if match:
+        return int(match.group(1)) * 60 + int(match.group(2))
+    
+    # Try hours only (2h)
+    match = re.match(r'(\d+)\s*h', time_str)
+    if match:
+        return int(match.group(1)) * 60
+    
+    # Try minutes only (30m)
+    match = re.match(r'(\d+)\s*m', time_str)
+    if match:
+        return int(match.group(1))
+    
+    # Try plain number (minutes)
+    match = re.match(r'^(\d+)$', time_str)
+    if match:
+        return int(match.group(1))
+    
+    return 0
+
+
 # =============================================================================
 # SPRINT MODEL (for Scrum projects)
 # =============================================================================
@@ -1314,6 +1490,16 @@ class Sprint(db.Model):
     started_at = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
     
+    # Stored aggregates, kept current by refresh_sprint_aggregates() while the
+    # sprint is open and frozen once it is closed
+    committed_points = db.Column(db.Float)  # Story points when the sprint was started
+    points_total = db.Column(db.Float, default=0)
+    points_completed = db.Column(db.Float, default=0)  # Issues in a final status
+    issue_count = db.Column(db.Integer, default=0)
+    issues_todo = db.Column(db.Integer, default=0)
+    issues_in_progress = db.Column(db.Integer, default=0)
+    issues_done = db.Column(db.Integer, default=0)  # Issues in a final status
+    
     # Relationships
     project = db.relationship('Project', backref='sprints')
     issues = db.relationship('Issue', backref='sprint', foreign_keys=[Issue.sprint_id])
@@ -1325,25 +1511,178 @@ class Sprint(db.Model):
     @property
     def total_points(self):
         """Sum of story points in sprint"""
-        return sum(i.story_points or 0 for i in self.issues)
+        return self.points_total or 0
     
     @property
     def completed_points(self):
         """Sum of story points for done issues"""
-        return sum(
-            i.story_points or 0 
-            for i in self.issues 
-            if i.status and i.status.is_final
-        )
+        return self.points_completed or 0
+    
+    @property
+    def velocity_committed(self):
+        """Points committed at the start (current total for sprints started before tracking)"""
+        return self.committed_points if self.committed_points is not None else self.total_points
     
     def __repr__(self):
         return f'<Sprint {self.name} ({self.state})>'
 
 
+# Attributes whose change moves issues between sprint aggregates
+SPRINT_AGGREGATE_FIELDS = ('sprint_id', 'story_points', 'status_id')
+SPRINT_AGGREGATE_COLUMNS = (
+    'points_total', 'points_completed', 'issue_count', 'issues_todo', 'issues_in_progress', 'issues_done'
+)
+PENDING_SPRINT_AGGREGATES = 'pending_sprint_aggregates'
+
+
+def sprint_aggregate_values():
+    """Correlated subqueries computing each stored aggregate for ``sprint.id``"""
+    def total(expression):
+        return db.select(db.func.coalesce(db.func.sum(expression), 0)).select_from(Issue).join(
+            IssueStatus, Issue.status_id == IssueStatus.id
+        ).where(Issue.sprint_id == Sprint.id).scalar_subquery()
+    
+    points = db.func.coalesce(Issue.story_points, 0)
+    final = IssueStatus.is_final == True
+    category = lambda name: db.case((IssueStatus.category == name, 1), else_=0)
+    return {
+        'points_total': total(points),
+        'points_completed': total(db.case((final, points), else_=0)),
+        'issue_count': total(1),
+        'issues_todo': total(category('todo')),
+        'issues_in_progress': total(category('in_progress')),
+        'issues_done': total(db.case((final, 1), else_=0)),
+    }
+
+
+def refresh_sprint_aggregates(sprint_ids=None, project_ids=None, session=None):
+    """
+    Recompute the stored aggregates of open sprints with one UPDATE.
+    
+    Closed sprints are never touched. Bulk statements that bypass the ORM
+    (see bulk.py) call this for the sprints they change; ORM changes are
+    picked up by the flush listeners below.
+    
+    Args:
+        sprint_ids: Sprints to refresh
+        project_ids: Refresh all open sprints of these projects instead
+        session: Session to use (default: db.session)
+    """
+    session = session or db.session
+    sprint_ids = {i for i in (sprint_ids or ()) if i is not None}
+    if not sprint_ids and not project_ids:
+        return
+    scope = Sprint.project_id.in_(project_ids) if project_ids else Sprint.id.in_(sprint_ids)
+    session.execute(
+        db.update(Sprint).where(scope, Sprint.state != 'closed').values(**sprint_aggregate_values())
+        .execution_options(synchronize_session=False)
+    )
+    # Loaded sprints reload the new values on next access
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Sprint) and (obj.id in sprint_ids or obj.project_id in (project_ids or ())):
+            session.expire(obj, SPRINT_AGGREGATE_COLUMNS)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_sprint_aggregate_changes(session, flush_context):
+    """Remember sprints whose issues were added, removed, re-estimated or moved"""
+    sprints, projects = set(), set()
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, Issue):
+            sprints.add(obj.sprint_id)
+    for obj in session.dirty:
+        if isinstance(obj, Issue):
+            state = db.inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in SPRINT_AGGREGATE_FIELDS):
+                sprints.add(obj.sprint_id)
+                # Only the sprint_id history holds sprint ids; the others hold points and status ids
+                sprints.update(state.attrs.sprint_id.history.deleted)
+        elif isinstance(obj, IssueStatus):
+            state = db.inspect(obj)
+            if state.attrs.is_final.history.has_changes() or state.attrs.category.history.has_changes():
+                projects.add(obj.project_id)
+    sprints.discard(None)
+    if sprints or projects:
+        pending = session.info.setdefault(PENDING_SPRINT_AGGREGATES, (set(), set()))
+        pending[0].update(sprints)
+        pending[1].update(projects)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _refresh_sprint_aggregates(session, flush_context):
+    pending = session.info.pop(PENDING_SPRINT_AGGREGATES, None)
+    if pending:
+        sprints, projects = pending
+        if projects:
+            refresh_sprint_aggregates(project_ids=projects, session=session)
+        refresh_sprint_aggregates(sprints, session=session)
+
+
+class SprintSnapshot(db.Model):
+    """Burndown state of a sprint at the end of one day (see burndown.py)"""
+    __tablename__ = 'sprint_snapshot'
+    __table_args__ = (
+        db.UniqueConstraint('sprint_id', 'day', name='uq_sprint_snapshot_day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sprint_id = db.Column(db.Integer, db.ForeignKey('sprint.id'), nullable=False, index=True)
+    day = db.Column(db.Date, nullable=False)
+    
+    # Open story points at the end of the day
+    remaining_points = db.Column(db.Float, default=0)
+    
+    # Changes during the day
+    added_points = db.Column(db.Float, default=0)  # Scope added (new issues, re-estimates)
+    removed_points = db.Column(db.Float, default=0)  # Scope removed
+    completed_points = db.Column(db.Float, default=0)  # Moved to a final status (net of reopened)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    sprint = db.relationship('Sprint', backref=db.backref('snapshots', lazy='dynamic', cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<SprintSnapshot sprint={self.sprint_id} {self.day}: {self.remaining_points}>'
+
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
+def load_board(project_id, statuses, sprint_id=None):
+    """
+    Active issues of a project (or one sprint) grouped into board columns.
+    
+    Fetches all cards in one ordered query and loads the relationships the
+    cards render (type, status, assignee) with one SELECT ... IN each, so
+    the number of queries does not grow with the number of cards or columns.
+    
+    Args:
+        project_id: Project ID
+        statuses: Board columns (IssueStatus objects)
+        sprint_id: Only issues of this sprint
+    
+    Returns:
+        Dict mapping every status ID to its list of issues in board order
+    """
+    query = Issue.query.options(
+        selectinload(Issue.issue_type),
+        selectinload(Issue.status),
+        selectinload(Issue.assignee),
+    ).filter(
+        Issue.project_id == project_id,
+        Issue.is_archived == False
+    )
+    if sprint_id is not None:
+        query = query.filter(Issue.sprint_id == sprint_id)
+    
+    columns = {status.id: [] for status in statuses}
+    for issue in query.order_by(Issue.board_rank, Issue.id):
+        if issue.status_id in columns:
+            columns[issue.status_id].append(issue)
+    return columns
+
+
 def create_default_issue_types(project):
     """Create default issue types for a new project based on methodology"""
     
@@ -0,0 +1,355 @@
+"""
+Project Management Module - Fractional board and backlog ranks
+
+Every issue carries two sortable string keys: ``board_rank`` (order within
+a Kanban column) and ``backlog_rank`` (backlog priority). Keys are base-36
+numbers (digits 0-9a-z) with a fixed-width integer part and an optional
+fraction, stored without trailing zeros, so plain string comparison gives
+the numeric order and a key between any two neighbours always exists.
+Moving a card therefore writes only the moved issue.
+
+Appends step the integer part by RANK_STEP; inserts between neighbours take
+the midpoint and may add fraction digits. Once a key grows longer than
+ISSUE_RANK_REBALANCE_LENGTH, a background job spreads the project's keys
+evenly again.
+"""
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from services import JobService
+from .models import Issue, Project
+from .realtime import bump_board_version
+
+RANK_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+RANK_WIDTH = 6  # Integer part: 36^6 ~ 2.2 billion slots
+RANK_LIMIT = 36 ** RANK_WIDTH
+RANK_STEP = 36 ** 3  # Gap between appended and rebalanced keys
+RANK_MAX_LENGTH = 64  # Column size; longer keys are respread immediately
+
+REBALANCE_JOB = 'projects.rebalance_ranks'
+
+# Issue attribute holding each kind of rank
+RANK_COLUMNS = {'board': 'board_rank', 'backlog': 'backlog_rank'}
+
+
+class RankError(ValueError):
+    """No key fits between the given neighbours (equal or unordered keys)"""
+    pass
+
+
+# =============================================================================
+# KEY ARITHMETIC
+# =============================================================================
+
+def _encode(value):
+    digits = []
+    for _ in range(RANK_WIDTH):
+        value, digit = divmod(value, 36)
+        digits.append(RANK_DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def _integer_part(key):
+    return int(key[:RANK_WIDTH].ljust(RANK_WIDTH, '0'), 36)
+
+
+def _midpoint(low, high):
+    """Shortest key between ``low`` ('' = start) and ``high`` (None = end)"""
+    if high is not None:
+        # Keep the common prefix (a missing digit of low counts as '0')
+        n = 0
+        while n < len(high) and (low[n] if n < len(low) else '0') == high[n]:
+            n += 1
+        if n:
+            return high[:n] + _midpoint(low[n:], high[n:])
+
+    digit_low = RANK_DIGITS.index(low[0]) if low else 0
+    digit_high = RANK_DIGITS.index(high[0]) if high is not None else len(RANK_DIGITS)
+    if digit_high - digit_low > 1:
+        return RANK_DIGITS[(digit_low + digit_high) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+    return RANK_DIGITS[digit_low] + _midpoint(low[1:], None)
+
+
+def rank_between(before=None, after=None):
+    """
+    Key that sorts strictly between two neighbours.
+
+    Args:
+        before: Key of the previous item (None = insert at the start)
+        after: Key of the next item (None = insert at the end)
+
+    Raises:
+        RankError: The neighbours are equal or in the wrong order
+    """
+    if before is not None and after is not None:
+        if before >= after:
+            raise RankError(f"No rank between '{before}' and '{after}'")
+        return _midpoint(before, after)
+    if before is not None:
+        value = _integer_part(before) + RANK_STEP
+        return _encode(value) if value < RANK_LIMIT else _midpoint(before, None)
+    if after is not None:
+        value = _integer_part(after) - RANK_STEP
+        return _encode(value) if value > 0 else _midpoint('', after)
+    return _encode(RANK_LIMIT // 2)
+
+
+def spread_ranks(count):
+    """``count`` evenly spaced keys in ascending order"""
+    step = max(min(RANK_STEP, (RANK_LIMIT - 1) // (count + 1)), 1)
+    return [_encode((i + 1) * step) for i in range(count)]
+
+
+def append_ranks(last, count):
+    """
+    ``count`` ascending keys after ``last`` (None = empty list), spaced
+    like single appends while there is room and evenly in the remaining
+    space otherwise (bulk inserts at the end)
+    """
+    start = _integer_part(last) if last else 0
+    step = min(RANK_STEP, (RANK_LIMIT - 1 - start) // (count + 1))
+    if step < 1:
+        keys = []
+        for _ in range(count):
+            last = rank_between(last, None)
+            keys.append(last)
+        return keys
+    return [_encode(start + (i + 1) * step) for i in range(count)]
+
+
+# =============================================================================
+# ISSUE RANKS
+# =============================================================================
+
+def _scope(project_id, kind, status_id=None):
+    """Filter for the active issues ranked together with ``kind`` keys"""
+    criteria = [Issue.project_id == project_id, Issue.is_archived == False]
+    if kind == 'board':
+        criteria.append(Issue.status_id == status_id)
+    return criteria
+
+
+def _neighbour_ranks(issue, kind, status_id, position, before_id, after_id):
+    column = getattr(Issue, RANK_COLUMNS[kind])
+    scope = _scope(issue.project_id, kind, status_id) + [Issue.id != issue.id]
+
+    if before_id or after_id:
+        # Explicit neighbours from the client; missing ones are looked up next to the given one
+        ranks = dict(db.session.query(Issue.id, column).filter(
+            Issue.id.in_([i for i in (before_id, after_id) if i]), *scope
+        ).all())
+        before, after = ranks.get(before_id), ranks.get(after_id)
+        if before is not None and not after_id:
+            after = db.session.query(db.func.min(column)).filter(*scope, column > before).scalar()
+        elif after is not None and not before_id:
+            before = db.session.query(db.func.max(column)).filter(*scope, column < after).scalar()
+        if (before_id is None or before is not None) and (after_id is None or after is not None):
+            return before, after
+
+    # Index in the target list; reads the two neighbours only
+    position = max(int(position or 0), 0)
+    neighbours = db.session.query(column).filter(*scope).order_by(column, Issue.id)\
+        .offset(max(position - 1, 0)).limit(2 if position else 1).all()
+    ranks = [row[0] for row in neighbours]
+    if not position:
+        return None, (ranks[0] if ranks else None)
+    return (ranks[0] if ranks else None), (ranks[1] if len(ranks) > 1 else None)
+
+
+def move_rank(issue, kind, status_id=None, position=None, before_id=None, after_id=None):
+    """
+    Set the issue's rank so it sorts between its new neighbours.
+
+    Only the moved issue is written. Neighbours are given as issue IDs
+    (``before_id``/``after_id``) or, as sent by older clients, as the
+    index in the target list. The caller commits.
+
+    Args:
+        issue: Issue being moved
+        kind: 'board' (within the column of ``status_id``) or 'backlog'
+        status_id: Target column for board moves (default: current status)
+        position: Index in the target list (without the moved issue)
+        before_id: Issue directly above the new place
+        after_id: Issue directly below the new place
+
+    Returns:
+        The new rank
+    """
+    if kind == 'board' and status_id is None:
+        status_id = issue.status_id
+
+    for attempt in range(2):
+        # No autoflush: pending changes of the moved issue go out in one UPDATE
+        with db.session.no_autoflush:
+            before, after = _neighbour_ranks(issue, kind, status_id, position, before_id, after_id)
+        try:
+            rank = rank_between(before, after)
+        except RankError:
+            rank = None
+        if rank is not None and len(rank) <= RANK_MAX_LENGTH:
+            break
+        # Duplicate or exhausted keys: respread the project and retry once
+        rebalance_ranks(issue.project_id)
+    else:
+        raise RankError(f'No rank for issue {issue.id} after rebalancing')
+
+    setattr(issue, RANK_COLUMNS[kind], rank)
+    if len(rank) > current_app.config.get('ISSUE_RANK_REBALANCE_LENGTH', 12):
+        request_rebalance(issue.project_id)
+    return rank
+
+
+def _longest_ordered_run(keys):
+    """Indices of a longest strictly increasing subsequence of ``keys`` (None never fits)"""
+    tails, tail_index, previous = [], [], [None] * len(keys)
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        low, high = 0, len(tails)
+        while low < high:
+            mid = (low + high) // 2
+            if tails[mid] < key:
+                low = mid + 1
+            else:
+                high = mid
+        previous[i] = tail_index[low - 1] if low else None
+        if low == len(tails):
+            tails.append(key)
+            tail_index.append(i)
+        else:
+            tails[low] = key
+            tail_index[low] = i
+
+    keep, i = set(), (tail_index[-1] if tail_index else None)
+    while i is not None:
+        keep.add(i)
+        i = previous[i]
+    return keep
+
+
+def reorder_ranks(issues, kind):
+    """
+    Give ``issues`` ranks in list order, rewriting as few issues as possible.
+
+    The longest run of issues that already sorts correctly keeps its keys;
+    only the others get new keys between their neighbours, so dragging one
+    row of a full list writes one issue. The caller commits.
+
+    Returns:
+        The issues whose rank changed
+    """
+    attribute = RANK_COLUMNS[kind]
+    keep = _longest_ordered_run([getattr(issue, attribute) for issue in issues])
+
+    changed = []
+    for i, issue in enumerate(issues):
+        if i in keep:
+            continue
+        before = getattr(issues[i - 1], attribute) if i else None
+        after = next((getattr(issues[j], attribute) for j in range(i + 1, len(issues)) if j in keep), None)
+        rank = rank_between(before, after)
+        if len(rank) > RANK_MAX_LENGTH:
+            raise RankError(f'Rank for issue {issue.id} too long')
+        setattr(issue, attribute, rank)
+        changed.append(issue)
+
+    if any(len(getattr(issue, attribute)) > current_app.config.get('ISSUE_RANK_REBALANCE_LENGTH', 12)
+           for issue in changed):
+        request_rebalance(issues[0].project_id)
+    return changed
+
+
+def request_rebalance(project_id):
+    """Queue a background respread of the project's ranks (once)"""
+    from models import Job, JobStatus
+
+    pending = db.session.query(Job.payload).filter(
+        Job.type == REBALANCE_JOB, Job.status == JobStatus.PENDING.value
+    ).all()
+    if any((payload or {}).get('project_id') == project_id for payload, in pending):
+        return
+    tenant_id = db.session.query(Project.tenant_id).filter_by(id=project_id).scalar()
+    JobService.enqueue(REBALANCE_JOB, {'project_id': project_id}, tenant_id=tenant_id, commit=False)
+
+
+def rebalance_ranks(project_id):
+    """
+    Respread board ranks per column and backlog ranks of a project.
+
+    Keeps the current order and writes only issues whose key changes;
+    bumps the board version so open boards resync. The caller commits.
+
+    Returns:
+        Number of issues updated
+    """
+    rows = db.session.query(
+        Issue.id, Issue.status_id, Issue.board_rank, Issue.backlog_rank
+    ).filter(Issue.project_id == project_id).order_by(Issue.id).all()  # Ties sort by id, as on the board
+
+    updates = {}
+    columns = {}
+    for row in rows:
+        columns.setdefault(row.status_id, []).append(row)
+    for column in columns.values():
+        ordered = sorted(column, key=lambda r: (r.board_rank is None, r.board_rank or ''))
+        for row, rank in zip(ordered, spread_ranks(len(ordered))):
+            if row.board_rank != rank:
+                updates.setdefault(row.id, {'id': row.id})['board_rank'] = rank
+
+    ordered = sorted(rows, key=lambda r: (r.backlog_rank is None, r.backlog_rank or ''))
+    for row, rank in zip(ordered, spread_ranks(len(ordered))):
+        if row.backlog_rank != rank:
+            updates.setdefault(row.id, {'id': row.id})['backlog_rank'] = rank
+
+    if updates:
+        db.session.execute(db.update(Issue), list(updates.values()))
+        project = db.session.get(Project, project_id)
+        if project is not None:
+            bump_board_version(project)
+    return len(updates)
+
+
+@JobService.register(REBALANCE_JOB)
+def _rebalance_job(payload, progress):
+    updated = rebalance_ranks(payload['project_id'])
+    db.session.commit()
+    return {'updated': updated}
+
+
+# =============================================================================
+# NEW ISSUES
+# =============================================================================
+
+@event.listens_for(Session, 'before_flush')
+def _rank_new_issues(session, flush_context, instances):
+    """
+    New issues without ranks go to the end of their column and the backlog.
+    
+    Archived issues count as well, so restoring one never duplicates a key.
+    """
+    new_issues = [obj for obj in session.new if isinstance(obj, Issue)
+                  and (obj.board_rank is None or obj.backlog_rank is None)]
+    if not new_issues:
+        return
+
+    last = {}
+    with session.no_autoflush:
+        for issue in new_issues:
+            if issue.board_rank is None:
+                key = ('board', issue.project_id, issue.status_id)
+                if key not in last:
+                    last[key] = session.query(db.func.max(Issue.board_rank)).filter(
+                        Issue.project_id == issue.project_id, Issue.status_id == issue.status_id
+                    ).scalar()
+                issue.board_rank = last[key] = rank_between(last[key], None)
+            if issue.backlog_rank is None:
+                key = ('backlog', issue.project_id)
+                if key not in last:
+                    last[key] = session.query(db.func.max(Issue.backlog_rank)).filter(
+                        Issue.project_id == issue.project_id
+                    ).scalar()
+                issue.backlog_rank = last[key] = rank_between(last[key], None)
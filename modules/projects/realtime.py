@@ -0,0 +1,151 @@
+"""
+Project Management Module - Real-time board sync
+
+Open Kanban boards and backlogs join a project-scoped SocketIO room and
+receive compact deltas whenever issues are moved, created or bulk-edited.
+Every change bumps ``Project.board_version``; clients compare the version of
+each delta with the last one they applied and fetch a fresh board state when
+they detect a gap (missed event, reconnect).
+"""
+from flask_login import current_user
+from flask_socketio import join_room, leave_room
+from sqlalchemy.orm.attributes import set_committed_value
+
+from extensions import db, socketio
+from .models import Project, Issue, mark_project_written
+
+
+def project_room(project_id):
+    """Name of the SocketIO room for a project"""
+    return f'project_{project_id}'
+
+
+def bump_board_version(project):
+    """Increment the board version inside the current transaction.
+
+    Runs as UPDATE ... RETURNING (UPDATE plus SELECT where RETURNING is not
+    supported) on the transaction's connection, so concurrent writers each
+    get their own version and the row stays locked until the commit.
+
+    Returns:
+        The new version, to be passed to ``broadcast_board_delta`` after
+        the commit (``project.board_version`` may by then show a later bump)
+    """
+    statement = db.update(Project).where(Project.id == project.id).values(
+        board_version=Project.board_version + 1
+    )
+    connection = db.session.connection(bind_arguments={'mapper': Project})
+    if connection.dialect.update_returning:
+        version = connection.execute(statement.returning(Project.board_version)).scalar_one()
+    else:
+        connection.execute(statement)
+        version = connection.execute(
+            db.select(Project.board_version).where(Project.id == project.id)
+        ).scalar_one()
+    set_committed_value(project, 'board_version', version)
+    mark_project_written(db.session, project.id)
+    return version
+
+
+def issue_delta(issue):
+    """Compact board/backlog representation of an issue"""
+    return {
+        'id': issue.id,
+        'status_id': issue.status_id,
+        'backlog_position': issue.backlog_position,
+        'board_rank': issue.board_rank,
+        'backlog_rank': issue.backlog_rank,
+        'assignee_id': issue.assignee_id,
+        'priority': issue.priority,
+    }
+
+
+def broadcast_board_delta(project, version, action, issues=None, removed_ids=None, created=None):
+    """
+    Emit a board delta to everybody viewing the project.
+
+    Must be called after the change was committed.
+
+    Args:
+        project: Project the change belongs to
+        version: Board version returned by ``bump_board_version`` for this change
+        action: Short event name (move, create, reorder, bulk, transition)
+        issues: List of ``issue_delta`` dicts for changed issues
+        removed_ids: IDs of issues that left the board (archived/deleted)
+        created: Card data for a newly created issue
+    """
+    payload = {
+        'project_id': project.id,
+        'version': version,
+        'action': action,
+        'issues': issues or [],
+    }
+    if removed_ids:
+        payload['removed'] = list(removed_ids)
+    if created:
+        payload['created'] = created
+    socketio.emit('board_delta', payload, room=project_room(project.id))
+
+
+def get_board_state(project):
+    """Current positions of all active issues, used by clients to resync"""
+    rows = db.session.query(
+        Issue.id, Issue.status_id, Issue.backlog_position,
+        Issue.board_rank, Issue.backlog_rank, Issue.assignee_id, Issue.priority
+    ).filter(
+        Issue.project_id == project.id,
+        Issue.is_archived == False
+    ).all()
+    return {
+        'project_id': project.id,
+        'version': project.board_version,
+        'issues': [
+            {
+                'id': row.id,
+                'status_id': row.status_id,
+                'backlog_position': row.backlog_position,
+                'board_rank': row.board_rank,
+                'backlog_rank': row.backlog_rank,
+                'assignee_id': row.assignee_id,
+                'priority': row.priority,
+            }
+            for row in rows
+        ],
+    }
+
+
+# ============================================================================
+# WEBSOCKET EVENTS
+# ============================================================================
+
+def handle_join_project(data):
+    """Join a project's board room; acknowledges with the current board version"""
+    if not current_user.is_authenticated:
+        return {'error': 'Not authenticated'}
+
+    project_id = (data or {}).get('project_id')
+    project = db.session.get(Project, project_id) if isinstance(project_id, int) else None
+    if not project or not project.is_member(current_user):
+        return {'error': 'No access'}
+    if project.tenant_id and not current_user.can_access_tenant(project.tenant_id):
+        return {'error': 'No access'}
+
+    join_room(project_room(project.id))
+    return {'project_id': project.id, 'version': project.board_version}
+
+
+def handle_leave_project(data):
+    """Leave a project's board room"""
+    project_id = (data or {}).get('project_id')
+    if isinstance(project_id, int):
+        leave_room(project_room(project_id))
+
+
+def register_socketio_handlers():
+    """Attach board room handlers to the current SocketIO server.
+
+    Called from ``ProjectsModule.init_app`` because ``socketio.init_app``
+    creates a fresh server per application.
+    """
+    socketio.on_event('join_project', handle_join_project)
+    socketio.on_event('leave_project', handle_leave_project)
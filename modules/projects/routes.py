@@ -6,19 +6,37 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 
 from extensions import db
+from middleware.read_replica import read_only
 from models import User
+from services import reference_data
 from translations import get_translation as t
 from .models import (
     Project, ProjectMember, ProjectRole,
     IssueType, IssueStatus, Issue, Sprint,
     IssueComment, IssueAttachment, IssueLink, IssueLinkType, Worklog, IssueReviewer,
-    IssueActivity, create_default_issue_types, create_default_issue_statuses
+    IssueActivity, create_default_issue_types, create_default_issue_statuses,
+    reset_member_role_memo, load_board, refresh_sprint_aggregates, parse_time_input
 )
+from .realtime import bump_board_version, issue_delta, broadcast_board_delta, get_board_state
+from .ranking import move_rank, reorder_ranks
+from .burndown import IssueChange, record_issue_changes, start_snapshot, calculate_burndown_data
+from .search import search_filter, search_issues
+from .key_index import issue_keys
+from .bulk import (
+    select_issues, update_issues, resolution_date_for, log_activities, delete_issues, remove_files
+)
+from .importer import IMPORT_FORMATS, IMPORT_JOB, ImportResult, IssueImportError, import_issues, queue_import
 
 # Create blueprint
 bp = Blueprint('projects', __name__, template_folder='templates', url_prefix='/projects')
 
 
+@bp.before_app_request
+def reset_project_member_roles():
+    """Membership roles are memoized per request"""
+    reset_member_role_memo()
+
+
 def project_access_required(f):
     """Decorator to check project access"""
     from functools import wraps
@@ -42,21 +60,20 @@ def projects_module_required(f):
     from functools import wraps
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        from models import Module, UserModule
+        from modules import module_access
         
         # Admins always have access
         if current_user.role == 'admin':
             return f(*args, **kwargs)
         
-        # Check if projects module is active
-        module = Module.query.filter_by(code='projects', is_active=True).first()
-        if not module:
+        # Check if projects module is active (cached module access matrix)
+        module = module_access.modules().get('projects')
+        if not module or not module.is_active:
             flash('Projektmanagement-Modul ist nicht aktiv.' if session.get('lang', 'de') == 'de' else 'Project management module is not active.', 'warning')
             return redirect(url_for('main.dashboard'))
         
         # Check if user has module assignment
-        user_module = UserModule.query.filter_by(user_id=current_user.id, module_id=module.id).first()
-        if not user_module:
+        if 'projects' not in module_access.granted_codes(current_user.id):
             flash('Sie haben keinen Zugriff auf das Projektmanagement-Modul.' if session.get('lang', 'de') == 'de' else 'You do not have access to the project management module.', 'warning')
             return redirect(url_for('main.dashboard'))
         
@@ -113,13 +130,20 @@ def project_list():
         projects = Project.query.filter_by(is_archived=False).order_by(Project.name).all()
     else:
         # Get projects where user is a member
-        member_project_ids = [m.project_id for m in current_user.project_memberships]
+        member_project_ids = db.session.query(ProjectMember.project_id).filter_by(user_id=current_user.id)
         projects = Project.query.filter(
             Project.id.in_(member_project_ids),
             Project.is_archived == False
         ).order_by(Project.name).all()
     
-    return render_template('projects/list.html', projects=projects, lang=lang)
+    # Member counts in one grouped query instead of loading every member list
+    member_counts = dict(db.session.query(
+        ProjectMember.project_id, db.func.count(ProjectMember.id)
+    ).filter(
+        ProjectMember.project_id.in_([p.id for p in projects])
+    ).group_by(ProjectMember.project_id).all()) if projects else {}
+    
+    return render_template('projects/list.html', projects=projects, member_counts=member_counts, lang=lang)
 
 
 # ============================================================================
@@ -203,7 +227,7 @@ def project_new():
         return redirect(url_for('projects.project_detail', project_id=project.id))
     
     # GET request
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
+    users = reference_data.active_users()
     return render_template('projects/form.html', project=None, users=users, lang=lang)
 
 
@@ -271,7 +295,7 @@ def project_edit(project_id, project=None):
         return redirect(url_for('projects.project_detail', project_id=project_id))
     
     from modules.projects.models import METHODOLOGY_CONFIG
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
+    users = reference_data.active_users()
     return render_template('projects/form.html', 
         project=project, 
         users=users, 
@@ -500,18 +524,13 @@ def item_list(project_id, project=None):
     if priority:
         query = query.filter_by(priority=priority)
     if search:
-        query = query.filter(
-            db.or_(
-                Issue.key.ilike(f'%{search}%'),
-                Issue.summary.ilike(f'%{search}%')
-            )
-        )
+        query = query.filter(search_filter(search))
     
     issues = query.order_by(Issue.created_at.desc()).all()
     
     # Get filter options
-    issue_types = IssueType.query.filter_by(project_id=project_id).order_by(IssueType.sort_order).all()
-    issue_statuses = IssueStatus.query.filter_by(project_id=project_id).order_by(IssueStatus.sort_order).all()
+    issue_types = reference_data.issue_types(project_id)
+    issue_statuses = reference_data.issue_statuses(project_id)
     members = ProjectMember.query.filter_by(project_id=project_id).all()
     
     return render_template('projects/items/list.html',
@@ -728,7 +747,12 @@ def item_edit(project_id, issue_key, project=None):
         issue.assignee_id = request.form.get('assignee_id', type=int) or None
         issue.priority = request.form.get('priority', 3, type=int)
         issue.parent_id = request.form.get('parent_id', type=int) or None
+        old_sprint = issue.sprint
         issue.sprint_id = request.form.get('sprint_id', type=int) or None
+        if issue.sprint_id != (old_sprint.id if old_sprint else None):
+            new_sprint = db.session.get(Sprint, issue.sprint_id) if issue.sprint_id else None
+            log_activity(issue, 'sprint_change', old_value=old_sprint.name if old_sprint else None,
+                         new_value=new_sprint.name if new_sprint else None)
         issue.story_points = request.form.get('story_points', type=float)
         
         due_date = request.form.get('due_date')
@@ -799,7 +823,10 @@ def item_transition(project_id, issue_key, project=None):
     elif not new_status.is_final:
         issue.resolution_date = None
     
+    delta = issue_delta(issue)
+    version = bump_board_version(project)
     db.session.commit()
+    broadcast_board_delta(project, version, 'transition', [delta])
     
     flash(f'Status geändert: {old_status.get_name(lang)} → {new_status.get_name(lang)}' if lang == 'de' 
           else f'Status changed: {old_status.get_name(lang)} → {new_status.get_name(lang)}', 'success')
@@ -827,6 +854,7 @@ def item_delete(project_id, issue_key, project=None):
     
     issue.is_archived = True
     issue.archived_at = datetime.utcnow()
+    issue.archived_by_id = current_user.id
     db.session.commit()
     
     flash(f'Issue {issue.key} archiviert.' if lang == 'de' else f'Issue {issue.key} archived.', 'success')
@@ -1103,6 +1131,90 @@ def reset_terminology(project_id, project=None):
     return redirect(url_for('projects.project_methodology', project_id=project_id))
 
 
+@bp.route('/<int:project_id>/settings/import', methods=['GET', 'POST'])
+@login_required
+@projects_module_required
+@project_access_required
+def project_import(project_id, project=None):
+    """Import issues from a CSV, JSON or Excel file (dry run here, import as a background job)"""
+    lang = session.get('lang', 'de')
+    
+    if project is None:
+        project = Project.query.get_or_404(project_id)
+    
+    if not project.can_user_edit(current_user):
+        flash('Keine Berechtigung.' if lang == 'de' else 'No permission.', 'danger')
+        return redirect(url_for('projects.project_detail', project_id=project_id))
+    
+    result = None
+    job = None
+    dry_run = True
+    if request.method == 'POST':
+        file = request.files.get('file')
+        dry_run = bool(request.form.get('dry_run'))
+        if not file or not file.filename:
+            flash('Bitte eine Datei auswählen.' if lang == 'de' else 'Please choose a file.', 'danger')
+            return redirect(url_for('projects.project_import', project_id=project_id))
+        try:
+            if dry_run:
+                result = import_issues(project, file.stream, file.filename, current_user.id, dry_run=True)
+            else:
+                job = queue_import(project, file.stream, file.filename, current_user.id)
+        except IssueImportError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('projects.project_import', project_id=project_id))
+        
+        if job is not None:
+            db.session.commit()
+            flash('Import gestartet.' if lang == 'de' else 'Import started.', 'info')
+            return redirect(url_for('projects.project_import', project_id=project_id, job=job.id))
+    elif request.args.get('job', type=int):
+        job = _get_import_job(project, request.args.get('job', type=int))
+        if job.result:
+            result = ImportResult(job.result['rows'], job.result['valid'], job.result['created'], job.result['errors'])
+    
+    # Job results keep only the first errors
+    error_count = job.result['error_count'] if job is not None and job.result else len(result.errors) if result else 0
+    return render_template('projects/settings/import.html',
+        project=project,
+        result=result,
+        error_count=error_count,
+        job=job,
+        dry_run=dry_run,
+        formats=IMPORT_FORMATS,
+        lang=lang
+    )
+
+
+@bp.route('/<int:project_id>/settings/import/jobs/<int:job_id>')
+@login_required
+@projects_module_required
+@project_access_required
+def project_import_status(project_id, job_id, project=None):
+    """Progress of a queued import (JSON, polled by the import page)"""
+    if project is None:
+        project = Project.query.get_or_404(project_id)
+    
+    job = _get_import_job(project, job_id)
+    return jsonify({
+        'status': job.status,
+        'progress': job.progress,
+        'progress_message': job.progress_message,
+        'finished': job.finished_at is not None,
+        'error': job.last_error,
+    })
+
+
+def _get_import_job(project, job_id):
+    """Import job of the project or 404"""
+    from models import Job
+    
+    job = db.session.get(Job, job_id)
+    if job is None or job.type != IMPORT_JOB or (job.payload or {}).get('project_id') != project.id:
+        abort(404)
+    return job
+
+
 # ============================================================================
 # KANBAN BOARD
 # ============================================================================
@@ -1128,13 +1240,7 @@ def kanban_board(project_id, project=None):
         statuses = IssueStatus.query.filter_by(project_id=project_id).order_by(IssueStatus.sort_order).all()
     
     # Get all active issues grouped by status
-    issues_by_status = {}
-    for status in statuses:
-        issues_by_status[status.id] = Issue.query.filter_by(
-            project_id=project_id,
-            status_id=status.id,
-            is_archived=False
-        ).order_by(Issue.board_position, Issue.created_at.desc()).all()
+    issues_by_status = load_board(project_id, statuses)
     
     # Get issue types for quick create
     issue_types = IssueType.query.filter_by(project_id=project_id).order_by(IssueType.sort_order).all()
@@ -1175,6 +1281,8 @@ def kanban_move_issue(project_id, project=None):
     issue_id = data.get('issue_id')
     new_status_id = data.get('status_id')
     new_position = data.get('position', 0)
+    before_id = data.get('before_id')
+    after_id = data.get('after_id')
     
     if not issue_id or not new_status_id:
         return jsonify({'error': 'Missing issue_id or status_id'}), 400
@@ -1196,9 +1304,13 @@ def kanban_move_issue(project_id, project=None):
             error_msg = 'Übergang nicht erlaubt' if lang == 'de' else 'Transition not allowed'
             return jsonify({'error': error_msg, 'transition_blocked': True}), 400
     
-    # Update status
+    # Update status and rank between the new neighbours (the only row written)
     issue.status_id = new_status_id
-    issue.board_position = new_position
+    move_rank(issue, 'board', new_status_id, position=new_position, before_id=before_id, after_id=after_id)
+    if old_status_id != new_status_id:
+        log_activity(issue, 'status_change',
+                     old_value=old_status.get_name(lang) if old_status else None,
+                     new_value=new_status.get_name(lang))
     
     # Set resolution date if moving to final status
     if new_status.is_final and not issue.resolution_date:
@@ -1206,29 +1318,19 @@ def kanban_move_issue(project_id, project=None):
     elif not new_status.is_final:
         issue.resolution_date = None
     
-    # Reorder other issues in the target column
-    issues_in_column = Issue.query.filter(
-        Issue.project_id == project_id,
-        Issue.status_id == new_status_id,
-        Issue.id != issue_id,
-        Issue.is_archived == False
-    ).order_by(Issue.board_position).all()
-    
-    # Insert at new position
-    for i, other_issue in enumerate(issues_in_column):
-        if i >= new_position:
-            other_issue.board_position = i + 1
-        else:
-            other_issue.board_position = i
-    
+    deltas = [issue_delta(issue)]
+    issue_key = issue.key
+    version = bump_board_version(project)
     db.session.commit()
+    broadcast_board_delta(project, version, 'move', deltas)
     
     return jsonify({
         'success': True,
-        'issue_key': issue.key,
+        'issue_key': issue_key,
         'old_status': old_status.get_name('de') if old_status else None,
         'new_status': new_status.get_name('de'),
-        'is_final': new_status.is_final
+        'is_final': new_status.is_final,
+        'version': version
     })
 
 
@@ -1279,13 +1381,6 @@ def kanban_quick_create(project_id, project=None):
     # Generate key
     issue_key = project.get_next_issue_key()
     
-    # Get max position in target column
-    max_pos = db.session.query(db.func.max(Issue.board_position)).filter_by(
-        project_id=project_id,
-        status_id=status.id,
-        is_archived=False
-    ).scalar() or 0
-    
     issue = Issue(
         project_id=project_id,
         key=issue_key,
@@ -1293,30 +1388,49 @@ def kanban_quick_create(project_id, project=None):
         status_id=status.id,
         summary=summary,
         reporter_id=current_user.id,
-        priority=3,
-        board_position=max_pos + 1
+        priority=3
     )
     db.session.add(issue)
+    db.session.flush()
+    
+    card = {
+        'id': issue.id,
+        'key': issue.key,
+        'summary': issue.summary,
+        'type': {
+            'name': issue_type.get_name(lang),
+            'icon': issue_type.icon,
+            'color': issue_type.color
+        },
+        'status_id': status.id,
+        'board_rank': issue.board_rank,
+        'priority': issue.priority,
+        'url': url_for('projects.item_detail', project_id=project_id, issue_key=issue.key)
+    }
+    delta = issue_delta(issue)
+    version = bump_board_version(project)
     db.session.commit()
+    broadcast_board_delta(project, version, 'create', [delta], created=card)
     
     return jsonify({
         'success': True,
-        'issue': {
-            'id': issue.id,
-            'key': issue.key,
-            'summary': issue.summary,
-            'type': {
-                'name': issue_type.get_name(lang),
-                'icon': issue_type.icon,
-                'color': issue_type.color
-            },
-            'status_id': status.id,
-            'priority': issue.priority,
-            'url': url_for('projects.item_detail', project_id=project_id, issue_key=issue.key)
-        }
+        'issue': card,
+        'version': version
     })
 
 
+@bp.route('/<int:project_id>/board/state')
+@login_required
+@projects_module_required
+@project_access_required
+def kanban_board_state(project_id, project=None):
+    """API endpoint returning board positions and version for client resync"""
+    if project is None:
+        project = Project.query.get_or_404(project_id)
+    
+    return jsonify(get_board_state(project))
+
+
 # ==================== PM-4: Backlog ====================
 
 @bp.route('/<int:project_id>/backlog')
@@ -1335,7 +1449,7 @@ def backlog(project_id, project=None):
     status_filter = request.args.get('status', type=int)
     assignee_filter = request.args.get('assignee', type=int)
     priority_filter = request.args.get('priority', type=int)
-    search_filter = request.args.get('search', '').strip()
+    search_term = request.args.get('search', '').strip()
     
     # Build query - exclude completed issues (is_final status)
     # Join with IssueStatus to filter out final statuses
@@ -1354,23 +1468,18 @@ def backlog(project_id, project=None):
             query = query.filter(Issue.assignee_id == assignee_filter)
     if priority_filter:
         query = query.filter(Issue.priority == priority_filter)
-    if search_filter:
-        query = query.filter(
-            db.or_(
-                Issue.key.ilike(f'%{search_filter}%'),
-                Issue.summary.ilike(f'%{search_filter}%')
-            )
-        )
+    if search_term:
+        query = query.filter(search_filter(search_term))
     
-    # Order by backlog_position (null last), then by created_at desc
+    # Order by backlog rank (null last)
     issues = query.order_by(
-        Issue.backlog_position.asc().nullslast(),
-        Issue.created_at.desc()
+        Issue.backlog_rank.asc().nullslast(),
+        Issue.id
     ).all()
     
     # Get filter options
-    issue_types = IssueType.query.filter_by(project_id=project_id).order_by(IssueType.sort_order).all()
-    statuses = IssueStatus.query.filter_by(project_id=project_id).order_by(IssueStatus.sort_order).all()
+    issue_types = reference_data.issue_types(project_id)
+    statuses = reference_data.issue_statuses(project_id)
     members = ProjectMember.query.filter_by(project_id=project_id).all()
     
     # Calculate total story points
@@ -1388,7 +1497,7 @@ def backlog(project_id, project=None):
             'status': status_filter,
             'assignee': assignee_filter,
             'priority': priority_filter,
-            'search': search_filter
+            'search': search_term
         },
         lang=lang
     )
@@ -1419,15 +1528,18 @@ def backlog_reorder(project_id, project=None):
         if not isinstance(issue_ids, list) or not issue_ids:
             return jsonify({'error': 'No issue_ids provided'}), 400
 
-        # Update positions based on array order
-        for position, issue_id in enumerate(issue_ids):
-            issue = Issue.query.filter_by(id=issue_id, project_id=project_id).first()
-            if issue:
-                issue.backlog_position = position
+        # Re-rank only the issues that moved relative to the others
+        issues_by_id = {issue.id: issue for issue in Issue.query.filter(
+            Issue.id.in_(issue_ids), Issue.project_id == project_id
+        )}
+        ordered = [issues_by_id[i] for i in dict.fromkeys(issue_ids) if i in issues_by_id]
+        deltas = [issue_delta(issue) for issue in reorder_ranks(ordered, 'backlog')]
 
+        version = bump_board_version(project)
         db.session.commit()
+        broadcast_board_delta(project, version, 'reorder', deltas)
 
-        return jsonify({'success': True, 'count': len(issue_ids)})
+        return jsonify({'success': True, 'count': len(issue_ids), 'version': version})
     except Exception:
         db.session.rollback()
         current_app.logger.exception(
@@ -1458,15 +1570,14 @@ def backlog_bulk_action(project_id, project=None):
     if not issue_ids:
         return jsonify({'error': 'No issues selected'}), 400
     
-    issues = Issue.query.filter(
-        Issue.id.in_(issue_ids),
-        Issue.project_id == project_id
-    ).all()
+    # Set-based: one SELECT of the affected rows, one UPDATE/DELETE, one activity INSERT
+    rows = select_issues(project_id, issue_ids, Issue.sprint_id, Issue.story_points)
     
-    if not issues:
+    if not rows:
         return jsonify({'error': 'No valid issues found'}), 404
     
-    count = len(issues)
+    ids = [row.id for row in rows]
+    count = len(rows)
     
     if action == 'change_status':
         new_status_id = data.get('status_id')
@@ -1477,16 +1588,26 @@ def backlog_bulk_action(project_id, project=None):
         if not new_status:
             return jsonify({'error': 'Status not found'}), 404
         
-        for issue in issues:
-            issue.status_id = new_status_id
-            if new_status.is_final and not issue.resolution_date:
-                issue.resolution_date = datetime.utcnow()
-            elif not new_status.is_final:
-                issue.resolution_date = None
-        
+        update_issues(ids, {'status_id': new_status.id, 'resolution_date': resolution_date_for(new_status)})
+        refresh_sprint_aggregates({row.sprint_id for row in rows})
+        record_issue_changes([
+            IssueChange(row.sprint_id, row.sprint_id, row.status_id, new_status.id, row.story_points, row.story_points)
+            for row in rows
+        ])
+        status_names = {s.id: s.get_name(lang) for s in IssueStatus.query.filter_by(project_id=project_id)}
+        log_activities([
+            {'issue_id': row.id, 'activity_type': 'status_change',
+             'old_value': status_names.get(row.status_id), 'new_value': new_status.get_name(lang)}
+            for row in rows if row.status_id != new_status.id
+        ], current_user.id)
+        
+        deltas = [dict(issue_delta(row), status_id=new_status.id) for row in rows]
+        version = bump_board_version(project)
         db.session.commit()
+        broadcast_board_delta(project, version, 'bulk', deltas)
         return jsonify({
             'success': True, 
+            'version': version,
             'message': f'{count} {"Issues aktualisiert" if lang == "de" else "issues updated"}'
         })
     
@@ -1502,13 +1623,24 @@ def backlog_bulk_action(project_id, project=None):
             ).first()
             if not member:
                 return jsonify({'error': 'User is not a project member'}), 400
-        
-        for issue in issues:
-            issue.assignee_id = assignee_id if assignee_id else None
-        
+        assignee_id = assignee_id if assignee_id else None
+        
+        update_issues(ids, {'assignee_id': assignee_id})
+        user_ids = {row.assignee_id for row in rows} | {assignee_id}
+        user_names = dict(db.session.query(User.id, User.name).filter(User.id.in_(user_ids - {None})))
+        log_activities([
+            {'issue_id': row.id, 'activity_type': 'assignee_change',
+             'old_value': user_names.get(row.assignee_id), 'new_value': user_names.get(assignee_id)}
+            for row in rows if row.assignee_id != assignee_id
+        ], current_user.id)
+        
+        deltas = [dict(issue_delta(row), assignee_id=assignee_id) for row in rows]
+        version = bump_board_version(project)
         db.session.commit()
+        broadcast_board_delta(project, version, 'bulk', deltas)
         return jsonify({
             'success': True, 
+            'version': version,
             'message': f'{count} {"Issues zugewiesen" if lang == "de" else "issues assigned"}'
         })
     
@@ -1517,34 +1649,54 @@ def backlog_bulk_action(project_id, project=None):
         if new_priority is None or new_priority not in [1, 2, 3, 4, 5]:
             return jsonify({'error': 'Invalid priority'}), 400
         
-        for issue in issues:
-            issue.priority = new_priority
+        update_issues(ids, {'priority': new_priority})
+        log_activities([
+            {'issue_id': row.id, 'activity_type': 'priority_change',
+             'old_value': row.priority, 'new_value': new_priority}
+            for row in rows if row.priority != new_priority
+        ], current_user.id)
         
+        deltas = [dict(issue_delta(row), priority=new_priority) for row in rows]
+        version = bump_board_version(project)
         db.session.commit()
+        broadcast_board_delta(project, version, 'bulk', deltas)
         return jsonify({
             'success': True, 
+            'version': version,
             'message': f'{count} {"Issues aktualisiert" if lang == "de" else "issues updated"}'
         })
     
     elif action == 'archive':
-        for issue in issues:
-            issue.is_archived = True
-            issue.archived_at = datetime.utcnow()
-            issue.archived_by_id = current_user.id
-        
+        update_issues(ids, {'is_archived': True, 'archived_at': datetime.utcnow(), 'archived_by_id': current_user.id})
+        log_activities([
+            {'issue_id': issue_id, 'activity_type': 'field_update', 'field_name': 'is_archived',
+             'old_value': False, 'new_value': True}
+            for issue_id in ids
+        ], current_user.id)
+        
+        version = bump_board_version(project)
         db.session.commit()
+        broadcast_board_delta(project, version, 'bulk', removed_ids=ids)
         return jsonify({
             'success': True, 
+            'version': version,
             'message': f'{count} {"Issues archiviert" if lang == "de" else "issues archived"}'
         })
     
     elif action == 'delete':
-        for issue in issues:
-            db.session.delete(issue)
+        attachment_paths = delete_issues(ids)
+        refresh_sprint_aggregates({row.sprint_id for row in rows})
+        record_issue_changes([
+            IssueChange(row.sprint_id, None, row.status_id, None, row.story_points, 0) for row in rows
+        ])
         
+        version = bump_board_version(project)
         db.session.commit()
+        remove_files(attachment_paths)
+        broadcast_board_delta(project, version, 'bulk', removed_ids=ids)
         return jsonify({
             'success': True, 
+            'version': version,
             'message': f'{count} {"Issues gelöscht" if lang == "de" else "issues deleted"}'
         })
     
@@ -1761,6 +1913,9 @@ def iteration_start(project_id, sprint_id, project=None):
     
     sprint.state = 'active'
     sprint.started_at = datetime.utcnow()
+    refresh_sprint_aggregates([sprint.id])
+    sprint.committed_points = sprint.points_total
+    start_snapshot(sprint)
     if not sprint.start_date:
         sprint.start_date = datetime.utcnow().date()
     db.session.commit()
@@ -1792,16 +1947,22 @@ def iteration_complete(project_id, sprint_id, project=None):
     
     # Handle incomplete issues - move them back to backlog (remove sprint assignment)
     move_to_backlog = request.form.get('move_incomplete', 'true') == 'true'
-    incomplete_count = 0
-    
-    for issue in sprint.issues:
-        if not issue.status.is_final:
-            incomplete_count += 1
-            if move_to_backlog:
-                issue.sprint_id = None
-    
+    sprint.completed_at = datetime.utcnow()  # Before the moves: they are no burndown scope change
+    incomplete_ids = [issue_id for issue_id, in db.session.query(Issue.id).join(
+        IssueStatus, Issue.status_id == IssueStatus.id
+    ).filter(Issue.sprint_id == sprint.id, IssueStatus.is_final.isnot(True))]
+    incomplete_count = len(incomplete_ids)
+    
+    if move_to_backlog:
+        update_issues(incomplete_ids, {'sprint_id': None})
+        log_activities([
+            {'issue_id': issue_id, 'activity_type': 'sprint_change', 'old_value': sprint.name}
+            for issue_id in incomplete_ids
+        ], current_user.id)
+    
+    # Final aggregates; closed sprints are never recomputed
+    refresh_sprint_aggregates([sprint.id])
     sprint.state = 'closed'
-    sprint.completed_at = datetime.utcnow()
     if not sprint.end_date:
         sprint.end_date = datetime.utcnow().date()
     db.session.commit()
@@ -1860,14 +2021,7 @@ def iteration_board(project_id, sprint_id, project=None):
     # Get statuses and issues for this sprint
     statuses = IssueStatus.query.filter_by(project_id=project_id).order_by(IssueStatus.sort_order).all()
     
-    issues_by_status = {}
-    for status in statuses:
-        issues_by_status[status.id] = Issue.query.filter_by(
-            project_id=project_id,
-            sprint_id=sprint_id,
-            status_id=status.id,
-            is_archived=False
-        ).order_by(Issue.board_position).all()
+    issues_by_status = load_board(project_id, statuses, sprint_id=sprint_id)
     
     return render_template(
         'projects/iterations/board.html',
@@ -1904,12 +2058,23 @@ def iteration_add_issues(project_id, sprint_id, project=None):
     if not issue_ids:
         return jsonify({'error': 'No issues provided'}), 400
     
-    count = 0
-    for issue_id in issue_ids:
-        issue = Issue.query.filter_by(id=issue_id, project_id=project_id).first()
-        if issue and issue.sprint_id != sprint_id:
-            issue.sprint_id = sprint_id
-            count += 1
+    rows = [row for row in select_issues(project_id, issue_ids, Issue.sprint_id, Issue.story_points)
+            if row.sprint_id != sprint_id]
+    count = update_issues([row.id for row in rows], {'sprint_id': sprint_id})
+    refresh_sprint_aggregates({row.sprint_id for row in rows} | {sprint_id})
+    record_issue_changes([
+        IssueChange(row.sprint_id, sprint_id, row.status_id, row.status_id, row.story_points, row.story_points)
+        for row in rows
+    ])
+    
+    sprint_names = dict(db.session.query(Sprint.id, Sprint.name).filter(
+        Sprint.id.in_({row.sprint_id for row in rows} - {None})
+    ))
+    log_activities([
+        {'issue_id': row.id, 'activity_type': 'sprint_change',
+         'old_value': sprint_names.get(row.sprint_id), 'new_value': sprint.name}
+        for row in rows
+    ], current_user.id)
     
     db.session.commit()
     
@@ -1946,6 +2111,7 @@ def iteration_remove_issue(project_id, sprint_id, project=None):
         return jsonify({'error': 'Issue not found in sprint'}), 404
     
     issue.sprint_id = None
+    log_activity(issue, 'sprint_change', old_value=sprint.name)
     db.session.commit()
     
     return jsonify({
@@ -1978,7 +2144,7 @@ def iteration_report(project_id, sprint_id, project=None):
     completed_points = sprint.completed_points
     
     # Calculate burndown data
-    burndown_data = calculate_burndown_data(sprint, issues)
+    burndown_data = calculate_burndown_data(sprint)
     
     # Calculate velocity for this sprint and previous sprints
     velocity_data = calculate_velocity_data(project)
@@ -2023,65 +2189,6 @@ def iteration_report(project_id, sprint_id, project=None):
     )
 
 
-def calculate_burndown_data(sprint, issues):
-    """Calculate burndown chart data for a sprint"""
-    from datetime import timedelta
-    
-    if not sprint.start_date or not sprint.end_date:
-        return {'labels': [], 'ideal': [], 'actual': [], 'remaining': []}
-    
-    start = sprint.start_date
-    end = sprint.end_date
-    days = (end - start).days + 1
-    
-    if days <= 0:
-        return {'labels': [], 'ideal': [], 'actual': [], 'remaining': []}
-    
-    # Total story points at sprint start
-    total_points = sum(i.story_points or 0 for i in issues)
-    
-    # Ideal burndown (linear)
-    ideal = []
-    labels = []
-    for i in range(days):
-        current_date = start + timedelta(days=i)
-        labels.append(current_date.strftime('%d.%m'))
-        ideal.append(round(total_points - (total_points / (days - 1) * i) if days > 1 else 0, 1))
-    
-    # Actual burndown based on when issues were completed
-    actual = []
-    today = datetime.now().date()
-    
-    for i in range(days):
-        current_date = start + timedelta(days=i)
-        
-        if current_date > today:
-            # Future dates - no actual data
-            actual.append(None)
-        else:
-            # Count remaining points as of this date
-            remaining = 0
-            for issue in issues:
-                points = issue.story_points or 0
-                # Issue is remaining if not completed or completed after this date
-                if issue.status and issue.status.is_final:
-                    # Check if completed after this date
-                    if issue.resolution_date and issue.resolution_date.date() > current_date:
-                        remaining += points
-                    elif not issue.resolution_date:
-                        # No resolution_date but marked done - assume completed at sprint end
-                        pass  # Count as completed
-                else:
-                    remaining += points
-            actual.append(remaining)
-    
-    return {
-        'labels': labels,
-        'ideal': ideal,
-        'actual': actual
-    }
-
-
 def calculate_velocity_data(project):
     """Calculate velocity data for closed sprints"""
     closed_sprints = Sprint.query.filter_by(
@@ -2102,7 +2209,7 @@ def calculate_velocity_data(project):
     total_completed = 0
     for sprint in closed_sprints:
         velocity_data['labels'].append(sprint.name)
-        committed = sum(i.story_points or 0 for i in sprint.issues)
+        committed = sprint.velocity_committed
         completed = sprint.completed_points
         velocity_data['committed'].append(committed)
         velocity_data['completed'].append(completed)
@@ -2383,8 +2490,8 @@ def link_add(project_id, issue_key, project=None):
         flash('Bitte Linktyp und Ziel-Issue angeben.' if lang == 'de' else 'Please specify link type and target issue.', 'warning')
         return redirect(url_for('projects.item_detail', project_id=project_id, issue_key=issue_key))
     
-    # Find target issue
-    target_issue = Issue.query.filter_by(key=target_key).first()
+    # Find target issue (keys are unique per tenant only)
+    target_issue = Issue.query.filter_by(tenant_id=project.tenant_id, key=target_key).first()
     if not target_issue:
         flash(f'Issue {target_key} nicht gefunden.' if lang == 'de' else f'Issue {target_key} not found.', 'warning')
         return redirect(url_for('projects.item_detail', project_id=project_id, issue_key=issue_key))
@@ -2549,35 +2656,6 @@ def worklog_delete(project_id, issue_key, worklog_id, project=None):
     return redirect(url_for('projects.item_detail', project_id=project_id, issue_key=issue_key))
 
 
-def parse_time_input(time_str):
-    """Parse time input like '2h', '30m', '1h 30m', '90' (minutes)"""
-    import re
-    
-    time_str = time_str.strip().lower()
-    
-    # Try hours and minutes pattern (1h 30m, 1h30m)
-    match = re.match(r'(\d+)\s*h\s*(\d+)\s*m?', time_str)
-    if match:
-        return int(match.group(1)) * 60 + int(match.group(2))
-    
-    # Try hours only (2h)
-    match = re.match(r'(\d+)\s*h', time_str)
-    if match:
-        return int(match.group(1)) * 60
-    
-    # Try minutes only (30m)
-    match = re.match(r'(\d+)\s*m', time_str)
-    if match:
-        return int(match.group(1))
-    
-    # Try plain number (minutes)
-    match = re.match(r'^(\d+)$', time_str)
-    if match:
-        return int(match.group(1))
-    
-    return 0
-
-
 # =============================================================================
 # ISSUE APPROVAL WORKFLOW ROUTES
 # =============================================================================
@@ -2853,83 +2931,57 @@ def item_reviewer_add(project_id, issue_key, project=None):
 @bp.route('/api/search')
 @login_required
 @projects_module_required
+@read_only
 def api_search():
     """Global search API for issues across all accessible projects"""
     lang = session.get('lang', 'de')
     query = request.args.get('q', '').strip()
     project_id = request.args.get('project_id', type=int)
-    limit = request.args.get('limit', 10, type=int)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
     
     if len(query) < 2:
         return jsonify({'results': [], 'total': 0})
     
-    # Build base query - only search in projects user has access to
-    if current_user.role == 'admin':
-        accessible_projects = Project.query.filter_by(is_archived=False).all()
-    else:
-        accessible_projects = Project.query.filter(
-            Project.id.in_(
-                db.session.query(ProjectMember.project_id).filter_by(user_id=current_user.id)
-            ),
-            Project.is_archived == False
-        ).all()
-    
-    project_ids = [p.id for p in accessible_projects]
-    
+    # Only search in projects user has access to
+    project_ids = accessible_project_ids()
     if not project_ids:
         return jsonify({'results': [], 'total': 0})
     
-    # Build search query
-    search_query = Issue.query.filter(
-        Issue.project_id.in_(project_ids),
-        Issue.is_archived == False
-    )
-    
     # Filter by specific project if provided
     if project_id and project_id in project_ids:
-        search_query = search_query.filter(Issue.project_id == project_id)
-    
-    # Search in key, summary, description
-    search_term = f'%{query}%'
-    search_query = search_query.filter(
-        db.or_(
-            Issue.key.ilike(search_term),
-            Issue.summary.ilike(search_term),
-            Issue.description.ilike(search_term)
-        )
-    )
+        project_ids = [project_id]
     
-    # Get total count
-    total = search_query.count()
-    
-    # Get results with limit
-    issues = search_query.order_by(Issue.updated_at.desc()).limit(limit).all()
+    # Ranked matches in key, summary, description and comments
+    issue_ids, total = search_issues(query, list(project_ids), limit)
+    rank = {issue_id: position for position, issue_id in enumerate(issue_ids)}
+    rows = sorted(issue_result_rows(Issue.id.in_(issue_ids)), key=lambda row: rank[row.id])
+    assignees = user_names(row.assignee_id for row in rows)
     
     # Format results
     results = []
-    for issue in issues:
+    for row in rows:
         results.append({
-            'id': issue.id,
-            'key': issue.key,
-            'summary': issue.summary,
-            'project_id': issue.project_id,
-            'project_key': issue.project.key,
-            'project_name': issue.project.name,
+            'id': row.id,
+            'key': row.key,
+            'summary': row.summary,
+            'project_id': row.project_id,
+            'project_key': row.project_key,
+            'project_name': row.project_name,
             'type': {
-                'name': issue.item_type.name if issue.item_type else 'Task',
-                'icon': issue.item_type.icon if issue.item_type else 'bi-check2-square',
-                'color': issue.item_type.color if issue.item_type else '#0076A8'
+                'name': (lang == 'en' and row.type_name_en) or row.type_name or 'Task',
+                'icon': row.type_icon or 'bi-check2-square',
+                'color': row.type_color or '#0076A8'
             },
             'status': {
-                'name': issue.status.name if issue.status else 'Open',
-                'color': issue.status.color if issue.status else '#6c757d'
+                'name': (lang == 'en' and row.status_name_en) or row.status_name or 'Open',
+                'color': row.status_color or '#6c757d'
             },
-            'priority': issue.priority,
+            'priority': row.priority,
             'assignee': {
-                'id': issue.assignee.id if issue.assignee else None,
-                'name': issue.assignee.name if issue.assignee else None
+                'id': row.assignee_id if row.assignee_id in assignees else None,
+                'name': assignees.get(row.assignee_id)
             },
-            'url': url_for('projects.item_detail', project_id=issue.project_id, issue_key=issue.key)
+            'url': url_for('projects.item_detail', project_id=row.project_id, issue_key=row.key)
         })
     
     return jsonify({
@@ -2942,47 +2994,104 @@ def api_search():
 @bp.route('/api/search/recent')
 @login_required
 @projects_module_required
+@read_only
 def api_search_recent():
     """Get recently viewed/updated issues for quick access"""
-    lang = session.get('lang', 'de')
-    limit = request.args.get('limit', 5, type=int)
-    
-    # Get accessible project IDs
-    if current_user.role == 'admin':
-        project_ids = [p.id for p in Project.query.filter_by(is_archived=False).all()]
-    else:
-        project_ids = [
-            m.project_id for m in ProjectMember.query.filter_by(user_id=current_user.id).all()
-        ]
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 50)
     
+    project_ids = accessible_project_ids()
     if not project_ids:
         return jsonify({'recent': []})
     
     # Get issues assigned to user or recently updated
-    recent_issues = Issue.query.filter(
+    rows = issue_result_rows(
         Issue.project_id.in_(project_ids),
         Issue.is_archived == False,
         db.or_(
             Issue.assignee_id == current_user.id,
             Issue.reporter_id == current_user.id
         )
-    ).order_by(Issue.updated_at.desc()).limit(limit).all()
+    ).order_by(Issue.updated_at.desc()).limit(limit)
     
     results = []
-    for issue in recent_issues:
+    for row in rows:
         results.append({
-            'id': issue.id,
-            'key': issue.key,
-            'summary': issue.summary,
-            'project_key': issue.project.key,
-            'type_icon': issue.item_type.icon if issue.item_type else 'bi-check2-square',
-            'type_color': issue.item_type.color if issue.item_type else '#0076A8',
-            'url': url_for('projects.item_detail', project_id=issue.project_id, issue_key=issue.key)
+            'id': row.id,
+            'key': row.key,
+            'summary': row.summary,
+            'project_key': row.project_key,
+            'type_icon': row.type_icon or 'bi-check2-square',
+            'type_color': row.type_color or '#0076A8',
+            'url': url_for('projects.item_detail', project_id=row.project_id, issue_key=row.key)
         })
     
     return jsonify({'recent': results})
 
 
+def accessible_project_ids():
+    """IDs of the current tenant's open projects the user can search (cached, see ReferenceDataCache)"""
+    if not g.tenant:
+        return frozenset()
+    return reference_data.accessible_project_ids(g.tenant.id, current_user.id, current_user.role == 'admin')
+
+
+def issue_result_rows(*criteria):
+    """
+    Search result columns of the matching issues with their project, type
+    and status in one joined query (plain rows instead of lazy loads)
+    """
+    return db.session.query(
+        Issue.id, Issue.key, Issue.summary, Issue.project_id, Issue.priority, Issue.assignee_id,
+        Project.key.label('project_key'), Project.name.label('project_name'),
+        IssueType.name.label('type_name'), IssueType.name_en.label('type_name_en'),
+        IssueType.icon.label('type_icon'), IssueType.color.label('type_color'),
+        IssueStatus.name.label('status_name'), IssueStatus.name_en.label('status_name_en'),
+        IssueStatus.color.label('status_color'),
+    ).join(Project, Issue.project_id == Project.id).outerjoin(
+        IssueType, Issue.type_id == IssueType.id
+    ).outerjoin(
+        IssueStatus, Issue.status_id == IssueStatus.id
+    ).filter(*criteria)
+
+
+def user_names(user_ids):
+    """
+    User ID -> name for the given IDs in one query. Users live in the
+    shared database, so they cannot be joined to a tenant database's issues.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return {}
+    return dict(db.session.query(User.id, User.name).filter(User.id.in_(user_ids)))
+
+
+@bp.route('/api/keys')
+@login_required
+@projects_module_required
+@read_only
+def api_keys():
+    """Project and issue key typeahead for the search box and the link dialog (in-memory key index)"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    
+    if not query or not g.tenant:
+        return jsonify({'projects': [], 'issues': []})
+    
+    projects, issues = issue_keys.lookup(g.tenant.id, query, accessible_project_ids(), limit)
+    
+    return jsonify({
+        'projects': [
+            {'id': p.id, 'key': p.key, 'name': p.name, 'url': url_for('projects.project_detail', project_id=p.id)}
+            for p in projects
+        ],
+        'issues': [
+            {'key': key, 'project_id': project_id,
+             'url': url_for('projects.item_detail', project_id=project_id, issue_key=key)}
+            for key, project_id in issues
+        ]
+    })
+
+
 # =============================================================================
 # ESTIMATION / SIZING
 # =============================================================================
@@ -3003,7 +3112,7 @@ def estimation(project_id, project=None):
         Issue.project_id == project_id,
         Issue.is_archived == False,
         db.or_(Issue.story_points == None, Issue.story_points == 0)
-    ).order_by(Issue.backlog_position, Issue.created_at.desc()).all()
+    ).order_by(Issue.backlog_rank, Issue.id).all()
     
     # Get recently estimated issues for reference
     estimated = Issue.query.filter(
@@ -0,0 +1,387 @@
+"""
+Project Management Module - Full-text search index for issues
+
+Key, summary, description and comments of every issue are indexed in the
+``issue_search`` table, chosen by backend:
+
+- SQLite: FTS5 virtual table (rowid = issue id), ranked with bm25().
+  FTS5 only ships an English stemmer, so words are stemmed here: each
+  word is indexed as written plus its German and English stem. Queries
+  match any of the three forms; the last word also matches as a prefix
+  (search as you type).
+- PostgreSQL: ``tsvector`` document with a GIN index, built from the
+  'german' and 'english' text search configurations plus the key and
+  raw words ('simple'), ranked with ts_rank_cd().
+
+The table is created together with ``issue`` (create_all, tenant
+databases) or by migration ft001. Flush listeners keep it in sync with
+Issue and IssueComment changes; bulk statements call index_issues() /
+unindex_issues() themselves. ``flask reindex-search`` rebuilds it.
+Databases without the table fall back to ILIKE.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from .models import Issue, IssueComment
+
+SEARCH_TABLE = 'issue_search'
+PENDING_SEARCH_CHANGES = 'pending_search_changes'
+
+# Issue columns in the index and their weight in the ranking (key first)
+INDEXED_FIELDS = ('key', 'summary', 'description')
+BM25_WEIGHTS = (10.0, 4.0, 1.0, 0.5)  # key, summary, description, comments
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "key, summary, description, comments, tokenize='unicode61 remove_diacritics 2')"
+)
+POSTGRES_DDL = (
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+    "issue_id INTEGER PRIMARY KEY REFERENCES issue (id) ON DELETE CASCADE, document TSVECTOR NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+)
+
+# Document of one issue; comments are aggregated in a subquery
+POSTGRES_DOCUMENT = """
+    setweight(to_tsvector('simple', issue.key), 'A')
+    || setweight(to_tsvector('german', coalesce(issue.summary, '')), 'B')
+    || setweight(to_tsvector('english', coalesce(issue.summary, '')), 'B')
+    || setweight(to_tsvector('german', coalesce(issue.description, '')), 'C')
+    || setweight(to_tsvector('english', coalesce(issue.description, '')), 'C')
+    || setweight(to_tsvector('simple', coalesce(issue.summary, '') || ' ' || coalesce(issue.description, '')), 'C')
+    || setweight(to_tsvector('german', coalesce(comments.content, '')), 'D')
+    || setweight(to_tsvector('english', coalesce(comments.content, '')), 'D')
+"""
+
+event.listen(Issue.__table__, 'after_create', sa.DDL(SQLITE_DDL).execute_if(dialect='sqlite'))
+for _statement in POSTGRES_DDL:
+    event.listen(Issue.__table__, 'after_create', sa.DDL(_statement).execute_if(dialect='postgresql'))
+event.listen(Issue.__table__, 'before_drop', sa.DDL(f'DROP TABLE IF EXISTS {SEARCH_TABLE}'))
+
+_search = sa.table(SEARCH_TABLE, sa.column('rowid', sa.Integer), sa.column('issue_id', sa.Integer),
+                   sa.column('document'))
+_search_column = sa.literal_column(SEARCH_TABLE)
+
+WORD_RE = re.compile(r'\w+')
+
+# Engines known to have (True) or lack (False) the index table
+_index_tables = {}
+
+
+# =============================================================================
+# STEMMING (SQLite)
+# =============================================================================
+
+class _FoldTable(dict):
+    """str.translate() table filled on first use: each character without diacritics"""
+
+    def __missing__(self, code):
+        char = 'ss' if code == ord('ß') else unicodedata.normalize('NFKD', chr(code))
+        self[code] = ''.join(c for c in char if not unicodedata.combining(c))
+        return self[code]
+
+
+_fold_table = _FoldTable()
+
+
+def fold(text):
+    """Lowercase without diacritics, like the FTS5 tokenizer (ß becomes ss)"""
+    text = text.lower()
+    return text if text.isascii() else text.translate(_fold_table)
+
+
+def stem_de(word):
+    """Light German stemmer (CISTEM suffix rules) for a folded word"""
+    if word.isdigit():
+        return word
+    while len(word) > 3:
+        if len(word) > 5 and word[-2:] in ('em', 'er', 'nd'):
+            word = word[:-2]
+        elif word[-1] in 'tesn' and not word.endswith('ss'):
+            word = word[:-1]
+        else:
+            break
+    return word
+
+
+def stem_en(word):
+    """Light English stemmer (plural, -ing, -ed) for a folded word"""
+    if word.isdigit() or len(word) <= 3:
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith(('sses', 'xes', 'zes', 'ches', 'shes')):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]  # running -> run
+            break
+    return word
+
+
+@lru_cache(maxsize=65536)
+def word_forms(word):
+    """The word as written plus its German and English stem (memoized: bulk indexing repeats words)"""
+    return tuple(dict.fromkeys((word, stem_de(word), stem_en(word))))
+
+
+def index_text(text):
+    """Text as stored in the FTS5 table: every word with its stems"""
+    if not text:
+        return ''
+    return ' '.join(form for word in WORD_RE.findall(fold(text)) for form in word_forms(word))
+
+
+def match_expression(query):
+    """
+    FTS5 MATCH expression for a search box query: all words must match
+    (as written or stemmed), the last one also as a prefix.
+
+    Returns:
+        Expression string, or None if the query has no words
+    """
+    words = WORD_RE.findall(fold(query))
+    terms = []
+    for i, word in enumerate(words):
+        forms = [f'"{form}"' for form in word_forms(word)]
+        if i == len(words) - 1:
+            forms[0] += '*'
+        terms.append(f"({' OR '.join(forms)})")
+    return ' AND '.join(terms) or None
+
+
+def _postgres_query(query):
+    """tsquery for a search box query (same semantics as match_expression)"""
+    terms = []
+    words = WORD_RE.findall(query.lower())
+    for i, word in enumerate(words):
+        prefix = word + (':*' if i == len(words) - 1 else '')
+        terms.append(
+            sa.func.to_tsquery('german', word).op('||')(sa.func.to_tsquery('english', word))
+            .op('||')(sa.func.to_tsquery('simple', prefix))
+        )
+    if not terms:
+        return None
+    combined = terms[0]
+    for term in terms[1:]:
+        combined = combined.op('&&')(term)
+    return combined
+
+
+# =============================================================================
+# INDEX MAINTENANCE
+# =============================================================================
+
+def _dialect(session):
+    return session.get_bind(mapper=Issue).dialect.name
+
+
+def index_available(session=None):
+    """True if the issue database has the search table (cached per engine)"""
+    session = session or db.session
+    engine = session.get_bind(mapper=Issue)
+    if engine not in _index_tables:
+        connection = session.connection(bind_arguments={'mapper': Issue})
+        _index_tables[engine] = sa.inspect(connection).has_table(SEARCH_TABLE)
+    return _index_tables[engine]
+
+
+def _execute(session, statement, parameters=None):
+    """Run a statement on the issue database (tenant bind)"""
+    return session.execute(statement, parameters, bind_arguments={'mapper': Issue})
+
+
+def unindex_issues(issue_ids, session=None):
+    """Remove issues from the index"""
+    session = session or db.session
+    issue_ids = list(issue_ids)
+    if not issue_ids or not index_available(session):
+        return
+    key = _search.c.rowid if _dialect(session) == 'sqlite' else _search.c.issue_id
+    _execute(session, sa.delete(_search).where(key.in_(issue_ids)))
+
+
+def index_issues(issue_ids, session=None):
+    """(Re)index issues from their current rows; unknown IDs are removed"""
+    session = session or db.session
+    issue_ids = list(issue_ids)
+    if not issue_ids or not index_available(session):
+        return
+    unindex_issues(issue_ids, session)
+
+    if _dialect(session) == 'postgresql':
+        _execute(session, sa.text(f"""
+            INSERT INTO {SEARCH_TABLE} (issue_id, document)
+            SELECT issue.id, {POSTGRES_DOCUMENT}
+            FROM issue LEFT JOIN (
+                SELECT issue_id, string_agg(content, ' ') AS content FROM issue_comment
+                WHERE issue_id = ANY(:ids) GROUP BY issue_id
+            ) AS comments ON comments.issue_id = issue.id
+            WHERE issue.id = ANY(:ids)
+        """), {'ids': issue_ids})
+        return
+
+    comments = {}
+    for issue_id, content in _execute(session, sa.select(IssueComment.issue_id, IssueComment.content).where(
+        IssueComment.issue_id.in_(issue_ids)
+    )):
+        comments.setdefault(issue_id, []).append(content)
+    rows = [
+        {'rowid': issue_id, 'key': index_text(key), 'summary': index_text(summary),
+         'description': index_text(description), 'comments': index_text(' '.join(comments.get(issue_id, [])))}
+        for issue_id, key, summary, description in _execute(
+            session, sa.select(Issue.id, *(getattr(Issue, field) for field in INDEXED_FIELDS))
+            .where(Issue.id.in_(issue_ids))
+        )
+    ]
+    if rows:
+        _execute(session, sa.text(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, key, summary, description, comments) '
+            'VALUES (:rowid, :key, :summary, :description, :comments)'
+        ), rows)
+
+
+def reindex(session=None, batch_size=1000):
+    """
+    Rebuild the index of the current (tenant) database; the caller commits.
+
+    Returns:
+        Number of indexed issues, or None if the database has no search table
+    """
+    session = session or db.session
+    _index_tables.pop(session.get_bind(mapper=Issue), None)
+    if not index_available(session):
+        return None
+    _execute(session, sa.delete(_search))
+    count, last_id = 0, 0
+    while True:
+        issue_ids = _execute(session, sa.select(Issue.id).where(Issue.id > last_id)
+                             .order_by(Issue.id).limit(batch_size)).scalars().all()
+        if not issue_ids:
+            break
+        index_issues(issue_ids, session)
+        count += len(issue_ids)
+        last_id = issue_ids[-1]
+    if _dialect(session) == 'sqlite':
+        _execute(session, sa.text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"))
+    return count
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+def _ilike(query):
+    term = f'%{query}%'
+    return db.or_(Issue.key.ilike(term), Issue.summary.ilike(term), Issue.description.ilike(term))
+
+
+def search_filter(query, session=None):
+    """
+    Criterion for Issue queries: issues matching a search box query.
+
+    Usage:
+        Issue.query.filter(Issue.project_id == project_id, search_filter(term))
+    """
+    session = session or db.session
+    if not index_available(session):
+        return _ilike(query)
+    if _dialect(session) == 'postgresql':
+        tsquery = _postgres_query(query)
+        if tsquery is None:
+            return sa.false()
+        return Issue.id.in_(sa.select(_search.c.issue_id).where(_search.c.document.op('@@')(tsquery)))
+    match = match_expression(query)
+    if match is None:
+        return sa.false()
+    return Issue.id.in_(sa.select(_search.c.rowid).where(_search_column.op('MATCH')(match)))
+
+
+def search_issues(query, project_ids, limit=10, session=None):
+    """
+    Best matching issues of a search box query in the given projects,
+    archived issues excluded. Without the index, matches are ordered by
+    last update.
+
+    Returns:
+        (issue IDs best match first, total number of matches)
+    """
+    session = session or db.session
+    criteria = [Issue.project_id.in_(project_ids), Issue.is_archived == False]
+    if not index_available(session):
+        statement = sa.select(Issue.id, sa.func.count().over()).where(*criteria, _ilike(query)) \
+            .order_by(Issue.updated_at.desc())
+    elif _dialect(session) == 'postgresql':
+        tsquery = _postgres_query(query)
+        if tsquery is None:
+            return [], 0
+        statement = sa.select(Issue.id, sa.func.count().over()) \
+            .join(_search, _search.c.issue_id == Issue.id) \
+            .where(*criteria, _search.c.document.op('@@')(tsquery)) \
+            .order_by(sa.func.ts_rank_cd(_search.c.document, tsquery).desc(), Issue.updated_at.desc())
+    else:
+        match = match_expression(query)
+        if match is None:
+            return [], 0
+        # Materialized: otherwise SQLite drives the join from issue and runs
+        # the MATCH once per issue of the projects
+        ranked = sa.select(_search.c.rowid, sa.func.bm25(_search_column, *BM25_WEIGHTS).label('rank')) \
+            .where(_search_column.op('MATCH')(match)).cte('ranked').prefix_with('MATERIALIZED')
+        statement = sa.select(Issue.id, sa.func.count().over()) \
+            .select_from(ranked).join(Issue, Issue.id == ranked.c.rowid) \
+            .where(*criteria) \
+            .order_by(ranked.c.rank, Issue.updated_at.desc())
+    rows = _execute(session, statement.limit(limit)).all()
+    return [issue_id for issue_id, _ in rows], rows[0][1] if rows else 0
+
+
+# =============================================================================
+# SYNC LISTENERS
+# =============================================================================
+
+@event.listens_for(Session, 'after_flush')
+def _collect_search_changes(session, flush_context):
+    """Remember issues whose indexed text changed"""
+    changed, removed = set(), set()
+    for obj in session.new:
+        if isinstance(obj, Issue):
+            changed.add(obj.id)
+        elif isinstance(obj, IssueComment):
+            changed.add(obj.issue_id)
+    for obj in session.dirty:
+        if isinstance(obj, Issue):
+            state = db.inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in INDEXED_FIELDS):
+                changed.add(obj.id)
+        elif isinstance(obj, IssueComment):
+            state = db.inspect(obj)
+            if state.attrs.content.history.has_changes() or state.attrs.issue_id.history.has_changes():
+                changed.update(v for v in state.attrs.issue_id.history.sum() if v is not None)
+    for obj in session.deleted:
+        if isinstance(obj, Issue):
+            removed.add(obj.id)
+        elif isinstance(obj, IssueComment):
+            changed.add(obj.issue_id)
+    if changed or removed:
+        pending = session.info.setdefault(PENDING_SEARCH_CHANGES, (set(), set()))
+        pending[0].update(changed)
+        pending[1].update(removed)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _update_search_index(session, flush_context):
+    pending = session.info.pop(PENDING_SEARCH_CHANGES, None)
+    if pending:
+        changed, removed = pending
+        unindex_issues(removed, session)
+        index_issues(changed - removed - {None}, session)
@@ -16,7 +16,7 @@ Additional admin routes remain in app.py for gradual migration.
 
 from datetime import date
 from functools import wraps
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, g
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, g, jsonify, current_app
 from flask_login import login_required, current_user
 
 from extensions import db
@@ -24,6 +24,8 @@ from models import (
     User, Entity, Team, TaskCategory, TaskPreset, Task,
     Module, UserModule, UserEntity, EntityAccessLevel, UserRole, AuditLog
 )
+from modules import invalidate_module_access
+from services import reference_data
 from translations import get_translation as t
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -184,7 +186,7 @@ def entity_new():
             flash(f'Gesellschaft {name_de} wurde erstellt.', 'success')
             return redirect(url_for('admin.entities'))
     
-    parent_entities = Entity.query.filter_by(is_active=True).order_by(Entity.name).all()
+    parent_entities = reference_data.entities()
     return render_template('admin/entity_form.html', entity=None, parent_entities=parent_entities)
 
 
@@ -279,7 +281,7 @@ def team_new():
             flash(f'Team "{name_de}" wurde erstellt.', 'success')
             return redirect(url_for('admin.teams'))
     
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
+    users = reference_data.active_users()
     return render_template('admin/team_form.html', team=None, users=users)
 
 
@@ -327,7 +329,7 @@ def team_edit(team_id):
             flash(f'Team "{team.name}" wurde aktualisiert.', 'success')
             return redirect(url_for('admin.teams'))
     
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
+    users = reference_data.active_users()
     return render_template('admin/team_form.html', team=team, users=users)
 
 
@@ -426,6 +428,78 @@ def category_edit(category_id):
     return render_template('admin/category_form.html', category=category)
 
 
+# ============================================================================
+# MAIL QUEUE
+# ============================================================================
+
+@admin_bp.route('/mail-queue/metrics')
+@admin_required
+def mail_queue_metrics():
+    """Outbound mail queue depth, latency and worker counters (JSON)"""
+    from services import MailQueueService
+    
+    metrics = MailQueueService.get_metrics(window_minutes=request.args.get('window', 60, type=int))
+    pool = current_app.extensions.get('mail_queue_pool')
+    metrics['workers'] = pool.get_stats() if pool else {}
+    return jsonify(metrics)
+
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+@admin_bp.route('/jobs')
+@admin_required
+def jobs():
+    """Background job counts, recent jobs, schedules and worker counters (JSON)"""
+    from models import Job
+    from services import JobService
+    
+    query = Job.query
+    if request.args.get('status'):
+        query = query.filter_by(status=request.args['status'])
+    if request.args.get('type'):
+        query = query.filter_by(type=request.args['type'])
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    recent = query.order_by(Job.run_at.desc(), Job.id.desc()).limit(limit).all()
+    
+    pool = current_app.extensions.get('job_pool')
+    return jsonify({
+        'metrics': JobService.get_metrics(),
+        'jobs': [job.to_dict() for job in recent],
+        'schedules': JobService.schedule_status(),
+        'workers': pool.get_stats() if pool else {},
+    })
+
+
+@admin_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@admin_required
+def job_cancel(job_id):
+    """Cancel a job that has not started yet"""
+    from models import Job
+    from services import JobService
+    
+    job = Job.query.get_or_404(job_id)
+    if not JobService.cancel(job):
+        return jsonify({'success': False, 'status': job.status}), 409
+    log_action('CANCEL', 'Job', job.id, job.type)
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@admin_bp.route('/jobs/<int:job_id>/retry', methods=['POST'])
+@admin_required
+def job_retry(job_id):
+    """Queue a failed or cancelled job again"""
+    from models import Job
+    from services import JobService
+    
+    job = Job.query.get_or_404(job_id)
+    if not JobService.retry(job):
+        return jsonify({'success': False, 'status': job.status}), 409
+    log_action('RETRY', 'Job', job.id, job.type)
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
 # ============================================================================
 # MODULE MANAGEMENT
 # ============================================================================
@@ -451,6 +525,7 @@ def module_toggle(module_id):
         return redirect(url_for('admin.modules'))
     
     module.is_active = not module.is_active
+    invalidate_module_access()
     db.session.commit()
     
     status = 'aktiviert' if module.is_active else 'deaktiviert'
@@ -511,6 +586,7 @@ def user_modules_save(user_id):
                 )
                 db.session.add(um)
     
+    invalidate_module_access(user_id=user_id)
     db.session.commit()
     
     flash('Modulzuweisungen gespeichert.' if lang == 'de' else 'Module assignments saved.', 'success')
@@ -600,7 +676,7 @@ def user_entities_save(user_id):
 def entity_users(entity_id):
     """View users with access to an entity"""
     entity = Entity.query.get_or_404(entity_id)
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
+    users = reference_data.active_users()
     lang = session.get('lang', 'de')
     
     # Get current permissions as dict for easy lookup
@@ -18,6 +18,7 @@ from flask_login import login_required, current_user
 from extensions import db
 from models import Task, TaskPreset, TaskReviewer, TaskEvidence, Comment, Notification, AuditLog
 from modules.projects.models import Project
+from middleware.read_replica import read_only
 from middleware.tenant import (
     get_task_or_404_scoped, get_task_scoped, get_project_or_404_scoped
 )
@@ -360,6 +361,7 @@ def task_workflow_timeline(task_id):
 
 @api_bp.route('/dashboard/status-chart')
 @login_required
+@read_only
 def dashboard_status_chart():
     """Get task status data for dashboard chart"""
     # Build base query - scoped to current tenant
@@ -420,6 +422,7 @@ def dashboard_status_chart():
 
 @api_bp.route('/dashboard/monthly-chart')
 @login_required
+@read_only
 def dashboard_monthly_chart():
     """Get monthly task data for dashboard chart"""
     year = request.args.get('year', type=int, default=date.today().year)
@@ -491,6 +494,7 @@ def dashboard_monthly_chart():
 @login_required
 def presets_list():
     """Get list of active presets"""
+    # Tenant scoping returns the tenant's presets plus the shared ones without a tenant
     presets = TaskPreset.query.filter_by(is_active=True).order_by(TaskPreset.category, TaskPreset.title).all()
     
     return jsonify([{
@@ -498,8 +502,8 @@ def presets_list():
         'title': p.title,
         'category': p.category,
         'description': p.description,
-        'default_period': p.default_period,
-        'estimation_hours': p.estimation_hours
+        'tax_type': p.tax_type,
+        'is_recurring': p.is_recurring
     } for p in presets])
 
 
@@ -514,8 +518,11 @@ def preset_get(preset_id):
         'title': preset.title,
         'category': preset.category,
         'description': preset.description,
-        'default_period': preset.default_period,
-        'estimation_hours': preset.estimation_hours,
+        'title_de': preset.title_de,
+        'title_en': preset.title_en,
+        'tax_type': preset.tax_type,
+        'law_reference': preset.law_reference,
+        'is_recurring': preset.is_recurring,
         'is_active': preset.is_active
     })
 
@@ -526,6 +533,7 @@ def preset_get(preset_id):
 
 @api_bp.route('/dashboard/team-chart')
 @login_required
+@read_only
 def dashboard_team_chart():
     """Get workload by team/owner for bar chart"""
     from collections import Counter
@@ -570,6 +578,7 @@ def dashboard_team_chart():
 
 @api_bp.route('/dashboard/project-velocity/<int:project_id>')
 @login_required
+@read_only
 def dashboard_project_velocity(project_id):
     """Get velocity chart data for a project (last 6 sprints)"""
     from modules.projects.models import Project, Sprint, Issue
@@ -596,7 +605,7 @@ def dashboard_project_velocity(project_id):
     
     for sprint in sprints:
         labels.append(sprint.name)
-        committed.append(sprint.total_points or 0)
+        committed.append(sprint.velocity_committed or 0)
         completed.append(sprint.completed_points or 0)
     
     return jsonify({
@@ -622,6 +631,7 @@ def dashboard_project_velocity(project_id):
 
 @api_bp.route('/dashboard/trends')
 @login_required
+@read_only
 def dashboard_trends():
     """Get completion trends for the last 30 days"""
     from collections import defaultdict
@@ -710,6 +720,7 @@ def dashboard_trends():
 
 @api_bp.route('/dashboard/project-distribution')
 @login_required
+@read_only
 def dashboard_project_distribution():
     """Get issue distribution across user's projects"""
     from modules.projects.models import Project, ProjectMember, Issue
@@ -17,10 +17,11 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 
 from extensions import db
-from models import User, Task, Notification
+from models import User, Task, Notification, NotificationDigestMode
 from services import CalendarService
 from modules import ModuleRegistry
 from middleware.tenant import scope_query_to_tenant
+from middleware.read_replica import read_only
 
 main_bp = Blueprint('main', __name__)
 
@@ -397,7 +398,7 @@ def notifications():
     page = request.args.get('page', 1, type=int)
     per_page = 20
     
-    notifications = Notification.query.filter_by(user_id=current_user.id)\
+    notifications = Notification.query.filter_by(user_id=current_user.id, digest_pending=False)\
         .order_by(Notification.created_at.desc())\
         .paginate(page=page, per_page=per_page, error_out=False)
     
@@ -423,7 +424,7 @@ def mark_notification_read(notification_id):
 @login_required
 def mark_all_notifications_read():
     """Mark all notifications as read"""
-    Notification.query.filter_by(user_id=current_user.id, is_read=False)\
+    Notification.query.filter_by(user_id=current_user.id, is_read=False, digest_pending=False)\
         .update({'is_read': True})
     db.session.commit()
     
@@ -460,6 +461,10 @@ def update_notification_preferences():
     current_user.email_task_approved = 'email_task_approved' in request.form
     current_user.email_task_rejected = 'email_task_rejected' in request.form
     
+    digest_mode = request.form.get('notification_digest')
+    if digest_mode in [m.value for m in NotificationDigestMode]:
+        current_user.notification_digest = digest_mode
+    
     db.session.commit()
     flash('Benachrichtigungseinstellungen gespeichert.', 'success')
     return redirect(url_for('main.profile_notifications'))
@@ -492,6 +497,7 @@ def regenerate_calendar_token():
 
 
 @main_bp.route('/calendar/ical/<token>.ics')
+@read_only
 def calendar_ical_feed(token):
     """Public iCal feed endpoint (no login required, uses token)"""
     user = User.query.filter_by(calendar_token=token).first()
@@ -18,7 +18,8 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 
 from extensions import db
-from models import TaskPreset, TaskCategory, Entity, User, PresetCustomField, AuditLog
+from models import TaskPreset, PresetCustomField, AuditLog
+from services import reference_data
 from translations import get_translation as t
 
 presets_bp = Blueprint('presets', __name__)
@@ -139,9 +140,9 @@ def preset_new():
             flash('Aufgabenvorlage wurde erstellt.', 'success')
             return redirect(url_for('presets.preset_list'))
     
-    entities = Entity.query.filter_by(is_active=True).order_by(Entity.name).all()
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
-    categories = TaskCategory.query.filter_by(is_active=True).order_by(TaskCategory.code).all()
+    entities = reference_data.entities()
+    users = reference_data.active_users()
+    categories = reference_data.categories()
     return render_template('admin/preset_form_enhanced.html', preset=None, entities=entities, users=users, categories=categories, tax_types=categories)
 
 
@@ -187,9 +188,9 @@ def preset_edit(preset_id):
         flash('Aufgabenvorlage wurde aktualisiert.', 'success')
         return redirect(url_for('presets.preset_list'))
     
-    entities = Entity.query.filter_by(is_active=True).order_by(Entity.name).all()
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
-    categories = TaskCategory.query.filter_by(is_active=True).order_by(TaskCategory.code).all()
+    entities = reference_data.entities()
+    users = reference_data.active_users()
+    categories = reference_data.categories()
     return render_template('admin/preset_form_enhanced.html', preset=preset, entities=entities, users=users, categories=categories, tax_types=categories)
 
 
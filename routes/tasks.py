@@ -20,11 +20,12 @@ from werkzeug.utils import secure_filename
 
 from extensions import db
 from models import (
-    Task, TaskTemplate, TaskCategory, TaskEvidence, TaskPreset, TaskReviewer,
+    Task, TaskTemplate, TaskEvidence, TaskReviewer,
     Entity, User, Team, Comment, Notification, AuditLog
 )
-from services import NotificationService, ApprovalService, ApprovalResult, build_task_query
+from services import NotificationService, ApprovalService, ApprovalResult, build_task_query, reference_data
 from translations import TRANSLATIONS
+from middleware.read_replica import read_only
 from middleware.tenant import (
     get_task_or_404_scoped, get_evidence_or_404_scoped, get_comment_or_404_scoped
 )
@@ -118,16 +119,17 @@ def task_list():
     
     # Get filter options - show only accessible entities for non-admins
     if current_user.is_admin() or current_user.is_manager():
-        entities = Entity.query.filter_by(is_active=True).order_by(Entity.name).all()
+        entities = reference_data.entities()
     else:
         entities = current_user.get_accessible_entities('view')
     
-    categories = TaskCategory.query.filter_by(is_active=True).order_by(TaskCategory.code).all()
-    years = db.session.query(Task.year).distinct().order_by(Task.year.desc()).all()
+    categories = reference_data.categories()
+    years = db.session.query(Task.year).filter(Task.tenant_id == g.tenant.id)\
+        .distinct().order_by(Task.year.desc()).all()
     years = [y[0] for y in years]
     
     # Get users for bulk assign modal
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
+    users = reference_data.active_users()
     
     return render_template('tasks/list.html', 
                          tasks=tasks, 
@@ -262,6 +264,7 @@ def task_create():
                         reviewer = User.query.get(reviewer_id)
                         if reviewer:
                             email_service.send_task_assigned(task, reviewer, current_user, lang)
+                db.session.commit()  # Queued emails
                 
                 flash('Aufgabe erfolgreich erstellt.', 'success')
                 return redirect(url_for('tasks.task_detail', task_id=task.id))
@@ -270,11 +273,11 @@ def task_create():
                 flash('Ungültiges Datumsformat.', 'danger')
     
     # GET request - show form
-    entities = Entity.query.filter_by(is_active=True).order_by(Entity.name).all()
+    entities = reference_data.entities()
     templates = TaskTemplate.query.filter_by(is_active=True).order_by(TaskTemplate.keyword).all()
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
+    users = reference_data.active_users()
     teams = Team.query.filter_by(is_active=True).order_by(Team.name).all()
-    presets = TaskPreset.query.filter_by(is_active=True).order_by(TaskPreset.category, TaskPreset.title).all()
+    presets = reference_data.presets()
     
     return render_template('tasks/form.html',
                          task=None,
@@ -349,9 +352,9 @@ def task_edit(task_id):
         return redirect(url_for('tasks.task_detail', task_id=task_id))
     
     # GET request
-    entities = Entity.query.filter_by(is_active=True).order_by(Entity.name).all()
+    entities = reference_data.entities()
     templates = TaskTemplate.query.filter_by(is_active=True).order_by(TaskTemplate.keyword).all()
-    users = User.query.filter_by(is_active=True).order_by(User.name).all()
+    users = reference_data.active_users()
     teams = Team.query.filter_by(is_active=True).order_by(Team.name).all()
     
     return render_template('tasks/form.html',
@@ -434,6 +437,7 @@ def task_change_status(task_id):
             for tr in task.reviewers:
                 if tr.user_id != current_user.id:
                     email_service.send_status_changed(task, tr.user, old_status, new_status, lang)
+        db.session.commit()  # Queued emails
         
         # Status-specific messages
         status_messages = {
@@ -484,6 +488,7 @@ def task_reviewer_action(task_id):
                 owner = User.query.get(task.owner_id)
                 if owner:
                     email_service.send_status_changed(task, owner, 'in_review', 'approved', lang)
+                    db.session.commit()  # Queued email
             
             flash('Alle Prüfer haben genehmigt. Aufgabe ist nun genehmigt.', 'success')
         elif result == ApprovalResult.SUCCESS:
@@ -514,6 +519,7 @@ def task_reviewer_action(task_id):
                 owner = User.query.get(task.owner_id)
                 if owner:
                     email_service.send_status_changed(task, owner, 'in_review', 'rejected', lang)
+                    db.session.commit()  # Queued email
             
             flash('Aufgabe wurde von Ihnen abgelehnt und zur Überarbeitung zurückgewiesen.', 'warning')
         else:
@@ -969,6 +975,7 @@ def task_delete_comment(task_id, comment_id):
 
 @tasks_bp.route('/export/excel')
 @login_required
+@read_only
 def export_excel():
     """Export filtered task list to Excel"""
     from flask import Response
@@ -1007,6 +1014,7 @@ def export_excel():
 
 @tasks_bp.route('/export/summary')
 @login_required
+@read_only
 def export_summary():
     """Export summary report to Excel"""
     from flask import Response
@@ -1037,6 +1045,7 @@ def export_summary():
 
 @tasks_bp.route('/<int:task_id>/export/pdf')
 @login_required
+@read_only
 def export_pdf(task_id):
     """Export single task to PDF"""
     from flask import Response
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark for database engine profiles on SQLite
+
+Runs reader threads (task list queries) and writer threads (small task
+inserts, one commit each) against one SQLite file for a fixed time, once
+with DB_ENGINE_PROFILE=stock (rollback journal, driver defaults) and once
+with DB_ENGINE_PROFILE=tuned (WAL, synchronous=NORMAL, mmap, larger cache,
+busy timeout). Reports throughput, latencies and "database is locked" errors.
+
+Usage:
+    python scripts/bench_engine_profiles.py
+    python scripts/bench_engine_profiles.py --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from config import config, TestingConfig
+from extensions import db, engine_report
+from models import Task, Tenant
+
+
+def build_app(path, profile, rows):
+    """App with a SQLite file seeded with ``rows`` tasks"""
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        DB_ENGINE_PROFILE = profile
+
+    config['bench'] = BenchConfig
+    app = create_app('bench')
+    with app.app_context():
+        db.create_all()
+        tenant = Tenant(name='Bench', slug='bench')
+        db.session.add(tenant)
+        db.session.flush()
+        db.session.add_all([
+            Task(tenant_id=tenant.id, entity_id=1, title=f'Task {i}', year=2026,
+                 due_date=date(2026, 1 + i % 12, 1 + i % 28), status='draft')
+            for i in range(rows)
+        ])
+        db.session.commit()
+        tenant_id = tenant.id
+    return app, tenant_id
+
+
+def reader(app, tenant_id, stop, results):
+    latencies, errors = [], 0
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                Task.query.filter_by(tenant_id=tenant_id, status='draft').order_by(Task.due_date).limit(50).all()
+                Task.query.filter_by(tenant_id=tenant_id).count()
+                db.session.rollback()
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        db.session.remove()
+    results.append(('read', latencies, errors))
+
+
+def writer(app, tenant_id, stop, results):
+    latencies, errors = [], 0
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                db.session.add(Task(tenant_id=tenant_id, entity_id=1, title='New task', year=2026,
+                                    due_date=date(2026, 12, 31), status='draft'))
+                db.session.commit()
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        db.session.remove()
+    results.append(('write', latencies, errors))
+
+
+def summarize(results, kind, elapsed):
+    latencies = sorted(l for k, lat, _ in results if k == kind for l in lat)
+    errors = sum(e for k, _, e in results if k == kind)
+    if not latencies:
+        return 0, 0, 0, errors
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    return (len(latencies) - errors) / elapsed, p50, p95, errors
+
+
+def run(readers, writers, seconds, rows):
+    print(f'{readers} readers + {writers} writers for {seconds}s on {rows} tasks')
+    print(f'{"profile":<8} {"op":<6} {"ops/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"locked":>7}')
+    for profile in ('stock', 'tuned'):
+        with tempfile.TemporaryDirectory() as directory:
+            app, tenant_id = build_app(os.path.join(directory, 'bench.db'), profile, rows)
+            for line in engine_report(app):
+                print(f'  {line}')
+
+            stop, results = threading.Event(), []
+            threads = [threading.Thread(target=reader, args=(app, tenant_id, stop, results))
+                       for _ in range(readers)]
+            threads += [threading.Thread(target=writer, args=(app, tenant_id, stop, results))
+                        for _ in range(writers)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            time.sleep(seconds)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            for kind in ('read', 'write'):
+                rate, p50, p95, errors = summarize(results, kind, elapsed)
+                print(f'{profile:<8} {kind:<6} {rate:>8.0f} {p50:>8.2f} {p95:>8.2f} {errors:>7}')
+
+            with app.app_context():
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark SQLite engine profiles')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=5000, help='Tasks seeded before the run')
+    args = parser.parse_args()
+    run(args.readers, args.writers, args.seconds, args.rows)
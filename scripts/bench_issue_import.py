@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the bulk issue import on SQLite
+
+Generates a CSV export with the given number of issues (types, statuses,
+priorities, assignees, sprints, labels, estimates; every tenth issue with
+a parent, every fifth with a link, comments and worklogs on a share of the
+rows) and imports it into an empty project on a SQLite file with
+import_issues(). Reports the time of the dry run (parsing and validation)
+and of the full import including the commit.
+
+Usage:
+    python scripts/bench_issue_import.py
+    python scripts/bench_issue_import.py --issues 20000 --batch-size 2000
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config, TestingConfig
+from extensions import db
+from models import Tenant, TenantMembership, User
+from modules.projects.importer import import_issues
+from modules.projects.models import Issue, IssueComment, IssueLink, IssueStatus, IssueType, Project, Sprint, Worklog
+
+WORDS = (
+    'Rechnung Kunde Fehler Anmeldung Export Bericht Schnittstelle Suche Kalender Termin Benutzer Rolle '
+    'invoice customer error login export report interface search calendar meeting user role slow fast'
+).split()
+TYPES = ('Story', 'Task', 'Bug')
+STATUSES = ('Open', 'In Progress', 'Done')
+USERS = 20
+
+
+def build_app(path):
+    """App with a SQLite file, one project with types, statuses, sprints and members"""
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+    config['bench'] = BenchConfig
+    app = create_app('bench')
+    with app.app_context():
+        db.create_all()
+        tenant = Tenant(name='Bench', slug='bench')
+        users = [User(email=f'user{n}@example.com', name=f'User {n}') for n in range(USERS)]
+        db.session.add_all([tenant, *users])
+        db.session.flush()
+        db.session.add_all([TenantMembership(tenant_id=tenant.id, user_id=user.id) for user in users])
+        project = Project(key='PRJ', name='Bench', tenant_id=tenant.id)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add_all([IssueType(name=name, project_id=project.id, sort_order=n) for n, name in enumerate(TYPES)])
+        db.session.add_all([
+            IssueStatus(project_id=project.id, name=name, sort_order=n, is_initial=n == 0, is_final=name == 'Done',
+                        category=('todo', 'in_progress', 'done')[n])
+            for n, name in enumerate(STATUSES)
+        ])
+        db.session.add_all([Sprint(project_id=project.id, tenant_id=tenant.id, name=f'Sprint {n}',
+                                   state='active' if n == 9 else 'future') for n in range(10)])
+        db.session.commit()
+        ids = {'project': project.id, 'user': users[0].id}
+    return app, ids
+
+
+def export_csv(issues):
+    """CSV export as produced by another tracker"""
+    rng = random.Random(1)
+    text = lambda n: ' '.join(rng.choice(WORDS) for _ in range(n))
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Key', 'Summary', 'Description', 'Type', 'Status', 'Priority', 'Assignee', 'Reporter',
+                     'Sprint', 'Story Points', 'Labels', 'Original Estimate', 'Parent', 'Link',
+                     'Comment', 'Comment', 'Worklog'])
+    for n in range(1, issues + 1):
+        writer.writerow([
+            f'OLD-{n}', text(6), text(40), rng.choice(TYPES), rng.choice(STATUSES), rng.randint(1, 5),
+            f'user{rng.randrange(USERS)}@example.com', f'User {rng.randrange(USERS)}',
+            f'Sprint {rng.randrange(10)}' if rng.random() < 0.5 else '', rng.choice(('', 1, 2, 3, 5, 8)),
+            'backend, import' if rng.random() < 0.3 else '', rng.choice(('', '2h', '1h 30m', '4h')),
+            f'OLD-{rng.randint(1, n - 1)}' if n > 1 and n % 10 == 0 else '',
+            f'relates_to:OLD-{rng.randint(1, issues)}' if n % 5 == 0 and n != issues else '',
+            f'2026-01-05 10:00;user{rng.randrange(USERS)}@example.com;{text(12)}' if rng.random() < 0.5 else '',
+            text(8) if rng.random() < 0.2 else '',
+            f'1h;2026-01-06;user{rng.randrange(USERS)}@example.com;{text(4)}' if rng.random() < 0.3 else '',
+        ])
+    return output.getvalue().encode('utf-8')
+
+
+def run(issues, batch_size):
+    content = export_csv(issues)
+    print(f'{issues} issues, {len(content) / 1024 / 1024:.1f} MB CSV')
+    with tempfile.TemporaryDirectory() as directory:
+        app, ids = build_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            project = db.session.get(Project, ids['project'])
+
+            start = time.perf_counter()
+            result = import_issues(project, io.BytesIO(content), 'export.csv', ids['user'], dry_run=True)
+            print(f'Dry run: {result.valid} valid, {len(result.errors)} errors in {time.perf_counter() - start:.1f}s')
+
+            start = time.perf_counter()
+            result = import_issues(project, io.BytesIO(content), 'export.csv', ids['user'], batch_size=batch_size)
+            db.session.commit()
+            elapsed = time.perf_counter() - start
+            print(f'Import: {result.created} issues in {elapsed:.1f}s ({result.created / elapsed:.0f} issues/s)')
+
+            counts = {model.__tablename__: db.session.query(model).count()
+                      for model in (Issue, IssueComment, Worklog, IssueLink)}
+            print(', '.join(f'{count} {table}' for table, count in counts.items()))
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the bulk issue import on SQLite')
+    parser.add_argument('--issues', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+    run(args.issues, args.batch_size)
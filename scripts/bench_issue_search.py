@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the issue full-text search index on SQLite
+
+Seeds one project with generated German/English issues, builds the FTS5
+index with reindex() and compares search box queries: the former
+``ILIKE '%term%'`` filter over key, summary and description plus a
+separate count, against search_issues() (bm25-ranked, prefix and stemmed
+matches, count in the same query). Reports p50/p95 latency per query kind.
+
+Usage:
+    python scripts/bench_issue_search.py
+    python scripts/bench_issue_search.py --issues 50000 --repeat 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config, TestingConfig
+from extensions import db
+from models import Tenant
+from modules.projects.models import Issue, IssueStatus, IssueType, Project
+from modules.projects.search import reindex, search_issues
+
+WORDS = (
+    'Rechnung Rechnungen Kunde Kunden Fehler Anmeldung Export Bericht Berichte Schnittstelle Suche '
+    'Kalender Termin Benutzer Rolle Rechte Daten Import Dashboard Ansicht langsam schnell neu alt '
+    'invoice invoices customer error errors login export report reports interface search calendar '
+    'meeting user role permission data import dashboard view slow fast running failed tested update'
+).split()
+
+# Search box input: whole words, stems and half-typed words
+QUERIES = ('rechnung', 'kunden fehler', 'export', 'invoic', 'running', 'dash', 'schnittstellen', 'PRJ-4711')
+
+
+def build_app(path, issues):
+    """App with a SQLite file seeded with ``issues`` issues in one project"""
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+    config['bench'] = BenchConfig
+    app = create_app('bench')
+    with app.app_context():
+        db.create_all()
+        tenant = Tenant(name='Bench', slug='bench')
+        db.session.add(tenant)
+        db.session.flush()
+        project = Project(key='PRJ', name='Bench', tenant_id=tenant.id)
+        db.session.add(project)
+        db.session.flush()
+        issue_type = IssueType(name='Task', project_id=project.id)
+        status = IssueStatus(project_id=project.id, name='Offen', category='todo')
+        db.session.add_all([issue_type, status])
+        db.session.flush()
+
+        # Mostly filler words; 2% of the words are topical (search terms)
+        rng = random.Random(1)
+        syllables = ('ka', 'lo', 'mer', 'tin', 'sa', 'ro', 'ben', 'dul', 'fi', 'gra', 'pe', 'vor')
+        filler = [''.join(rng.choice(syllables) for _ in range(3)) for _ in range(20000)]
+        text = lambda n: ' '.join(rng.choice(WORDS if rng.random() < 0.02 else filler) for _ in range(n))
+        for start in range(0, issues, 10000):
+            db.session.execute(db.insert(Issue), [
+                {'key': f'PRJ-{n + 1}', 'summary': text(6), 'description': text(40), 'project_id': project.id,
+                 'tenant_id': tenant.id, 'type_id': issue_type.id, 'status_id': status.id}
+                for n in range(start, min(start + 10000, issues))
+            ])
+        db.session.commit()
+        project_id = project.id
+    return app, project_id
+
+
+def ilike_search(query, project_ids, limit=10):
+    """The previous api_search filter"""
+    term = f'%{query}%'
+    search = Issue.query.filter(
+        Issue.project_id.in_(project_ids), Issue.is_archived == False,
+        db.or_(Issue.key.ilike(term), Issue.summary.ilike(term), Issue.description.ilike(term))
+    )
+    return [i.id for i in search.order_by(Issue.updated_at.desc()).limit(limit)], search.count()
+
+
+def timed(func, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000, result
+
+
+def run(issues, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        app, project_id = build_app(os.path.join(directory, 'bench.db'), issues)
+        print(f'{issues} issues seeded in {time.perf_counter() - start:.1f}s')
+
+        with app.app_context():
+            start = time.perf_counter()
+            reindex(batch_size=5000)
+            db.session.commit()
+            print(f'Index built in {time.perf_counter() - start:.1f}s')
+
+            print(f'{"query":<16} {"ilike p50":>10} {"p95":>8} {"hits":>7}   {"index p50":>10} {"p95":>8} {"hits":>7}')
+            for query in QUERIES:
+                ilike = timed(lambda: ilike_search(query, [project_id]), repeat)
+                index = timed(lambda: search_issues(query, [project_id]), repeat)
+                print(f'{query:<16} {ilike[0]:>10.1f} {ilike[1]:>8.1f} {ilike[2][1]:>7}   '
+                      f'{index[0]:>10.1f} {index[1]:>8.1f} {index[2][1]:>7}')
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the issue search index on SQLite')
+    parser.add_argument('--issues', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query')
+    args = parser.parse_args()
+    run(args.issues, args.repeat)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for per-tenant databases on SQLite
+
+Starts one writer thread per tenant; every writer commits small task
+inserts as fast as it can. The run is repeated with all tenants in one
+SQLite file (shared) and with every tenant in its own file via
+TENANT_DATABASES / Tenant.db_bind (sharded). Reports throughput, commit
+latency and "database is locked" errors.
+
+Usage:
+    python scripts/bench_tenant_shards.py
+    python scripts/bench_tenant_shards.py --tenants 16 --writes 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from config import config, TestingConfig
+from extensions import db, tenant_bind
+from models import Task, Tenant
+from services import TenantShardService
+
+
+def build_app(directory, tenants, sharded):
+    """App with a default database file and (optionally) one file per tenant"""
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'main.db')}"
+        TENANT_DATABASES = {
+            f'tenant{i}': f"sqlite:///{os.path.join(directory, f'tenant{i}.db')}"
+            for i in range(tenants)
+        } if sharded else {}
+
+    config['bench'] = BenchConfig
+    app = create_app('bench')
+    with app.app_context():
+        db.create_all()
+        for name in BenchConfig.TENANT_DATABASES:
+            TenantShardService.create_schema(name)
+        for i in range(tenants):
+            db.session.add(Tenant(name=f'Tenant {i}', slug=f'tenant-{i}',
+                                  db_bind=f'tenant{i}' if sharded else None))
+        db.session.commit()
+        binds = [(t.id, t.db_bind) for t in Tenant.query.order_by(Tenant.id)]
+    return app, binds
+
+
+def writer(app, tenant_id, bind, writes, results):
+    latencies, errors = [], 0
+    with app.app_context(), tenant_bind(bind):
+        for i in range(writes):
+            start = time.perf_counter()
+            try:
+                db.session.add(Task(tenant_id=tenant_id, entity_id=1, title=f'Task {i}', year=2026,
+                                    due_date=date(2026, 12, 31), status='draft'))
+                db.session.commit()
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        db.session.remove()
+    results.append((latencies, errors))
+
+
+def run(tenants, writes):
+    print(f'{tenants} tenants x {writes} commits, one writer thread per tenant')
+    print(f'{"mode":<8} {"seconds":>8} {"commits/s":>10} {"p50 ms":>8} {"p95 ms":>8} {"locked":>7}')
+    for sharded in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            app, binds = build_app(directory, tenants, sharded)
+            results = []
+            threads = [
+                threading.Thread(target=writer, args=(app, tenant_id, bind, writes, results))
+                for tenant_id, bind in binds
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            latencies = sorted(l for lat, _ in results for l in lat)
+            errors = sum(e for _, e in results)
+            p50 = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[int(len(latencies) * 0.95)] * 1000
+            committed = len(latencies) - errors
+            print(f'{"sharded" if sharded else "shared":<8} {elapsed:>8.2f} {committed / elapsed:>10.0f} '
+                  f'{p50:>8.2f} {p95:>8.2f} {errors:>7}')
+
+            with app.app_context():
+                for engine in db.engines.values():
+                    engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark per-tenant SQLite databases')
+    parser.add_argument('--tenants', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=200, help='Commits per tenant')
+    args = parser.parse_args()
+    run(args.tenants, args.writes)
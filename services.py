@@ -10,13 +10,18 @@ from enum import Enum
 from dataclasses import dataclass
 from typing import Optional, List, Tuple
 import logging
+import os
 import smtplib
+import socket
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 from markupsafe import escape
-from extensions import db
-from models import Task, TaskReviewer, User
+from sqlalchemy import event
+from extensions import db, call_after_commit, TenantRoutingSession
+from models import Task, TaskReviewer, User, EmailQueue, EmailQueueStatus
 
 # Logger for email operations
 email_logger = logging.getLogger('email_service')
@@ -641,20 +646,45 @@ class WorkflowService:
 # NOTIFICATION SERVICE
 # ============================================================================
 
+# Session.info key of notifications created without a loaded recipient; their
+# digest_pending flag is set at flush time (see _resolve_digest_pending)
+UNRESOLVED_DIGEST = 'unresolved_digest_notifications'
+
+
 class NotificationService:
     """
     Service for creating and managing in-app notifications.
     Integrates with SocketIO for real-time delivery.
+    
+    Routine notifications (DIGEST_TYPES) for users with an hourly or daily
+    digest preference are stored as held (``digest_pending``) and folded by
+    NotificationDigestService instead of being shown and pushed one by one.
+    The digest reduces what users receive (entries in the notification list,
+    socket pushes and one email per event), not database writes: held rows
+    are inserted as usual and replaced by one digest row per type.
     """
     
+    DIGEST_TYPES = frozenset({
+        'task_assigned', 'reviewer_added', 'task_status_changed', 'task_comment'
+    })
+    
+    @staticmethod
+    def uses_digest(user) -> bool:
+        """True if the user receives routine notifications as a digest"""
+        return getattr(user, 'notification_digest', None) in ('hourly', 'daily')
+    
     @staticmethod
     def create(user_id: int, notification_type: str, title_de: str, title_en: str,
                message_de: str = None, message_en: str = None,
                entity_type: str = None, entity_id: int = None,
-               actor_id: int = None) -> 'Notification':
+               actor_id: int = None, recipient=None) -> 'Notification':
         """
         Create a notification for a user.
         
+        Whether a routine notification is held for the digest is decided
+        from ``recipient`` if the caller has the User loaded, otherwise at
+        flush time with one query for all new notifications.
+        
         Args:
             user_id: Target user ID
             notification_type: Type from NotificationType enum
@@ -665,6 +695,7 @@ class NotificationService:
             entity_type: Related entity type ('task', 'comment', etc.)
             entity_id: Related entity ID
             actor_id: User who triggered the notification
+            recipient: The target User, if already loaded
             
         Returns:
             Created Notification object (not yet committed)
@@ -684,6 +715,11 @@ class NotificationService:
             entity_id=entity_id,
             actor_id=actor_id
         )
+        if notification_type in NotificationService.DIGEST_TYPES:
+            if recipient is not None:
+                notification.digest_pending = NotificationService.uses_digest(recipient)
+            else:
+                db.session.info.setdefault(UNRESOLVED_DIGEST, []).append(notification)
         db.session.add(notification)
         return notification
     
@@ -717,7 +753,7 @@ class NotificationService:
     def get_unread_count(user_id: int) -> int:
         """Get count of unread notifications for a user."""
         from models import Notification
-        return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+        return Notification.query.filter_by(user_id=user_id, is_read=False, digest_pending=False).count()
     
     @staticmethod
     def get_recent(user_id: int, limit: int = 10, include_read: bool = True) -> List['Notification']:
@@ -733,7 +769,7 @@ class NotificationService:
             List of Notification objects, newest first
         """
         from models import Notification
-        query = Notification.query.filter_by(user_id=user_id)
+        query = Notification.query.filter_by(user_id=user_id, digest_pending=False)
         if not include_read:
             query = query.filter_by(is_read=False)
         return query.order_by(Notification.created_at.desc()).limit(limit).all()
@@ -752,7 +788,7 @@ class NotificationService:
             Pagination object
         """
         from models import Notification
-        return Notification.query.filter_by(user_id=user_id)\
+        return Notification.query.filter_by(user_id=user_id, digest_pending=False)\
             .order_by(Notification.created_at.desc())\
             .paginate(page=page, per_page=per_page, error_out=False)
     
@@ -790,7 +826,7 @@ class NotificationService:
         """
         from models import Notification
         count = Notification.query.filter_by(
-            user_id=user_id, is_read=False
+            user_id=user_id, is_read=False, digest_pending=False
         ).update({'is_read': True, 'read_at': datetime.utcnow()})
         return count
     
@@ -918,6 +954,21 @@ class NotificationService:
         )
 
 
+@event.listens_for(TenantRoutingSession, 'before_flush')
+def _resolve_digest_pending(session, flush_context, instances):
+    """Load the digest preference of all recipients of new notifications in one query"""
+    pending = [n for n in session.info.pop(UNRESOLVED_DIGEST, ()) if n in session.new]
+    if not pending:
+        return
+    with session.no_autoflush:
+        digest_users = {user_id for (user_id,) in session.query(User.id).filter(
+            User.id.in_({n.user_id for n in pending}),
+            User.notification_digest.in_(('hourly', 'daily'))
+        )}
+    for notification in pending:
+        notification.digest_pending = notification.user_id in digest_users
+
+
 # ============================================================================
 # EXPORT SERVICE
 # ============================================================================
@@ -1678,6 +1729,9 @@ class EmailService:
         
         Returns:
             True if sent successfully, False otherwise
+        
+        With MAIL_QUEUE_ENABLED the email is only added to the session as an
+        EmailQueue row; it is delivered after the caller commits.
         """
         if not self.is_enabled:
             email_logger.info(f"Email disabled - would send to {to_email}: {subject}")
@@ -1695,6 +1749,9 @@ class EmailService:
             text_content = re.sub(r'\s+', ' ', text_content).strip()
         
         try:
+            if self.app.config.get('MAIL_QUEUE_ENABLED', False):
+                MailQueueService.enqueue(to_email, subject, html_content, text_content, from_email)
+                return True
             if self.provider == 'sendgrid':
                 return self._send_via_sendgrid(to_email, subject, html_content, text_content, from_email)
             elif self.provider == 'ses':
@@ -1705,8 +1762,9 @@ class EmailService:
             email_logger.error(f"Failed to send email to {to_email}: {str(e)}")
             return False
     
-    def _send_via_smtp(self, to_email, subject, html_content, text_content, from_email) -> bool:
-        """Send email via SMTP"""
+    @staticmethod
+    def _build_mime_message(to_email, subject, html_content, text_content, from_email) -> MIMEMultipart:
+        """Build a multipart/alternative message with plain text and HTML parts"""
         msg = MIMEMultipart('alternative')
         msg['Subject'] = subject
         msg['From'] = from_email
@@ -1717,6 +1775,11 @@ class EmailService:
         part2 = MIMEText(html_content, 'html', 'utf-8')
         msg.attach(part1)
         msg.attach(part2)
+        return msg
+    
+    def _send_via_smtp(self, to_email, subject, html_content, text_content, from_email) -> bool:
+        """Send email via SMTP"""
+        msg = self._build_mime_message(to_email, subject, html_content, text_content, from_email)
         
         server = self.app.config.get('MAIL_SERVER', 'localhost')
         port = self.app.config.get('MAIL_PORT', 587)
@@ -1818,6 +1881,9 @@ class EmailService:
         if not assignee.email_notifications or not assignee.email_on_assignment:
             email_logger.debug(f"User {assignee.email} has assignment emails disabled")
             return True
+        if NotificationService.uses_digest(assignee):
+            email_logger.debug(f"User {assignee.email} receives assignment emails as a digest")
+            return True
         
         app_url = self.app.config.get('APP_URL', 'http://localhost:5000')
         task_url = f"{app_url}/tasks/{task.id}"
@@ -1827,21 +1893,26 @@ class EmailService:
         else:
             subject = f"New Task Assigned: {task.title}"
         
-        html_content = self._render_email_template('task_assigned', {
+        context = {
             'task': task,
             'assignee': assignee,
             'assigned_by': assigned_by,
             'task_url': task_url,
             'lang': lang
-        })
+        }
+        html_content = self._render_email_template('task_assigned', context)
+        text_content = self._render_email_text('task_assigned', context)
         
-        return self.send_email(assignee.email, subject, html_content)
+        return self.send_email(assignee.email, subject, html_content, text_content)
     
     def send_status_changed(self, task: 'Task', user: 'User', old_status: str, new_status: str, lang: str = 'de') -> bool:
         """Send status change notification to task owner and reviewers"""
         if not user.email_notifications or not user.email_on_status_change:
             email_logger.debug(f"User {user.email} has status change emails disabled")
             return True
+        if NotificationService.uses_digest(user):
+            email_logger.debug(f"User {user.email} receives status change emails as a digest")
+            return True
         
         app_url = self.app.config.get('APP_URL', 'http://localhost:5000')
         task_url = f"{app_url}/tasks/{task.id}"
@@ -1851,16 +1922,18 @@ class EmailService:
         else:
             subject = f"Status Changed: {task.title} - {new_status}"
         
-        html_content = self._render_email_template('status_changed', {
+        context = {
             'task': task,
             'user': user,
             'old_status': old_status,
             'new_status': new_status,
             'task_url': task_url,
             'lang': lang
-        })
+        }
+        html_content = self._render_email_template('status_changed', context)
+        text_content = self._render_email_text('status_changed', context)
         
-        return self.send_email(user.email, subject, html_content)
+        return self.send_email(user.email, subject, html_content, text_content)
     
     def send_due_reminder(self, task: 'Task', user: 'User', days_until_due: int, lang: str = 'de') -> bool:
         """Send due date reminder"""
@@ -1886,21 +1959,26 @@ class EmailService:
             else:
                 subject = f"Due in {days_until_due} days: {task.title}"
         
-        html_content = self._render_email_template('due_reminder', {
+        context = {
             'task': task,
             'user': user,
             'days_until_due': days_until_due,
             'task_url': task_url,
             'lang': lang
-        })
+        }
+        html_content = self._render_email_template('due_reminder', context)
+        text_content = self._render_email_text('due_reminder', context)
         
-        return self.send_email(user.email, subject, html_content)
+        return self.send_email(user.email, subject, html_content, text_content)
     
     def send_comment_notification(self, task: 'Task', commenter: 'User', recipient: 'User', comment_text: str, lang: str = 'de') -> bool:
         """Send new comment notification"""
         if not recipient.email_notifications or not recipient.email_on_comment:
             email_logger.debug(f"User {recipient.email} has comment emails disabled")
             return True
+        if NotificationService.uses_digest(recipient):
+            email_logger.debug(f"User {recipient.email} receives comment emails as a digest")
+            return True
         
         app_url = self.app.config.get('APP_URL', 'http://localhost:5000')
         task_url = f"{app_url}/tasks/{task.id}"
@@ -1910,230 +1988,228 @@ class EmailService:
         else:
             subject = f"New Comment: {task.title}"
         
-        html_content = self._render_email_template('new_comment', {
+        context = {
             'task': task,
             'commenter': commenter,
             'recipient': recipient,
             'comment_text': comment_text,
             'task_url': task_url,
             'lang': lang
-        })
+        }
+        html_content = self._render_email_template('new_comment', context)
+        text_content = self._render_email_text('new_comment', context)
         
-        return self.send_email(recipient.email, subject, html_content)
+        return self.send_email(recipient.email, subject, html_content, text_content)
     
-    def _render_email_template(self, template_name: str, context: dict) -> str:
-        """Render an email template with Deloitte branding"""
-        # Base styles
-        base_style = """
-            body { font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #333; }
-            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-            .header { background: #000000; color: #FFFFFF; padding: 20px; text-align: center; }
-            .header img { height: 30px; }
-            .header h1 { margin: 10px 0 0 0; font-size: 18px; font-weight: normal; }
-            .content { padding: 30px 20px; background: #FFFFFF; }
-            .task-card { background: #F5F5F5; border-left: 4px solid #86BC25; padding: 15px; margin: 20px 0; border-radius: 4px; }
-            .task-title { font-size: 18px; font-weight: bold; color: #000; margin-bottom: 10px; }
-            .task-meta { color: #666; font-size: 14px; }
-            .btn { display: inline-block; padding: 12px 24px; background: #86BC25; color: #FFFFFF; text-decoration: none; border-radius: 4px; font-weight: bold; }
-            .btn:hover { background: #6B9B1E; }
-            .btn-danger { background: #DC3545; }
-            .btn-warning { background: #FFA500; color: #000; }
-            .footer { padding: 20px; text-align: center; color: #999; font-size: 12px; background: #F5F5F5; }
-            .status-badge { display: inline-block; padding: 4px 12px; border-radius: 20px; font-size: 12px; font-weight: bold; }
-            .status-completed { background: #E8F5E9; color: #2E7D32; }
-            .status-in_review { background: #E3F2FD; color: #1565C0; }
-            .status-submitted { background: #FFF3E0; color: #E65100; }
-            .status-draft { background: #EEEEEE; color: #616161; }
-            .status-rejected { background: #FFEBEE; color: #C62828; }
-        """
-        
-        lang = context.get('lang', 'de')
-        task = context.get('task')
-        task_url = context.get('task_url', '#')
-        
-        # Template-specific content
-        if template_name == 'task_assigned':
-            assignee = context.get('assignee')
-            assigned_by = context.get('assigned_by')
-            
-            if lang == 'de':
-                greeting = f"Hallo {assignee.name},"
-                intro = f"<strong>{assigned_by.name}</strong> hat Ihnen eine neue Aufgabe zugewiesen:"
-                due_label = "Fälligkeitsdatum"
-                entity_label = "Mandant"
-                btn_text = "Aufgabe öffnen"
-            else:
-                greeting = f"Hello {assignee.name},"
-                intro = f"<strong>{assigned_by.name}</strong> has assigned you a new task:"
-                due_label = "Due Date"
-                entity_label = "Entity"
-                btn_text = "Open Task"
-            
-            content = f"""
-                <p>{greeting}</p>
-                <p>{intro}</p>
-                <div class="task-card">
-                    <div class="task-title">{task.title}</div>
-                    <div class="task-meta">
-                        <p><strong>{due_label}:</strong> {task.due_date.strftime('%d.%m.%Y') if task.due_date else 'N/A'}</p>
-                        <p><strong>{entity_label}:</strong> {task.entity.name if task.entity else 'N/A'}</p>
-                    </div>
-                </div>
-                <p style="text-align: center;">
-                    <a href="{task_url}" class="btn">{btn_text}</a>
-                </p>
-            """
-        
-        elif template_name == 'status_changed':
-            user = context.get('user')
-            old_status = context.get('old_status', '')
-            new_status = context.get('new_status', '')
-            
-            if lang == 'de':
-                greeting = f"Hallo {user.name},"
-                intro = "Der Status einer Ihrer Aufgaben wurde geändert:"
-                from_label = "Von"
-                to_label = "Zu"
-                btn_text = "Details anzeigen"
-            else:
-                greeting = f"Hello {user.name},"
-                intro = "The status of one of your tasks has been changed:"
-                from_label = "From"
-                to_label = "To"
-                btn_text = "View Details"
-            
-            content = f"""
-                <p>{greeting}</p>
-                <p>{intro}</p>
-                <div class="task-card">
-                    <div class="task-title">{task.title}</div>
-                    <div class="task-meta">
-                        <p>{from_label}: <span class="status-badge status-{old_status}">{old_status.upper()}</span></p>
-                        <p>{to_label}: <span class="status-badge status-{new_status}">{new_status.upper()}</span></p>
-                    </div>
-                </div>
-                <p style="text-align: center;">
-                    <a href="{task_url}" class="btn">{btn_text}</a>
-                </p>
-            """
-        
-        elif template_name == 'due_reminder':
-            user = context.get('user')
-            days_until_due = context.get('days_until_due', 0)
-            
-            if lang == 'de':
-                greeting = f"Hallo {user.name},"
-                if days_until_due == 0:
-                    intro = "Die folgende Aufgabe ist <strong>heute fällig</strong>:"
-                    btn_class = "btn btn-warning"
-                elif days_until_due < 0:
-                    intro = f"Die folgende Aufgabe ist <strong>{abs(days_until_due)} Tage überfällig</strong>:"
-                    btn_class = "btn btn-danger"
-                else:
-                    intro = f"Die folgende Aufgabe ist in <strong>{days_until_due} Tagen fällig</strong>:"
-                    btn_class = "btn"
-                due_label = "Fälligkeitsdatum"
-                btn_text = "Aufgabe bearbeiten"
-            else:
-                greeting = f"Hello {user.name},"
-                if days_until_due == 0:
-                    intro = "The following task is <strong>due today</strong>:"
-                    btn_class = "btn btn-warning"
-                elif days_until_due < 0:
-                    intro = f"The following task is <strong>{abs(days_until_due)} days overdue</strong>:"
-                    btn_class = "btn btn-danger"
-                else:
-                    intro = f"The following task is due in <strong>{days_until_due} days</strong>:"
-                    btn_class = "btn"
-                due_label = "Due Date"
-                btn_text = "Edit Task"
-            
-            content = f"""
-                <p>{greeting}</p>
-                <p>{intro}</p>
-                <div class="task-card">
-                    <div class="task-title">{task.title}</div>
-                    <div class="task-meta">
-                        <p><strong>{due_label}:</strong> {task.due_date.strftime('%d.%m.%Y') if task.due_date else 'N/A'}</p>
-                    </div>
-                </div>
-                <p style="text-align: center;">
-                    <a href="{task_url}" class="{btn_class}">{btn_text}</a>
-                </p>
-            """
-        
-        elif template_name == 'new_comment':
-            recipient = context.get('recipient')
-            commenter = context.get('commenter')
-            comment_text = context.get('comment_text', '')
-            
-            if lang == 'de':
-                greeting = f"Hallo {recipient.name},"
-                intro = f"<strong>{commenter.name}</strong> hat einen Kommentar zu einer Aufgabe hinzugefügt:"
-                comment_label = "Kommentar"
-                btn_text = "Zur Diskussion"
-            else:
-                greeting = f"Hello {recipient.name},"
-                intro = f"<strong>{commenter.name}</strong> added a comment to a task:"
-                comment_label = "Comment"
-                btn_text = "View Discussion"
-            
-            content = f"""
-                <p>{greeting}</p>
-                <p>{intro}</p>
-                <div class="task-card">
-                    <div class="task-title">{task.title}</div>
-                    <div class="task-meta">
-                        <p><strong>{comment_label}:</strong></p>
-                        <blockquote style="border-left: 3px solid #86BC25; padding-left: 15px; margin: 10px 0; color: #555;">
-                            {comment_text[:500]}{'...' if len(comment_text) > 500 else ''}
-                        </blockquote>
-                    </div>
-                </div>
-                <p style="text-align: center;">
-                    <a href="{task_url}" class="btn">{btn_text}</a>
-                </p>
-            """
+    def send_due_digest(self, user: 'User', items: list, lang: str = 'de') -> bool:
+        """
+        Send one daily digest of due and overdue tasks.
+        
+        Args:
+            user: Recipient
+            items: Dicts with title, entity_name, due_date, days_until_due and task_url
+            lang: Language code
+        """
+        if not user.email_notifications or not user.email_on_due_reminder:
+            email_logger.debug(f"User {user.email} has due reminder emails disabled")
+            return True
+        
+        overdue = [i for i in items if i['days_until_due'] < 0]
+        due_today = [i for i in items if i['days_until_due'] == 0]
+        upcoming = [i for i in items if i['days_until_due'] > 0]
+        
+        if lang == 'de':
+            subject = f"Erinnerung: {len(items)} Aufgabe(n) fällig"
+            if overdue:
+                subject += f", {len(overdue)} überfällig"
         else:
-            content = "<p>Email content</p>"
+            subject = f"Reminder: {len(items)} task(s) due"
+            if overdue:
+                subject += f", {len(overdue)} overdue"
+        
+        context = {
+            'user': user,
+            'overdue': overdue,
+            'due_today': due_today,
+            'upcoming': upcoming,
+            'lang': lang
+        }
+        html_content = self._render_email_template('due_digest', context)
+        text_content = self._render_email_text('due_digest', context)
+        
+        return self.send_email(user.email, subject, html_content, text_content)
+    
+    def send_notification_digest(self, user: 'User', groups: list, lang: str = 'de') -> bool:
+        """
+        Send the email for one notification digest run.
+        
+        Args:
+            user: Recipient
+            groups: Dicts with notification_type, count, title and items (top titles)
+            lang: Language code
+        """
+        type_switches = {
+            'task_assigned': user.email_on_assignment,
+            'reviewer_added': user.email_on_assignment,
+            'task_status_changed': user.email_on_status_change,
+            'task_comment': user.email_on_comment,
+        }
+        groups = [g for g in groups if type_switches.get(g['notification_type'], True)]
+        if not user.email_notifications or not groups:
+            return True
         
-        # Footer
+        total = sum(g['count'] for g in groups)
         if lang == 'de':
-            footer_text = "Diese E-Mail wurde automatisch von Deloitte ProjectOps generiert."
-            unsubscribe_text = "E-Mail-Einstellungen verwalten"
+            subject = f"Ihre Zusammenfassung: {total} Benachrichtigung(en)"
         else:
-            footer_text = "This email was automatically generated by Deloitte ProjectOps."
-            unsubscribe_text = "Manage email settings"
+            subject = f"Your digest: {total} notification(s)"
         
-        app_url = self.app.config.get('APP_URL', 'http://localhost:5000')
+        context = {
+            'user': user,
+            'groups': groups,
+            'notifications_url': f"{self._template_context({})['app_url']}/notifications",
+            'lang': lang
+        }
+        html_content = self._render_email_template('notification_digest', context)
+        text_content = self._render_email_text('notification_digest', context)
         
-        # Full HTML template
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>{base_style}</style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Deloitte ProjectOps</h1>
-                </div>
-                <div class="content">
-                    {content}
-                </div>
-                <div class="footer">
-                    <p>{footer_text}</p>
-                    <p><a href="{app_url}/profile/notifications">{unsubscribe_text}</a></p>
-                </div>
-            </div>
-        </body>
-        </html>
+        return self.send_email(user.email, subject, html_content, text_content)
+    
+    def _render_email_template(self, template_name: str, context: dict) -> str:
+        """Render the HTML part of an email template with Deloitte branding"""
+        return email_templates.render(template_name, self._template_context(context), kind='html')
+    
+    def _render_email_text(self, template_name: str, context: dict) -> str:
+        """Render the plain text part of an email template"""
+        return email_templates.render(template_name, self._template_context(context), kind='txt')
+    
+    def _template_context(self, context: dict) -> dict:
+        """Add values shared by all email templates"""
+        app_url = self.app.config.get('APP_URL', 'http://localhost:5000') if self.app else 'http://localhost:5000'
+        return dict(context, app_url=app_url, lang=context.get('lang', 'de'))
+
+
+class EmailTemplateRenderer:
+    """
+    Compiled, cached email templates.
+    
+    Templates live in ``templates/emails`` as ``<name>.html`` with a parallel
+    ``<name>.txt`` for the plain text part. Each (template, language) pair is
+    compiled once: the CSS from ``email.css`` is inlined into the HTML source
+    while loading (mail clients drop ``<style>`` blocks), and the language is
+    bound as a template global, so rendering only evaluates the variables.
+    """
+    
+    CSS_FILE = 'email.css'
+    
+    def __init__(self, template_dir: str = None):
+        self.template_dir = template_dir or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'templates', 'emails'
+        )
+        self._environments = {}
+        self._templates = {}
+        self._lock = threading.Lock()
+    
+    def _create_environment(self, lang: str):
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        
+        renderer = self
+        
+        class InliningLoader(FileSystemLoader):
+            """Inline CSS into HTML sources as they are loaded"""
+            def get_source(self, environment, template):
+                source, filename, uptodate = super().get_source(environment, template)
+                if template.endswith('.html'):
+                    source = renderer.inline_css(source, renderer._read_css())
+                return source, filename, uptodate
+        
+        env = Environment(
+            loader=InliningLoader(self.template_dir),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        env.globals['lang'] = lang
+        return env
+    
+    def _read_css(self) -> str:
+        with open(os.path.join(self.template_dir, self.CSS_FILE), encoding='utf-8') as f:
+            return f.read()
+    
+    @staticmethod
+    def inline_css(html: str, css: str) -> str:
+        """
+        Copy simple CSS rules into ``style`` attributes.
+        
+        Only element selectors (``body``) and single class selectors
+        (``.btn``) are inlined; descendant and pseudo-class rules stay in the
+        ``<style>`` block. Class names built from template expressions are
+        skipped, and an element's own ``style`` attribute keeps precedence.
         """
+        import re
+        
+        tag_styles, class_styles = {}, {}
+        for selectors, declarations in re.findall(r'([^{}]+)\{([^}]*)\}', css):
+            declarations = ' '.join(declarations.split()).strip().rstrip(';')
+            for selector in selectors.split(','):
+                selector = selector.strip()
+                if re.fullmatch(r'\.[\w-]+', selector):
+                    class_styles[selector[1:]] = declarations
+                elif re.fullmatch(r'[a-z][a-z0-9]*', selector):
+                    tag_styles[selector] = declarations
+        
+        def inline(match):
+            tag, attrs = match.group(1), match.group(2)
+            styles = []
+            if tag.lower() in tag_styles:
+                styles.append(tag_styles[tag.lower()])
+            class_match = re.search(r'\sclass="([^"]*)"', attrs)
+            if class_match:
+                for name in class_match.group(1).split():
+                    if '{' not in name and '}' not in name and name in class_styles:
+                        styles.append(class_styles[name])
+            if not styles:
+                return match.group(0)
+            
+            inlined = '; '.join(styles)
+            style_match = re.search(r'\sstyle="([^"]*)"', attrs)
+            if style_match:
+                attrs = attrs.replace(style_match.group(0), f' style="{inlined}; {style_match.group(1)}"')
+            else:
+                attrs = f'{attrs} style="{inlined}"'
+            return f'<{tag}{attrs}>'
         
-        return html
+        return re.sub(r'<([a-zA-Z][a-zA-Z0-9]*)((?:\s[^>]*)?)>', inline, html)
+    
+    def get_template(self, name: str, lang: str = 'de', kind: str = 'html'):
+        """Compiled template for (name, lang, kind), loading it on first use"""
+        key = (name, lang, kind)
+        template = self._templates.get(key)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(key)
+                if template is None:
+                    env = self._environments.get(lang)
+                    if env is None:
+                        env = self._environments[lang] = self._create_environment(lang)
+                    template = env.get_template(f'{name}.{kind}')
+                    self._templates[key] = template
+        return template
+    
+    def render(self, name: str, context: dict, kind: str = 'html') -> str:
+        """Render a cached template; ``context['lang']`` selects the language"""
+        return self.get_template(name, context.get('lang', 'de'), kind).render(context).strip()
+    
+    def clear(self):
+        """Drop all compiled templates (e.g. after editing template files)"""
+        with self._lock:
+            self._environments.clear()
+            self._templates.clear()
+
+
+# Global email template cache
+email_templates = EmailTemplateRenderer()
 
 
 # Global email service instance
@@ -2141,142 +2217,1826 @@ email_service = EmailService()
 
 
 # ============================================================================
-# RECURRENCE SERVICE
+# OUTBOUND MAIL QUEUE
 # ============================================================================
 
-class RecurrenceService:
+class MailQueueService:
     """
-    Service for managing recurring task generation from TaskPresets.
+    Persistent outbound mail queue backed by the EmailQueue table.
     
-    Supports multiple recurrence patterns:
-    - monthly: Every month on a specific day
-    - quarterly: Every quarter (Q1, Q2, Q3, Q4)
-    - semi_annual: Twice a year (H1, H2)
-    - annual: Once a year
-    - custom: Using RRULE strings for complex patterns
+    Request handlers only add a row to their transaction, so an email is
+    queued exactly when the change it reports is committed and a rollback
+    discards it. MailQueueWorker instances lease due rows in batches,
+    deliver them and reschedule failures with exponential backoff.
     """
     
     @staticmethod
-    def get_period_dates(frequency: str, year: int, day_offset: int = 10) -> List[Tuple[str, 'date']]:
+    def enqueue(to_email: str, subject: str, html_content: str, text_content: str = None,
+                from_email: str = None, tenant_id: Optional[int] = None) -> EmailQueue:
         """
-        Generate period labels and due dates for a given frequency and year.
+        Store an email for background delivery.
         
         Args:
-            frequency: Recurrence frequency (monthly, quarterly, semi_annual, annual)
-            year: Year to generate dates for
-            day_offset: Day of period when task is due (default: 10th)
+            to_email: Recipient email address
+            subject: Email subject
+            html_content: HTML body content
+            text_content: Plain text body
+            from_email: Sender address (already formatted)
+            tenant_id: Owning tenant (defaults to the request's tenant)
         
         Returns:
-            List of tuples (period_label, due_date)
+            The queued EmailQueue row (added to the session; the caller
+            commits it together with the change that triggered the email)
         """
-        from datetime import date
-        
-        periods = []
-        
-        if frequency == 'monthly':
-            for month in range(1, 13):
-                # Due date is day_offset of the following month (or current if offset < 0)
-                if day_offset > 0:
-                    # Due on day_offset of the following month
-                    due_month = month + 1
-                    due_year = year
-                    if due_month > 12:
-                        due_month = 1
-                        due_year = year + 1
-                    try:
-                        due_date = date(due_year, due_month, min(day_offset, 28))
-                    except ValueError:
-                        due_date = date(due_year, due_month, 28)
-                else:
-                    # Due within the same month
-                    try:
-                        due_date = date(year, month, abs(day_offset) if day_offset != 0 else 15)
-                    except ValueError:
-                        due_date = date(year, month, 28)
-                
-                periods.append((f'M{month:02d}', due_date))
-        
-        elif frequency == 'quarterly':
-            quarter_months = [(1, 'Q1'), (4, 'Q2'), (7, 'Q3'), (10, 'Q4')]
-            for start_month, quarter in quarter_months:
-                # Due date is day_offset after quarter end
-                end_month = start_month + 2  # Last month of quarter
-                due_month = end_month + 1
-                due_year = year
-                if due_month > 12:
-                    due_month = 1
-                    due_year = year + 1
-                try:
-                    due_date = date(due_year, due_month, min(day_offset if day_offset > 0 else 15, 28))
-                except ValueError:
-                    due_date = date(due_year, due_month, 28)
-                
-                periods.append((quarter, due_date))
+        from flask import current_app, g, has_request_context
         
-        elif frequency == 'semi_annual':
-            # H1 (Jan-Jun) and H2 (Jul-Dec)
-            # H1 due in July, H2 due in January next year
-            periods.append(('H1', date(year, 7, min(day_offset if day_offset > 0 else 15, 28))))
-            periods.append(('H2', date(year + 1, 1, min(day_offset if day_offset > 0 else 15, 28))))
+        if tenant_id is None and has_request_context() and getattr(g, 'tenant', None):
+            tenant_id = g.tenant.id
         
-        elif frequency == 'annual':
-            # Annual task, typically due in following year
-            try:
-                due_date = date(year + 1, 3, min(day_offset if day_offset > 0 else 31, 28))  # Default March 31
-            except ValueError:
-                due_date = date(year + 1, 3, 28)
-            periods.append(('', due_date))
+        item = EmailQueue(
+            tenant_id=tenant_id,
+            to_email=to_email,
+            from_email=from_email,
+            subject=subject[:500],
+            html_content=html_content,
+            text_content=text_content,
+            max_attempts=current_app.config.get('MAIL_QUEUE_MAX_ATTEMPTS', 5),
+            next_attempt_at=datetime.utcnow()
+        )
+        db.session.add(item)
         
-        return periods
+        email_logger.info(f"Email queued for {to_email}: {subject}")
+        return item
     
     @staticmethod
-    def generate_tasks_from_preset(preset, year: int, entities: List = None, 
-                                   owner_id: int = None, force: bool = False) -> List['Task']:
+    def _due_filter(now: datetime, lease_seconds: int):
+        """Rows that are due, including leases abandoned by a crashed worker"""
+        stale_before = now - timedelta(seconds=lease_seconds)
+        return db.or_(
+            db.and_(EmailQueue.status == EmailQueueStatus.PENDING.value,
+                    EmailQueue.next_attempt_at <= now),
+            db.and_(EmailQueue.status == EmailQueueStatus.SENDING.value,
+                    EmailQueue.locked_at < stale_before)
+        )
+    
+    @staticmethod
+    def claim_batch(worker_id: str, limit: int = 50, lease_seconds: int = 300) -> List[EmailQueue]:
         """
-        Generate task instances from a recurring preset.
+        Lease up to ``limit`` due messages for a worker.
+        
+        The lease is taken with a single UPDATE, so concurrent workers never
+        receive the same row.
         
         Args:
-            preset: TaskPreset with recurrence settings
-            year: Year to generate tasks for
-            entities: List of entities to create tasks for (defaults to preset.default_entity)
-            owner_id: Owner for generated tasks (defaults to preset.default_owner_id)
-            force: If True, generate even if tasks already exist for this period
+            worker_id: Unique worker identifier stored in ``locked_by``
+            limit: Maximum number of messages to lease
+            lease_seconds: Age after which another worker may take over a lease
         
         Returns:
-            List of created Task instances
+            Leased EmailQueue rows, oldest first
         """
-        from models import Task, Entity
-        from datetime import date
+        now = datetime.utcnow()
+        due = MailQueueService._due_filter(now, lease_seconds)
+        due_ids = db.select(EmailQueue.id).where(due)\
+            .order_by(EmailQueue.next_attempt_at, EmailQueue.id).limit(limit)
+        
+        db.session.execute(
+            db.update(EmailQueue)
+            .where(EmailQueue.id.in_(due_ids), due)
+            .values(status=EmailQueueStatus.SENDING.value, locked_by=worker_id, locked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
         
-        if not preset.is_recurring or preset.recurrence_frequency == 'none':
-            return []
+        return EmailQueue.query.filter_by(
+            status=EmailQueueStatus.SENDING.value, locked_by=worker_id
+        ).order_by(EmailQueue.id).all()
+    
+    @staticmethod
+    def renew_lease(item: EmailQueue, worker_id: str) -> bool:
+        """
+        Extend a worker's lease on one message right before delivering it.
         
-        # Determine entities
-        if not entities:
-            if preset.default_entity_id:
-                entities = [preset.default_entity]
-            else:
-                # Generate for all active entities
-                entities = Entity.query.filter_by(is_active=True).all()
+        A batch can take longer than the lease (slow SMTP server), so each
+        message is re-leased on its own. Returns False if the lease expired
+        and another worker took the message over; the caller must skip it.
+        """
+        result = db.session.execute(
+            db.update(EmailQueue)
+            .where(EmailQueue.id == item.id,
+                   EmailQueue.status == EmailQueueStatus.SENDING.value,
+                   EmailQueue.locked_by == worker_id)
+            .values(locked_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @staticmethod
+    def mark_sent(item: EmailQueue):
+        """Record a successful delivery"""
+        item.status = EmailQueueStatus.SENT.value
+        item.attempts += 1
+        item.sent_at = datetime.utcnow()
+        item.last_error = None
+        item.locked_by = None
+        item.locked_at = None
+    
+    @staticmethod
+    def mark_failed(item: EmailQueue, error: str, retry_base_seconds: int = 30):
+        """
+        Record a failed delivery and schedule the next attempt.
         
-        # Determine owner
-        owner = owner_id or preset.default_owner_id
+        The delay doubles with every attempt (capped at one hour); after
+        ``max_attempts`` the message is marked as failed for good.
+        """
+        item.attempts += 1
+        item.last_error = str(error)[:2000]
+        item.locked_by = None
+        item.locked_at = None
+        
+        if item.attempts >= item.max_attempts:
+            item.status = EmailQueueStatus.FAILED.value
+            email_logger.error(f"Giving up on email {item.id} to {item.to_email}: {error}")
+        else:
+            delay = min(retry_base_seconds * (2 ** (item.attempts - 1)), 3600)
+            item.status = EmailQueueStatus.PENDING.value
+            item.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            email_logger.warning(f"Email {item.id} to {item.to_email} failed, retry in {delay}s: {error}")
+    
+    @staticmethod
+    def get_metrics(window_minutes: int = 60) -> dict:
+        """
+        Queue depth and delivery latency metrics.
         
-        # Get periods for this frequency
-        periods = RecurrenceService.get_period_dates(
-            preset.recurrence_frequency, 
-            year, 
-            preset.recurrence_day_offset or 10
+        Args:
+            window_minutes: Window for sent counts and latency statistics
+        
+        Returns:
+            Dict with counts per status, depth, oldest pending age and
+            average/p95 latency (seconds from enqueue to delivery)
+        """
+        now = datetime.utcnow()
+        counts = dict(
+            db.session.query(EmailQueue.status, db.func.count(EmailQueue.id))
+            .group_by(EmailQueue.status).all()
         )
+        pending = counts.get(EmailQueueStatus.PENDING.value, 0)
+        sending = counts.get(EmailQueueStatus.SENDING.value, 0)
+        
+        oldest_pending = db.session.query(db.func.min(EmailQueue.created_at)).filter(
+            EmailQueue.status.in_([EmailQueueStatus.PENDING.value, EmailQueueStatus.SENDING.value])
+        ).scalar()
+        
+        window_start = now - timedelta(minutes=window_minutes)
+        recent = db.session.query(EmailQueue.created_at, EmailQueue.sent_at).filter(
+            EmailQueue.status == EmailQueueStatus.SENT.value,
+            EmailQueue.sent_at >= window_start
+        ).all()
+        latencies = sorted((sent_at - created_at).total_seconds() for created_at, sent_at in recent)
+        
+        return {
+            'depth': pending + sending,
+            'pending': pending,
+            'sending': sending,
+            'sent': counts.get(EmailQueueStatus.SENT.value, 0),
+            'failed': counts.get(EmailQueueStatus.FAILED.value, 0),
+            'sent_in_window': len(latencies),
+            'window_minutes': window_minutes,
+            'oldest_pending_seconds': (now - oldest_pending).total_seconds() if oldest_pending else 0,
+            'avg_latency_seconds': sum(latencies) / len(latencies) if latencies else None,
+            'p95_latency_seconds': latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+        }
+
+
+class SMTPConnection:
+    """
+    Long-lived SMTP session reused for many messages.
+    
+    Connects lazily, reconnects once when the server dropped the session and
+    closes itself after ``MAIL_SMTP_IDLE_TIMEOUT`` seconds without traffic.
+    """
+    
+    # Errors that mean the session is gone, not that the message was refused
+    RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+    
+    def __init__(self, config):
+        self.config = config
+        self._smtp = None
+        self._last_used = 0.0
+        self.connects = 0
+    
+    @property
+    def is_open(self) -> bool:
+        return self._smtp is not None
+    
+    def _connect(self):
+        server = self.config.get('MAIL_SERVER', 'localhost')
+        port = self.config.get('MAIL_PORT', 587)
+        timeout = self.config.get('MAIL_SMTP_TIMEOUT', 30)
+        username = self.config.get('MAIL_USERNAME', '')
+        password = self.config.get('MAIL_PASSWORD', '')
+        
+        if self.config.get('MAIL_USE_SSL', False):
+            smtp = smtplib.SMTP_SSL(server, port, timeout=timeout)
+        else:
+            smtp = smtplib.SMTP(server, port, timeout=timeout)
+            if self.config.get('MAIL_USE_TLS', True):
+                smtp.starttls()
         
-        # Check recurrence end date
-        if preset.recurrence_end_date:
-            periods = [(p, d) for p, d in periods if d <= preset.recurrence_end_date]
+        if username and password:
+            smtp.login(username, password)
         
-        created_tasks = []
+        self._smtp = smtp
+        self.connects += 1
+    
+    def _is_idle(self) -> bool:
+        idle_timeout = self.config.get('MAIL_SMTP_IDLE_TIMEOUT', 60)
+        return time.monotonic() - self._last_used > idle_timeout
+    
+    def send(self, from_email: str, to_email: str, message: str):
+        """Send one message, reconnecting once if the session was lost"""
+        if self._smtp is None or self._is_idle():
+            self.close()
+            self._connect()
         
-        for entity in entities:
-            for period, due_date in periods:
+        try:
+            self._smtp.sendmail(from_email, [to_email], message)
+        except self.RECONNECT_ERRORS:
+            self.close()
+            self._connect()
+            self._smtp.sendmail(from_email, [to_email], message)
+        
+        self._last_used = time.monotonic()
+    
+    def close_if_idle(self):
+        """Close the session when it has not been used recently"""
+        if self._smtp is not None and self._is_idle():
+            self.close()
+    
+    def close(self):
+        """Close the session, ignoring errors from an already dead connection"""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
+
+
+class MailQueueWorker:
+    """Delivers queued emails in batches over a single provider session"""
+    
+    _counter = 0
+    
+    def __init__(self, app, worker_id: str = None):
+        self.app = app
+        if worker_id is None:
+            MailQueueWorker._counter += 1
+            worker_id = f'{socket.gethostname()}-{os.getpid()}-{MailQueueWorker._counter}'
+        self.worker_id = worker_id
+        self.connection = SMTPConnection(app.config)
+        self.stats = {'sent': 0, 'failed': 0, 'batches': 0}
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def _deliver(self, item: EmailQueue):
+        """Hand one message to the configured provider; raises on failure"""
+        provider = self.app.config.get('MAIL_PROVIDER', 'smtp')
+        text_content = item.text_content or ''
+        
+        if provider == 'sendgrid':
+            ok = email_service._send_via_sendgrid(item.to_email, item.subject, item.html_content,
+                                                  text_content, item.from_email)
+        elif provider == 'ses':
+            ok = email_service._send_via_ses(item.to_email, item.subject, item.html_content,
+                                             text_content, item.from_email)
+        else:
+            msg = EmailService._build_mime_message(item.to_email, item.subject, item.html_content,
+                                                   text_content, item.from_email)
+            self.connection.send(item.from_email, item.to_email, msg.as_string())
+            ok = True
+        
+        if not ok:
+            raise RuntimeError(f'{provider} rejected the message')
+    
+    def process_batch(self) -> int:
+        """
+        Lease and deliver one batch of due messages.
+        
+        Must run inside an application context.
+        
+        Returns:
+            Number of messages processed (sent or rescheduled)
+        """
+        config = self.app.config
+        items = MailQueueService.claim_batch(
+            self.worker_id,
+            limit=config.get('MAIL_QUEUE_BATCH_SIZE', 50),
+            lease_seconds=config.get('MAIL_QUEUE_LEASE_SECONDS', 300)
+        )
+        
+        for item in items:
+            if not MailQueueService.renew_lease(item, self.worker_id):
+                email_logger.warning(f"Lease on email {item.id} expired, left to worker that took it over")
+                continue
+            try:
+                self._deliver(item)
+                MailQueueService.mark_sent(item)
+                self.stats['sent'] += 1
+                email_logger.info(f"Email {item.id} sent to {item.to_email}: {item.subject}")
+            except Exception as e:
+                MailQueueService.mark_failed(item, e, config.get('MAIL_QUEUE_RETRY_BASE', 30))
+                self.stats['failed'] += 1
+            # Commit per message so a crash never re-sends delivered mail
+            db.session.commit()
+        
+        if items:
+            self.stats['batches'] += 1
+        else:
+            self.connection.close_if_idle()
+        return len(items)
+    
+    def run(self):
+        """Worker loop: process batches until stopped, sleeping while idle"""
+        poll_interval = self.app.config.get('MAIL_QUEUE_POLL_INTERVAL', 2)
+        with self.app.app_context():
+            try:
+                while not self._stop_event.is_set():
+                    try:
+                        processed = self.process_batch()
+                    except Exception:
+                        db.session.rollback()
+                        email_logger.exception(f"Mail queue worker {self.worker_id} failed")
+                        processed = 0
+                    if not processed:
+                        self._stop_event.wait(poll_interval)
+            finally:
+                self.connection.close()
+                db.session.remove()
+    
+    def start(self):
+        """Run the worker loop in a daemon thread"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name=f'mail-worker-{self.worker_id}', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10):
+        """Signal the loop to stop and wait for the current batch to finish"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+class MailQueueWorkerPool:
+    """Fixed-size pool of MailQueueWorker threads for one application"""
+    
+    def __init__(self, app, size: int = None):
+        self.app = app
+        self.size = size if size is not None else app.config.get('MAIL_QUEUE_WORKERS', 2)
+        self.workers = []
+    
+    def start(self):
+        """Start the workers and register the pool on the app"""
+        self.workers = [MailQueueWorker(self.app) for _ in range(self.size)]
+        for worker in self.workers:
+            worker.start()
+        self.app.extensions['mail_queue_pool'] = self
+        email_logger.info(f"Started {self.size} mail queue workers")
+    
+    def stop(self, timeout: float = 10):
+        """Stop all workers"""
+        for worker in self.workers:
+            worker.stop(timeout)
+        self.workers = []
+        self.app.extensions.pop('mail_queue_pool', None)
+    
+    def get_stats(self) -> dict:
+        """In-process delivery counters per worker"""
+        return {
+            worker.worker_id: dict(worker.stats, smtp_connects=worker.connection.connects)
+            for worker in self.workers
+        }
+
+
+# ============================================================================
+# DUE DATE REMINDERS
+# ============================================================================
+
+class DueReminderService:
+    """
+    Daily due-date reminder digests.
+    
+    Each run does one range scan on ``(tenant_id, due_date)`` per tenant,
+    groups the hits by recipient (owner, owner team members, reviewers and
+    reviewer team members) and sends every recipient at most one digest per
+    tenant and day. Sent digests are recorded in ``ReminderLog`` in the same
+    transaction that queues the email, so a restarted or repeated run skips
+    recipients that were already reminded.
+    """
+    
+    CHUNK_SIZE = 500  # Bound IN (...) lists on large tenants
+    
+    @staticmethod
+    def _chunks(values: list, size: int):
+        for i in range(0, len(values), size):
+            yield values[i:i + size]
+    
+    @staticmethod
+    def find_due_tasks(tenant_id: int, today: date, days_ahead: int, overdue_days: int) -> list:
+        """
+        Open tasks of one tenant due within the reminder window.
+        
+        Returns lightweight rows (no ORM objects) ordered by due date.
+        """
+        return db.session.query(
+            Task.id, Task.title, Task.due_date, Task.entity_id,
+            Task.owner_id, Task.owner_team_id, Task.reviewer_id, Task.reviewer_team_id
+        ).filter(
+            Task.tenant_id == tenant_id,
+            Task.due_date >= today - timedelta(days=overdue_days),
+            Task.due_date <= today + timedelta(days=days_ahead),
+            Task.status != 'completed',
+            Task.is_archived == False
+        ).order_by(Task.due_date, Task.id).all()
+    
+    @staticmethod
+    def group_by_recipient(tasks: list) -> dict:
+        """
+        Map user IDs to the IDs of their due tasks.
+        
+        Reviewers and team members are loaded with one query each.
+        """
+        from models import team_members
+        
+        recipients = {}
+        
+        def add(user_id, task_id):
+            if user_id:
+                recipients.setdefault(user_id, set()).add(task_id)
+        
+        task_ids = [t.id for t in tasks]
+        team_ids = list({tid for t in tasks for tid in (t.owner_team_id, t.reviewer_team_id) if tid})
+        
+        members_by_team = {}
+        for chunk in DueReminderService._chunks(team_ids, DueReminderService.CHUNK_SIZE):
+            rows = db.session.query(team_members.c.team_id, team_members.c.user_id).filter(
+                team_members.c.team_id.in_(chunk)
+            )
+            for team_id, user_id in rows:
+                members_by_team.setdefault(team_id, []).append(user_id)
+        
+        for chunk in DueReminderService._chunks(task_ids, DueReminderService.CHUNK_SIZE):
+            rows = db.session.query(TaskReviewer.task_id, TaskReviewer.user_id).filter(
+                TaskReviewer.task_id.in_(chunk)
+            )
+            for task_id, user_id in rows:
+                add(user_id, task_id)
+        
+        for t in tasks:
+            add(t.owner_id, t.id)
+            add(t.reviewer_id, t.id)
+            for team_id in (t.owner_team_id, t.reviewer_team_id):
+                for user_id in members_by_team.get(team_id, ()):
+                    add(user_id, t.id)
+        
+        return recipients
+    
+    @staticmethod
+    def run_for_tenant(tenant_id: int, today: date = None, email: 'EmailService' = None) -> dict:
+        """
+        Send today's digests for one tenant.
+        
+        Args:
+            tenant_id: Tenant to process
+            today: Reminder date (defaults to today)
+            email: EmailService to send with (defaults to one bound to current_app)
+        
+        Returns:
+            Dict with counts of tasks, digests sent and recipients skipped
+        """
+        from flask import current_app
+        from sqlalchemy.exc import IntegrityError
+        from models import Entity, ReminderLog
+        
+        today = today or date.today()
+        config = current_app.config
+        email = email or EmailService(current_app._get_current_object())
+        lang = config.get('DEFAULT_LANGUAGE', 'de')
+        app_url = config.get('APP_URL', 'http://localhost:5000')
+        stats = {'tasks': 0, 'digests': 0, 'skipped': 0}
+        
+        tasks = DueReminderService.find_due_tasks(
+            tenant_id, today,
+            config.get('REMINDER_DAYS_AHEAD', 3),
+            config.get('REMINDER_OVERDUE_DAYS', 14)
+        )
+        stats['tasks'] = len(tasks)
+        if not tasks:
+            return stats
+        
+        recipients = DueReminderService.group_by_recipient(tasks)
+        
+        already_sent = {
+            user_id for (user_id,) in db.session.query(ReminderLog.user_id).filter(
+                ReminderLog.tenant_id == tenant_id, ReminderLog.reminder_date == today
+            )
+        }
+        stats['skipped'] = len(already_sent & recipients.keys())
+        pending_ids = [user_id for user_id in recipients if user_id not in already_sent]
+        if not pending_ids:
+            return stats
+        
+        entity_names = dict(db.session.query(Entity.id, Entity.name).filter(
+            Entity.id.in_({t.entity_id for t in tasks})
+        ))
+        items_by_task = {
+            t.id: {
+                'title': t.title,
+                'entity_name': entity_names.get(t.entity_id),
+                'due_date': t.due_date,
+                'days_until_due': (t.due_date - today).days,
+                'task_url': f"{app_url}/tasks/{t.id}"
+            }
+            for t in tasks
+        }
+        
+        users = []
+        for chunk in DueReminderService._chunks(pending_ids, DueReminderService.CHUNK_SIZE):
+            users.extend(User.query.filter(
+                User.id.in_(chunk),
+                User.is_active == True,
+                User.email_notifications == True,
+                User.email_on_due_reminder == True
+            ).all())
+        
+        for user in users:
+            task_ids = recipients[user.id]
+            items = [items_by_task[t.id] for t in tasks if t.id in task_ids]
+            try:
+                db.session.add(ReminderLog(
+                    tenant_id=tenant_id, user_id=user.id,
+                    reminder_date=today, task_count=len(items)
+                ))
+                db.session.flush()  # Claim the ledger row before sending
+                if not email.send_due_digest(user, items, lang):
+                    db.session.rollback()
+                    continue
+                db.session.commit()
+                stats['digests'] += 1
+            except IntegrityError:
+                # Another scheduler process reminded this user concurrently
+                db.session.rollback()
+                stats['skipped'] += 1
+        
+        return stats
+    
+    @staticmethod
+    def run(today: date = None, email: 'EmailService' = None) -> dict:
+        """
+        Send today's digests for all active tenants.
+        
+        Returns:
+            Aggregated counts, including the number of tenants processed
+        """
+        from extensions import tenant_bind
+        from models import Tenant
+        
+        tenants = db.session.query(Tenant.id, Tenant.db_bind).filter(
+            Tenant.is_active == True, Tenant.is_archived == False
+        ).order_by(Tenant.id).all()
+        
+        totals = {'tenants': 0, 'tasks': 0, 'digests': 0, 'skipped': 0}
+        for tenant_id, bind in tenants:
+            with tenant_bind(bind):
+                stats = DueReminderService.run_for_tenant(tenant_id, today, email)
+            totals['tenants'] += 1
+            for key, value in stats.items():
+                totals[key] += value
+        
+        email_logger.info(f"Due reminders: {totals}")
+        return totals
+
+
+# ============================================================================
+# NOTIFICATION DIGESTS
+# ============================================================================
+
+class NotificationDigestService:
+    """
+    Folds held notifications into per-type digests.
+    
+    Hourly users are folded for everything created before the current hour,
+    daily users for everything before today. Each batch handles a bounded
+    number of users: counts and the top items per (user, tenant, type) are
+    computed in SQL, the held rows are replaced by one digest notification
+    per tenant and type and every user gets one digest email through the
+    mail queue.
+    """
+    
+    TYPE_TITLES = {
+        'task_assigned': ('{n} Aufgaben zugewiesen', '{n} tasks assigned to you'),
+        'reviewer_added': ('{n} Review-Anfragen', '{n} review requests'),
+        'task_status_changed': ('{n} Statusänderungen', '{n} status changes'),
+        'task_comment': ('{n} neue Kommentare', '{n} new comments'),
+    }
+    
+    @staticmethod
+    def _due_filter(now: datetime):
+        """Held notifications whose digest period has ended (needs a join to User)"""
+        from models import Notification
+        from sqlalchemy import and_, func, or_
+        
+        hour_cutoff = now.replace(minute=0, second=0, microsecond=0)
+        day_cutoff = hour_cutoff.replace(hour=0)
+        mode = func.coalesce(User.notification_digest, 'immediate')
+        return and_(
+            Notification.digest_pending == True,
+            or_(
+                and_(mode == 'hourly', Notification.created_at < hour_cutoff),
+                and_(mode == 'daily', Notification.created_at < day_cutoff),
+                # Users who switched back to immediate get their backlog at once
+                mode.notin_(['hourly', 'daily'])
+            )
+        )
+    
+    @staticmethod
+    def _build_digest(user_id: int, tenant_id: Optional[int], notification_type: str, count: int,
+                      top: list) -> 'Notification':
+        from models import Notification
+        
+        title_de, title_en = NotificationDigestService.TYPE_TITLES.get(
+            notification_type, ('{n} Benachrichtigungen', '{n} notifications')
+        )
+        # Keep the link target when every folded event refers to the same object
+        targets = {(row.entity_type, row.entity_id) for row in top}
+        entity_type, entity_id = targets.pop() if len(targets) == 1 and count == len(top) else (None, None)
+        actors = {row.actor_id for row in top}
+        
+        items_de = '; '.join(row.title_de or row.title for row in top)
+        items_en = '; '.join(row.title_en or row.title for row in top)
+        if count > len(top):
+            items_de += f' (+{count - len(top)} weitere)'
+            items_en += f' (+{count - len(top)} more)'
+        
+        return Notification(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            notification_type=notification_type,
+            title=title_de.format(n=count),
+            title_de=title_de.format(n=count),
+            title_en=title_en.format(n=count),
+            message=items_de,
+            message_de=items_de,
+            message_en=items_en,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            actor_id=actors.pop() if len(actors) == 1 and count == len(top) else None,
+            digest_count=count
+        )
+    
+    @staticmethod
+    def process_batch(now: datetime = None, batch_size: int = None, top_items: int = None,
+                      email: 'EmailService' = None) -> dict:
+        """
+        Fold the held notifications of up to ``batch_size`` users and commit.
+        
+        Returns:
+            Dict with users, folded (held rows removed) and digests created
+        """
+        from flask import current_app
+        from models import Notification
+        from sqlalchemy import and_, func, select
+        
+        config = current_app.config
+        now = now or datetime.utcnow()
+        batch_size = batch_size or config.get('NOTIFICATION_DIGEST_BATCH_SIZE', 200)
+        top_items = top_items or config.get('NOTIFICATION_DIGEST_TOP_ITEMS', 3)
+        due = NotificationDigestService._due_filter(now)
+        stats = {'users': 0, 'folded': 0, 'digests': 0}
+        
+        user_ids = [user_id for (user_id,) in db.session.query(Notification.user_id).join(
+            User, User.id == Notification.user_id
+        ).filter(due).distinct().order_by(Notification.user_id).limit(batch_size)]
+        if not user_ids:
+            return stats
+        
+        # Rows held after this point belong to the next run
+        max_id = db.session.query(func.max(Notification.id)).scalar()
+        scope = and_(due, Notification.user_id.in_(user_ids), Notification.id <= max_id)
+        
+        # One digest per tenant, so each stays visible in its tenant
+        counts = db.session.query(
+            Notification.user_id, Notification.tenant_id, Notification.notification_type,
+            func.count(Notification.id)
+        ).join(User, User.id == Notification.user_id).filter(scope).group_by(
+            Notification.user_id, Notification.tenant_id, Notification.notification_type
+        ).all()
+        
+        ranked = select(
+            Notification.user_id, Notification.notification_type, Notification.title,
+            Notification.title_de, Notification.title_en, Notification.entity_type,
+            Notification.entity_id, Notification.actor_id, Notification.tenant_id,
+            func.row_number().over(
+                partition_by=(Notification.user_id, Notification.tenant_id, Notification.notification_type),
+                order_by=(Notification.created_at.desc(), Notification.id.desc())
+            ).label('rank')
+        ).join(User, User.id == Notification.user_id).where(scope).subquery()
+        top_by_group = {}
+        for row in db.session.execute(select(ranked).where(ranked.c.rank <= top_items)):
+            top_by_group.setdefault((row.user_id, row.tenant_id, row.notification_type), []).append(row)
+        
+        held_ids = select(Notification.id).join(User, User.id == Notification.user_id).where(scope)
+        stats['folded'] = db.session.query(Notification).filter(
+            Notification.id.in_(held_ids)
+        ).delete(synchronize_session=False)
+        
+        digests_by_user = {}
+        for user_id, tenant_id, notification_type, count in counts:
+            digest = NotificationDigestService._build_digest(
+                user_id, tenant_id, notification_type, count,
+                top_by_group.get((user_id, tenant_id, notification_type), [])
+            )
+            digest.created_at = now
+            db.session.add(digest)
+            digests_by_user.setdefault(user_id, []).append(digest)
+        
+        email = email or EmailService(current_app._get_current_object())
+        lang = config.get('DEFAULT_LANGUAGE', 'de')
+        for user in User.query.filter(User.id.in_(digests_by_user)).all():
+            groups = [
+                {
+                    'notification_type': d.notification_type,
+                    'count': d.digest_count,
+                    'title': d.get_title(lang),
+                    'items': [(row.title_de if lang == 'de' else row.title_en) or row.title
+                              for row in top_by_group.get((user.id, d.tenant_id, d.notification_type), [])],
+                }
+                for d in digests_by_user[user.id]
+            ]
+            email.send_notification_digest(user, groups, lang)
+        
+        db.session.commit()
+        stats['users'] = len(user_ids)
+        stats['digests'] = sum(len(d) for d in digests_by_user.values())
+        
+        if hasattr(current_app, 'emit_notifications_to_users'):
+            current_app.emit_notifications_to_users(
+                [d for digests in digests_by_user.values() for d in digests], lang
+            )
+        return stats
+    
+    @staticmethod
+    def run(now: datetime = None, batch_size: int = None, max_batches: int = None,
+            email: 'EmailService' = None) -> dict:
+        """
+        Process batches until nothing is due or ``max_batches`` is reached.
+        
+        Returns:
+            Aggregated counts including the number of batches
+        """
+        from flask import current_app
+        
+        max_batches = max_batches or current_app.config.get('NOTIFICATION_DIGEST_MAX_BATCHES', 50)
+        totals = {'batches': 0, 'users': 0, 'folded': 0, 'digests': 0}
+        while totals['batches'] < max_batches:
+            stats = NotificationDigestService.process_batch(now, batch_size, email=email)
+            if not stats['users']:
+                break
+            totals['batches'] += 1
+            for key, value in stats.items():
+                totals[key] += value
+        
+        if totals['batches']:
+            email_logger.info(f"Notification digests: {totals}")
+        return totals
+
+
+# ============================================================================
+# TENANT DATABASES
+# ============================================================================
+
+shard_logger = logging.getLogger('tenant_databases')
+
+
+class TenantMoveError(Exception):
+    """A tenant cannot be moved to the requested database"""
+
+
+class TenantShardService:
+    """
+    Per-tenant databases (``TENANT_DATABASES`` binds, ``Tenant.db_bind``).
+    
+    Every tenant database carries the full schema. Tenant tables are filled
+    by ``move``; ``user`` and ``tenant`` rows are mirrored from the default
+    database (by a ``tenants.mirror`` job) so joins and foreign keys keep
+    working there. All other SHARED_TABLES stay empty outside the default
+    database.
+    
+    Rows keep their ids when a tenant moves, so every database allocates
+    new ids from its own range (``id_range``) and ids stay unique across
+    databases. Tenant databases are SQLite or PostgreSQL.
+    """
+    
+    MIRRORED_TABLES = ('tenant', 'user')
+    BATCH_SIZE = 1000
+    IN_FLIGHT_GRACE = 5  # seconds for requests that started before a switch
+    ID_RANGE = 100_000_000  # ids per database (id columns are 32-bit on PostgreSQL)
+    
+    @staticmethod
+    def engine(name: Optional[str]):
+        """Engine of a tenant database (None = default database)"""
+        if not name:
+            return db.engine
+        if name not in db.engines:
+            raise TenantMoveError(f"Unknown tenant database '{name}'")
+        return db.engines[name]
+    
+    @staticmethod
+    def database_names() -> list:
+        from flask import current_app
+        return list(current_app.config.get('TENANT_DATABASES') or {})
+    
+    @staticmethod
+    def id_range(name: Optional[str]) -> tuple:
+        """
+        First and last id a database allocates.
+        
+        The default database uses the first range, tenant databases follow
+        in TENANT_DATABASES order (so new databases are only appended).
+        """
+        names = TenantShardService.database_names()
+        if name and name not in names:
+            raise TenantMoveError(f"Unknown tenant database '{name}'")
+        slot = names.index(name) + 1 if name else 0
+        return slot * TenantShardService.ID_RANGE + 1, (slot + 1) * TenantShardService.ID_RANGE
+    
+    @staticmethod
+    def id_tables() -> list:
+        """Tenant tables with a generated integer ``id`` primary key"""
+        return [
+            table for table in TenantShardService.tenant_tables()
+            if 'id' in table.c and list(table.primary_key.columns) == [table.c.id]
+            and table.c.id.autoincrement is not False
+        ]
+    
+    @staticmethod
+    def tenant_tables() -> list:
+        """Tenant tables in foreign key order"""
+        import sqlalchemy as sa
+        from extensions import SHARED_TABLES
+        
+        return sa.schema.sort_tables(
+            [t for t in db.metadata.tables.values() if t.name not in SHARED_TABLES]
+        )
+    
+    @staticmethod
+    def ownership(tenant_id: Optional[int]) -> dict:
+        """
+        Map each tenant table to the WHERE clause selecting a tenant's rows.
+        
+        Tables with a ``tenant_id`` filter on it; child tables (comments,
+        activities, memberships, ...) follow their foreign keys to an owned
+        parent. ``tenant_id=None`` selects the shared rows without tenant.
+        """
+        import sqlalchemy as sa
+        
+        clauses = {}
+        for table in TenantShardService.tenant_tables():
+            if 'tenant_id' in table.c:
+                column = table.c.tenant_id
+                clauses[table] = column.is_(None) if tenant_id is None else column == tenant_id
+                continue
+            parents = [
+                fk for fk in table.foreign_keys
+                if fk.column.table in clauses and fk.column.table is not table
+            ]
+            if parents:
+                clauses[table] = sa.or_(*(
+                    fk.parent.in_(sa.select(fk.column).where(clauses[fk.column.table]))
+                    for fk in parents
+                ))
+        return clauses
+    
+    @staticmethod
+    def _sync_table(source, target, table, clause, insert_only: bool = False) -> dict:
+        """
+        Make the rows matching clause in target equal to those in source.
+        
+        Single-column primary keys are compared in key-ordered batches,
+        association tables as whole rows. Returns counts and the keys to
+        delete; deletes are applied by the caller in reverse table order.
+        """
+        import sqlalchemy as sa
+        
+        stats = {'inserted': 0, 'updated': 0, 'deletes': []}
+        pk = list(table.primary_key.columns)
+        
+        if len(pk) != 1:
+            source_rows = set(source.execute(sa.select(table).where(clause)).all())
+            target_rows = set(target.execute(sa.select(table).where(clause)).all())
+            missing = [row._asdict() for row in source_rows - target_rows]
+            if missing:
+                target.execute(table.insert(), missing)
+            stats['inserted'] = len(missing)
+            if not insert_only:
+                stats['deletes'] = [
+                    sa.and_(*(column == value for column, value in zip(table.columns, row)))
+                    for row in target_rows - source_rows
+                ]
+            return stats
+        
+        pk = pk[0]
+        update = table.update().where(pk == sa.bindparam('_pk'))
+        last = None
+        while True:
+            query = sa.select(table).where(clause).order_by(pk).limit(TenantShardService.BATCH_SIZE)
+            existing_query = sa.select(table).where(clause)
+            if last is not None:
+                query = query.where(pk > last)
+                existing_query = existing_query.where(pk > last)
+            rows = source.execute(query).all()
+            done = len(rows) < TenantShardService.BATCH_SIZE
+            if not done:
+                existing_query = existing_query.where(pk <= getattr(rows[-1], pk.name))
+            existing = {getattr(row, pk.name): row for row in target.execute(existing_query)}
+            
+            inserts, updates = [], []
+            for row in rows:
+                key = getattr(row, pk.name)
+                current = existing.pop(key, None)
+                if current is None:
+                    inserts.append(row._asdict())
+                elif current != row and not insert_only:
+                    updates.append({**row._asdict(), '_pk': key})
+            if inserts:
+                target.execute(table.insert(), inserts)
+            if updates:
+                target.execute(update, updates)
+            stats['inserted'] += len(inserts)
+            stats['updated'] += len(updates)
+            if existing and not insert_only:
+                stats['deletes'].append(pk.in_(list(existing)))
+            
+            if done:
+                return stats
+            last = getattr(rows[-1], pk.name)
+    
+    @staticmethod
+    def sync_tenant(tenant_id: int, source_name: Optional[str], target_name: Optional[str]) -> dict:
+        """
+        Copy a tenant's rows from one database to another.
+        
+        Safe to repeat: a second run only writes the rows that changed in
+        between (inserts, updates and deletes). Shared rows without tenant
+        (global presets, categories) are copied once and never updated or
+        deleted. Each table is committed separately so other tenants of the
+        target database are not blocked for the whole copy.
+        """
+        from sqlalchemy.exc import IntegrityError
+        
+        source_engine = TenantShardService.engine(source_name)
+        target_engine = TenantShardService.engine(target_name)
+        totals = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        shared = TenantShardService.ownership(None)
+        pending_deletes = []
+        
+        with source_engine.connect() as source, target_engine.connect() as target:
+            for table, clause in TenantShardService.ownership(tenant_id).items():
+                try:
+                    with target.begin():
+                        if table in shared:
+                            TenantShardService._sync_table(source, target, table, shared[table], insert_only=True)
+                        stats = TenantShardService._sync_table(source, target, table, clause)
+                except IntegrityError as e:
+                    raise TenantMoveError(
+                        f"Rows of table '{table.name}' collide with existing rows in the target database"
+                    ) from e
+                totals['inserted'] += stats['inserted']
+                totals['updated'] += stats['updated']
+                pending_deletes.extend((table, where) for where in stats['deletes'])
+            
+            with target.begin():
+                for table, where in reversed(pending_deletes):
+                    totals['deleted'] += target.execute(table.delete().where(where)).rowcount
+            
+            TenantShardService._reset_sequences(target, target_name)
+        
+        return totals
+    
+    @staticmethod
+    def create_schema(name: str):
+        """
+        Create the full schema in an empty tenant database.
+        
+        SQLite tables get AUTOINCREMENT: without it SQLite continues after
+        the highest id in the table, including ids copied from the default
+        database, instead of using the database's own range.
+        """
+        engine = TenantShardService.engine(name)
+        tables = TenantShardService.id_tables() if engine.dialect.name == 'sqlite' else []
+        for table in tables:
+            table.dialect_options['sqlite']['autoincrement'] = True
+        try:
+            db.metadata.create_all(engine)
+        finally:
+            for table in tables:
+                table.dialect_options['sqlite']['autoincrement'] = False
+        with engine.connect() as connection:
+            TenantShardService._reset_sequences(connection, name)
+    
+    @staticmethod
+    def _reset_sequences(connection, name: Optional[str]):
+        """
+        Continue id generation after the highest id of the database's own range.
+        
+        PostgreSQL sequences are set directly; SQLite only keeps a counter
+        (``sqlite_sequence``) for AUTOINCREMENT tables (see create_schema).
+        """
+        import sqlalchemy as sa
+        
+        start, end = TenantShardService.id_range(name)
+        with connection.begin():
+            if connection.dialect.name == 'sqlite':
+                counters = set(connection.exec_driver_sql(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE '%AUTOINCREMENT%'"
+                ).scalars())
+            for table in TenantShardService.id_tables():
+                last = connection.execute(
+                    sa.select(sa.func.max(table.c.id)).where(table.c.id.between(start, end))
+                ).scalar()
+                if connection.dialect.name == 'postgresql':
+                    connection.execute(sa.text(
+                        "SELECT setval(pg_get_serial_sequence(:table, 'id'), :value, :called)"
+                    ), {'table': f'"{table.name}"', 'value': last or start, 'called': last is not None})
+                elif connection.dialect.name == 'sqlite' and table.name in counters:
+                    connection.exec_driver_sql('DELETE FROM sqlite_sequence WHERE name = ?', (table.name,))
+                    connection.exec_driver_sql(
+                        'INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table.name, last or start - 1)
+                    )
+    
+    @staticmethod
+    def check_id_range(tenant_id: int, source_name: Optional[str], target_name: Optional[str]):
+        """
+        Refuse moves that would push a SQLite database out of its id range.
+        
+        SQLite always continues after the highest id in a table, so rows
+        created in a database with a higher range (e.g. a tenant database
+        when moving back to the default database) cannot be copied there.
+        PostgreSQL sequences ignore copied rows and need no check.
+        """
+        import sqlalchemy as sa
+        
+        if TenantShardService.engine(target_name).dialect.name != 'sqlite':
+            return
+        end = TenantShardService.id_range(target_name)[1]
+        clauses = TenantShardService.ownership(tenant_id)
+        with TenantShardService.engine(source_name).connect() as source:
+            for table in TenantShardService.id_tables():
+                if table not in clauses:
+                    continue
+                last = source.execute(sa.select(sa.func.max(table.c.id)).where(clauses[table])).scalar()
+                if last is not None and last > end:
+                    raise TenantMoveError(
+                        f"Rows of table '{table.name}' have ids outside the range of "
+                        f"{target_name or 'the default database'}"
+                    )
+    
+    @staticmethod
+    def purge_tenant(tenant_id: int, name: Optional[str]) -> int:
+        """Delete a tenant's rows from a database (children first)"""
+        deleted = 0
+        with TenantShardService.engine(name).begin() as connection:
+            for table, clause in reversed(list(TenantShardService.ownership(tenant_id).items())):
+                deleted += connection.execute(table.delete().where(clause)).rowcount
+        return deleted
+    
+    @staticmethod
+    def mirror_rows(keys: dict = None, names: list = None):
+        """
+        Copy ``user``/``tenant`` rows into tenant databases.
+        
+        Rows are upserted (INSERT ... ON CONFLICT DO UPDATE), so tenant rows
+        referencing them never lose their foreign key. Rows deleted in the
+        default database are deleted unless tenant rows still reference
+        them.
+        
+        Args:
+            keys: Table name -> ids to refresh (default: whole tables)
+            names: Tenant databases (default: all configured)
+        """
+        import sqlalchemy as sa
+        from sqlalchemy.exc import IntegrityError
+        
+        names = TenantShardService.database_names() if names is None else names
+        if not names:
+            return
+        tables = [db.metadata.tables[name] for name in TenantShardService.MIRRORED_TABLES]
+        
+        rows = {}
+        with db.engine.connect() as source:
+            for table in tables:
+                query = sa.select(table)
+                if keys is not None:
+                    query = query.where(table.c.id.in_(keys.get(table.name, ())))
+                rows[table] = [row._asdict() for row in source.execute(query)]
+        
+        for name in names:
+            with TenantShardService.engine(name).begin() as target:
+                if target.dialect.name == 'postgresql':
+                    from sqlalchemy.dialects.postgresql import insert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert
+                for table in tables:
+                    if rows[table]:
+                        upsert = insert(table)
+                        target.execute(upsert.on_conflict_do_update(
+                            index_elements=[table.c.id],
+                            set_={c.name: upsert.excluded[c.name] for c in table.c if c.name != 'id'}
+                        ), rows[table])
+                    
+                    if keys is None:
+                        candidates = target.execute(sa.select(table.c.id)).scalars().all()
+                    else:
+                        candidates = keys.get(table.name, ())
+                    for key in set(candidates) - {row['id'] for row in rows[table]}:
+                        try:
+                            with target.begin_nested():
+                                target.execute(table.delete().where(table.c.id == key))
+                        except IntegrityError:
+                            shard_logger.warning(f"{name}: {table.name} {key} is still referenced, kept")
+    
+    @staticmethod
+    def upgrade(name: str) -> str:
+        """
+        Bring a tenant database to the current schema.
+        
+        An empty database gets the full schema and is stamped with the
+        current revisions; an existing one runs the pending migrations.
+        Mirrored tables are refreshed afterwards.
+        """
+        import sqlalchemy as sa
+        from alembic import command
+        from flask import current_app
+        
+        engine = TenantShardService.engine(name)
+        config = current_app.extensions['migrate'].migrate.get_config(x_arg=[f'shard={name}'])
+        if sa.inspect(engine).has_table('alembic_version'):
+            command.upgrade(config, 'heads')
+            with engine.connect() as connection:
+                TenantShardService._reset_sequences(connection, name)
+            result = 'upgraded'
+        else:
+            TenantShardService.create_schema(name)
+            command.stamp(config, 'heads')
+            result = 'created'
+        TenantShardService.mirror_rows(names=[name])
+        return result
+    
+    @staticmethod
+    def move(tenant, target: Optional[str], wait: float = None, purge: bool = True, log=None) -> dict:
+        """
+        Move a tenant to another database while it stays online.
+        
+        1. Copy all rows while the tenant keeps working.
+        2. Pause writes (``is_moving``) and wait until every process has
+           seen the flag (tenant context cache TTL plus a grace period).
+        3. Copy the rows changed during step 1.
+        4. Switch ``db_bind`` and resume writes.
+        5. After another wait, delete the rows from the old database.
+        
+        Reads are served throughout; writes are rejected with 503 between
+        steps 2 and 4 only.
+        """
+        from flask import current_app
+        from middleware.tenant import invalidate_tenant_context
+        
+        log = log or shard_logger.info
+        source = tenant.db_bind or None
+        target = target or None
+        if source == target:
+            raise TenantMoveError(f"Tenant {tenant.slug} already uses this database")
+        TenantShardService.check_id_range(tenant.id, source, target)
+        if wait is None:
+            wait = current_app.config.get('TENANT_CONTEXT_CACHE_TTL', 30) + TenantShardService.IN_FLIGHT_GRACE
+        
+        def set_state(**values):
+            for key, value in values.items():
+                setattr(tenant, key, value)
+            invalidate_tenant_context(tenant_id=tenant.id)
+            db.session.commit()
+        
+        if target:
+            TenantShardService.mirror_rows(names=[target])
+        stats = {'copied': TenantShardService.sync_tenant(tenant.id, source, target)}
+        log(f"Copied {stats['copied']['inserted']} rows")
+        
+        set_state(is_moving=True)
+        try:
+            log(f"Writes paused, waiting {wait}s")
+            time.sleep(wait)
+            stats['delta'] = TenantShardService.sync_tenant(tenant.id, source, target)
+            log(f"Synced delta: {stats['delta']}")
+            set_state(db_bind=target, is_moving=False)
+        except Exception:
+            db.session.rollback()
+            set_state(is_moving=False)
+            raise
+        log(f"Tenant {tenant.slug} now uses {target or 'the default database'}")
+        
+        if purge:
+            time.sleep(wait)
+            stats['purged'] = TenantShardService.purge_tenant(tenant.id, source)
+            log(f"Deleted {stats['purged']} rows from {source or 'the default database'}")
+        return stats
+
+
+@event.listens_for(TenantRoutingSession, 'after_flush')
+def _collect_mirrored_rows(session, flush_context):
+    """Remember users/tenants written by this flush for the tenant databases"""
+    from models import Tenant
+    
+    pending = {}
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (User, Tenant)) and obj.id is not None:
+            pending.setdefault(obj.__tablename__, set()).add(obj.id)
+    session.info['mirror_pending'] = pending
+
+
+@event.listens_for(TenantRoutingSession, 'after_flush_postexec')
+def _queue_mirror_job(session, flush_context):
+    """Queue the mirror job in the same transaction, so it only runs once the rows are committed"""
+    pending = session.info.pop('mirror_pending', None)
+    if pending and TenantShardService.database_names():
+        JobService.enqueue('tenants.mirror', {
+            'keys': {table: sorted(ids) for table, ids in pending.items()}
+        }, commit=False)
+
+
+# ============================================================================
+# READ REPLICA (SQLITE STAND-IN)
+# ============================================================================
+
+class ReadReplicaSyncService:
+    """
+    Copies a SQLite primary into the SQLite read replica.
+    
+    Stands in for database replication in development and tests: every
+    run copies the whole primary with SQLite's online backup API (readers
+    of the replica see either the old or the new copy) and stamps the
+    start time of the copy into the replica's heartbeat table, which
+    middleware/read_replica.py reads as the replica position.
+    """
+    
+    @staticmethod
+    def sync() -> float:
+        """Copy the primary into the replica; returns the new replica position"""
+        from middleware.read_replica import HEARTBEAT_TABLE, replica_position
+        from extensions import READ_REPLICA
+        
+        primary, replica = db.engine, db.engines[READ_REPLICA]
+        if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+            raise ValueError('Replica sync only copies SQLite databases; use database replication otherwise')
+        
+        synced_at = time.time()
+        source, target = primary.raw_connection(), replica.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+            cursor = target.cursor()
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {HEARTBEAT_TABLE} (synced_at REAL NOT NULL)')
+            cursor.execute(f'DELETE FROM {HEARTBEAT_TABLE}')
+            cursor.execute(f'INSERT INTO {HEARTBEAT_TABLE} (synced_at) VALUES (?)', (synced_at,))
+            target.commit()
+        finally:
+            source.close()
+            target.close()
+        replica_position.clear()
+        return synced_at
+
+
+# ============================================================================
+# REFERENCE DATA CACHE
+# ============================================================================
+
+class ReferenceSnapshot:
+    """
+    Read-only copy of a reference row.
+    
+    Holds column values only (no session, no lazy loads), so one snapshot
+    can be shared by all requests and threads. Display helpers listed for
+    the model (``get_name`` etc.) are evaluated against the copied values.
+    """
+    
+    __slots__ = ('_model', '_values', '_methods')
+    
+    def __init__(self, model, values: dict, methods: tuple = ()):
+        from types import MappingProxyType
+        
+        object.__setattr__(self, '_model', model)
+        object.__setattr__(self, '_values', MappingProxyType(dict(values)))
+        object.__setattr__(self, '_methods', tuple(methods))
+    
+    @classmethod
+    def from_row(cls, obj, columns: tuple = None, methods: tuple = ()):
+        names = columns or [c.key for c in obj.__mapper__.column_attrs]
+        return cls.from_values(type(obj), {name: getattr(obj, name) for name in names}, methods)
+    
+    @classmethod
+    def from_values(cls, model, values: dict, methods: tuple = ()):
+        return cls(model, {name: cls._freeze(value) for name, value in values.items()}, methods)
+    
+    @staticmethod
+    def _freeze(value):
+        """Read-only copies of JSON column values"""
+        from types import MappingProxyType
+        
+        if isinstance(value, list):
+            return tuple(ReferenceSnapshot._freeze(v) for v in value)
+        if isinstance(value, dict):
+            return MappingProxyType({k: ReferenceSnapshot._freeze(v) for k, v in value.items()})
+        return value
+    
+    def __getattr__(self, name):
+        values = object.__getattribute__(self, '_values')
+        if name in values:
+            return values[name]
+        if name in object.__getattribute__(self, '_methods'):
+            return getattr(object.__getattribute__(self, '_model'), name).__get__(self)
+        raise AttributeError(name)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError('Reference snapshots are read-only')
+    
+    def __delattr__(self, name):
+        raise AttributeError('Reference snapshots are read-only')
+    
+    def __eq__(self, other):
+        return (isinstance(other, ReferenceSnapshot) and self._model is other._model
+                and self._values.get('id') == other._values.get('id'))
+    
+    def __hash__(self):
+        return hash((self._model, self._values.get('id')))
+    
+    def __reduce__(self):
+        from collections.abc import Mapping
+        
+        def thaw(value):
+            if isinstance(value, tuple):
+                return [thaw(v) for v in value]
+            if isinstance(value, Mapping):
+                return {k: thaw(v) for k, v in value.items()}
+            return value
+        
+        return ReferenceSnapshot.from_values, (self._model, thaw(self._values), self._methods)
+    
+    def __repr__(self):
+        return f"<{self._model.__name__} snapshot {self._values.get('id')}>"
+
+
+class LocalReferenceBackend:
+    """Per-process LRU with TTL; table versions live in this process only"""
+    
+    def __init__(self, size: int):
+        from collections import OrderedDict
+        
+        self.size = size
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+    
+    def versions(self, tables: tuple) -> tuple:
+        return tuple(self._versions.get(table, 0) for table in tables)
+    
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisReferenceBackend(LocalReferenceBackend):
+    """
+    Shared backend for several worker processes.
+    
+    Table versions are Redis counters, so a commit in one process
+    invalidates the snapshots of all others. Snapshots are stored in Redis
+    and kept in the local LRU as a first level.
+    """
+    
+    PREFIX = 'refcache:'
+    
+    def __init__(self, size: int, url: str):
+        import redis
+        
+        super().__init__(size)
+        self.redis = redis.Redis.from_url(url)
+    
+    def versions(self, tables: tuple) -> tuple:
+        values = self.redis.mget([f'{self.PREFIX}version:{table}' for table in tables])
+        return tuple(int(v or 0) for v in values)
+    
+    def bump(self, tables):
+        pipe = self.redis.pipeline()
+        for table in tables:
+            pipe.incr(f'{self.PREFIX}version:{table}')
+        pipe.execute()
+    
+    def get(self, key):
+        import pickle
+        
+        value = super().get(key)
+        if value is None:
+            raw = self.redis.get(self.PREFIX + repr(key))
+            if raw is not None:
+                value = pickle.loads(raw)
+        return value
+    
+    def set(self, key, value, ttl: float):
+        import pickle
+        
+        super().set(key, value, ttl)
+        self.redis.setex(self.PREFIX + repr(key), max(int(ttl), 1), pickle.dumps(value))
+
+
+class ReferenceDataCache:
+    """
+    Cached dropdown/reference lists as tuples of ReferenceSnapshot.
+    
+    Entries are keyed by list, current tenant scope and arguments, and by
+    the version of the table they were read from. Table versions are
+    bumped after every commit that inserted, updated or deleted rows of a
+    cached table (tracked per session), so a commit invalidates the lists
+    without waiting for ``REFERENCE_CACHE_TTL``. User updates only count
+    if they change one of the USER_COLUMNS. ``REFERENCE_CACHE_REDIS_URL``
+    shares entries and versions between processes.
+    
+    Project access lists have a version per tenant instead, bumped only by
+    membership writes and by projects being created, deleted, archived or
+    moved to another tenant; board versions and issue counters change on
+    almost every board write and never affect access.
+    """
+    
+    TABLES = frozenset({'entity', 'task_category', 'task_preset', 'issue_type', 'issue_status', 'module', 'user'})
+    PROJECT_ACCESS = 'project_access'  # version name, per tenant as 'project_access:<tenant_id>'
+    
+    # Never copy secrets into shared snapshots
+    USER_COLUMNS = ('id', 'email', 'name', 'role', 'is_active')
+    
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            from flask import current_app
+            
+            with self._lock:
+                if self._backend is None:
+                    size = current_app.config.get('REFERENCE_CACHE_SIZE', 512)
+                    url = current_app.config.get('REFERENCE_CACHE_REDIS_URL')
+                    backend = None
+                    if url:
+                        try:
+                            backend = RedisReferenceBackend(size, url)
+                        except ImportError:
+                            current_app.logger.error("redis package not installed. Run: pip install redis")
+                    self._backend = backend or LocalReferenceBackend(size)
+        return self._backend
+    
+    def get(self, name: str, model, query_factory, *args, columns: tuple = None, methods: tuple = ()) -> tuple:
+        """
+        Cached result of ``query_factory(*args)`` as snapshots.
+        
+        The key includes the tenant the query is scoped to (see
+        ``tenant_scope_id``), so tenants never see each other's rows.
+        """
+        return self._cached(name, (model.__tablename__,), args,
+                            lambda: self._load(query_factory, args, columns, methods))
+    
+    def _cached(self, name: str, tables: tuple, args: tuple, load):
+        """Cached ``load()``, keyed by name, tenant scope, args and the versions of the tables read"""
+        from flask import current_app
+        from middleware.tenant import tenant_scope_id
+        
+        ttl = current_app.config.get('REFERENCE_CACHE_TTL', 30)
+        if ttl <= 0:
+            return load()
+        
+        key = (name, tenant_scope_id(), args, tables, self.backend.versions(tables))
+        value = self.backend.get(key)
+        if value is None:
+            value = load()
+            self.backend.set(key, value, ttl)
+        return value
+    
+    @staticmethod
+    def _load(query_factory, args, columns, methods) -> tuple:
+        return tuple(
+            ReferenceSnapshot.from_row(obj, columns, methods) for obj in query_factory(*args)
+        )
+    
+    def invalidate(self, tables):
+        """Drop cached lists read from the given tables"""
+        tables = set(tables) & self.TABLES
+        if tables:
+            self.backend.bump(sorted(tables))
+    
+    def invalidate_project_access(self, tenant_ids):
+        """Drop cached project access lists of the given tenants (None = all tenants)"""
+        if tenant_ids:
+            self.backend.bump(sorted(
+                self.PROJECT_ACCESS if tenant_id is None else f'{self.PROJECT_ACCESS}:{tenant_id}'
+                for tenant_id in tenant_ids
+            ))
+    
+    def clear(self):
+        if self._backend is not None:
+            self._backend.clear()
+    
+    # Reference lists ------------------------------------------------------
+    
+    def entities(self) -> tuple:
+        """Active entities, ordered by name"""
+        from models import Entity
+        return self.get('entities', Entity,
+                        lambda: Entity.query.filter_by(is_active=True).order_by(Entity.name),
+                        methods=('get_name',))
+    
+    def categories(self) -> tuple:
+        """Active task categories, ordered by code"""
+        from models import TaskCategory
+        return self.get('categories', TaskCategory,
+                        lambda: TaskCategory.query.filter_by(is_active=True).order_by(TaskCategory.code),
+                        methods=('get_name', 'get_description'))
+    
+    def presets(self) -> tuple:
+        """Active task presets, ordered by category and title"""
+        from models import TaskPreset
+        return self.get('presets', TaskPreset,
+                        lambda: TaskPreset.query.filter_by(is_active=True).order_by(TaskPreset.category, TaskPreset.title),
+                        methods=('get_title', 'get_description'))
+    
+    def issue_types(self, project_id: int) -> tuple:
+        """Issue types of a project, ordered by sort order"""
+        from modules.projects.models import IssueType
+        return self.get('issue_types', IssueType,
+                        lambda pid: IssueType.query.filter_by(project_id=pid).order_by(IssueType.sort_order),
+                        project_id, methods=('get_name',))
+    
+    def issue_statuses(self, project_id: int) -> tuple:
+        """Workflow statuses of a project, ordered by sort order"""
+        from modules.projects.models import IssueStatus
+        return self.get('issue_statuses', IssueStatus,
+                        lambda pid: IssueStatus.query.filter_by(project_id=pid).order_by(IssueStatus.sort_order),
+                        project_id, methods=('get_name', 'can_transition_to'))
+    
+    def modules(self) -> tuple:
+        """Active modules, ordered for the navigation"""
+        from models import Module
+        return self.get('modules', Module,
+                        lambda: Module.query.filter_by(is_active=True).order_by(Module.nav_order, Module.code),
+                        methods=('get_name', 'get_description'))
+    
+    def accessible_project_ids(self, tenant_id: int, user_id: int, all_projects: bool = False) -> frozenset:
+        """
+        IDs of the tenant's non-archived projects a user is a member of
+        (all of them with ``all_projects``, e.g. for admins)
+        """
+        from modules.projects.models import Project, ProjectMember
+        
+        def load():
+            query = db.session.query(Project.id).filter(Project.tenant_id == tenant_id, Project.is_archived == False)
+            if not all_projects:
+                query = query.join(ProjectMember, ProjectMember.project_id == Project.id).filter(
+                    ProjectMember.user_id == user_id
+                )
+            return frozenset(project_id for (project_id,) in query)
+        
+        args = (tenant_id, None if all_projects else user_id)
+        versions = (self.PROJECT_ACCESS, f'{self.PROJECT_ACCESS}:{tenant_id}')
+        return self._cached('accessible_project_ids', versions, args, load)
+    
+    def active_users(self) -> tuple:
+        """Active users for assignment dropdowns, ordered by name"""
+        return self.get('active_users', User,
+                        lambda: User.query.filter_by(is_active=True).order_by(User.name),
+                        columns=self.USER_COLUMNS, methods=('is_admin', 'is_manager', 'can_review'))
+
+
+reference_data = ReferenceDataCache()
+
+
+def _invalidate_tables_after_commit(session, *tables):
+    call_after_commit(reference_data.invalidate, tables, session=session)
+
+
+def _invalidate_project_access_after_commit(session, *tenant_ids):
+    call_after_commit(reference_data.invalidate_project_access, tenant_ids, session=session)
+
+
+@event.listens_for(TenantRoutingSession, 'after_flush')
+def _track_flushed_tables(session, flush_context):
+    from sqlalchemy import inspect
+    from modules.projects.models import Project, ProjectMember
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table == 'user' and obj in session.dirty:
+            # Logins and preference changes do not touch the cached user list
+            state = inspect(obj)
+            if any(state.attrs[column].history.has_changes() for column in ReferenceDataCache.USER_COLUMNS):
+                _invalidate_tables_after_commit(session, table)
+        elif table in ReferenceDataCache.TABLES:
+            _invalidate_tables_after_commit(session, table)
+        elif isinstance(obj, ProjectMember):
+            project = obj.project if 'project' in obj.__dict__ else session.get(Project, obj.project_id)
+            _invalidate_project_access_after_commit(session, project.tenant_id if project else None)
+        elif isinstance(obj, Project):
+            state = inspect(obj)
+            if obj in session.dirty and not (state.attrs.tenant_id.history.has_changes()
+                                             or state.attrs.is_archived.history.has_changes()):
+                continue
+            _invalidate_project_access_after_commit(session, obj.tenant_id, *state.attrs.tenant_id.history.deleted)
+
+
+@event.listens_for(TenantRoutingSession, 'do_orm_execute')
+def _track_bulk_tables(execute_state):
+    """Bulk UPDATE/DELETE/INSERT statements bypass the flush"""
+    if execute_state.is_select:
+        return
+    table = getattr(execute_state.statement, 'table', None)
+    if (getattr(table, 'name', None) == 'user' and execute_state.is_update
+            and not set(execute_state.statement.compile().params) & set(ReferenceDataCache.USER_COLUMNS)):
+        return
+    if getattr(table, 'name', None) in ReferenceDataCache.TABLES:
+        _invalidate_tables_after_commit(execute_state.session, table.name)
+    elif getattr(table, 'name', None) == 'project_member':
+        from middleware.tenant import tenant_scope_id
+        _invalidate_project_access_after_commit(execute_state.session, tenant_scope_id())
+
+
+# ============================================================================
+# RECURRENCE SERVICE
+# ============================================================================
+
+class RecurrenceService:
+    """
+    Service for managing recurring task generation from TaskPresets.
+    
+    Supports multiple recurrence patterns:
+    - monthly: Every month on a specific day
+    - quarterly: Every quarter (Q1, Q2, Q3, Q4)
+    - semi_annual: Twice a year (H1, H2)
+    - annual: Once a year
+    - custom: Using RRULE strings for complex patterns
+    """
+    
+    @staticmethod
+    def get_period_dates(frequency: str, year: int, day_offset: int = 10) -> List[Tuple[str, 'date']]:
+        """
+        Generate period labels and due dates for a given frequency and year.
+        
+        Args:
+            frequency: Recurrence frequency (monthly, quarterly, semi_annual, annual)
+            year: Year to generate dates for
+            day_offset: Day of period when task is due (default: 10th)
+        
+        Returns:
+            List of tuples (period_label, due_date)
+        """
+        from datetime import date
+        
+        periods = []
+        
+        if frequency == 'monthly':
+            for month in range(1, 13):
+                # Due date is day_offset of the following month (or current if offset < 0)
+                if day_offset > 0:
+                    # Due on day_offset of the following month
+                    due_month = month + 1
+                    due_year = year
+                    if due_month > 12:
+                        due_month = 1
+                        due_year = year + 1
+                    try:
+                        due_date = date(due_year, due_month, min(day_offset, 28))
+                    except ValueError:
+                        due_date = date(due_year, due_month, 28)
+                else:
+                    # Due within the same month
+                    try:
+                        due_date = date(year, month, abs(day_offset) if day_offset != 0 else 15)
+                    except ValueError:
+                        due_date = date(year, month, 28)
+                
+                periods.append((f'M{month:02d}', due_date))
+        
+        elif frequency == 'quarterly':
+            quarter_months = [(1, 'Q1'), (4, 'Q2'), (7, 'Q3'), (10, 'Q4')]
+            for start_month, quarter in quarter_months:
+                # Due date is day_offset after quarter end
+                end_month = start_month + 2  # Last month of quarter
+                due_month = end_month + 1
+                due_year = year
+                if due_month > 12:
+                    due_month = 1
+                    due_year = year + 1
+                try:
+                    due_date = date(due_year, due_month, min(day_offset if day_offset > 0 else 15, 28))
+                except ValueError:
+                    due_date = date(due_year, due_month, 28)
+                
+                periods.append((quarter, due_date))
+        
+        elif frequency == 'semi_annual':
+            # H1 (Jan-Jun) and H2 (Jul-Dec)
+            # H1 due in July, H2 due in January next year
+            periods.append(('H1', date(year, 7, min(day_offset if day_offset > 0 else 15, 28))))
+            periods.append(('H2', date(year + 1, 1, min(day_offset if day_offset > 0 else 15, 28))))
+        
+        elif frequency == 'annual':
+            # Annual task, typically due in following year
+            try:
+                due_date = date(year + 1, 3, min(day_offset if day_offset > 0 else 31, 28))  # Default March 31
+            except ValueError:
+                due_date = date(year + 1, 3, 28)
+            periods.append(('', due_date))
+        
+        return periods
+    
+    @staticmethod
+    def generate_tasks_from_preset(preset, year: int, entities: List = None, 
+                                   owner_id: int = None, force: bool = False) -> List['Task']:
+        """
+        Generate task instances from a recurring preset.
+        
+        Args:
+            preset: TaskPreset with recurrence settings
+            year: Year to generate tasks for
+            entities: List of entities to create tasks for (defaults to preset.default_entity)
+            owner_id: Owner for generated tasks (defaults to preset.default_owner_id)
+            force: If True, generate even if tasks already exist for this period
+        
+        Returns:
+            List of created Task instances
+        """
+        from models import Task, Entity
+        from datetime import date
+        
+        if not preset.is_recurring or preset.recurrence_frequency == 'none':
+            return []
+        
+        # Determine entities
+        if not entities:
+            if preset.default_entity_id:
+                entities = [preset.default_entity]
+            else:
+                # Generate for all active entities
+                entities = Entity.query.filter_by(is_active=True).all()
+        
+        # Determine owner
+        owner = owner_id or preset.default_owner_id
+        
+        # Get periods for this frequency
+        periods = RecurrenceService.get_period_dates(
+            preset.recurrence_frequency, 
+            year, 
+            preset.recurrence_day_offset or 10
+        )
+        
+        # Check recurrence end date
+        if preset.recurrence_end_date:
+            periods = [(p, d) for p, d in periods if d <= preset.recurrence_end_date]
+        
+        created_tasks = []
+        
+        for entity in entities:
+            for period, due_date in periods:
                 # Check if task already exists for this preset/entity/period/year
                 existing = Task.query.filter_by(
                     preset_id=preset.id,
@@ -2376,3 +4136,622 @@ class RecurrenceService:
             return []
         except Exception:
             return []
+
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+job_logger = logging.getLogger('jobs')
+
+
+class JobLeaseLost(Exception):
+    """The worker's lease on a job was taken over by another worker"""
+    pass
+
+
+class CronSchedule:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week).
+    
+    Supports ``*``, single values, ranges (``1-5``), steps (``*/15``,
+    ``8-18/2``) and comma-separated lists. Day of week runs from 0 (Sunday)
+    to 6; 7 is accepted for Sunday as well. As in cron, a restricted
+    day-of-month and day-of-week match if either of them matches. Times are
+    naive UTC, like all timestamps in the database.
+    """
+    
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+    
+    def __init__(self, expression: str):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        
+        values = {}
+        for part, (name, low, high) in zip(parts, self.FIELDS):
+            values[name] = self._parse_field(part, name, low, high)
+        self.minutes = values['minute']
+        self.hours = values['hour']
+        self.days = values['day']
+        self.months = values['month']
+        self.weekdays = {w % 7 for w in values['weekday']}
+        self._any_day = parts[2].startswith('*')
+        self._any_weekday = parts[4].startswith('*')
+    
+    @staticmethod
+    def _parse_field(part: str, name: str, low: int, high: int) -> set:
+        result = set()
+        for item in part.split(','):
+            step = 1
+            if '/' in item:
+                item, step_text = item.split('/', 1)
+                if not step_text.isdigit() or int(step_text) < 1:
+                    raise ValueError(f"Invalid step in cron {name}: '{part}'")
+                step = int(step_text)
+            
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start_text, end_text = item.split('-', 1)
+                if not (start_text.isdigit() and end_text.isdigit()):
+                    raise ValueError(f"Invalid cron {name}: '{part}'")
+                start, end = int(start_text), int(end_text)
+            elif item.isdigit():
+                start = int(item)
+                end = high if step > 1 else start
+            else:
+                raise ValueError(f"Invalid cron {name}: '{part}'")
+            
+            if not low <= start <= end <= high:
+                raise ValueError(f"Cron {name} out of range {low}-{high}: '{part}'")
+            result.update(range(start, end + 1, step))
+        return result
+    
+    def _day_matches(self, day: date) -> bool:
+        in_month = day.day in self.days
+        # Python: Monday = 0; cron: Sunday = 0
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+    
+    def matches(self, moment: datetime) -> bool:
+        """True if the schedule fires at this minute"""
+        return (moment.minute in self.minutes and moment.hour in self.hours
+                and moment.month in self.months and self._day_matches(moment.date()))
+    
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        First slot strictly after ``moment``.
+        
+        Skips non-matching months, days and hours as a whole, so sparse
+        schedules need only a few steps.
+        """
+        current = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = current + timedelta(days=366 * 5)
+        while current < limit:
+            if current.month not in self.months:
+                year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+                current = datetime(year, month, 1)
+            elif not self._day_matches(current.date()):
+                current = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+            else:
+                return current
+        raise ValueError(f"Cron expression never fires: '{self.expression}'")
+    
+    def latest_until(self, start: datetime, end: datetime) -> Optional[datetime]:
+        """Last slot in ``(start, end]``, or None"""
+        latest = None
+        slot = self.next_after(start)
+        while slot <= end:
+            latest = slot
+            slot = self.next_after(slot)
+        return latest
+
+
+class JobService:
+    """
+    Persistent background jobs backed by the Job table.
+    
+    Code enqueues a job type with a JSON payload; JobWorker instances lease
+    due jobs one at a time, run the registered handler and retry failures
+    with exponential backoff. Periodic jobs come from the JOB_SCHEDULES
+    setting and are enqueued by the workers themselves, once per slot.
+    
+    Handlers are registered with ``@JobService.register('type')`` and called
+    as ``handler(payload, progress)``. ``progress(percent, message)``
+    records the progress, renews the worker's lease and commits the session,
+    so handlers call it between units of work. The handler's return value
+    is stored as the job result.
+    """
+    
+    handlers = {}
+    
+    @classmethod
+    def register(cls, job_type: str):
+        """Decorator registering a handler for ``job_type``"""
+        def decorator(handler):
+            cls.handlers[job_type] = handler
+            return handler
+        return decorator
+    
+    @staticmethod
+    def enqueue(job_type: str, payload: dict = None, run_at: datetime = None,
+                tenant_id: Optional[int] = None, max_attempts: int = None,
+                created_by_id: Optional[int] = None, commit: bool = True):
+        """
+        Store a job for background execution.
+        
+        Args:
+            job_type: Registered handler name
+            payload: JSON-serializable handler arguments
+            run_at: Earliest start (default: now)
+            tenant_id: Owning tenant (defaults to the request's tenant)
+            max_attempts: Attempts before giving up (default: JOB_MAX_ATTEMPTS)
+            created_by_id: User who requested the job
+            commit: Commit the session (False to enqueue within a larger transaction)
+        
+        Returns:
+            The queued Job row
+        """
+        from flask import current_app, g, has_request_context
+        from models import Job
+        
+        if job_type not in JobService.handlers:
+            raise ValueError(f"Unknown job type '{job_type}'")
+        if tenant_id is None and has_request_context() and getattr(g, 'tenant', None):
+            tenant_id = g.tenant.id
+        
+        job = Job(
+            tenant_id=tenant_id,
+            type=job_type,
+            payload=payload or {},
+            run_at=run_at or datetime.utcnow(),
+            max_attempts=max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 3),
+            created_by_id=created_by_id
+        )
+        db.session.add(job)
+        if commit:
+            db.session.commit()
+        
+        job_logger.info(f"Job {job.id} queued: {job_type}")
+        return job
+    
+    @staticmethod
+    def _due_filter(now: datetime, lease_seconds: int):
+        """Jobs that are due, including leases abandoned by a crashed worker"""
+        from models import Job, JobStatus
+        
+        stale_before = now - timedelta(seconds=lease_seconds)
+        return db.or_(
+            db.and_(Job.status == JobStatus.PENDING.value, Job.run_at <= now),
+            db.and_(Job.status == JobStatus.RUNNING.value, Job.locked_at < stale_before,
+                    Job.attempts < Job.max_attempts)
+        )
+    
+    @staticmethod
+    def fail_abandoned(now: datetime = None, lease_seconds: int = 300) -> int:
+        """Give up on abandoned jobs that used all their attempts (e.g. crash the worker)"""
+        from models import Job, JobStatus
+        
+        now = now or datetime.utcnow()
+        result = db.session.execute(
+            db.update(Job)
+            .where(Job.status == JobStatus.RUNNING.value,
+                   Job.locked_at < now - timedelta(seconds=lease_seconds),
+                   Job.attempts >= Job.max_attempts)
+            .values(status=JobStatus.FAILED.value, locked_by=None, locked_at=None, finished_at=now,
+                    last_error='Worker lease expired')
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def claim(worker_id: str, lease_seconds: int = 300):
+        """
+        Lease the next due job for a worker.
+        
+        The lease is taken with a single UPDATE, so concurrent workers never
+        receive the same job. Every lease counts as an attempt.
+        
+        Args:
+            worker_id: Unique worker identifier stored in ``locked_by``
+            lease_seconds: Age after which another worker may take over a lease
+        
+        Returns:
+            The leased Job, or None if nothing is due
+        """
+        from models import Job, JobStatus
+        
+        now = datetime.utcnow()
+        due = JobService._due_filter(now, lease_seconds)
+        next_id = db.select(Job.id).where(due).order_by(Job.run_at, Job.id).limit(1).scalar_subquery()
+        
+        result = db.session.execute(
+            db.update(Job)
+            .where(Job.id == next_id, due)
+            .values(status=JobStatus.RUNNING.value, locked_by=worker_id, locked_at=now,
+                    started_at=now, attempts=Job.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if not result.rowcount:
+            return None
+        
+        return Job.query.filter_by(status=JobStatus.RUNNING.value, locked_by=worker_id)\
+            .order_by(Job.locked_at.desc(), Job.id.desc()).first()
+    
+    @staticmethod
+    def update_progress(job, worker_id: str, percent: int, message: str = None):
+        """
+        Record a job's progress, renew the lease and commit.
+        
+        Raises:
+            JobLeaseLost: Another worker took over the job
+        """
+        from models import Job
+        
+        result = db.session.execute(
+            db.update(Job)
+            .where(Job.id == job.id, Job.locked_by == worker_id)
+            .values(progress=max(0, min(int(percent), 100)),
+                    progress_message=message[:255] if message else None,
+                    locked_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if not result.rowcount:
+            raise JobLeaseLost(f"Job {job.id} is no longer leased by {worker_id}")
+    
+    @staticmethod
+    def mark_succeeded(job, result=None):
+        """Record a successful run"""
+        from models import JobStatus
+        
+        job.status = JobStatus.SUCCEEDED.value
+        job.progress = 100
+        job.result = result
+        job.last_error = None
+        job.finished_at = datetime.utcnow()
+        job.locked_by = None
+        job.locked_at = None
+    
+    @staticmethod
+    def mark_failed(job, error: str, retry_base_seconds: int = 60):
+        """
+        Record a failed run and schedule the next attempt.
+        
+        The delay doubles with every attempt (capped at one hour); after
+        ``max_attempts`` the job is marked as failed for good.
+        """
+        from models import JobStatus
+        
+        job.last_error = str(error)[:2000]
+        job.locked_by = None
+        job.locked_at = None
+        
+        if job.attempts >= job.max_attempts:
+            job.status = JobStatus.FAILED.value
+            job.finished_at = datetime.utcnow()
+            job_logger.error(f"Giving up on job {job.id} ({job.type}): {error}")
+        else:
+            delay = min(retry_base_seconds * (2 ** (job.attempts - 1)), 3600)
+            job.status = JobStatus.PENDING.value
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+            job_logger.warning(f"Job {job.id} ({job.type}) failed, retry in {delay}s: {error}")
+    
+    @staticmethod
+    def cancel(job) -> bool:
+        """Cancel a job that has not started yet"""
+        from models import JobStatus
+        
+        if job.status != JobStatus.PENDING.value:
+            return False
+        job.status = JobStatus.CANCELLED.value
+        job.finished_at = datetime.utcnow()
+        return True
+    
+    @staticmethod
+    def retry(job) -> bool:
+        """Queue a failed or cancelled job again with fresh attempts"""
+        from models import JobStatus
+        
+        if job.status not in (JobStatus.FAILED.value, JobStatus.CANCELLED.value):
+            return False
+        job.status = JobStatus.PENDING.value
+        job.attempts = 0
+        job.progress = 0
+        job.progress_message = None
+        job.finished_at = None
+        job.run_at = datetime.utcnow()
+        return True
+    
+    # =========================================================================
+    # PERIODIC SCHEDULES
+    # =========================================================================
+    
+    @staticmethod
+    def schedules() -> dict:
+        """Configured schedules: name -> (CronSchedule, job type, payload)"""
+        from flask import current_app
+        
+        return {
+            name: (CronSchedule(spec['cron']), spec['type'], spec.get('payload') or {})
+            for name, spec in current_app.config.get('JOB_SCHEDULES', {}).items()
+        }
+    
+    @staticmethod
+    def _last_slots() -> dict:
+        from models import Job
+        
+        return dict(
+            db.session.query(Job.schedule, db.func.max(Job.run_at))
+            .filter(Job.schedule.isnot(None)).group_by(Job.schedule).all()
+        )
+    
+    @staticmethod
+    def enqueue_due_schedules(now: datetime = None) -> int:
+        """
+        Enqueue one job for the latest due slot of every schedule.
+        
+        Slots missed while no worker ran are coalesced into one run
+        (looking back at most JOB_SCHEDULE_CATCHUP seconds). Every worker
+        calls this; the unique (schedule, run_at) constraint lets exactly
+        one of them insert a slot.
+        
+        Returns:
+            Number of jobs enqueued
+        """
+        from flask import current_app
+        from sqlalchemy.exc import IntegrityError
+        from models import Job
+        
+        now = now or datetime.utcnow()
+        catchup = timedelta(seconds=current_app.config.get('JOB_SCHEDULE_CATCHUP', 3600))
+        last_slots = JobService._last_slots()
+        enqueued = 0
+        
+        for name, (cron, job_type, payload) in JobService.schedules().items():
+            start = max(last_slots.get(name) or now - catchup, now - catchup)
+            slot = cron.latest_until(start, now)
+            if slot is None:
+                continue
+            try:
+                db.session.add(Job(
+                    type=job_type, payload=payload, schedule=name, run_at=slot,
+                    max_attempts=current_app.config.get('JOB_MAX_ATTEMPTS', 3)
+                ))
+                db.session.commit()
+                enqueued += 1
+                job_logger.info(f"Scheduled job {name} for {slot:%Y-%m-%d %H:%M}")
+            except IntegrityError:
+                # Another worker enqueued this slot
+                db.session.rollback()
+        
+        return enqueued
+    
+    @staticmethod
+    def schedule_status(now: datetime = None) -> List[dict]:
+        """Schedules with their last slot, its state and the next slot"""
+        from models import Job
+        
+        now = now or datetime.utcnow()
+        last_slots = JobService._last_slots()
+        status = []
+        for name, (cron, job_type, payload) in JobService.schedules().items():
+            last_job = Job.query.filter_by(schedule=name, run_at=last_slots[name]).first() \
+                if name in last_slots else None
+            status.append({
+                'name': name,
+                'type': job_type,
+                'cron': cron.expression,
+                'last_run_at': last_job.run_at.isoformat() if last_job else None,
+                'last_status': last_job.status if last_job else None,
+                'next_run_at': cron.next_after(now).isoformat(),
+            })
+        return status
+    
+    @staticmethod
+    def get_metrics() -> dict:
+        """
+        Job counts and queue age.
+        
+        Returns:
+            Dict with counts per status, number of due pending jobs and the
+            age of the oldest due job in seconds
+        """
+        from models import Job, JobStatus
+        
+        now = datetime.utcnow()
+        counts = dict(
+            db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+        )
+        due = db.session.query(db.func.count(Job.id), db.func.min(Job.run_at)).filter(
+            Job.status == JobStatus.PENDING.value, Job.run_at <= now
+        ).one()
+        
+        metrics = {status.value: counts.get(status.value, 0) for status in JobStatus}
+        metrics.update({
+            'due': due[0],
+            'oldest_due_seconds': (now - due[1]).total_seconds() if due[1] else 0,
+        })
+        return metrics
+
+
+class JobWorker:
+    """Runs due background jobs one at a time"""
+    
+    _counter = 0
+    
+    def __init__(self, app, worker_id: str = None):
+        self.app = app
+        if worker_id is None:
+            JobWorker._counter += 1
+            worker_id = f'{socket.gethostname()}-{os.getpid()}-{JobWorker._counter}'
+        self.worker_id = worker_id
+        self.stats = {'succeeded': 0, 'failed': 0}
+        self.current_job_id = None
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def run_job(self, job):
+        """Run one leased job and record the outcome"""
+        config = self.app.config
+        handler = JobService.handlers.get(job.type)
+        self.current_job_id = job.id
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type '{job.type}'")
+            result = handler(
+                job.payload or {},
+                lambda percent, message=None: JobService.update_progress(job, self.worker_id, percent, message)
+            )
+            
+            db.session.refresh(job)
+            if job.locked_by != self.worker_id:
+                raise JobLeaseLost(f"Job {job.id} is no longer leased by {self.worker_id}")
+            JobService.mark_succeeded(job, result)
+            self.stats['succeeded'] += 1
+            job_logger.info(f"Job {job.id} ({job.type}) succeeded")
+        except JobLeaseLost as e:
+            # The other worker owns the job now; leave the row alone
+            db.session.rollback()
+            job_logger.warning(str(e))
+        except Exception as e:
+            db.session.rollback()
+            if job.locked_by == self.worker_id:
+                JobService.mark_failed(job, e, config.get('JOB_RETRY_BASE', 60))
+                self.stats['failed'] += 1
+            else:
+                job_logger.warning(f"Job {job.id} failed after losing its lease: {e}")
+        finally:
+            self.current_job_id = None
+        db.session.commit()
+    
+    def process_next(self) -> bool:
+        """
+        Enqueue due schedule slots, then lease and run one due job.
+        
+        Must run inside an application context.
+        
+        Returns:
+            True if a job was run
+        """
+        lease_seconds = self.app.config.get('JOB_LEASE_SECONDS', 300)
+        JobService.enqueue_due_schedules()
+        JobService.fail_abandoned(lease_seconds=lease_seconds)
+        
+        job = JobService.claim(self.worker_id, lease_seconds)
+        if job is None:
+            return False
+        self.run_job(job)
+        return True
+    
+    def run(self, once: bool = False):
+        """Worker loop: run jobs until stopped (or until idle with ``once``)"""
+        poll_interval = self.app.config.get('JOB_POLL_INTERVAL', 5)
+        with self.app.app_context():
+            try:
+                while not self._stop_event.is_set():
+                    try:
+                        processed = self.process_next()
+                    except Exception:
+                        db.session.rollback()
+                        job_logger.exception(f"Job worker {self.worker_id} failed")
+                        processed = False
+                    if not processed:
+                        if once:
+                            break
+                        self._stop_event.wait(poll_interval)
+            finally:
+                db.session.remove()
+    
+    def start(self):
+        """Run the worker loop in a daemon thread"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name=f'job-worker-{self.worker_id}', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 30):
+        """Signal the loop to stop and wait for the current job to finish"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def join(self):
+        """Wait for the worker thread to end"""
+        if self._thread:
+            self._thread.join()
+
+
+class JobWorkerPool:
+    """Fixed-size pool of JobWorker threads for one application"""
+    
+    def __init__(self, app, size: int = None):
+        self.app = app
+        self.size = size if size is not None else app.config.get('JOB_WORKERS', 0)
+        self.workers = []
+    
+    def start(self):
+        """Start the workers and register the pool on the app"""
+        self.workers = [JobWorker(self.app) for _ in range(self.size)]
+        for worker in self.workers:
+            worker.start()
+        self.app.extensions['job_pool'] = self
+        job_logger.info(f"Started {self.size} job workers")
+    
+    def stop(self, timeout: float = 30):
+        """Stop all workers"""
+        for worker in self.workers:
+            worker.stop(timeout)
+        self.workers = []
+        self.app.extensions.pop('job_pool', None)
+    
+    def get_stats(self) -> dict:
+        """In-process counters and the current job per worker"""
+        return {
+            worker.worker_id: dict(worker.stats, current_job_id=worker.current_job_id)
+            for worker in self.workers
+        }
+
+
+# Built-in job types used by the default JOB_SCHEDULES
+
+@JobService.register('reminders.send')
+def _run_due_reminders(payload, progress):
+    return DueReminderService.run()
+
+
+@JobService.register('notifications.digest')
+def _run_notification_digests(payload, progress):
+    return NotificationDigestService.run()
+
+
+@JobService.register('notifications.purge')
+def _purge_notifications(payload, progress):
+    deleted = NotificationService.delete_old_notifications(days=payload.get('days', 90))
+    db.session.commit()
+    return {'deleted': deleted}
+
+
+@JobService.register('tasks.generate_recurring')
+def _generate_recurring_tasks(payload, progress):
+    return RecurrenceService.generate_all_recurring_tasks(payload.get('year') or date.today().year)
+
+
+@JobService.register('replica.sync')
+def _sync_read_replica(payload, progress):
+    return {'synced_at': ReadReplicaSyncService.sync()}
+
+
+@JobService.register('tenants.mirror')
+def _mirror_tenant_rows(payload, progress):
+    TenantShardService.mirror_rows(keys=payload.get('keys'))
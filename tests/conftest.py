@@ -4,6 +4,7 @@ Pytest configuration and fixtures for Deloitte ProjectOps.
 import os
 import sys
 import pytest
+from contextlib import contextmanager
 from datetime import datetime
 
 # Add project root to path
@@ -11,6 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from flask import Flask
 from flask_login import login_user
+from sqlalchemy import event
 
 from extensions import db as _db
 from app import create_app
@@ -74,25 +76,36 @@ def clean_db_tables(db):
         User, Tenant, TenantMembership, TenantApiKey, Notification,
         Task, TaskReviewer, Team, Entity, UserEntity, TaskEvidence, Comment,
         team_members, TaskPreset, PresetCustomField, TaskCustomFieldValue, AuditLog,
-        Module, UserModule, TaskCategory
+        Module, UserModule, TaskCategory, EmailQueue, ReminderLog, Job
     )
     from modules.projects.models import (
         Project, ProjectMember, Sprint, Issue, IssueType, IssueStatus,
-        IssueComment, IssueActivity, IssueAttachment
+        IssueComment, IssueActivity, IssueAttachment, IssueLink, SprintSnapshot, Worklog
     )
     
+    # Bulk deletes must not be narrowed to a tenant left behind in g
+    from flask import g
+    g.pop('tenant', None)
+    
     try:
         # Delete in order of dependencies
+        db.session.query(IssueLink).delete()
         db.session.query(IssueAttachment).delete()
         db.session.query(IssueActivity).delete()
         db.session.query(IssueComment).delete()
+        db.session.query(Worklog).delete()
         db.session.query(Issue).delete()
+        db.session.execute(db.text('DELETE FROM issue_search'))
         db.session.query(IssueType).delete()
         db.session.query(IssueStatus).delete()
+        db.session.query(SprintSnapshot).delete()
         db.session.query(Sprint).delete()
         db.session.query(ProjectMember).delete()
         db.session.query(Project).delete()
         db.session.query(Notification).delete()
+        db.session.query(EmailQueue).delete()
+        db.session.query(ReminderLog).delete()
+        db.session.query(Job).delete()
         db.session.query(TenantApiKey).delete()
         db.session.query(TenantMembership).delete()
         db.session.query(TaskReviewer).delete()
@@ -118,6 +131,43 @@ def clean_db_tables(db):
         db.session.commit()
     except Exception:
         db.session.rollback()
+    # Deleted rows stay in the identity map; the next test reuses their IDs
+    db.session.expunge_all()
+    
+    # Cached tenant contexts refer to rows that no longer exist
+    from middleware.tenant import tenant_context_cache
+    from services import reference_data
+    from modules import module_access
+    from modules.projects.key_index import issue_keys
+    tenant_context_cache.clear()
+    reference_data.clear()
+    module_access.clear()
+    issue_keys.clear()
+
+
+@pytest.fixture
+def count_queries(db):
+    """Context manager collecting the SQL statements executed inside the block.
+    
+    Usage:
+        with count_queries() as statements:
+            ...
+        assert len(statements) == 1
+    """
+    @contextmanager
+    def collect():
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    
+    return collect
 
 
 @pytest.fixture(scope='function')
@@ -363,6 +413,7 @@ def sprint(db, project):
     sprint = Sprint(
         name='Sprint 1',
         project_id=project.id,
+        tenant_id=project.tenant_id,
         start_date=datetime.utcnow().date(),
         end_date=(datetime.utcnow() + timedelta(days=14)).date(),
         goal='Complete sprint goals'
@@ -437,6 +488,92 @@ def issue(db, project, issue_type, issue_status, user, tenant):
     # Cleanup handled by clean_db_tables fixture
 
 
+# Board columns by status category: (name, name_en)
+BOARD_STATUSES = {
+    'todo': ('Offen', 'Open'),
+    'in_progress': ('In Arbeit', 'In Progress'),
+    'done': ('Fertig', 'Done'),
+}
+
+
+@pytest.fixture
+def board(request, db, project, sprint, issue_type, admin_user):
+    """Create board columns, the admin as project member and the projects module.
+
+    Returns a dict of IDs: project, key, tenant, type, sprint, admin, one
+    entry per status category and ``statuses`` in column order. All three
+    categories are created unless the fixture is parametrized indirectly:
+
+        @pytest.mark.parametrize('board', [['todo', 'done']], indirect=True)
+    """
+    from models import Module
+    from modules.projects.models import IssueStatus, ProjectMember
+
+    categories = getattr(request, 'param', list(BOARD_STATUSES))
+    statuses = [
+        IssueStatus(
+            project_id=project.id,
+            name=BOARD_STATUSES[category][0],
+            name_en=BOARD_STATUSES[category][1],
+            category=category,
+            sort_order=i,
+            is_initial=i == 0,
+            is_final=category == 'done'
+        )
+        for i, category in enumerate(categories)
+    ]
+    db.session.add_all(statuses)
+    db.session.add(ProjectMember(project_id=project.id, user_id=admin_user.id, role='admin'))
+    if not Module.query.filter_by(code='projects').first():
+        db.session.add(Module(code='projects', name_de='Projekte', name_en='Projects', is_active=True))
+    db.session.commit()
+
+    ids = {
+        'project': project.id, 'key': project.key, 'tenant': project.tenant_id, 'type': issue_type.id,
+        'sprint': sprint.id, 'admin': admin_user.id, 'statuses': [status.id for status in statuses],
+    }
+    ids.update((status.category, status.id) for status in statuses)
+    yield ids
+    # Cleanup handled by clean_db_tables fixture
+
+
+@pytest.fixture
+def add_issues(db, board):
+    """Factory fixture adding issues to the board project.
+
+    Usage:
+        ids = add_issues(3, sprint_id=board['sprint'])
+
+    Issues are named 'Issue <n>' and keyed on from the number of issues in
+    their project, start in the first column and take any column as keyword
+    argument. ``project`` adds them to another project, keyed by its key.
+    Returns the new issue IDs.
+    """
+    from modules.projects.models import Issue
+
+    def _add_issues(count=1, project=None, **values):
+        project_id = project.id if project else board['project']
+        start = db.session.query(db.func.count(Issue.id)).filter(Issue.project_id == project_id).scalar()
+        key = project.key if project else board['key']
+        defaults = {
+            'project_id': project_id,
+            'tenant_id': project.tenant_id if project else board['tenant'],
+            'type_id': board['type'],
+            'status_id': board['statuses'][0],
+        }
+        issues = [
+            Issue(**{**defaults, 'key': f'{key}-{start + n + 1}', 'summary': f'Issue {start + n}', **values})
+            for n in range(count)
+        ]
+        db.session.add_all(issues)
+        db.session.flush()
+        issue_ids = [issue.id for issue in issues]
+        db.session.commit()
+        return issue_ids
+
+    return _add_issues
+
+
 # =============================================================================
 # TASK FIXTURES (Calendar Tasks)
 # =============================================================================
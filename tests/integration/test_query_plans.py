@@ -0,0 +1,154 @@
+"""
+Query plan regression tests for hot tenant-scoped queries
+
+Runs the task list (build_task_query), the dashboards and the project
+boards, records every SELECT they issue against the large tables and
+checks ``EXPLAIN QUERY PLAN`` on SQLite. A plan that scans one of these
+tables instead of searching an index fails the test.
+"""
+import re
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import Task, Notification, AuditLog, Module, UserModule
+from modules.projects.models import ProjectMember, Issue
+
+# Tables that grow with tenant data; small lookup tables may be scanned
+HOT_TABLES = ('task', 'issue', 'notification', 'audit_log')
+
+HOT_TABLE_RE = re.compile(r'\bFROM (%s)\b' % '|'.join(HOT_TABLES))
+FULL_SCAN_RE = re.compile(r'^SCAN (%s)\b' % '|'.join(HOT_TABLES))
+
+
+def capture_selects(db, func):
+    """Run func and return (statement, parameters) of SELECTs on hot tables."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and HOT_TABLE_RE.search(statement):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def full_scans(db, statements):
+    """Return (statement, plan) pairs whose plan scans a hot table."""
+    offenders = []
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+            if any(FULL_SCAN_RE.match(detail) for detail in plan):
+                offenders.append((statement, plan))
+    return offenders
+
+
+def assert_no_full_scans(db, client, url):
+    responses = []
+    statements = capture_selects(db, lambda: responses.append(client.get(url)))
+
+    assert responses[0].status_code == 200, url
+    assert statements, f'{url} issued no queries on {HOT_TABLES}'
+    offenders = full_scans(db, statements)
+    assert not offenders, '\n\n'.join(f'{url}\n{sql}\n-> {plan}' for sql, plan in offenders)
+
+
+@pytest.fixture
+def plan_data(db, tenant, entity, user, admin_user, project, sprint, issue):
+    """A little data in every hot table so each query path is exercised."""
+    today = date.today()
+    for offset in (-3, 2, 20):
+        db.session.add(Task(
+            tenant_id=tenant.id, entity_id=entity.id, title=f'Task {offset}',
+            year=today.year, due_date=today + timedelta(days=offset),
+            status='in_review' if offset > 0 else 'draft', owner_id=user.id
+        ))
+    for member in (user, admin_user):
+        db.session.add(ProjectMember(project_id=project.id, user_id=member.id, role='admin'))
+        db.session.add(Notification(
+            tenant_id=tenant.id, user_id=member.id,
+            notification_type='task_assigned', title='Assigned'
+        ))
+    issue.sprint_id = sprint.id
+
+    module = Module(code='projects', name_de='Projekte', name_en='Projects', is_active=True)
+    db.session.add(module)
+    db.session.flush()
+    db.session.add(UserModule(user_id=user.id, module_id=module.id))
+    db.session.commit()
+
+    task = Task.query.filter_by(tenant_id=tenant.id).first()
+    db.session.add(AuditLog(tenant_id=tenant.id, user_id=user.id, action='UPDATE',
+                            entity_type='Task', entity_id=task.id))
+    db.session.commit()
+    return {'project': project, 'sprint': sprint, 'task': task}
+
+
+TASK_LIST_URLS = [
+    '/tasks',
+    '/tasks?status=overdue',
+    '/tasks?status=due_soon',
+    '/tasks?status=in_review&year={year}',
+    '/tasks?show_archived=true',
+]
+
+DASHBOARD_URLS = [
+    '/dashboard',
+    '/api/dashboard/status-chart',
+    '/api/dashboard/monthly-chart',
+    '/api/notifications/unread-count',
+    '/api/tasks/{task}/workflow-timeline',
+]
+
+BOARD_URLS = [
+    '/projects/{project}/board',
+    '/projects/{project}/backlog',
+    '/projects/{project}/iterations/{sprint}/board',
+]
+
+
+def _format(url, data):
+    return url.format(year=date.today().year, task=data['task'].id,
+                      project=data['project'].id, sprint=data['sprint'].id)
+
+
+@pytest.mark.integration
+class TestQueryPlans:
+    """EXPLAIN QUERY PLAN checks for task lists, dashboards and boards"""
+
+    @pytest.mark.parametrize('url', TASK_LIST_URLS + DASHBOARD_URLS + BOARD_URLS)
+    def test_admin_queries_use_indexes(self, db, admin_client_with_tenant, plan_data, url):
+        """Admin views (unrestricted tenant queries) never scan a hot table"""
+        assert_no_full_scans(db, admin_client_with_tenant, _format(url, plan_data))
+
+    @pytest.mark.parametrize('url', TASK_LIST_URLS + DASHBOARD_URLS + BOARD_URLS)
+    def test_member_queries_use_indexes(self, db, authenticated_client_with_tenant, plan_data, url):
+        """Access-scoped views of a regular user never scan a hot table"""
+        assert_no_full_scans(db, authenticated_client_with_tenant, _format(url, plan_data))
+
+    def test_composite_indexes_exist(self, db):
+        """The composite indexes are part of the schema"""
+        with db.engine.connect() as conn:
+            names = {row[0] for row in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )}
+
+        assert {
+            'ix_task_tenant_archived_due_date',
+            'ix_task_tenant_year_status',
+            'ix_issue_project_archived_status_rank',
+            'ix_notification_user_read_created',
+            'ix_audit_log_entity',
+        } <= names
+
+    def test_detector_flags_full_scans(self, db):
+        """Sanity check: an unfiltered query is reported"""
+        statements = capture_selects(db, lambda: db.session.query(Issue.id).filter(Issue.priority == 1).all())
+
+        assert full_scans(db, statements)
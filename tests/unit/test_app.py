@@ -383,4 +383,47 @@ class TestCSPNonceFallback:
             
             # After processing, g.csp_nonce should be set
             assert hasattr(g, 'csp_nonce'), "g.csp_nonce should be set after fallback"
-            assert len(g.csp_nonce) >= 16, f"Fallback nonce too short: {g.csp_nonce}"
\ No newline at end of file
+            assert len(g.csp_nonce) >= 16, f"Fallback nonce too short: {g.csp_nonce}"
+
+# ============================================================================
+# BACKGROUND WORKER TESTS
+# ============================================================================
+
+class TestBackgroundWorkers:
+    """Tests for start_background_workers"""
+    
+    def test_import_starts_no_workers(self):
+        """Importing the app (web processes, tests) must not start threads"""
+        import app as app_module
+        
+        assert 'mail_queue_pool' not in app_module.app.extensions
+        assert 'job_pool' not in app_module.app.extensions
+    
+    def test_mail_queue_is_disabled_by_default(self):
+        from config import Config
+        
+        assert Config.MAIL_QUEUE_ENABLED is False
+    
+    def test_starts_mail_and_job_workers(self, app, monkeypatch):
+        from app import start_background_workers
+        from services import MailQueueWorkerPool, JobWorkerPool
+        
+        monkeypatch.setitem(app.config, 'MAIL_ENABLED', True)
+        monkeypatch.setitem(app.config, 'MAIL_QUEUE_ENABLED', True)
+        with patch.object(MailQueueWorkerPool, 'start') as mail_start, \
+                patch.object(JobWorkerPool, 'start') as job_start:
+            pools = start_background_workers(app, mail_workers=2)
+        
+        assert [(type(pool), pool.size) for pool in pools] == [(MailQueueWorkerPool, 2), (JobWorkerPool, 1)]
+        mail_start.assert_called_once()
+        job_start.assert_called_once()
+    
+    def test_direct_delivery_starts_no_mail_workers(self, app, monkeypatch):
+        from app import start_background_workers
+        from services import JobWorkerPool
+        
+        monkeypatch.setitem(app.config, 'MAIL_QUEUE_ENABLED', False)
+        with patch.object(JobWorkerPool, 'start'):
+            pools = start_background_workers(app)
+        
+        assert [type(pool) for pool in pools] == [JobWorkerPool]
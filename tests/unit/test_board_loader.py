@@ -0,0 +1,76 @@
+"""
+Tests for the board loader
+
+Tests for:
+- load_board grouping and ordering of cards per column
+- Sprint filtering
+- Card relationships loaded with the same number of queries for small and large boards
+"""
+
+import pytest
+
+from models import User
+from modules.projects.models import Issue, IssueStatus, IssueType, load_board
+
+
+def columns_of(board):
+    return IssueStatus.query.filter(IssueStatus.id.in_(board['statuses'])).order_by(IssueStatus.sort_order).all()
+
+
+def add_cards(db, board, add_issues, count):
+    """Issues spread over all columns, each with its own type and assignee, all in the sprint"""
+    statuses = board['statuses']
+    start = Issue.query.count()
+    for n in range(start, start + count):
+        assignee = User(email=f'assignee{n}@example.com', name=f'Assignee {n}', role='preparer')
+        issue_type = IssueType(project_id=board['project'], name=f'Type {n}', color='#0076A8')
+        db.session.add_all([assignee, issue_type])
+        db.session.flush()
+        add_issues(status_id=statuses[n % len(statuses)], sprint_id=board['sprint'],
+                   assignee_id=assignee.id, type_id=issue_type.id)
+
+
+@pytest.mark.unit
+class TestLoadBoard:
+    """Tests for load_board"""
+
+    def test_groups_cards_by_column_in_board_order(self, db, board, add_issues):
+        add_cards(db, board, add_issues, 7)
+
+        columns = load_board(board['project'], columns_of(board))
+
+        first, _, third = board['statuses']
+        assert list(columns) == board['statuses']
+        assert [i.summary for i in columns[first]] == ['Issue 0', 'Issue 3', 'Issue 6']
+        assert [i.summary for i in columns[third]] == ['Issue 2', 'Issue 5']
+
+    def test_sprint_filter_and_archived_issues(self, db, board, add_issues):
+        add_cards(db, board, add_issues, 3)
+        Issue.query.filter_by(summary='Issue 1').one().sprint_id = None
+        Issue.query.filter_by(summary='Issue 2').one().is_archived = True
+        db.session.commit()
+
+        columns = load_board(board['project'], columns_of(board), sprint_id=board['sprint'])
+
+        assert [i.summary for column in columns.values() for i in column] == ['Issue 0']
+
+    def test_queries_independent_of_card_count(self, db, board, add_issues, count_queries):
+        def load():
+            db.session.expunge_all()
+            statuses = columns_of(board)
+            with count_queries() as statements:
+                columns = load_board(board['project'], statuses)
+                cards = [
+                    (issue.assignee.name, issue.issue_type.name, issue.status.allowed_transitions)
+                    for column in columns.values() for issue in column
+                ]
+            return cards, statements
+
+        add_cards(db, board, add_issues, 3)
+        few_cards, few = load()
+        add_cards(db, board, add_issues, 27)
+        many_cards, many = load()
+
+        assert (len(few_cards), len(many_cards)) == (3, 30)
+        assert len({name for name, _, _ in many_cards}) == len({type_name for _, type_name, _ in many_cards}) == 30
+        assert len(many) == len(few) == 4  # Issues, types, statuses, assignees
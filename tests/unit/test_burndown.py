@@ -0,0 +1,140 @@
+"""
+Tests for daily sprint burndown snapshots
+
+Tests for:
+- Burndown effect of single issue changes
+- Today's snapshot kept current by issue changes in active sprints
+- Rebuilding snapshots from the activity log (and the backfill command)
+- Report data read from the snapshots
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.projects.burndown import change_deltas, rebuild_snapshots, calculate_burndown_data
+from modules.projects.models import Issue, IssueActivity, Sprint, SprintSnapshot
+
+
+def start_sprint(db, board, started_at=None):
+    sprint = db.session.get(Sprint, board['sprint'])
+    sprint.state = 'active'
+    sprint.started_at = started_at or datetime.utcnow()
+    sprint.start_date = sprint.started_at.date()
+    sprint.end_date = sprint.start_date + timedelta(days=13)
+    db.session.commit()
+
+
+def today_snapshot(db, board):
+    db.session.expire_all()
+    row = SprintSnapshot.query.filter_by(sprint_id=board['sprint'], day=datetime.utcnow().date()).one()
+    return row.remaining_points, row.added_points, row.removed_points, row.completed_points
+
+
+@pytest.mark.unit
+class TestChangeDeltas:
+    """(added, removed, completed, remaining) of one change"""
+
+    @pytest.mark.parametrize('change, expected', [
+        ((False, False, 0, True, False, 5), (5, 0, 0, 5)),     # Added open issue
+        ((True, False, 5, False, False, 5), (0, 5, 0, -5)),    # Removed open issue
+        ((True, True, 5, False, True, 5), (0, 5, 0, 0)),       # Removed done issue
+        ((True, False, 5, True, True, 5), (0, 0, 5, -5)),      # Completed
+        ((True, True, 5, True, False, 5), (0, 0, -5, 5)),      # Reopened
+        ((True, False, 5, True, False, 8), (3, 0, 0, 3)),      # Re-estimated up
+        ((True, False, 5, True, False, 2), (0, 3, 0, -3)),     # Re-estimated down
+        ((False, False, 5, False, True, 5), (0, 0, 0, 0)),     # Outside the sprint
+    ])
+    def test_deltas(self, change, expected):
+        assert change_deltas(*change) == expected
+
+
+@pytest.mark.unit
+class TestLiveSnapshots:
+    """Issue changes adjust today's snapshot of active sprints"""
+
+    def test_scope_and_completion(self, db, board, add_issues):
+        issue_id, = add_issues(story_points=5, sprint_id=board['sprint'])
+        start_sprint(db, board)
+
+        add_issues(story_points=3, sprint_id=board['sprint'])
+        db.session.get(Issue, issue_id).status_id = board['done']
+        db.session.commit()
+        assert today_snapshot(db, board) == (3, 3, 0, 5)
+
+        db.session.get(Issue, issue_id).sprint_id = None
+        db.session.commit()
+        assert today_snapshot(db, board) == (3, 3, 5, 5)
+
+    def test_future_sprints_have_no_snapshots(self, db, board, add_issues):
+        add_issues(story_points=5, sprint_id=board['sprint'])
+
+        assert SprintSnapshot.query.count() == 0
+
+
+@pytest.fixture
+def history(db, board, sprint, add_issues):
+    """
+    A sprint started four days ago: A (5) and B (3) committed, C (2) added
+    on day 1, A done on day 2, B removed on day 3.
+    """
+    a, = add_issues(story_points=5, sprint_id=board['sprint'])
+    b, = add_issues(story_points=3, sprint_id=board['sprint'])
+    c, = add_issues(story_points=2)
+    start = datetime.utcnow().replace(hour=8) - timedelta(days=4)
+    start_sprint(db, board, started_at=start)
+    SprintSnapshot.query.delete()
+
+    Issue.query.filter_by(id=a).update({'status_id': board['done']})
+    Issue.query.filter_by(id=b).update({'sprint_id': None})
+    Issue.query.filter_by(id=c).update({'sprint_id': board['sprint']})
+    for issue_id, activity_type, old, new, day in [
+        (c, 'sprint_change', None, sprint.name, 1),
+        (a, 'status_change', 'Offen', 'Fertig', 2),
+        (b, 'sprint_change', sprint.name, None, 3),
+    ]:
+        db.session.add(IssueActivity(issue_id=issue_id, user_id=board['admin'], activity_type=activity_type,
+                                     old_value=old, new_value=new, created_at=start + timedelta(days=day)))
+    db.session.commit()
+    return start
+
+
+@pytest.mark.unit
+class TestRebuild:
+    """Snapshots reconstructed from the activity log"""
+
+    def test_replays_activity_log(self, db, board, history):
+        rows = rebuild_snapshots(db.session.get(Sprint, board['sprint']))
+        db.session.commit()
+
+        snapshots = SprintSnapshot.query.order_by(SprintSnapshot.day).all()
+        assert rows == 5
+        assert [s.remaining_points for s in snapshots] == [8, 10, 5, 2, 2]
+        assert [(s.added_points, s.removed_points, s.completed_points) for s in snapshots] == [
+            (0, 0, 0), (2, 0, 0), (0, 0, 5), (0, 3, 0), (0, 0, 0)
+        ]
+
+    def test_backfill_command(self, app, db, board, history):
+        result = app.test_cli_runner().invoke(args=['backfill-burndown'])
+
+        assert '5 snapshots for 1 sprints' in result.output
+        assert SprintSnapshot.query.count() == 5
+
+    def test_report_reads_snapshots(self, db, board, history):
+        sprint = db.session.get(Sprint, board['sprint'])
+
+        data = calculate_burndown_data(sprint)  # Rebuilt once: no snapshots yet
+
+        assert data['actual'][:5] == [8, 10, 5, 2, 2]
+        assert data['actual'][5] is None  # Tomorrow
+        assert data['ideal'][0] == 8
+        assert data['added'][:5] == [0, 2, 0, 0, 0]
+
+    def test_days_without_snapshot_carry_forward(self, db, board, history):
+        rebuild_snapshots(db.session.get(Sprint, board['sprint']))
+        SprintSnapshot.query.filter(SprintSnapshot.day > history.date() + timedelta(days=1)).delete()
+        db.session.commit()
+
+        data = calculate_burndown_data(db.session.get(Sprint, board['sprint']))
+
+        assert data['actual'][:5] == [8, 10, 10, 10, 10]
@@ -0,0 +1,177 @@
+"""
+Tests for due date reminder digests
+
+Tests for:
+- DueReminderService (range scan, recipient grouping, ledger)
+- EmailService.send_due_digest
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from models import EmailQueue, ReminderLog, Task, TaskReviewer, Team, User
+from services import DueReminderService, EmailService
+
+
+TODAY = date(2026, 3, 10)
+
+
+@pytest.fixture
+def reminder_config(app, monkeypatch):
+    """Queue digests instead of sending them."""
+    for key, value in {
+        'MAIL_ENABLED': True,
+        'MAIL_QUEUE_ENABLED': True,
+        'REMINDER_DAYS_AHEAD': 3,
+        'REMINDER_OVERDUE_DAYS': 14,
+    }.items():
+        monkeypatch.setitem(app.config, key, value)
+    return app.config
+
+
+def _user(db, email, **kwargs):
+    user = User(email=email, name=email.split('@')[0].title(), is_active=True, **kwargs)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _task(db, tenant, entity, title, days, **kwargs):
+    task = Task(tenant_id=tenant.id, entity_id=entity.id, title=title, year=2026,
+                due_date=TODAY + timedelta(days=days), status=kwargs.pop('status', 'draft'), **kwargs)
+    db.session.add(task)
+    db.session.commit()
+    return task
+
+
+@pytest.mark.unit
+@pytest.mark.services
+class TestDueReminderService:
+    """Tests for DueReminderService"""
+
+    def test_find_due_tasks_uses_window(self, app, db, tenant, entity, user, reminder_config):
+        """Only open tasks inside the reminder window are returned"""
+        _task(db, tenant, entity, 'Overdue', -2, owner_id=user.id)
+        _task(db, tenant, entity, 'Today', 0, owner_id=user.id)
+        _task(db, tenant, entity, 'Soon', 3, owner_id=user.id)
+        _task(db, tenant, entity, 'Later', 4, owner_id=user.id)
+        _task(db, tenant, entity, 'Ancient', -15, owner_id=user.id)
+        _task(db, tenant, entity, 'Done', 1, owner_id=user.id, status='completed')
+        _task(db, tenant, entity, 'Archived', 1, owner_id=user.id, is_archived=True)
+
+        rows = DueReminderService.find_due_tasks(tenant.id, TODAY, 3, 14)
+
+        assert [r.title for r in rows] == ['Overdue', 'Today', 'Soon']
+
+    def test_groups_owner_reviewers_and_team_members(self, app, db, tenant, entity, user, reminder_config):
+        """Owner, reviewers and members of owner/reviewer teams are recipients"""
+        reviewer = _user(db, 'reviewer@example.com')
+        member = _user(db, 'member@example.com')
+        team = Team(tenant_id=tenant.id, name='Tax')
+        team.members.append(member)
+        db.session.add(team)
+        db.session.commit()
+
+        owned = _task(db, tenant, entity, 'Owned', 1, owner_id=user.id)
+        reviewed = _task(db, tenant, entity, 'Reviewed', 2, reviewer_team_id=team.id)
+        db.session.add(TaskReviewer(task_id=reviewed.id, user_id=reviewer.id))
+        db.session.commit()
+
+        rows = DueReminderService.find_due_tasks(tenant.id, TODAY, 3, 14)
+        recipients = DueReminderService.group_by_recipient(rows)
+
+        assert recipients == {
+            user.id: {owned.id},
+            reviewer.id: {reviewed.id},
+            member.id: {reviewed.id},
+        }
+
+    def test_one_digest_per_recipient(self, app, db, tenant, entity, user, reminder_config):
+        """Several due tasks produce a single queued digest"""
+        _task(db, tenant, entity, 'First', -1, owner_id=user.id)
+        _task(db, tenant, entity, 'Second', 0, owner_id=user.id)
+        _task(db, tenant, entity, 'Third', 2, owner_id=user.id)
+
+        stats = DueReminderService.run_for_tenant(tenant.id, TODAY)
+
+        assert stats == {'tasks': 3, 'digests': 1, 'skipped': 0}
+        item = EmailQueue.query.one()
+        assert item.to_email == user.email
+        assert 'First' in item.text_content and 'Third' in item.text_content
+        log = ReminderLog.query.one()
+        assert (log.user_id, log.reminder_date, log.task_count) == (user.id, TODAY, 3)
+
+    def test_rerun_does_not_resend(self, app, db, tenant, entity, user, reminder_config):
+        """The ledger makes repeated runs on the same day a no-op"""
+        _task(db, tenant, entity, 'Due', 1, owner_id=user.id)
+
+        DueReminderService.run(today=TODAY)
+        totals = DueReminderService.run(today=TODAY)
+
+        assert totals['digests'] == 0
+        assert totals['skipped'] == 1
+        assert EmailQueue.query.count() == 1
+
+        DueReminderService.run(today=TODAY + timedelta(days=1))
+        assert EmailQueue.query.count() == 2
+
+    def test_respects_email_preferences(self, app, db, tenant, entity, reminder_config):
+        """Users who disabled due reminders get no digest and no ledger entry"""
+        muted = _user(db, 'muted@example.com', email_on_due_reminder=False)
+        _task(db, tenant, entity, 'Due', 1, owner_id=muted.id)
+
+        stats = DueReminderService.run_for_tenant(tenant.id, TODAY)
+
+        assert stats['digests'] == 0
+        assert EmailQueue.query.count() == 0
+        assert ReminderLog.query.count() == 0
+
+    def test_tenants_are_scanned_separately(self, app, db, tenant, entity, user, reminder_config):
+        """Tasks of other tenants are not part of a tenant's run"""
+        from models import Tenant
+        other = Tenant(name='Other', slug='other-tenant', is_active=True)
+        db.session.add(other)
+        db.session.commit()
+        _task(db, other, entity, 'Foreign', 1, owner_id=user.id)
+
+        assert DueReminderService.run_for_tenant(tenant.id, TODAY)['tasks'] == 0
+        assert DueReminderService.run_for_tenant(other.id, TODAY)['digests'] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.services
+class TestDueDigestEmail:
+    """Tests for EmailService.send_due_digest"""
+
+    def test_digest_groups_tasks(self, app, db, user, reminder_config):
+        """Overdue, today and upcoming tasks are listed in separate sections"""
+        items = [
+            {'title': title, 'entity_name': 'Test GmbH', 'due_date': TODAY + timedelta(days=days),
+             'days_until_due': days, 'task_url': f'http://localhost/tasks/{i}'}
+            for i, (title, days) in enumerate([('Late', -2), ('Now', 0), ('Next', 2)])
+        ]
+
+        assert EmailService(app).send_due_digest(user, items, 'en') is True
+
+        item = EmailQueue.query.one()
+        assert item.subject == 'Reminder: 3 task(s) due, 1 overdue'
+        assert 'Overdue (1)' in item.text_content
+        assert 'Due today (1)' in item.text_content
+        assert 'Due soon (1)' in item.text_content
+        assert 'http://localhost/tasks/2' in item.html_content
+
+
+@pytest.mark.unit
+class TestSendDueRemindersCommand:
+    """Tests for the send-due-reminders CLI command"""
+
+    def test_command_reports_totals(self, app, db, tenant, entity, user, reminder_config):
+        """The command runs all tenants for the given date"""
+        _task(db, tenant, entity, 'Due', 1, owner_id=user.id)
+
+        result = app.test_cli_runner().invoke(args=['send-due-reminders', '--date', TODAY.isoformat()])
+
+        assert result.exit_code == 0, result.output
+        assert '1 digests sent for 1 due tasks' in result.output
+        assert ReminderLog.query.count() == 1
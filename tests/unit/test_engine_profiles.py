@@ -0,0 +1,128 @@
+"""
+Tests for database engine profiles
+
+Tests for:
+- Profile selection for SQLite and server databases
+- Engine options for the default database and binds
+- PRAGMAs on new SQLite connections and the settings report
+- Stock profile by default
+"""
+
+import pytest
+import sqlalchemy as sa
+from flask import Flask
+
+from app import create_app
+from config import config, TestingConfig
+from extensions import db, engine_profile, configure_engine_options, engine_report
+
+
+@pytest.fixture
+def tuned(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'DB_ENGINE_PROFILE', 'tuned')
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """An app on a SQLite file with the tuned profile"""
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        DB_ENGINE_PROFILE = 'tuned'
+
+    monkeypatch.setitem(config, 'file_test', FileConfig)
+    app = create_app('file_test')
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.mark.unit
+class TestEngineProfile:
+    """Tests for engine_profile and configure_engine_options"""
+
+    def test_sqlite_gets_pragmas(self, app, tuned):
+        options, pragmas = engine_profile('sqlite:///app.db', app.config)
+
+        assert options == {}
+        assert pragmas['journal_mode'] == 'WAL'
+        assert pragmas['synchronous'] == 'NORMAL'
+        assert {'mmap_size', 'cache_size', 'busy_timeout'} <= set(pragmas)
+
+    def test_server_databases_get_pool_settings(self, app, tuned):
+        options, pragmas = engine_profile('postgresql://db/projectops', app.config)
+
+        assert pragmas == {}
+        assert options['pool_pre_ping'] is True
+        assert {'pool_size', 'max_overflow', 'pool_recycle', 'pool_timeout'} <= set(options)
+
+    def test_stock_profile_is_the_default(self, app):
+        assert TestingConfig.DB_ENGINE_PROFILE == 'stock'
+        assert engine_profile('sqlite:///app.db', {}) == ({}, {})
+
+    def test_stock_profile_changes_nothing(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, 'DB_ENGINE_PROFILE', 'stock')
+
+        assert engine_profile('postgresql://db/projectops', app.config) == ({}, {})
+        assert engine_profile('sqlite:///app.db', app.config) == ({}, {})
+
+    def test_binds_get_their_own_options(self):
+        app = Flask(__name__)
+        app.config.from_object(TestingConfig)
+        app.config['DB_ENGINE_PROFILE'] = 'tuned'
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://db/main'
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 3}
+        app.config['SQLALCHEMY_BINDS'] = {'eu1': 'postgresql://db/eu1', 'local': 'sqlite:///local.db'}
+
+        configure_engine_options(app)
+
+        assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 3  # explicit options win
+        assert app.config['SQLALCHEMY_BINDS']['eu1']['pool_size'] == TestingConfig.DB_POOL_SIZE
+        assert app.config['SQLALCHEMY_BINDS']['local'] == {'url': 'sqlite:///local.db'}
+
+
+@pytest.mark.unit
+class TestSqlitePragmas:
+    """PRAGMAs applied by apply_sqlite_pragmas"""
+
+    def test_connections_use_wal_and_tuned_settings(self, file_app):
+        with file_app.app_context(), db.engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('cache_size') == TestingConfig.SQLITE_CACHE_SIZE
+            assert pragma('busy_timeout') == TestingConfig.SQLITE_BUSY_TIMEOUT
+
+    def test_report_shows_configured_settings(self, file_app):
+        [line] = engine_report(file_app)
+
+        assert line.startswith('default (sqlite, tuned)')
+        assert 'journal_mode=WAL' in line
+
+    def test_report_lists_engine_options_without_connecting(self):
+        app = Flask(__name__)
+        app.config.from_object(TestingConfig)
+        app.config['DB_ENGINE_PROFILE'] = 'tuned'
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://db/main'
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 3}
+        app.config['SQLALCHEMY_BINDS'] = {'eu1': 'postgresql://db/eu1'}
+        configure_engine_options(app)
+
+        default, eu1 = engine_report(app)  # No engines exist, so nothing can connect
+
+        assert default.startswith('default (postgresql, tuned): ')
+        assert 'pool_size=3' in default
+        assert f'pool_recycle={TestingConfig.DB_POOL_RECYCLE}' in eu1
+
+    def test_stock_report(self, app):
+        assert engine_report(app)[0] == 'default (sqlite, stock): driver defaults'
+
+    def test_db_settings_command(self, file_app):
+        result = file_app.test_cli_runner().invoke(args=['db-settings'])
+
+        assert 'journal_mode=WAL' in result.output
+
+    def test_other_engines_are_untouched(self, file_app, tmp_path):
+        engine = sa.create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'delete'
+        engine.dispose()
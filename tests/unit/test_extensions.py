@@ -88,3 +88,63 @@ class TestDatabaseSession:
         # Should not be in database
         result = Tenant.query.filter_by(slug='rollback-test').first()
         assert result is None
+
+
+@pytest.mark.unit
+class TestCallAfterCommit:
+    """Tests for callbacks queued until the transaction commits."""
+    
+    @pytest.fixture
+    def calls(self):
+        return []
+    
+    def test_runs_once_on_commit(self, db, calls):
+        from extensions import call_after_commit
+        
+        call_after_commit(calls.append, 'a')
+        call_after_commit(calls.append, 'a')
+        assert calls == []
+        
+        db.session.commit()
+        assert calls == ['a']
+    
+    def test_rollback_discards_calls(self, db, calls):
+        from extensions import AFTER_COMMIT, call_after_commit
+        
+        call_after_commit(calls.append, 'a')
+        db.session.rollback()
+        db.session.commit()
+        
+        assert calls == []
+        assert AFTER_COMMIT not in db.session.info
+    
+    def test_released_savepoint_waits_for_outer_commit(self, db, calls):
+        from extensions import call_after_commit
+        
+        with db.session.begin_nested():
+            call_after_commit(calls.append, 'inner')
+        assert calls == []
+        
+        db.session.commit()
+        assert calls == ['inner']
+    
+    def test_savepoint_rollback_keeps_calls_queued_before(self, db, calls):
+        from extensions import call_after_commit
+        
+        call_after_commit(calls.append, 'outer')
+        savepoint = db.session.begin_nested()
+        call_after_commit(calls.append, 'outer')
+        call_after_commit(calls.append, 'inner')
+        savepoint.rollback()
+        
+        db.session.commit()
+        assert calls == ['outer']
+    
+    def test_invalidate_now_and_after_commit(self, db, calls):
+        from extensions import invalidate_now_and_after_commit
+        
+        invalidate_now_and_after_commit(calls.append, 'a')
+        assert calls == ['a']
+        
+        db.session.commit()
+        assert calls == ['a', 'a']
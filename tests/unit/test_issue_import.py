@@ -0,0 +1,286 @@
+"""
+Tests for the bulk issue import
+
+Tests for:
+- Reading CSV, JSON (Lines) and Excel files with German or English headers
+- Per-row errors for unknown names, invalid values and broken references
+- Dry runs that write nothing
+- Keys, ranks, comments, worklogs, links, parents and one activity per issue
+- Search index, typeahead keys, sprint aggregates and burndown after the import
+- Statements per import independent of the number of rows
+- Queued imports: stored upload, one job run, nothing written on failure
+"""
+
+import io
+import json
+from datetime import date
+
+import pytest
+
+from models import Job
+from modules.projects.importer import IssueImportError, import_issues, queue_import, read_rows
+from modules.projects.key_index import issue_keys
+from modules.projects.models import (
+    Issue, IssueActivity, IssueComment, IssueLink, Project, Sprint, SprintSnapshot, Worklog
+)
+from modules.projects.search import search_issues
+from services import JobService
+
+
+def csv_file(*lines):
+    return io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+
+def run_import(db, board, lines, filename='issues.csv', **kwargs):
+    result = import_issues(db.session.get(Project, board['project']), csv_file(*lines), filename,
+                           board['admin'], **kwargs)
+    db.session.commit()
+    return result
+
+
+@pytest.mark.unit
+class TestReadRows:
+    """Formats and headers"""
+
+    def test_csv_with_german_headers_and_repeated_columns(self):
+        file = io.BytesIO('﻿Schlüssel;Zusammenfassung;Kommentar;Kommentar;Unbekannt\n'
+                          'OLD-1;Rechnung prüfen;Erster;Zweiter;x\n;;;;\nOLD-2;"Zwei;Zeilen\nText";;;\n'
+                          .encode('utf-8'))
+
+        rows = list(read_rows(file, 'export.CSV'))
+
+        assert rows == [
+            (2, {'key': 'OLD-1', 'summary': 'Rechnung prüfen', 'comments': ['Erster', 'Zweiter']}),
+            (4, {'key': 'OLD-2', 'summary': 'Zwei;Zeilen\nText'}),
+        ]
+
+    def test_json_and_json_lines(self):
+        issues = [{'Summary': 'One', 'comments': ['a', {'content': 'b'}]}, 'broken']
+
+        assert list(read_rows(io.BytesIO(json.dumps({'issues': issues}).encode()), 'x.json')) == [
+            (1, {'summary': 'One', 'comments': ['a', {'content': 'b'}]}), (2, None)
+        ]
+        lines = '\n'.join(json.dumps(issue) for issue in issues[:1]) + '\n\n'
+        assert list(read_rows(io.BytesIO(lines.encode()), 'x.jsonl')) == [
+            (1, {'summary': 'One', 'comments': ['a', {'content': 'b'}]})
+        ]
+
+    def test_excel(self):
+        import openpyxl
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['Title', 'Story Points', 'Due Date'])
+        sheet.append(['Export', 3, date(2026, 3, 1)])
+        file = io.BytesIO()
+        workbook.save(file)
+        file.seek(0)
+
+        rows = list(read_rows(file, 'x.xlsx'))
+
+        assert rows[0][0] == 2
+        assert rows[0][1]['summary'] == 'Export'
+        assert rows[0][1]['story_points'] == 3
+        assert rows[0][1]['due_date'].date() == date(2026, 3, 1)
+
+    @pytest.mark.parametrize('content, filename', [
+        (b'summary\nx', 'issues.pdf'),
+        (b'key,name\n1,x', 'issues.csv'),
+        (b'{"summary": "x"}', 'issues.json'),
+        (b'not json', 'issues.json'),
+    ])
+    def test_unreadable_files(self, content, filename):
+        with pytest.raises(IssueImportError):
+            list(read_rows(io.BytesIO(content), filename))
+
+
+@pytest.mark.unit
+class TestValidation:
+    """Per-row errors; only valid rows are imported"""
+
+    def test_row_errors(self, db, board):
+        result = run_import(db, board, [
+            'summary,status,priority,assignee,story points,due date,worklog',
+            'Valid,Done,High,admin@example.com,3,01.03.2026,1h 30m',
+            'Bad status,Archived,,,,,',
+            'Bad values,,9,nobody@example.com,-1,2026-13-01,soon',
+            ',Open,,,,,',
+        ])
+
+        assert (result.rows, result.valid, result.created) == (4, 1, 1)
+        assert result.errors == [
+            (3, "status: Unknown status 'Archived'"),
+            (4, "priority: Invalid priority '9'"),
+            (4, "assignee: Unknown user 'nobody@example.com'"),
+            (4, "story_points: Invalid story points '-1'"),
+            (4, "due_date: Invalid date '2026-13-01'"),
+            (4, "worklogs: Invalid time 'soon'"),
+            (5, 'summary: Required'),
+        ]
+        issue = Issue.query.one()
+        assert (issue.status_id, issue.priority, issue.assignee_id) == (board['done'], 2, board['admin'])
+        assert (issue.story_points, issue.due_date, issue.time_spent) == (3, date(2026, 3, 1), 90)
+        assert issue.resolution_date is not None
+
+    def test_broken_references(self, db, board):
+        result = run_import(db, board, [
+            'key,summary,parent,link',
+            'A-1,Epic,,',
+            'A-2,Child,A-1,',
+            'A-3,Unknown parent,A-99,',
+            'A-4,Child of rejected,A-3,',
+            'A-5,Linked to rejected,,blocks:A-4',
+            'A-1,Duplicate,,',
+            'A-6,Cycle,A-7,',
+            'A-7,Cycle,A-6,',
+            'A-8,Bad link type,,fixes:A-1',
+        ])
+
+        assert [issue.summary for issue in Issue.query.order_by(Issue.id)] == ['Epic', 'Child']
+        assert result.errors == [
+            (4, "parent: Unknown issue 'A-99'"),
+            (5, "parent: Row 4 with key 'A-3' has errors"),
+            (6, "links: Row 5 with key 'A-4' has errors"),
+            (7, 'key: Duplicate of row 2'),
+            (8, 'parent: Circular parent chain'),
+            (9, 'parent: Circular parent chain'),
+            (10, "links: Unknown link type 'fixes'"),
+        ]
+
+    def test_dry_run_writes_nothing(self, db, board):
+        result = run_import(db, board, ['summary,comment', 'One,Hello', 'Two,'], dry_run=True)
+
+        assert (result.rows, result.valid, result.created, result.errors) == (2, 2, 0, [])
+        assert Issue.query.count() == 0
+        assert IssueActivity.query.count() == 0
+        assert db.session.get(Project, board['project']).issue_counter == 0
+
+
+@pytest.mark.unit
+class TestImport:
+    """Written issues and their side tables"""
+
+    def test_keys_ranks_and_side_tables(self, db, board):
+        existing = Issue(key='TEST-1', summary='Existing', project_id=board['project'], tenant_id=board['tenant'],
+                         type_id=board['type'], status_id=board['todo'])
+        db.session.add(existing)
+        db.session.get(Project, board['project']).issue_counter = 1
+        db.session.commit()
+
+        run_import(db, board, [
+            'key,summary,parent,link,link,comment,comment,worklog',
+            'OLD-1,Parent,,relates_to:TEST-1,,Plain comment,2026-01-05 10:00;admin@example.com;Dated,',
+            'OLD-2,Child,OLD-1,is blocked by:OLD-1,OLD-3,,,2h;2026-01-06;Admin User;Review',
+            'OLD-3,Sibling,OLD-1,,,,,',
+        ], batch_size=2)
+
+        issues = Issue.query.filter(Issue.id != existing.id).order_by(Issue.id).all()
+        parent, child, sibling = issues
+        assert [i.key for i in issues] == ['TEST-2', 'TEST-3', 'TEST-4']
+        assert existing.board_rank < parent.board_rank < child.board_rank < sibling.board_rank
+        assert existing.backlog_rank < parent.backlog_rank < child.backlog_rank < sibling.backlog_rank
+        assert (child.parent_id, sibling.parent_id, parent.parent_id) == (parent.id, parent.id, None)
+
+        links = {(l.source_issue_id, l.target_issue_id, l.link_type) for l in IssueLink.query}
+        assert links == {(parent.id, existing.id, 'relates_to'), (child.id, parent.id, 'is_blocked_by'),
+                         (child.id, sibling.id, 'relates_to')}
+        comments = IssueComment.query.filter_by(issue_id=parent.id).order_by(IssueComment.id).all()
+        assert [(c.content, c.author_id) for c in comments] == [('Plain comment', board['admin']),
+                                                                ('Dated', board['admin'])]
+        assert comments[1].created_at.isoformat() == '2026-01-05T10:00:00'
+        worklog = Worklog.query.one()
+        assert (worklog.issue_id, worklog.time_spent, worklog.work_date) == (child.id, 120, date(2026, 1, 6))
+        assert child.time_spent == 120
+
+        activities = IssueActivity.query.filter(IssueActivity.issue_id != existing.id).order_by(IssueActivity.id)
+        assert [(a.activity_type, a.details) for a in activities] == [
+            ('created', 'Import: OLD-1 (2 comments, 1 links)'),
+            ('created', 'Import: OLD-2 (1 worklogs, 2 links)'),
+            ('created', 'Import: OLD-3'),
+        ]
+        assert db.session.get(Project, board['project']).issue_counter == 4
+
+    def test_search_and_typeahead(self, db, board):
+        issue_keys.lookup(board['tenant'], 'TEST-1')
+
+        run_import(db, board, ['summary,comment', 'Rechnung prüfen,Kunde wartet', 'Export'])
+
+        assert search_issues('kunde', [board['project']])[1] == 1
+        assert [key for key, _ in issue_keys.lookup(board['tenant'], 'TEST-')[1]] == ['TEST-2', 'TEST-1']
+
+    def test_sprint_aggregates_and_burndown(self, db, board):
+        db.session.get(Sprint, board['sprint']).state = 'active'
+        db.session.commit()
+
+        run_import(db, board, ['summary,sprint,story points,status', 'One,Sprint 1,3,', 'Two,sprint 1,5,Fertig'])
+
+        sprint = db.session.get(Sprint, board['sprint'])
+        assert (sprint.issue_count, sprint.points_total, sprint.points_completed) == (2, 8, 5)
+        snapshot = SprintSnapshot.query.one()
+        assert (snapshot.added_points, snapshot.completed_points, snapshot.remaining_points) == (8, 0, 3)
+
+    def test_statements_independent_of_row_count(self, db, board, count_queries):
+        def lines(count):
+            return ['key,summary,comment,worklog,link'] + [
+                f'OLD-{n},Issue {n},Comment {n},1h,relates_to:OLD-1' if n > 1 else 'OLD-1,First,,,'
+                for n in range(1, count + 1)
+            ]
+
+        project = db.session.get(Project, board['project'])
+        with count_queries() as few:
+            run_import(db, board, lines(5))
+        project.key  # Reload after the commit
+        with count_queries() as many:
+            run_import(db, board, lines(60))
+
+        assert Issue.query.count() == 65
+        assert len(many) == len(few)
+
+
+@pytest.mark.unit
+class TestImportJob:
+    """Imports queued as background jobs"""
+
+    @pytest.fixture
+    def queue(self, app, db, board, tmp_path):
+        app.config['UPLOAD_FOLDER'] = str(tmp_path)
+
+        def _queue(*lines, filename='issues.csv'):
+            job = queue_import(db.session.get(Project, board['project']), csv_file(*lines), filename, board['admin'])
+            db.session.commit()
+            return job
+        return _queue
+
+    def test_job_imports_the_stored_file(self, db, board, queue, tmp_path):
+        job = queue('summary,status', 'One,Open', 'Two,Unknown')
+        assert (job.max_attempts, job.tenant_id) == (1, board['tenant'])
+        assert Issue.query.count() == 0
+
+        steps = []
+        result = JobService.handlers[job.type](job.payload, lambda *args: steps.append(args))
+
+        assert [issue.summary for issue in Issue.query] == ['One']
+        assert steps == [(10, '1 of 2 rows valid')]
+        assert result == {'rows': 2, 'valid': 1, 'created': 1, 'error_count': 1,
+                          'errors': [(3, "status: Unknown status 'Unknown'")]}
+        assert not list(tmp_path.glob('imports/*'))
+
+    def test_failed_job_writes_nothing(self, db, board, queue, tmp_path, monkeypatch):
+        job = queue('summary', 'One', 'Two')
+
+        def fail(project):
+            raise RuntimeError('boom')
+        monkeypatch.setattr('modules.projects.importer.bump_board_version', fail)  # After the last batch
+
+        with pytest.raises(RuntimeError):
+            JobService.handlers[job.type](job.payload, lambda *args: None)
+        db.session.rollback()
+
+        assert Issue.query.count() == 0
+        assert not list(tmp_path.glob('imports/*'))
+
+    def test_unsupported_file_is_not_queued(self, db, queue):
+        with pytest.raises(IssueImportError):
+            queue('x', filename='issues.pdf')
+
+        assert Job.query.count() == 0
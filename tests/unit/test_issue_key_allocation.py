@@ -0,0 +1,153 @@
+"""
+Tests for issue key allocation
+
+Tests for:
+- Atomic counter updates and blocks of reserved keys
+- In-memory counter kept in sync with the stored one
+- Own transaction on server databases, unless the project row is already written
+- Concurrent creates from many threads without duplicate keys or lock timeouts
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import create_app
+from config import config, TestingConfig
+from extensions import db as _db
+from models import Tenant
+from modules.projects.models import Issue, IssueStatus, IssueType, Project, reserve_issue_numbers
+
+
+@pytest.mark.unit
+class TestReservation:
+    """Single keys and blocks"""
+
+    def test_blocks_follow_single_keys(self, db, project):
+        assert project.get_next_issue_key() == 'TEST-1'
+        assert project.reserve_issue_keys(3) == ['TEST-2', 'TEST-3', 'TEST-4']
+        assert list(reserve_issue_numbers(project, 2)) == [5, 6]
+        assert project.issue_counter == 6
+
+    def test_stale_counter_is_not_written_back(self, db, project):
+        assert project.issue_counter == 0
+        # Another writer moves the counter; the loaded project still says 0
+        db.session.execute(db.text('UPDATE project SET issue_counter = 41 WHERE id = :id'), {'id': project.id})
+
+        assert project.get_next_issue_key() == 'TEST-42'
+        assert project.issue_counter == 42
+        db.session.commit()
+        assert db.session.get(Project, project.id).issue_counter == 42
+
+    def test_count_must_be_positive(self, db, project):
+        with pytest.raises(ValueError):
+            reserve_issue_numbers(project, 0)
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """Separate app on a SQLite file, so threads share one database"""
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'keys.db'}"
+
+    config['file_keys'] = FileConfig
+    app = create_app('file_keys')
+    with app.app_context():
+        _db.create_all()
+        tenant = Tenant(name='Keys', slug='keys')
+        _db.session.add(tenant)
+        _db.session.flush()
+        project = Project(key='KEY', name='Keys', tenant_id=tenant.id)
+        _db.session.add(project)
+        _db.session.flush()
+        issue_type = IssueType(name='Task', project_id=project.id)
+        status = IssueStatus(project_id=project.id, name='Offen', category='todo')
+        _db.session.add_all([issue_type, status])
+        _db.session.commit()
+        ids = {'project': project.id, 'tenant': tenant.id, 'type': issue_type.id, 'status': status.id}
+    yield app, ids
+    with app.app_context():
+        _db.engine.dispose()
+    config.pop('file_keys')
+
+
+@pytest.fixture
+def server_app(file_app, monkeypatch):
+    """File app whose default database takes the server database path (own counter transaction)"""
+    app, ids = file_app
+    with app.app_context():
+        monkeypatch.setattr(_db.engine.dialect, 'name', 'postgresql')
+        yield ids
+
+
+@pytest.mark.unit
+class TestServerDatabase:
+    """Counter transaction on server databases"""
+
+    def test_reservation_is_committed_at_once(self, server_app):
+        project = _db.session.get(Project, server_app['project'])
+        assert project.get_next_issue_key() == 'KEY-1'
+        _db.session.rollback()
+
+        assert _db.session.get(Project, server_app['project']).issue_counter == 1
+
+    def test_new_project_reserves_in_its_transaction(self, server_app):
+        project = Project(key='NEW', name='New', tenant_id=server_app['tenant'])
+        _db.session.add(project)
+
+        assert project.get_next_issue_key() == 'NEW-1'
+        _db.session.commit()
+        assert project.issue_counter == 1
+
+    def test_written_project_reserves_in_its_transaction(self, server_app):
+        project = _db.session.get(Project, server_app['project'])
+        project.name = 'Renamed'
+        _db.session.flush()
+
+        assert project.reserve_issue_keys(2) == ['KEY-1', 'KEY-2']
+        _db.session.rollback()
+        assert _db.session.get(Project, server_app['project']).issue_counter == 0
+
+
+@pytest.mark.unit
+@pytest.mark.slow
+class TestConcurrentCreates:
+    """10k issues from eight threads, one key or a block of keys per transaction"""
+
+    WORKERS = 8
+    ISSUES_PER_WORKER = 1250
+
+    def test_no_duplicate_keys(self, file_app):
+        app, ids = file_app
+
+        def create(worker):
+            with app.app_context():
+                project = _db.session.get(Project, ids['project'])
+                created = 0
+                while created < self.ISSUES_PER_WORKER:
+                    # Odd workers create one issue per transaction, even workers blocks of 25
+                    block = 1 if worker % 2 else min(25, self.ISSUES_PER_WORKER - created)
+                    keys = [project.get_next_issue_key()] if block == 1 else project.reserve_issue_keys(block)
+                    _db.session.add_all([
+                        Issue(key=key, summary=f'Worker {worker}', project_id=ids['project'],
+                              tenant_id=ids['tenant'], type_id=ids['type'], status_id=ids['status'])
+                        for key in keys
+                    ])
+                    _db.session.commit()
+                    created += block
+                return created
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.WORKERS) as pool:
+            created = sum(pool.map(create, range(self.WORKERS)))  # Re-raises lock timeouts
+        elapsed = time.perf_counter() - start
+
+        with app.app_context():
+            keys = [key for (key,) in _db.session.query(Issue.key)]
+            counter = _db.session.get(Project, ids['project']).issue_counter
+
+        assert created == len(keys) == 10000
+        assert len(set(keys)) == len(keys)
+        assert counter == 10000
+        assert elapsed < 120
@@ -0,0 +1,143 @@
+"""
+Tests for the in-memory issue key index
+
+Tests for:
+- Issue number prefixes on sorted numbers
+- Project and issue key typeahead without database queries once loaded
+- Committed creates, deletes and moves applied to the loaded index
+"""
+
+import pytest
+
+from modules.projects.bulk import delete_issues
+from modules.projects.key_index import issue_keys, numbers_with_prefix
+from modules.projects.models import Issue, Project
+
+
+def issue_matches(board, query, **kwargs):
+    return [key for key, _ in issue_keys.lookup(board['tenant'], query, **kwargs)[1]]
+
+
+@pytest.mark.unit
+class TestNumberPrefixes:
+    """Decimal prefixes on a sorted list"""
+
+    NUMBERS = [1, 2, 9, 12, 13, 120, 125, 129, 130, 1200, 1299, 1300]
+
+    @pytest.mark.parametrize('prefix, limit, expected', [
+        ('12', 10, [12, 120, 125, 129, 1200, 1299]),
+        ('12', 3, [12, 120, 125]),
+        ('1', 4, [1, 12, 13, 120]),
+        ('', 3, [1300, 1299, 1200]),  # Newest first
+        ('0', 10, []),
+        ('5', 10, []),
+    ])
+    def test_prefixes(self, prefix, limit, expected):
+        assert numbers_with_prefix(self.NUMBERS, prefix, limit) == expected
+
+    def test_empty(self):
+        assert numbers_with_prefix([], '1', 10) == []
+
+
+@pytest.mark.unit
+class TestLookup:
+    """Typeahead answered from memory"""
+
+    def test_issue_and_project_keys(self, db, board, add_issues):
+        add_issues(30)
+
+        assert issue_matches(board, 'test-2') == ['TEST-2', 'TEST-20', 'TEST-21', 'TEST-22', 'TEST-23',
+                                                  'TEST-24', 'TEST-25', 'TEST-26', 'TEST-27', 'TEST-28']
+        assert issue_matches(board, 'TEST-', limit=2) == ['TEST-30', 'TEST-29']
+        assert issue_matches(board, 'TEST-x') == []
+        assert issue_matches(board, 'OTHER-1') == []
+        assert [p.key for p in issue_keys.lookup(board['tenant'], 'te')[0]] == ['TEST']
+
+    def test_no_queries_once_loaded(self, db, board, add_issues, count_queries):
+        add_issues(5)
+        issue_keys.lookup(board['tenant'], 'TEST-1')
+
+        with count_queries() as statements:
+            for query in ('T', 'TEST-', 'TEST-3', 'TEST-99'):
+                issue_keys.lookup(board['tenant'], query)
+
+        assert statements == []
+
+    def test_visible_projects(self, db, board, add_issues, tenant):
+        archived = Project(key='OLD', name='Old', tenant_id=tenant.id, is_archived=True)
+        hidden = Project(key='HID', name='Hidden', tenant_id=tenant.id)
+        db.session.add_all([archived, hidden])
+        db.session.commit()
+        add_issues(project=archived)
+        add_issues(project=hidden)
+
+        assert issue_matches(board, 'OLD-1') == []
+        assert issue_matches(board, 'HID-1') == ['HID-1']
+        assert issue_matches(board, 'HID-1', project_ids={board['project']}) == []
+
+
+@pytest.mark.unit
+class TestUpdates:
+    """Committed changes reach the loaded index without a reload"""
+
+    def test_create_move_and_delete(self, db, board, add_issues, count_queries):
+        first, second = add_issues(2)
+        issue_keys.lookup(board['tenant'], 'TEST-1')
+
+        add_issues()
+        db.session.get(Issue, first).key = 'TEST-10'
+        db.session.delete(db.session.get(Issue, second))
+        db.session.commit()
+
+        with count_queries() as statements:
+            assert issue_matches(board, 'TEST-') == ['TEST-10', 'TEST-3']
+        assert statements == []
+
+    def test_rollback_is_discarded(self, db, board, add_issues):
+        add_issues()
+        issue_keys.lookup(board['tenant'], 'TEST-1')
+
+        db.session.add(Issue(key='TEST-2', summary='Issue 2', project_id=board['project'], tenant_id=board['tenant'],
+                             type_id=board['type'], status_id=board['todo']))
+        db.session.flush()
+        db.session.rollback()
+
+        assert issue_matches(board, 'TEST-') == ['TEST-1']
+
+    def test_savepoints(self, db, board, add_issues):
+        add_issues()
+        issue_keys.lookup(board['tenant'], 'TEST-1')
+
+        db.session.add(Issue(key='TEST-2', summary='Issue 2', project_id=board['project'], tenant_id=board['tenant'],
+                             type_id=board['type'], status_id=board['todo']))
+        with db.session.begin_nested():
+            db.session.add(Issue(key='TEST-3', summary='Issue 3', project_id=board['project'],
+                                 tenant_id=board['tenant'], type_id=board['type'], status_id=board['todo']))
+        assert issue_matches(board, 'TEST-') == ['TEST-1']  # Released, not committed
+
+        savepoint = db.session.begin_nested()
+        db.session.add(Issue(key='TEST-4', summary='Issue 4', project_id=board['project'],
+                             tenant_id=board['tenant'], type_id=board['type'], status_id=board['todo']))
+        db.session.flush()
+        savepoint.rollback()
+        db.session.commit()
+
+        assert issue_matches(board, 'TEST-') == ['TEST-3', 'TEST-2', 'TEST-1']
+
+    def test_bulk_delete(self, db, board, add_issues):
+        ids = add_issues(3)
+        issue_keys.lookup(board['tenant'], 'TEST-1')
+
+        delete_issues(ids[:2])
+        db.session.commit()
+
+        assert issue_matches(board, 'TEST-') == ['TEST-3']
+
+    def test_project_change_reloads_tenant(self, db, board, add_issues):
+        add_issues()
+        issue_keys.lookup(board['tenant'], 'T')
+
+        db.session.get(Project, board['project']).is_archived = True
+        db.session.commit()
+
+        assert issue_matches(board, 'TEST-') == []
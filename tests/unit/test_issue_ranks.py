@@ -0,0 +1,135 @@
+"""
+Tests for fractional board and backlog ranks
+
+Tests for:
+- Key arithmetic (rank_between, spread_ranks)
+- Ranks of new issues
+- Moves between neighbours or to a position
+- Rebalancing, inline for duplicate keys and as a background job
+"""
+
+import random
+
+import pytest
+
+from models import Job
+from modules.projects.models import Issue
+from modules.projects.ranking import (
+    rank_between, spread_ranks, move_rank, rebalance_ranks, RankError, REBALANCE_JOB
+)
+from services import JobService
+
+
+@pytest.fixture
+def issues(add_issues):
+    """Ten issues in the first column"""
+    return add_issues(10)
+
+
+def column(status_id):
+    return [i.summary for i in Issue.query.filter_by(status_id=status_id).order_by(Issue.board_rank, Issue.id)]
+
+
+def backlog(project_id):
+    return [i.summary for i in Issue.query.filter_by(project_id=project_id).order_by(Issue.backlog_rank, Issue.id)]
+
+
+@pytest.mark.unit
+class TestRankKeys:
+    """Tests for the key arithmetic"""
+
+    def test_random_inserts_stay_ordered(self):
+        random.seed(42)
+        keys = spread_ranks(3)
+        for _ in range(2000):
+            i = random.randint(0, len(keys))
+            before, after = (keys[i - 1] if i else None), (keys[i] if i < len(keys) else None)
+            key = rank_between(before, after)
+            assert (before is None or before < key) and (after is None or key < after)
+            assert not key.endswith('0')
+            keys.insert(i, key)
+
+        assert max(len(k) for k in keys) <= 10
+
+    def test_appends_stay_short(self):
+        key = None
+        for _ in range(1000):
+            key = rank_between(key, None)
+
+        assert len(key) == 3
+
+    def test_spread_is_sorted_and_unique(self):
+        keys = spread_ranks(5000)
+
+        assert keys == sorted(set(keys))
+
+    @pytest.mark.parametrize('before, after', [('b', 'b'), ('c', 'b')])
+    def test_no_key_between_equal_or_reversed(self, before, after):
+        with pytest.raises(RankError):
+            rank_between(before, after)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('board', [['todo', 'done']], indirect=True)
+class TestIssueRanks:
+    """Ranks of new issues and moves"""
+
+    def test_new_issues_go_to_the_end(self, db, board, issues):
+        ranks = [i.board_rank for i in Issue.query.order_by(Issue.id)]
+
+        assert None not in ranks
+        assert ranks == sorted(ranks)
+        assert column(board['todo']) == [f'Issue {n}' for n in range(10)]
+
+    def test_move_between_explicit_neighbours(self, db, board, issues):
+        issues = Issue.query.order_by(Issue.board_rank).all()
+
+        move_rank(issues[9], 'board', before_id=issues[2].id, after_id=issues[3].id)
+        db.session.commit()
+
+        assert column(board['todo'])[2:5] == ['Issue 2', 'Issue 9', 'Issue 3']
+
+    def test_move_by_position(self, db, board, issues):
+        issue = Issue.query.filter_by(summary='Issue 0').one()
+
+        move_rank(issue, 'board', position=4)
+        db.session.commit()
+
+        assert column(board['todo'])[3:6] == ['Issue 4', 'Issue 0', 'Issue 5']
+
+    def test_duplicate_keys_are_respread(self, db, board, issues):
+        Issue.query.update({Issue.board_rank: 'i'})
+        db.session.commit()
+        issue = Issue.query.filter_by(summary='Issue 5').one()
+
+        move_rank(issue, 'board', position=1)
+        db.session.commit()
+
+        ranks = [i.board_rank for i in Issue.query]
+        assert len(set(ranks)) == 10
+        assert column(board['todo'])[1] == 'Issue 5'
+
+    def test_long_keys_queue_one_rebalance(self, app, db, board, issues, monkeypatch):
+        monkeypatch.setitem(app.config, 'ISSUE_RANK_REBALANCE_LENGTH', 1)
+        issues = Issue.query.order_by(Issue.board_rank).all()
+
+        move_rank(issues[9], 'board', before_id=issues[0].id, after_id=issues[1].id)
+        move_rank(issues[8], 'board', before_id=issues[0].id, after_id=issues[1].id)
+        db.session.commit()
+
+        jobs = Job.query.filter_by(type=REBALANCE_JOB).all()
+        assert [job.payload for job in jobs] == [{'project_id': board['project']}]
+
+        before = column(board['todo'])
+        result = JobService.handlers[REBALANCE_JOB](jobs[0].payload, lambda *args: None)
+        assert result['updated'] == 10
+        assert column(board['todo']) == before
+        assert max(len(i.board_rank) for i in Issue.query) <= 3
+
+    def test_rebalance_keeps_order(self, db, board, issues):
+        before = backlog(board['project'])
+
+        rebalance_ranks(board['project'])
+        db.session.commit()
+
+        assert backlog(board['project']) == before
@@ -0,0 +1,151 @@
+"""
+Tests for the issue full-text search index
+
+Tests for:
+- German/English stemming and MATCH expressions
+- Index kept in sync with issue and comment changes (and bulk deletes)
+- Ranked, prefix and stemmed matches limited to the given projects
+- Rebuilding the index (and the reindex command)
+"""
+
+import pytest
+
+from modules.projects.bulk import delete_issues
+from modules.projects.models import Issue, IssueComment, Project
+from modules.projects.search import (
+    stem_de, stem_en, index_text, match_expression, search_filter, search_issues, reindex
+)
+
+
+def found(board, query):
+    return search_issues(query, [board['project']], limit=50)[0]
+
+
+@pytest.mark.unit
+class TestStemming:
+    """Words are indexed with their German and English stems"""
+
+    @pytest.mark.parametrize('word, stem', [
+        ('rechnungen', 'rechnung'), ('rechnung', 'rechnung'), ('kunden', 'kund'), ('kunde', 'kund'),
+        ('fehlern', 'fehl'), ('2026', '2026'),
+    ])
+    def test_german(self, word, stem):
+        assert stem_de(word) == stem
+
+    @pytest.mark.parametrize('word, stem', [
+        ('invoices', 'invoice'), ('running', 'run'), ('tested', 'test'), ('queries', 'query'),
+        ('boxes', 'box'), ('status', 'status'), ('bug', 'bug'),
+    ])
+    def test_english(self, word, stem):
+        assert stem_en(word) == stem
+
+    def test_index_text_folds_and_stems(self):
+        assert index_text('Größe der Rechnungen') == 'grosse gross der rechnungen rechnung'
+
+    def test_match_expression(self):
+        assert match_expression('TAX-12') == '("tax") AND ("12"*)'
+        assert match_expression('Kunden') == '("kunden"* OR "kund")'
+        assert match_expression(' -- ') is None
+
+
+@pytest.mark.unit
+class TestIndexSync:
+    """Flush listeners keep the index current"""
+
+    def test_new_changed_and_deleted_issues(self, db, board, add_issues):
+        issue_id, = add_issues(summary='Rechnungen exportieren')
+        assert found(board, 'rechnung') == [issue_id]
+
+        db.session.get(Issue, issue_id).summary = 'Invoices export'
+        db.session.commit()
+        assert found(board, 'rechnung') == []
+        assert found(board, 'invoice') == [issue_id]
+
+        db.session.delete(db.session.get(Issue, issue_id))
+        db.session.commit()
+        assert found(board, 'invoice') == []
+
+    def test_comments(self, db, board, add_issues, admin_user):
+        issue_id, = add_issues(summary='Login')
+        comment = IssueComment(issue_id=issue_id, author_id=admin_user.id, content='Passwort vergessen')
+        db.session.add(comment)
+        db.session.commit()
+        assert found(board, 'passwort') == [issue_id]
+
+        db.session.delete(comment)
+        db.session.commit()
+        assert found(board, 'passwort') == []
+
+    def test_bulk_delete(self, db, board, add_issues):
+        issue_id, = add_issues(summary='Dashboard laden')
+
+        delete_issues([issue_id])
+        db.session.commit()
+
+        count = db.session.execute(db.text('SELECT count(*) FROM issue_search')).scalar()
+        assert count == 0
+
+
+@pytest.mark.unit
+class TestSearch:
+    """Ranked matches in key, summary, description and comments"""
+
+    def test_prefix_stemming_and_key(self, db, board, add_issues):
+        first, = add_issues(summary='Running checks nightly')
+        second, = add_issues(summary='Kundenportal', description='Kunden melden Fehler beim Login')
+
+        assert found(board, 'run') == [first]
+        assert found(board, 'checked') == [first]
+        assert found(board, 'kunde fehl') == [second]
+        assert found(board, f"{board['key']}-2") == [second]
+
+    def test_ranking_and_total(self, db, board, add_issues):
+        in_description, = add_issues(summary='Export', description='Performance der Suche')
+        in_summary, = add_issues(summary='Suche ist langsam')
+        for n in range(3):
+            add_issues(summary=f'Suche {n}')
+
+        issue_ids, total = search_issues('suche', [board['project']], limit=4)
+
+        assert total == 5
+        assert len(issue_ids) == 4
+        assert in_summary in issue_ids
+        assert in_description not in issue_ids  # Lowest rank
+
+    def test_projects_and_archived_issues(self, db, board, add_issues, tenant):
+        add_issues(summary='Archiviertes Ticket', is_archived=True)
+        other = Project(key='OTH', name='Other', tenant_id=tenant.id)
+        db.session.add(other)
+        db.session.commit()
+        add_issues(project=other, summary='Ticket woanders')
+
+        assert found(board, 'ticket') == []
+        assert len(search_issues('ticket', [board['project'], other.id])[0]) == 1
+
+    def test_search_filter(self, db, board, add_issues):
+        issue_id, = add_issues(summary='Berichte drucken')
+        add_issues(summary='Anderes')
+
+        assert [i.id for i in Issue.query.filter(search_filter('bericht'))] == [issue_id]
+        assert Issue.query.filter(search_filter('--')).count() == 0
+
+
+@pytest.mark.unit
+class TestReindex:
+    """Rebuilding the index from the issue rows"""
+
+    def test_reindex(self, db, board, add_issues):
+        issue_id, = add_issues(summary='Kalender')
+        db.session.execute(db.text('DELETE FROM issue_search'))
+        assert found(board, 'kalender') == []
+
+        assert reindex(batch_size=1) == 1
+        assert found(board, 'kalender') == [issue_id]
+
+    def test_command(self, app, db, board, add_issues):
+        add_issues(summary='Kalender')
+        add_issues(summary='Termine')
+
+        result = app.test_cli_runner().invoke(args=['reindex-search', 'default'])
+
+        assert 'default: 2 issues indexed' in result.output
@@ -0,0 +1,262 @@
+"""
+Tests for persistent background jobs
+
+Tests for:
+- Cron expression parsing and next slots
+- Leasing, retries with backoff, progress and lease takeover
+- Periodic schedules enqueued once per slot
+- Several workers on one database running every job exactly once
+- Admin job list, cancel and retry
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from config import config, TestingConfig
+from extensions import db as _db
+from models import Job, JobStatus
+from services import CronSchedule, JobService, JobWorker, JobLeaseLost
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Test job types; calls are recorded per payload 'n'"""
+    calls = Counter()
+    lock = threading.Lock()
+
+    def record(payload, progress):
+        with lock:
+            calls[payload.get('n')] += 1
+        progress(50, 'halfway')
+        return {'n': payload.get('n')}
+
+    def explode(payload, progress):
+        raise RuntimeError('boom')
+
+    monkeypatch.setitem(JobService.handlers, 'test.record', record)
+    monkeypatch.setitem(JobService.handlers, 'test.explode', explode)
+    return calls
+
+
+@pytest.fixture
+def no_schedules(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'JOB_SCHEDULES', {})
+
+
+@pytest.mark.unit
+class TestCronSchedule:
+    """Tests for CronSchedule"""
+
+    def test_steps(self):
+        cron = CronSchedule('*/15 * * * *')
+
+        assert cron.next_after(datetime(2026, 3, 1, 10, 7, 30)) == datetime(2026, 3, 1, 10, 15)
+        assert cron.next_after(datetime(2026, 3, 1, 10, 15)) == datetime(2026, 3, 1, 10, 30)
+
+    def test_weekdays_and_month_rollover(self):
+        cron = CronSchedule('0 6 * * 1-5')  # Weekdays at 06:00
+
+        # Friday 2026-10-30 after six -> Monday 2026-11-02
+        assert cron.next_after(datetime(2026, 10, 30, 7, 0)) == datetime(2026, 11, 2, 6, 0)
+
+    def test_day_of_month_or_weekday(self):
+        cron = CronSchedule('0 0 1 * 0')  # The 1st or any Sunday
+
+        assert cron.next_after(datetime(2026, 10, 19)) == datetime(2026, 10, 25)
+        assert cron.next_after(datetime(2026, 10, 26)) == datetime(2026, 11, 1)
+
+    def test_latest_until_coalesces_missed_slots(self):
+        cron = CronSchedule('0 * * * *')
+
+        assert cron.latest_until(datetime(2026, 1, 1, 0, 0), datetime(2026, 1, 1, 5, 30)) == datetime(2026, 1, 1, 5, 0)
+        assert cron.latest_until(datetime(2026, 1, 1, 5, 0), datetime(2026, 1, 1, 5, 30)) is None
+
+    @pytest.mark.parametrize('expression', ['* * * *', '60 * * * *', '*/0 * * * *', 'a * * * *', '0 0 31 2 *'])
+    def test_invalid_expressions(self, expression):
+        with pytest.raises(ValueError):
+            CronSchedule(expression).next_after(datetime(2026, 1, 1))
+
+
+@pytest.mark.unit
+class TestJobExecution:
+    """Tests for JobService and JobWorker"""
+
+    def test_enqueue_unknown_type(self, db):
+        with pytest.raises(ValueError):
+            JobService.enqueue('test.missing')
+
+    def test_claim_leases_one_job(self, db, handlers):
+        JobService.enqueue('test.record', {'n': 1})
+
+        job = JobService.claim('worker-a')
+
+        assert job.status == JobStatus.RUNNING.value
+        assert (job.locked_by, job.attempts) == ('worker-a', 1)
+        assert JobService.claim('worker-b') is None
+
+    def test_future_jobs_wait(self, db, handlers):
+        JobService.enqueue('test.record', run_at=datetime.utcnow() + timedelta(minutes=5))
+
+        assert JobService.claim('worker-a') is None
+
+    def test_worker_records_result(self, app, db, handlers, no_schedules):
+        job_id = JobService.enqueue('test.record', {'n': 7}).id
+
+        assert JobWorker(app, 'worker-a').process_next()
+
+        job = db.session.get(Job, job_id)
+        assert job.status == JobStatus.SUCCEEDED.value
+        assert (job.progress, job.result, job.locked_by) == (100, {'n': 7}, None)
+        assert handlers[7] == 1
+
+    def test_failures_back_off_then_give_up(self, app, db, handlers, no_schedules):
+        job_id = JobService.enqueue('test.explode', max_attempts=2).id
+        worker = JobWorker(app, 'worker-a')
+
+        worker.process_next()
+        job = db.session.get(Job, job_id)
+        assert job.status == JobStatus.PENDING.value
+        assert job.run_at > datetime.utcnow() + timedelta(seconds=30)
+        assert 'boom' in job.last_error
+
+        job.run_at = datetime.utcnow()
+        db.session.commit()
+        worker.process_next()
+        assert job.status == JobStatus.FAILED.value
+        assert worker.stats == {'succeeded': 0, 'failed': 2}
+
+    def test_stale_lease_is_taken_over(self, db, handlers):
+        JobService.enqueue('test.record')
+        job = JobService.claim('worker-a', lease_seconds=60)
+        job.locked_at = datetime.utcnow() - timedelta(minutes=5)
+        db.session.commit()
+
+        taken = JobService.claim('worker-b', lease_seconds=60)
+
+        assert (taken.id, taken.locked_by, taken.attempts) == (job.id, 'worker-b', 2)
+        with pytest.raises(JobLeaseLost):
+            JobService.update_progress(job, 'worker-a', 80)
+
+    def test_abandoned_job_without_attempts_left_fails(self, db, handlers):
+        JobService.enqueue('test.record', max_attempts=1)
+        job = JobService.claim('worker-a', lease_seconds=60)
+        job.locked_at = datetime.utcnow() - timedelta(minutes=5)
+        db.session.commit()
+
+        assert JobService.claim('worker-b', lease_seconds=60) is None
+        assert JobService.fail_abandoned(lease_seconds=60) == 1
+        db.session.refresh(job)
+        assert job.status == JobStatus.FAILED.value
+
+    def test_cancel_and_retry(self, db, handlers):
+        job = JobService.enqueue('test.record')
+
+        assert JobService.cancel(job)
+        assert not JobService.cancel(job)
+        assert JobService.retry(job)
+        assert (job.status, job.attempts) == (JobStatus.PENDING.value, 0)
+
+
+@pytest.mark.unit
+class TestSchedules:
+    """Periodic jobs from JOB_SCHEDULES"""
+
+    @pytest.fixture
+    def hourly(self, app, handlers, monkeypatch):
+        monkeypatch.setitem(app.config, 'JOB_SCHEDULES', {
+            'hourly': {'cron': '0 * * * *', 'type': 'test.record', 'payload': {'n': 1}},
+        })
+        monkeypatch.setitem(app.config, 'JOB_SCHEDULE_CATCHUP', 6 * 3600)
+
+    def test_slot_is_enqueued_once(self, db, hourly):
+        now = datetime(2026, 10, 19, 9, 30)
+
+        assert JobService.enqueue_due_schedules(now) == 1
+        assert JobService.enqueue_due_schedules(now) == 0
+
+        job = Job.query.one()
+        assert (job.schedule, job.run_at, job.payload) == ('hourly', datetime(2026, 10, 19, 9, 0), {'n': 1})
+
+    def test_next_slot_after_the_last_one(self, db, hourly):
+        JobService.enqueue_due_schedules(datetime(2026, 10, 19, 9, 30))
+
+        assert JobService.enqueue_due_schedules(datetime(2026, 10, 19, 12, 5)) == 1
+        assert [j.run_at.hour for j in Job.query.order_by(Job.run_at)] == [9, 12]
+
+    def test_concurrent_enqueue_of_same_slot(self, db, hourly, monkeypatch):
+        db.session.add(Job(type='test.record', schedule='hourly', run_at=datetime(2026, 10, 19, 9, 0)))
+        db.session.commit()
+        db.session.expunge_all()
+
+        # A worker that still believes the slot is open loses on the unique constraint
+        monkeypatch.setattr(JobService, '_last_slots', staticmethod(lambda: {}))
+        assert JobService.enqueue_due_schedules(datetime(2026, 10, 19, 9, 30)) == 0
+        assert Job.query.count() == 1
+
+    def test_default_schedules_are_valid(self, app):
+        for spec in TestingConfig.JOB_SCHEDULES.values():
+            CronSchedule(spec['cron'])
+            assert spec['type'] in JobService.handlers
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """An app on a SQLite file that several worker threads can share"""
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'jobs.db'}"
+        JOB_SCHEDULES = {}
+
+    monkeypatch.setitem(config, 'jobs_test', FileConfig)
+    app = create_app('jobs_test')
+    with app.app_context():
+        _db.create_all()
+    yield app
+    with app.app_context():
+        _db.engine.dispose()
+
+
+@pytest.mark.unit
+def test_workers_run_every_job_once(file_app, handlers):
+    with file_app.app_context():
+        for n in range(40):
+            JobService.enqueue('test.record', {'n': n})
+        _db.session.remove()
+
+    workers = [JobWorker(file_app) for _ in range(4)]
+    threads = [threading.Thread(target=worker.run, kwargs={'once': True}) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert handlers == Counter(range(40))
+    assert sum(worker.stats['succeeded'] for worker in workers) == 40
+    with file_app.app_context():
+        assert Job.query.filter_by(status=JobStatus.SUCCEEDED.value).count() == 40
+        _db.session.remove()
+
+
+@pytest.mark.unit
+class TestAdminJobs:
+    """Admin job endpoints"""
+
+    def test_job_list(self, admin_client_with_tenant, db, handlers):
+        JobService.enqueue('test.record', {'n': 1})
+
+        data = admin_client_with_tenant.get('/admin/jobs').get_json()
+
+        assert data['metrics']['pending'] == 1
+        assert data['jobs'][0]['type'] == 'test.record'
+        assert {s['name'] for s in data['schedules']} == set(TestingConfig.JOB_SCHEDULES)
+
+    def test_cancel_and_retry(self, admin_client_with_tenant, db, handlers):
+        job_id = JobService.enqueue('test.record').id
+
+        assert admin_client_with_tenant.post(f'/admin/jobs/{job_id}/cancel').get_json()['success']
+        assert admin_client_with_tenant.post(f'/admin/jobs/{job_id}/cancel').status_code == 409
+        response = admin_client_with_tenant.post(f'/admin/jobs/{job_id}/retry')
+        assert response.get_json()['job']['status'] == JobStatus.PENDING.value
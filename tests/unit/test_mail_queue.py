@@ -0,0 +1,330 @@
+"""
+Tests for the outbound mail queue
+
+Tests for:
+- MailQueueService (enqueue, leasing, backoff, metrics)
+- SMTPConnection (session reuse, reconnect)
+- MailQueueWorker against a local SMTP stand-in server
+"""
+
+import socketserver
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models import EmailQueue, EmailQueueStatus
+from services import EmailService, MailQueueService, MailQueueWorker, SMTPConnection
+
+
+# ============================================================================
+# LOCAL SMTP SERVER
+# ============================================================================
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: enough for smtplib.sendmail()"""
+
+    def _reply(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        sent_on_connection = 0
+        self._reply('220 localhost ESMTP test')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+
+            if command.startswith('EHLO'):
+                self._reply('250-localhost')
+                self._reply('250 8BITMIME')
+            elif command.startswith('HELO'):
+                self._reply('250 localhost')
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self._reply('250 OK')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b'.\r\n', b'.\n', b''):
+                        break
+                    data.append(data_line)
+                if server.reject_data:
+                    self._reply('451 Temporary failure')
+                    continue
+                server.messages.append(b''.join(data).decode())
+                sent_on_connection += 1
+                self._reply('250 Queued')
+                if server.drop_after and sent_on_connection >= server.drop_after:
+                    return  # Server closes the session without QUIT
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """SMTP stand-in recording received messages and connections"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.drop_after = None
+        self.reject_data = False
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+@pytest.fixture
+def smtp_server():
+    """Run a local SMTP server for the duration of a test."""
+    server = LocalSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mail_config(app, smtp_server, monkeypatch):
+    """Point the app's mail settings at the local SMTP server."""
+    settings = {
+        'MAIL_ENABLED': True,
+        'MAIL_PROVIDER': 'smtp',
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': smtp_server.port,
+        'MAIL_USE_TLS': False,
+        'MAIL_USE_SSL': False,
+        'MAIL_USERNAME': '',
+        'MAIL_PASSWORD': '',
+        'MAIL_QUEUE_ENABLED': True,
+        'MAIL_QUEUE_BATCH_SIZE': 50,
+        'MAIL_QUEUE_RETRY_BASE': 30,
+        'MAIL_SMTP_IDLE_TIMEOUT': 60,
+    }
+    for key, value in settings.items():
+        monkeypatch.setitem(app.config, key, value)
+    return app.config
+
+
+def _queue(count, subject='Queued'):
+    items = [
+        MailQueueService.enqueue(f'user{i}@example.com', f'{subject} {i}', f'<p>Body {i}</p>',
+                                 f'Body {i}', 'ProjectOps <noreply@example.com>')
+        for i in range(count)
+    ]
+    db.session.commit()
+    return items
+
+
+# ============================================================================
+# QUEUE SERVICE TESTS
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.services
+class TestMailQueueService:
+    """Tests for MailQueueService"""
+
+    def test_send_email_enqueues_when_queue_enabled(self, app, db, mail_config, smtp_server):
+        """send_email stores the message instead of talking to SMTP"""
+        service = EmailService(app)
+
+        assert service.send_email('a@example.com', 'Hello', '<p>Hi <b>there</b></p>') is True
+
+        item = EmailQueue.query.one()
+        assert item.status == EmailQueueStatus.PENDING.value
+        assert item.text_content == 'Hi there'
+        assert smtp_server.connections == 0
+
+    def test_enqueue_joins_the_callers_transaction(self, app, db, mail_config):
+        """Queued emails are committed with the caller's change and discarded by a rollback"""
+        service = EmailService(app)
+
+        service.send_email('a@example.com', 'Rolled back', '<p>Hi</p>')
+        db.session.rollback()
+        assert EmailQueue.query.count() == 0
+
+        service.send_email('a@example.com', 'Committed', '<p>Hi</p>')
+        db.session.commit()
+        assert [i.subject for i in EmailQueue.query.all()] == ['Committed']
+
+    def test_claim_batch_leases_due_messages_once(self, app, db, mail_config):
+        """Two workers never lease the same message"""
+        _queue(3)
+
+        first = MailQueueService.claim_batch('worker-a', limit=2)
+        second = MailQueueService.claim_batch('worker-b', limit=10)
+
+        assert len(first) == 2
+        assert len(second) == 1
+        assert {i.id for i in first}.isdisjoint({i.id for i in second})
+        assert all(i.status == EmailQueueStatus.SENDING.value for i in first + second)
+
+    def test_claim_batch_skips_future_retries(self, app, db, mail_config):
+        """Messages waiting for a retry are not leased early"""
+        item = _queue(1)[0]
+        item.next_attempt_at = datetime.utcnow() + timedelta(minutes=5)
+        db.session.commit()
+
+        assert MailQueueService.claim_batch('worker-a') == []
+
+    def test_claim_batch_reclaims_stale_lease(self, app, db, mail_config):
+        """A lease abandoned by a crashed worker is taken over"""
+        item = _queue(1)[0]
+        item.status = EmailQueueStatus.SENDING.value
+        item.locked_by = 'dead-worker'
+        item.locked_at = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+
+        claimed = MailQueueService.claim_batch('worker-a', lease_seconds=300)
+        assert [i.id for i in claimed] == [item.id]
+        assert claimed[0].locked_by == 'worker-a'
+
+    def test_mark_failed_backs_off_exponentially(self, app, db, mail_config):
+        """Retry delay doubles per attempt and gives up after max_attempts"""
+        item = _queue(1)[0]
+        item.max_attempts = 3
+
+        before = datetime.utcnow()
+        MailQueueService.mark_failed(item, 'boom', retry_base_seconds=10)
+        assert item.status == EmailQueueStatus.PENDING.value
+        assert timedelta(seconds=9) < item.next_attempt_at - before < timedelta(seconds=12)
+
+        MailQueueService.mark_failed(item, 'boom', retry_base_seconds=10)
+        assert timedelta(seconds=19) < item.next_attempt_at - before < timedelta(seconds=22)
+
+        MailQueueService.mark_failed(item, 'boom', retry_base_seconds=10)
+        assert item.status == EmailQueueStatus.FAILED.value
+        assert item.attempts == 3
+
+    def test_metrics_report_depth_and_latency(self, app, db, mail_config):
+        """Metrics include queue depth and enqueue-to-send latency"""
+        items = _queue(3)
+        items[0].status = EmailQueueStatus.SENT.value
+        items[0].created_at = datetime.utcnow() - timedelta(seconds=10)
+        items[0].sent_at = datetime.utcnow()
+        db.session.commit()
+
+        metrics = MailQueueService.get_metrics()
+
+        assert metrics['depth'] == 2
+        assert metrics['pending'] == 2
+        assert metrics['sent_in_window'] == 1
+        assert 9 <= metrics['avg_latency_seconds'] <= 11
+
+
+# ============================================================================
+# WORKER TESTS
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.services
+class TestMailQueueWorker:
+    """Tests for MailQueueWorker and SMTPConnection against a local SMTP server"""
+
+    def test_batch_uses_single_smtp_session(self, app, db, mail_config, smtp_server):
+        """All messages of a batch are sent over one connection"""
+        _queue(5)
+        worker = MailQueueWorker(app, worker_id='test-worker')
+
+        assert worker.process_batch() == 5
+        worker.connection.close()
+
+        assert len(smtp_server.messages) == 5
+        assert smtp_server.connections == 1
+        assert EmailQueue.query.filter_by(status=EmailQueueStatus.SENT.value).count() == 5
+
+    def test_session_is_reused_across_batches(self, app, db, mail_config, smtp_server):
+        """The connection stays open between batches"""
+        worker = MailQueueWorker(app, worker_id='test-worker')
+        _queue(2)
+        worker.process_batch()
+        _queue(2, subject='Second')
+        worker.process_batch()
+        worker.connection.close()
+
+        assert len(smtp_server.messages) == 4
+        assert smtp_server.connections == 1
+
+    def test_reconnects_after_server_drop(self, app, db, mail_config, smtp_server):
+        """A dropped session is re-established and delivery continues"""
+        smtp_server.drop_after = 2
+        _queue(5)
+        worker = MailQueueWorker(app, worker_id='test-worker')
+
+        worker.process_batch()
+        worker.connection.close()
+
+        assert len(smtp_server.messages) == 5
+        assert smtp_server.connections == 3
+        assert EmailQueue.query.filter_by(status=EmailQueueStatus.SENT.value).count() == 5
+
+    def test_rejected_messages_are_rescheduled(self, app, db, mail_config, smtp_server):
+        """Temporary failures leave the message pending with a later attempt time"""
+        smtp_server.reject_data = True
+        item_id = _queue(1)[0].id
+        worker = MailQueueWorker(app, worker_id='test-worker')
+
+        worker.process_batch()
+        worker.connection.close()
+
+        item = db.session.get(EmailQueue, item_id)
+        assert item.status == EmailQueueStatus.PENDING.value
+        assert item.attempts == 1
+        assert '451' in item.last_error
+        assert item.next_attempt_at > datetime.utcnow()
+        assert worker.stats['failed'] == 1
+
+    def test_lease_taken_over_mid_batch_is_skipped(self, app, db, mail_config, smtp_server, monkeypatch):
+        """A message re-leased by another worker during a slow batch is not sent twice"""
+        first_id, second_id = [item.id for item in _queue(2)]
+        worker = MailQueueWorker(app, worker_id='test-worker')
+        deliver = worker._deliver
+
+        def slow_deliver(item):
+            # The batch outlived the lease: another worker claims the second message
+            db.session.execute(db.update(EmailQueue).where(EmailQueue.id == second_id)
+                               .values(locked_by='worker-b'))
+            deliver(item)
+
+        monkeypatch.setattr(worker, '_deliver', slow_deliver)
+        worker.process_batch()
+        worker.connection.close()
+
+        assert len(smtp_server.messages) == 1
+        assert db.session.get(EmailQueue, first_id).status == EmailQueueStatus.SENT.value
+        second = db.session.get(EmailQueue, second_id)
+        assert (second.status, second.locked_by) == (EmailQueueStatus.SENDING.value, 'worker-b')
+
+    def test_idle_connection_is_closed(self, app, db, mail_config, smtp_server, monkeypatch):
+        """An idle session is closed instead of kept open forever"""
+        _queue(1)
+        worker = MailQueueWorker(app, worker_id='test-worker')
+        worker.process_batch()
+        assert worker.connection.is_open
+
+        monkeypatch.setitem(app.config, 'MAIL_SMTP_IDLE_TIMEOUT', 0)
+        worker.process_batch()  # Empty batch
+
+        assert not worker.connection.is_open
+
+    def test_smtp_connection_connects_lazily(self, app, mail_config, smtp_server):
+        """No connection is opened until the first message"""
+        connection = SMTPConnection(app.config)
+        assert not connection.is_open
+        assert smtp_server.connections == 0
@@ -0,0 +1,140 @@
+"""
+Tests for the module access cache
+
+Tests for:
+- Navigation and module guard served without Module/UserModule queries
+- Invalidation on module toggle, user module assignment and module sync
+- Version check against stale entries, TTL=0
+"""
+
+import pytest
+
+from extensions import AFTER_COMMIT
+from models import Module, UserModule
+from modules import ModuleRegistry, module_access, invalidate_module_access
+
+
+def module_queries(statements):
+    return [s for s in statements if 'FROM module' in s or 'FROM user_module' in s]
+
+
+@pytest.fixture
+def modules(db):
+    """Core, tasks and projects modules as synced on startup"""
+    rows = {
+        'core': Module(code='core', name_de='Kern', name_en='Core', is_core=True, is_active=True),
+        'tasks': Module(code='tasks', name_de='Aufgaben', name_en='Tasks', is_active=True),
+        'projects': Module(code='projects', name_de='Projekte', name_en='Projects', is_active=True),
+    }
+    db.session.add_all(rows.values())
+    db.session.commit()
+    return {code: module.id for code, module in rows.items()}
+
+
+@pytest.fixture
+def granted(db, user, modules):
+    """The regular user may use the projects module"""
+    db.session.add(UserModule(user_id=user.id, module_id=modules['projects']))
+    db.session.commit()
+
+
+def codes(modules):
+    return [m.code for m in modules]
+
+
+@pytest.mark.unit
+class TestModuleAccessCache:
+    """Tests for ModuleAccessCache"""
+
+    def test_user_modules_are_cached(self, db, user, granted, count_queries):
+        assert codes(ModuleRegistry.get_user_modules(user)) == ['core', 'projects']
+
+        with count_queries() as statements:
+            assert codes(ModuleRegistry.get_user_modules(user)) == ['core', 'projects']
+
+        assert module_queries(statements) == []
+
+    def test_inactive_modules_are_hidden(self, db, user, admin_user, modules, granted):
+        Module.query.filter_by(code='projects').update({'is_active': False})
+        db.session.commit()
+
+        assert codes(ModuleRegistry.get_user_modules(user)) == ['core']
+        assert codes(ModuleRegistry.get_user_modules(admin_user)) == ['core', 'tasks']
+
+    def test_invalidation_drops_snapshot(self, db, user, modules, granted):
+        ModuleRegistry.get_user_modules(user)
+        UserModule.query.filter_by(user_id=user.id).delete()
+        invalidate_module_access(user_id=user.id)
+        db.session.commit()
+
+        assert codes(ModuleRegistry.get_user_modules(user)) == ['core']
+
+    def test_entries_of_older_versions_are_ignored(self, db, user, modules):
+        """A snapshot loaded before a global invalidation is never served"""
+        version = module_access.version
+        module_access.invalidate()
+
+        module_access._modules = (version, float('inf'), {})
+        assert 'projects' in module_access.modules()
+
+    def test_rollback_discards_pending_invalidation(self, db, user, modules):
+        invalidate_module_access()
+        db.session.rollback()
+
+        assert AFTER_COMMIT not in db.session.info
+
+    def test_ttl_zero_disables_cache(self, app, db, user, granted, monkeypatch, count_queries):
+        monkeypatch.setitem(app.config, 'MODULE_ACCESS_CACHE_TTL', 0)
+        ModuleRegistry.get_user_modules(user)
+
+        with count_queries() as statements:
+            ModuleRegistry.get_user_modules(user)
+
+        assert module_queries(statements)
+
+    def test_sync_to_db_invalidates(self, db, modules):
+        from modules.projects import ProjectsModule
+
+        Module.query.filter_by(code='projects').delete()
+        db.session.commit()
+        assert 'projects' not in module_access.modules()
+
+        ProjectsModule.sync_to_db()
+
+        assert module_access.modules()['projects'].is_active
+
+
+@pytest.mark.unit
+class TestCachedModuleViews:
+    """Views that read module access from the cache"""
+
+    def test_warm_project_list_skips_module_queries(self, db, authenticated_client_with_tenant, granted, count_queries):
+        client = authenticated_client_with_tenant
+        assert client.get('/projects/').status_code == 200
+
+        with count_queries() as statements:
+            response = client.get('/projects/')
+
+        assert response.status_code == 200
+        assert module_queries(statements) == []
+
+    def test_guard_rejects_user_without_assignment(self, authenticated_client_with_tenant, modules):
+        response = authenticated_client_with_tenant.get('/projects/')
+
+        assert response.status_code == 302
+
+    def test_module_toggle_invalidates(self, db, admin_client_with_tenant, user, modules, granted):
+        assert 'projects' in codes(ModuleRegistry.get_user_modules(user))
+
+        response = admin_client_with_tenant.post(f"/admin/modules/{modules['projects']}/toggle")
+
+        assert response.status_code == 302
+        assert 'projects' not in codes(ModuleRegistry.get_user_modules(user))
+
+    def test_user_modules_save_invalidates(self, db, admin_client_with_tenant, user, modules):
+        assert codes(ModuleRegistry.get_user_modules(user)) == ['core']
+
+        admin_client_with_tenant.post(f'/admin/users/{user.id}/modules',
+                                      data={'modules': [modules['tasks']]})
+
+        assert codes(ModuleRegistry.get_user_modules(user)) == ['core', 'tasks']
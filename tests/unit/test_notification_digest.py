@@ -0,0 +1,190 @@
+"""
+Tests for notification digests
+
+Tests for:
+- Holding routine notifications for hourly/daily digest users
+- NotificationDigestService folding and batching
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import EmailQueue, Notification, Tenant, User
+from services import EmailService, NotificationDigestService, NotificationService
+
+
+NOW = datetime(2026, 3, 10, 14, 30)
+
+
+@pytest.fixture
+def digest_config(app, monkeypatch):
+    """Queue digest emails instead of sending them."""
+    for key, value in {
+        'MAIL_ENABLED': True,
+        'MAIL_QUEUE_ENABLED': True,
+        'NOTIFICATION_DIGEST_TOP_ITEMS': 2,
+    }.items():
+        monkeypatch.setitem(app.config, key, value)
+    return app.config
+
+
+def _digest_user(db, email, mode):
+    user = User(email=email, name=email.split('@')[0].title(), is_active=True,
+                notification_digest=mode, email_on_comment=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _notify(db, user, notification_type, title, created_at, entity_id=1):
+    notification = NotificationService.create(
+        user.id, notification_type, f'{title} (de)', f'{title} (en)',
+        entity_type='task', entity_id=entity_id
+    )
+    notification.created_at = created_at
+    db.session.commit()
+    return notification
+
+
+@pytest.mark.unit
+@pytest.mark.services
+class TestHeldNotifications:
+    """Tests for holding notifications of digest users"""
+
+    def test_immediate_user_is_not_held(self, app, db, user):
+        """Default preference keeps per-event notifications"""
+        notification = _notify(db, user, 'task_assigned', 'Task', NOW)
+
+        assert notification.digest_pending is False
+        assert NotificationService.get_unread_count(user.id) == 1
+
+    def test_digest_user_notifications_are_held(self, app, db):
+        """Routine notifications wait for the digest and are not listed"""
+        user = _digest_user(db, 'busy@example.com', 'hourly')
+        held = _notify(db, user, 'task_comment', 'Comment', NOW)
+        urgent = _notify(db, user, 'task_rejected', 'Rejected', NOW)
+
+        assert held.digest_pending is True
+        assert urgent.digest_pending is False
+        assert NotificationService.get_unread_count(user.id) == 1
+        assert NotificationService.get_recent(user.id) == [urgent]
+
+    def test_preferences_are_loaded_once_per_flush(self, app, db, user, count_queries):
+        """Recipients' digest preferences are read with one query for the whole flush"""
+        users = [user] + [_digest_user(db, f'busy{i}@example.com', 'hourly') for i in range(3)]
+        notifications = NotificationService.notify_users([u.id for u in users], 'task_assigned', 'Neu', 'New')
+
+        with count_queries() as statements:
+            db.session.flush()
+
+        assert len([s for s in statements if 'FROM user' in s]) == 1
+        held = {n.user_id: n.digest_pending for n in notifications}
+        assert held == {u.id: u is not user for u in users}
+
+    def test_loaded_recipient_skips_lookup(self, app, db, count_queries):
+        user = _digest_user(db, 'busy@example.com', 'daily')
+        assert user.notification_digest == 'daily'  # loaded by the caller
+        with count_queries() as statements:
+            notification = NotificationService.create(user.id, 'task_comment', 'Neu', 'New', recipient=user)
+            db.session.flush()
+
+        assert notification.digest_pending is True
+        assert not [s for s in statements if 'FROM user' in s]
+
+    def test_digest_user_gets_no_per_event_email(self, app, db, digest_config):
+        """Per-event emails are replaced by the digest email"""
+        user = _digest_user(db, 'busy@example.com', 'daily')
+        task = type('TaskStub', (), {'id': 1, 'title': 'T'})()
+
+        assert EmailService(app).send_comment_notification(task, user, user, 'Hi') is True
+        assert EmailQueue.query.count() == 0
+
+
+@pytest.mark.unit
+@pytest.mark.services
+class TestNotificationDigestService:
+    """Tests for NotificationDigestService"""
+
+    def test_folds_per_user_and_type(self, app, db, digest_config):
+        """Held rows become one digest per type with counts and top items"""
+        user = _digest_user(db, 'busy@example.com', 'hourly')
+        for i in range(3):
+            _notify(db, user, 'task_comment', f'Comment {i}', NOW - timedelta(hours=1, minutes=i), entity_id=i)
+        _notify(db, user, 'task_assigned', 'Assigned', NOW - timedelta(hours=1))
+
+        totals = NotificationDigestService.run(now=NOW)
+
+        assert totals == {'batches': 1, 'users': 1, 'folded': 4, 'digests': 2}
+        digests = {n.notification_type: n for n in Notification.query.filter_by(user_id=user.id)}
+        assert set(digests) == {'task_comment', 'task_assigned'}
+        comment = digests['task_comment']
+        assert comment.digest_count == 3
+        assert comment.digest_pending is False
+        assert comment.title_en == '3 new comments'
+        assert comment.message_en == 'Comment 0 (en); Comment 1 (en) (+1 more)'
+        assert comment.entity_id is None
+        assert digests['task_assigned'].entity_id == 1
+
+    def test_folds_per_tenant(self, app, db, digest_config, tenant):
+        """Digests keep the tenant of the folded rows, so each stays visible in its tenant"""
+        other = Tenant(name='Other Tenant', slug='other-tenant', is_active=True)
+        db.session.add(other)
+        db.session.flush()
+        user = _digest_user(db, 'member@example.com', 'hourly')
+        _notify(db, user, 'task_comment', 'Own', NOW - timedelta(hours=1)).tenant_id = tenant.id
+        _notify(db, user, 'task_comment', 'Other', NOW - timedelta(hours=1)).tenant_id = other.id
+        db.session.commit()
+
+        totals = NotificationDigestService.run(now=NOW)
+
+        assert totals['digests'] == 2
+        digests = {n.tenant_id: n.message_en for n in Notification.query.filter_by(user_id=user.id)}
+        assert digests == {tenant.id: 'Own (en)', other.id: 'Other (en)'}
+
+    def test_one_email_per_user(self, app, db, digest_config):
+        """All digests of a run go out in a single email"""
+        user = _digest_user(db, 'busy@example.com', 'hourly')
+        _notify(db, user, 'task_comment', 'Comment', NOW - timedelta(hours=1))
+        _notify(db, user, 'task_status_changed', 'Status', NOW - timedelta(hours=1))
+
+        NotificationDigestService.run(now=NOW)
+
+        item = EmailQueue.query.one()
+        assert item.to_email == user.email
+        assert 'Comment (de)' in item.text_content
+        assert 'Status (de)' in item.text_content
+
+    def test_respects_digest_period(self, app, db, digest_config):
+        """Notifications of the running hour/day stay held"""
+        hourly = _digest_user(db, 'hourly@example.com', 'hourly')
+        daily = _digest_user(db, 'daily@example.com', 'daily')
+        _notify(db, hourly, 'task_comment', 'This hour', NOW - timedelta(minutes=10))
+        _notify(db, daily, 'task_comment', 'Earlier today', NOW - timedelta(hours=3))
+
+        assert NotificationDigestService.run(now=NOW)['folded'] == 0
+        assert NotificationDigestService.run(now=NOW + timedelta(hours=1))['folded'] == 1
+        assert NotificationDigestService.run(now=NOW + timedelta(days=1))['folded'] == 1
+
+    def test_switching_back_to_immediate_flushes_backlog(self, app, db, digest_config):
+        """Held notifications are delivered once the user leaves digest mode"""
+        user = _digest_user(db, 'busy@example.com', 'daily')
+        _notify(db, user, 'task_comment', 'Comment', NOW)
+        user.notification_digest = 'immediate'
+        db.session.commit()
+
+        assert NotificationDigestService.run(now=NOW)['digests'] == 1
+
+    def test_batches_are_bounded(self, app, db, digest_config):
+        """Each batch handles at most batch_size users"""
+        for i in range(5):
+            user = _digest_user(db, f'user{i}@example.com', 'hourly')
+            _notify(db, user, 'task_assigned', 'Assigned', NOW - timedelta(hours=2))
+
+        first = NotificationDigestService.process_batch(now=NOW, batch_size=2)
+        assert first['users'] == 2
+
+        totals = NotificationDigestService.run(now=NOW, batch_size=2)
+        assert totals['batches'] == 2
+        assert totals['users'] == 3
+        assert Notification.query.filter_by(digest_pending=True).count() == 0
@@ -519,6 +519,7 @@ class TestEmailServiceSendEmail:
         app.config['MAIL_PORT'] = 587
         app.config['MAIL_USE_TLS'] = True
         app.config['MAIL_USE_SSL'] = False
+        app.config['MAIL_QUEUE_ENABLED'] = False
         
         mock_server = MagicMock()
         mock_smtp.return_value = mock_server
@@ -537,6 +538,70 @@ class TestEmailServiceSendEmail:
         mock_server.quit.assert_called_once()
 
 
+class TestEmailTemplates:
+    """Tests for the cached email templates"""
+
+    @staticmethod
+    def _context(lang='de', **extra):
+        task = Mock(id=1, title='<script>alert(1)</script>', tax_type='USt',
+                    due_date=date(2026, 3, 10), status='submitted')
+        task.entity.name = 'Test GmbH'
+        task.get_status_display.return_value = 'Eingereicht'
+        user = Mock(name='Recipient')
+        user.name = 'Erika'
+        context = {'task': task, 'user': user, 'days_until_due': 2,
+                   'task_url': 'http://localhost/tasks/1', 'lang': lang}
+        context.update(extra)
+        return context
+
+    def test_template_compiled_once_per_language(self, app):
+        """Test compiled templates are cached per (template, language)"""
+        from services import email_templates
+
+        assert email_templates.get_template('due_reminder', 'de') is email_templates.get_template('due_reminder', 'de')
+        assert email_templates.get_template('due_reminder', 'de') is not email_templates.get_template('due_reminder', 'en')
+
+    def test_css_is_inlined(self, app):
+        """Test stylesheet rules are copied into style attributes"""
+        service = EmailService(app)
+        html = service._render_email_template('due_reminder', self._context(days_until_due=0))
+
+        assert 'class="btn btn-warning" style="display: inline-block;' in html
+        assert '<body style="font-family:' in html
+
+    def test_user_content_is_escaped(self, app):
+        """Test task data cannot inject markup into the HTML part"""
+        service = EmailService(app)
+        html = service._render_email_template('due_reminder', self._context())
+
+        assert '<script>' not in html
+        assert '&lt;script&gt;' in html
+
+    def test_text_part_rendered_from_text_template(self, app):
+        """Test plain text part is rendered in the requested language"""
+        service = EmailService(app)
+        text = service._render_email_text('due_reminder', self._context(lang='en'))
+
+        assert 'Hello Erika' in text
+        assert 'due in 2 days' in text
+        assert 'http://localhost/tasks/1' in text
+        assert '<' not in text.replace('<script>', '').replace('</script>', '')
+
+    def test_send_methods_pass_text_part(self, app):
+        """Test high-level methods send both HTML and text parts"""
+        service = EmailService(app)
+        user = Mock(email='erika@example.com', email_notifications=True, email_on_comment=True)
+        user.name = 'Erika'
+        context = self._context()
+
+        with patch.object(service, 'send_email', return_value=True) as send:
+            service.send_comment_notification(context['task'], user, user, 'x' * 600, 'de')
+
+        html, text = send.call_args.args[2], send.call_args.args[3]
+        assert 'x' * 500 + '...' in html
+        assert 'hat einen Kommentar' in text
+
+
 # ============================================================================
 # RECURRENCE SERVICE TESTS
 # ============================================================================
@@ -0,0 +1,145 @@
+"""
+Tests for project membership lookups
+
+Tests for:
+- Single indexed (project_id, user_id) lookup instead of loading Project.members
+- Per-request memo of membership roles and its invalidation
+- project_access_required and the project list without member list loads
+"""
+
+import pytest
+from flask import g
+from flask_login import login_user
+
+from models import Module, UserModule
+from modules.projects.models import Project, ProjectMember, MEMBER_ROLE_MEMO
+from modules.projects.routes import project_access_required
+
+
+@pytest.fixture(autouse=True)
+def own_app_context(app):
+    """Keep memoized roles on g out of the shared session app context."""
+    with app.app_context():
+        yield
+
+
+def member_queries(statements):
+    return [s for s in statements if 'FROM project_member' in s]
+
+
+@pytest.fixture
+def crowded_project(db, project_with_member, admin_user):
+    """The test project with the user as member plus fifty more members"""
+    from models import User
+
+    project, user = project_with_member
+    for i in range(50):
+        other = User(email=f'member{i}@example.com', name=f'Member {i}', role='preparer')
+        db.session.add(other)
+        db.session.flush()
+        db.session.add(ProjectMember(project_id=project.id, user_id=other.id, role='viewer'))
+    db.session.commit()
+    return project.id, user
+
+
+@pytest.mark.unit
+class TestMemberRoleLookup:
+    """Tests for Project.get_member_role and friends"""
+
+    def test_role_checks_share_one_query(self, app, db, crowded_project, count_queries):
+        project_id, user = crowded_project
+        project = db.session.get(Project, project_id)
+        user.role  # Refresh the expired user outside the count
+
+        with count_queries() as statements:
+            assert project.is_member(user)
+            assert project.get_member_role(user) == 'member'
+            assert project.can_user_manage_issues(user)
+            assert not project.can_user_edit(user)
+            assert not project.is_admin(user)
+
+        assert len(member_queries(statements)) == 1
+        assert 'user_id' in member_queries(statements)[0]
+        assert 'members' not in project.__dict__
+
+    def test_non_member_has_no_role(self, db, project, user):
+        assert project.get_member_role(user) is None
+        assert not project.is_member(user)
+
+    def test_admins_skip_the_lookup(self, db, project, admin_user, count_queries):
+        admin_user.role
+
+        with count_queries() as statements:
+            assert project.get_member_role(admin_user) == 'admin'
+
+        assert statements == []
+
+    def test_loaded_member_list_is_reused(self, db, project_with_member, count_queries):
+        project, user = project_with_member
+        project.members, user.role
+
+        with count_queries() as statements:
+            assert project.get_member_role(user) == 'member'
+
+        assert statements == []
+
+    def test_role_change_resets_memo(self, db, project_with_member):
+        project, user = project_with_member
+        assert not project.can_user_edit(user)
+
+        ProjectMember.query.filter_by(project_id=project.id, user_id=user.id).first().role = 'lead'
+        db.session.commit()
+
+        assert project.can_user_edit(user)
+
+    def test_memo_lives_on_g(self, app, db, project_with_member):
+        project, user = project_with_member
+        with app.test_request_context():
+            project.get_member_role(user)
+            assert g.get(MEMBER_ROLE_MEMO) == {(project.id, user.id): 'member'}
+
+
+@pytest.mark.unit
+class TestProjectAccessRequired:
+    """project_access_required checks one membership row"""
+
+    def _call(self, app, user, project_id):
+        view = project_access_required(lambda project_id, project=None: project)
+        with app.test_request_context():
+            g.tenant = None
+            login_user(user)
+            return view(project_id=project_id)
+
+    def test_member_passes_without_loading_members(self, app, db, crowded_project, count_queries):
+        project_id, user = crowded_project
+
+        with count_queries() as statements:
+            project = self._call(app, user, project_id)
+
+        assert project.id == project_id
+        assert len(member_queries(statements)) == 1
+        assert 'members' not in project.__dict__
+
+    def test_non_member_is_redirected(self, app, db, project, user):
+        response = self._call(app, user, project.id)
+
+        assert response.status_code == 302
+
+
+@pytest.mark.unit
+class TestProjectList:
+    """The project list counts members in one query"""
+
+    def test_member_counts_are_grouped(self, db, authenticated_client_with_tenant, crowded_project, user, count_queries):
+        module = Module(code='projects', name_de='Projekte', name_en='Projects', is_active=True)
+        db.session.add(module)
+        db.session.flush()
+        db.session.add(UserModule(user_id=user.id, module_id=module.id))
+        db.session.commit()
+
+        with count_queries() as statements:
+            response = authenticated_client_with_tenant.get('/projects/')
+
+        assert response.status_code == 200
+        assert b'51 Mitglieder' in response.data or b'51 Members' in response.data
+        assert not [s for s in member_queries(statements) if 'project_member.role' in s]
@@ -0,0 +1,182 @@
+"""
+Tests for read-replica routing
+
+The replica is a SQLite file refreshed with ReadReplicaSyncService (the
+periodically copied stand-in for real replication). Tests for:
+- SELECTs inside use_read_replica / read_only endpoints use the replica
+- Fallback to the primary after writes, for lagging or unsynced replicas
+- Read-your-writes across requests via the Flask session
+"""
+
+import time
+from datetime import date
+
+import pytest
+import sqlalchemy as sa
+from flask import session
+
+from extensions import READ_REPLICA
+from middleware.read_replica import (
+    LAST_WRITE_AT, HEARTBEAT_TABLE, replica_position, use_read_replica, reset_write_tracking
+)
+from models import Task
+from services import JobService, ReadReplicaSyncService
+
+
+@pytest.fixture(autouse=True)
+def own_app_context(app):
+    """Keep the session's write tracking out of the shared session app context."""
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def replica(app, db, tmp_path, monkeypatch):
+    """A read replica in a temporary SQLite file (as if configured in READ_REPLICA_URL)"""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.engines[READ_REPLICA] = engine
+    monkeypatch.setitem(app.config, 'SQLALCHEMY_BINDS', {READ_REPLICA: str(engine.url)})
+    replica_position.clear()
+    yield engine
+    db.engines.pop(READ_REPLICA)
+    replica_position.clear()
+    engine.dispose()
+
+
+def add_task(db, tenant, entity, title):
+    db.session.add(Task(tenant_id=tenant.id, entity_id=entity.id, title=title, year=2026,
+                        due_date=date(2026, 6, 30), status='draft'))
+    db.session.commit()
+
+
+@pytest.fixture
+def replicated_task(db, replica, tenant, entity):
+    """One task on primary and replica, a second one only on the primary"""
+    add_task(db, tenant, entity, 'Replicated')
+    ReadReplicaSyncService.sync()
+    add_task(db, tenant, entity, 'Primary only')
+
+
+def titles():
+    return sorted(t.title for t in Task.query)
+
+
+@pytest.mark.unit
+class TestReplicaRouting:
+    """Tests for use_read_replica and TenantRoutingSession"""
+
+    def test_sync_copies_primary_and_stamps_position(self, db, replica, tenant, entity):
+        add_task(db, tenant, entity, 'Replicated')
+        synced_at = ReadReplicaSyncService.sync()
+
+        with replica.connect() as conn:
+            assert conn.exec_driver_sql('SELECT title FROM task').scalars().all() == ['Replicated']
+        assert replica_position.get() == synced_at
+
+    def test_sync_job(self, db, replica, tenant, entity):
+        """READ_REPLICA_SYNC_CRON schedules the copy as a replica.sync job"""
+        add_task(db, tenant, entity, 'Replicated')
+        result = JobService.handlers['replica.sync']({}, None)
+
+        with replica.connect() as conn:
+            assert conn.exec_driver_sql('SELECT title FROM task').scalars().all() == ['Replicated']
+        assert replica_position.get() == result['synced_at']
+
+    def test_selects_use_replica(self, app, db, replicated_task):
+        with app.test_request_context():
+            reset_write_tracking()
+            with use_read_replica():
+                assert titles() == ['Replicated']
+            assert titles() == ['Primary only', 'Replicated']
+
+    def test_writes_in_same_session_use_primary(self, app, db, replicated_task, tenant, entity):
+        with app.test_request_context():
+            reset_write_tracking()
+            db.session.add(Task(tenant_id=tenant.id, entity_id=entity.id, title='Pending', year=2026,
+                                due_date=date(2026, 6, 30), status='draft'))
+            db.session.flush()
+            with use_read_replica():
+                assert titles() == ['Pending', 'Primary only', 'Replicated']
+            db.session.rollback()
+
+    def test_read_your_writes(self, app, db, replicated_task):
+        with app.test_request_context():
+            reset_write_tracking()
+            session[LAST_WRITE_AT] = time.time()
+            with use_read_replica():
+                assert titles() == ['Primary only', 'Replicated']
+
+            ReadReplicaSyncService.sync()
+            with use_read_replica():
+                assert titles() == ['Primary only', 'Replicated']
+                assert db.session.info.get('use_read_replica') is True
+
+    def test_commit_remembers_last_write(self, app, db, replica, tenant, entity):
+        with app.test_request_context():
+            add_task(db, tenant, entity, 'Written')
+
+            assert session[LAST_WRITE_AT] <= time.time()
+
+    def test_rolled_back_savepoint_is_no_write(self, app, db, replica, tenant, entity):
+        with app.test_request_context():
+            savepoint = db.session.begin_nested()
+            db.session.add(Task(tenant_id=tenant.id, entity_id=entity.id, title='Discarded', year=2026,
+                                due_date=date(2026, 1, 1)))
+            db.session.flush()
+            savepoint.rollback()
+            db.session.commit()
+
+            assert LAST_WRITE_AT not in session
+
+    def test_lagging_replica_is_skipped(self, app, db, replicated_task, replica, monkeypatch):
+        with replica.begin() as conn:
+            conn.exec_driver_sql(f'UPDATE {HEARTBEAT_TABLE} SET synced_at = synced_at - 3600')
+        replica_position.clear()
+        monkeypatch.setitem(app.config, 'READ_REPLICA_MAX_LAG', 60)
+
+        with app.test_request_context():
+            reset_write_tracking()
+            with use_read_replica():
+                assert titles() == ['Primary only', 'Replicated']
+
+    def test_unsynced_replica_is_skipped(self, app, db, replica, tenant, entity):
+        add_task(db, tenant, entity, 'Primary only')
+
+        with app.test_request_context():
+            reset_write_tracking()
+            with use_read_replica():
+                assert titles() == ['Primary only']
+
+    def test_no_replica_configured(self, app, db, tenant, entity):
+        add_task(db, tenant, entity, 'Primary only')
+
+        with app.test_request_context():
+            reset_write_tracking()
+            with use_read_replica():
+                assert not db.session.info['use_read_replica']
+                assert titles() == ['Primary only']
+
+
+@pytest.mark.unit
+class TestReadOnlyEndpoints:
+    """Endpoints marked with @read_only"""
+
+    def test_dashboard_chart_reads_replica(self, admin_client_with_tenant, replica, tenant, entity, db):
+        add_task(db, tenant, entity, 'Replicated')
+        ReadReplicaSyncService.sync()
+        add_task(db, tenant, entity, 'Primary only')
+
+        response = admin_client_with_tenant.get('/api/dashboard/status-chart')
+
+        assert response.get_json()['data'][0] == 1  # draft tasks
+
+    def test_dashboard_chart_reads_own_writes(self, admin_client_with_tenant, replica, tenant, entity, db):
+        add_task(db, tenant, entity, 'Replicated')
+        ReadReplicaSyncService.sync()
+        add_task(db, tenant, entity, 'Primary only')
+        with admin_client_with_tenant.session_transaction() as sess:
+            sess[LAST_WRITE_AT] = time.time()
+
+        response = admin_client_with_tenant.get('/api/dashboard/status-chart')
+
+        assert response.get_json()['data'][0] == 2
@@ -0,0 +1,212 @@
+"""
+Tests for the reference data cache
+
+Tests for:
+- Snapshot lists served without queries
+- Commit-time invalidation (flush and bulk statements)
+- Tenant separation, TTL=0 and read-only snapshots
+- Project access lists invalidated per tenant
+"""
+
+import pickle
+from datetime import datetime
+
+import pytest
+from flask import g
+
+from models import Entity, Tenant, User
+from modules.projects.models import ProjectMember
+from services import ReferenceSnapshot, reference_data
+
+
+@pytest.fixture(autouse=True)
+def own_app_context(app):
+    """Keep g.tenant set by these tests out of the shared session app context."""
+    with app.app_context():
+        yield
+
+
+@pytest.mark.unit
+class TestReferenceDataCache:
+    """Tests for ReferenceDataCache"""
+
+    def test_second_call_uses_cache(self, app, db, tenant, entity, count_queries):
+        with app.test_request_context():
+            g.tenant = tenant
+            first = reference_data.entities()
+            with count_queries() as statements:
+                second = reference_data.entities()
+
+        assert statements == []
+        assert second is first
+        assert [e.name for e in first] == ['Test GmbH']
+
+    def test_snapshots_are_read_only_and_detached(self, app, db, tenant, entity):
+        with app.test_request_context():
+            g.tenant = tenant
+            snapshot = reference_data.entities()[0]
+
+        assert isinstance(snapshot, ReferenceSnapshot)
+        assert snapshot.get_name('en') == 'Test Ltd'
+        with pytest.raises(AttributeError):
+            snapshot.name = 'Changed'
+        with pytest.raises(AttributeError):
+            snapshot.parent  # Relationships are not part of a snapshot
+
+    def test_commit_invalidates(self, app, db, tenant, entity):
+        with app.test_request_context():
+            g.tenant = tenant
+            reference_data.entities()
+            db.session.add(Entity(name='Neue GmbH', tenant_id=tenant.id))
+            db.session.commit()
+
+            assert [e.name for e in reference_data.entities()] == ['Neue GmbH', 'Test GmbH']
+
+    def test_bulk_update_invalidates(self, app, db, tenant, entity):
+        with app.test_request_context():
+            g.tenant = tenant
+            reference_data.entities()
+            Entity.query.filter_by(id=entity.id).update({'is_active': False})
+            db.session.commit()
+
+            assert reference_data.entities() == ()
+
+    def test_rollback_keeps_cache(self, app, db, tenant, entity, count_queries):
+        with app.test_request_context():
+            g.tenant = tenant
+            reference_data.entities()
+            db.session.add(Entity(name='Verworfen GmbH', tenant_id=tenant.id))
+            db.session.flush()
+            db.session.rollback()
+
+            with count_queries() as statements:
+                names = [e.name for e in reference_data.entities()]
+
+        assert statements == []
+        assert names == ['Test GmbH']
+
+    def test_lists_are_cached_per_tenant(self, app, db, tenant, entity):
+        other = Tenant(name='Other', slug='other')
+        db.session.add(other)
+        db.session.flush()
+        db.session.add(Entity(name='Other GmbH', tenant_id=other.id))
+        db.session.commit()
+
+        with app.test_request_context():
+            g.tenant = tenant
+            own = [e.name for e in reference_data.entities()]
+            g.tenant = other
+            foreign = [e.name for e in reference_data.entities()]
+
+        assert own == ['Test GmbH']
+        assert foreign == ['Other GmbH']
+
+    def test_board_writes_keep_project_access(self, app, db, tenant, project_with_member, count_queries):
+        """Board versions and issue counters change on every board write, access does not"""
+        project, user = project_with_member
+        tenant_id, user_id = tenant.id, user.id
+        with app.test_request_context():
+            g.tenant = tenant
+            assert reference_data.accessible_project_ids(tenant_id, user_id) == {project.id}
+            project.board_version += 1
+            project.issue_counter += 1
+            db.session.commit()
+
+            with count_queries() as statements:
+                reference_data.accessible_project_ids(tenant_id, user_id)
+
+        assert statements == []
+
+    def test_membership_invalidates_only_its_tenant(self, app, db, tenant, project, user, count_queries):
+        other = Tenant(name='Other', slug='other')
+        db.session.add(other)
+        db.session.commit()
+        other_id, tenant_id, user_id, project_id = other.id, tenant.id, user.id, project.id
+
+        with app.test_request_context():
+            g.tenant = other
+            reference_data.accessible_project_ids(other_id, user_id)
+            g.tenant = tenant
+            assert reference_data.accessible_project_ids(tenant_id, user_id) == frozenset()
+            db.session.add(ProjectMember(project_id=project_id, user_id=user_id, role='member'))
+            db.session.commit()
+
+            assert reference_data.accessible_project_ids(tenant_id, user_id) == {project_id}
+            g.tenant = other
+            with count_queries() as statements:
+                reference_data.accessible_project_ids(other_id, user_id)
+
+        assert statements == []
+
+    def test_archiving_invalidates_project_access(self, app, db, tenant, project_with_member):
+        project, user = project_with_member
+        tenant_id, user_id = tenant.id, user.id
+        with app.test_request_context():
+            g.tenant = tenant
+            assert reference_data.accessible_project_ids(tenant_id, user_id) == {project.id}
+            project.is_archived = True
+            db.session.commit()
+
+            assert reference_data.accessible_project_ids(tenant_id, user_id) == frozenset()
+
+    def test_user_snapshots_hide_credentials(self, app, db, user, admin_user):
+        users = {u.email: u for u in reference_data.active_users()}
+
+        assert users[admin_user.email].is_admin()
+        assert not users[user.email].is_admin()
+        with pytest.raises(AttributeError):
+            users[user.email].password_hash
+
+    def test_login_keeps_user_list(self, app, db, user, count_queries):
+        """Writes to columns the list does not show (last_login) keep the cached users"""
+        reference_data.active_users()
+        user.last_login = datetime.utcnow()
+        db.session.commit()
+        User.query.filter_by(id=user.id).update({'last_login': datetime.utcnow()})
+        db.session.commit()
+
+        with count_queries() as statements:
+            reference_data.active_users()
+
+        assert statements == []
+
+    def test_user_column_change_invalidates_user_list(self, app, db, user):
+        reference_data.active_users()
+        user.name = 'Renamed'
+        db.session.commit()
+
+        assert [u.name for u in reference_data.active_users()] == ['Renamed']
+
+    def test_ttl_zero_disables_cache(self, app, db, user, monkeypatch, count_queries):
+        monkeypatch.setitem(app.config, 'REFERENCE_CACHE_TTL', 0)
+        reference_data.active_users()
+
+        with count_queries() as statements:
+            reference_data.active_users()
+
+        assert statements
+
+    def test_snapshots_survive_pickling(self, app, db, user):
+        """Required by the shared (Redis) backend"""
+        snapshot = reference_data.active_users()[0]
+        copy = pickle.loads(pickle.dumps(snapshot))
+
+        assert copy == snapshot
+        assert copy.email == snapshot.email
+        assert copy.is_manager() == snapshot.is_manager()
+
+
+@pytest.mark.unit
+class TestCachedViews:
+    """Views that render their dropdowns from the cache"""
+
+    def test_task_form_skips_reference_queries_when_warm(self, db, authenticated_client_with_tenant, entity, count_queries):
+        client = authenticated_client_with_tenant
+        assert client.get('/tasks/new').status_code == 200
+
+        with count_queries() as statements:
+            response = client.get('/tasks/new')
+
+        assert response.status_code == 200
+        assert b'Test GmbH' in response.data
+        assert not [s for s in statements if 'FROM entity' in s or 'FROM task_preset' in s]
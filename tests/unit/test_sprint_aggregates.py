@@ -0,0 +1,101 @@
+"""
+Tests for stored sprint aggregates
+
+Tests for:
+- Live aggregates of open sprints kept current on issue changes
+- Velocity data without per-issue queries
+"""
+
+from datetime import datetime
+
+import pytest
+
+from modules.projects.models import Issue, IssueStatus, Sprint
+from modules.projects.routes import calculate_velocity_data
+
+
+def aggregates(db, sprint_id):
+    db.session.expire_all()
+    sprint = db.session.get(Sprint, sprint_id)
+    return (sprint.total_points, sprint.completed_points, sprint.issue_count,
+            sprint.issues_todo, sprint.issues_in_progress, sprint.issues_done)
+
+
+@pytest.mark.unit
+class TestLiveAggregates:
+    """Flush listeners keep open sprints current"""
+
+    def test_adding_and_finishing_issues(self, db, board, add_issues):
+        add_issues(story_points=5, sprint_id=board['sprint'])
+        issue_id, = add_issues(story_points=3, status_id=board['in_progress'], sprint_id=board['sprint'])
+        add_issues(story_points=8)  # Backlog
+
+        assert aggregates(db, board['sprint']) == (8, 0, 2, 1, 1, 0)
+
+        db.session.get(Issue, issue_id).status_id = board['done']
+        db.session.commit()
+        assert aggregates(db, board['sprint']) == (8, 3, 2, 1, 0, 1)
+
+    def test_moving_reestimating_and_deleting(self, db, board, add_issues):
+        other = Sprint(name='Sprint 2', project_id=board['project'])
+        db.session.add(other)
+        db.session.commit()
+        issue_id, = add_issues(story_points=5, sprint_id=board['sprint'])
+
+        issue = db.session.get(Issue, issue_id)
+        issue.sprint_id = other.id
+        issue.story_points = 2
+        db.session.commit()
+        assert aggregates(db, board['sprint'])[:3] == (0, 0, 0)
+        assert aggregates(db, other.id)[:3] == (2, 0, 1)
+
+        db.session.delete(db.session.get(Issue, issue_id))
+        db.session.commit()
+        assert aggregates(db, other.id)[:3] == (0, 0, 0)
+
+    def test_editing_leaves_other_sprints_alone(self, db, board, add_issues):
+        # Sprints whose ids equal the old points and the old status id
+        db.session.add(IssueStatus(id=500, project_id=board['project'], name='Later', category='todo'))
+        db.session.add_all([Sprint(id=7, name='Sprint 7', project_id=board['project']),
+                            Sprint(id=500, name='Sprint 500', project_id=board['project'])])
+        db.session.commit()
+        issue_id, = add_issues(story_points=7, status_id=500, sprint_id=board['sprint'])
+        db.session.execute(db.update(Sprint).where(Sprint.id.in_([7, 500])).values(points_total=99))
+        db.session.commit()
+
+        issue = db.session.get(Issue, issue_id)
+        issue.story_points = 3
+        issue.status_id = board['done']
+        db.session.commit()
+
+        assert aggregates(db, board['sprint'])[:2] == (3, 3)
+        assert aggregates(db, 7)[0] == aggregates(db, 500)[0] == 99
+
+    def test_status_definition_change(self, db, board, add_issues):
+        add_issues(story_points=5, status_id=board['in_progress'], sprint_id=board['sprint'])
+
+        db.session.get(IssueStatus, board['in_progress']).is_final = True
+        db.session.commit()
+
+        assert aggregates(db, board['sprint'])[:2] == (5, 5)
+
+
+@pytest.mark.unit
+def test_velocity_reads_stored_values(db, project, board, add_issues, count_queries):
+    for n in range(10):
+        sprint = Sprint(name=f'Sprint {n + 2}', project_id=board['project'])
+        db.session.add(sprint)
+        db.session.flush()
+        for points in (1, 2, 3):
+            add_issues(story_points=points, status_id=board['done'], sprint_id=sprint.id)
+        sprint.state, sprint.completed_at = 'closed', datetime(2026, 1, n + 1)
+        db.session.commit()
+    db.session.expunge_all()
+    project = db.session.get(type(project), board['project'])
+
+    with count_queries() as statements:
+        data = calculate_velocity_data(project)
+
+    assert len(statements) == 1
+    assert data['completed'] == [6] * 10
+    assert data['committed'] == [6] * 10  # No commitment recorded: current total
@@ -0,0 +1,107 @@
+"""
+Tests for the tenant context cache
+
+Tests for:
+- Query count of a warm authenticated request
+- Invalidation on archive/restore and membership changes
+- TTL expiry
+"""
+
+import pytest
+
+from middleware.tenant import get_tenant_context, tenant_context_cache
+
+
+def _tenant_queries(statements):
+    return [s for s in statements if 'FROM tenant' in s]
+
+
+@pytest.mark.unit
+class TestTenantContextCache:
+    """Tests for the cached tenant context lookup"""
+
+    def test_warm_request_skips_tenant_queries(self, app, db, authenticated_client_with_tenant, count_queries):
+        """The second GET resolves tenant and role without touching the database"""
+        client = authenticated_client_with_tenant
+
+        with count_queries() as cold:
+            assert client.get('/api/notifications/unread-count').status_code == 200
+        with count_queries() as warm:
+            assert client.get('/api/notifications/unread-count').status_code == 200
+
+        assert _tenant_queries(cold)
+        assert not _tenant_queries(warm)
+        assert len(warm) < len(cold)
+
+    def test_hit_returns_session_bound_tenant(self, app, db, tenant, tenant_with_user, user, count_queries):
+        """Cached tenants are merged into the session and keep their role"""
+        with app.test_request_context():
+            get_tenant_context(user, tenant.id)
+            db.session.expunge_all()
+
+            with count_queries() as statements:
+                cached, role = get_tenant_context(user, tenant.id)
+
+            assert statements == []
+            assert cached in db.session
+            assert cached.slug == tenant.slug
+            assert role == 'member'
+
+    def test_archive_invalidates(self, app, db, tenant, tenant_with_user, user, admin_user):
+        """Archiving a tenant drops its cached contexts"""
+        with app.test_request_context():
+            assert get_tenant_context(user, tenant.id)[0] is not None
+
+            tenant.archive(admin_user)
+            db.session.commit()
+
+            assert get_tenant_context(user, tenant.id) == (None, None)
+
+            tenant.restore()
+            db.session.commit()
+
+            assert get_tenant_context(user, tenant.id)[0] is not None
+
+    def test_remove_member_invalidates(self, app, db, tenant, tenant_with_user, user):
+        """Removing a membership drops the user's cached contexts"""
+        with app.test_request_context():
+            assert get_tenant_context(user, tenant.id)[0] is not None
+            assert get_tenant_context(user, None)[0] is not None
+
+            tenant.remove_member(user)
+            db.session.commit()
+
+            assert get_tenant_context(user, tenant.id) == (None, None)
+            assert tenant_context_cache.get(user.id, None) is None
+
+    def test_admin_role_change_invalidates(self, app, db, client, tenant, tenant_with_user, user, admin_user):
+        """The admin member update route drops the cached role"""
+        admin_user.is_superadmin = True
+        db.session.commit()
+        with app.test_request_context():
+            assert get_tenant_context(user, tenant.id)[1] == 'member'
+
+        with client.session_transaction() as sess:
+            sess['_user_id'] = admin_user.id
+            sess['_fresh'] = True
+        client.post(f'/admin/tenants/{tenant.id}/members/{user.id}/update', data={'role': 'viewer'})
+
+        with app.test_request_context():
+            assert get_tenant_context(user, tenant.id)[1] == 'viewer'
+
+    def test_entries_expire(self, app, db, tenant, tenant_with_user, user, monkeypatch):
+        """Entries are ignored once their TTL has passed"""
+        with app.test_request_context():
+            get_tenant_context(user, tenant.id)
+            assert tenant_context_cache.get(user.id, tenant.id) is not None
+
+            monkeypatch.setattr('middleware.tenant.time.monotonic', lambda: float('inf'))
+            assert tenant_context_cache.get(user.id, tenant.id) is None
+
+    def test_ttl_zero_disables_cache(self, app, db, tenant, tenant_with_user, user, monkeypatch):
+        """TENANT_CONTEXT_CACHE_TTL=0 always resolves from the database"""
+        monkeypatch.setitem(app.config, 'TENANT_CONTEXT_CACHE_TTL', 0)
+        with app.test_request_context():
+            get_tenant_context(user, tenant.id)
+
+        assert tenant_context_cache.get(user.id, tenant.id) is None
@@ -0,0 +1,242 @@
+"""
+Tests for automatic tenant scoping
+
+Tests for:
+- do_orm_execute loader criteria on tenant-aware models
+- Rows written without a tenant (owner's or default tenant)
+- Shared categories and presets without a tenant
+- Opt-outs (execution option, disable_tenant_scope, exempt tables)
+- Previously unscoped endpoints (presets_list, api_search)
+"""
+
+from datetime import date
+
+import pytest
+from flask import g
+
+from middleware.tenant import SKIP_TENANT_SCOPE, disable_tenant_scope
+from models import Tenant, TenantMembership, Task, TaskCategory, TaskPreset, Entity, Notification, AuditLog, User
+
+
+@pytest.fixture(autouse=True)
+def own_app_context(app):
+    """Keep g.tenant set by these tests out of the shared session app context."""
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def other_tenant(db):
+    tenant = Tenant(name='Other Tenant', slug='other-tenant', is_active=True)
+    db.session.add(tenant)
+    db.session.commit()
+    return tenant
+
+
+@pytest.fixture
+def two_tenant_tasks(db, tenant, other_tenant, entity):
+    """One task per tenant plus one row the tb001 backfill missed (tenant_id NULL)"""
+    tasks = {}
+    for key, tenant_id in (('own', tenant.id), ('other', other_tenant.id)):
+        task = Task(tenant_id=tenant_id, entity_id=entity.id, title=key, year=2026,
+                    due_date=date(2026, 3, 31), status='draft')
+        db.session.add(task)
+        tasks[key] = task
+    db.session.commit()
+    ids = {key: task.id for key, task in tasks.items()}
+    # Core INSERT, so _stamp_tenant_id does not assign a tenant
+    ids['legacy'] = db.session.execute(Task.__table__.insert().values(
+        entity_id=entity.id, title='legacy', year=2026, due_date=date(2026, 3, 31), status='draft'
+    )).inserted_primary_key[0]
+    db.session.commit()
+    return ids
+
+
+@pytest.mark.unit
+class TestTenantScope:
+    """Tests for the do_orm_execute tenant criteria"""
+
+    def test_queries_are_scoped_to_current_tenant(self, app, db, tenant, two_tenant_tasks):
+        """Unfiltered queries only return the tenant's rows"""
+        with app.test_request_context():
+            g.tenant = tenant
+            titles = {t.title for t in Task.query.all()}
+
+        assert titles == {'own'}
+
+    def test_tasks_without_tenant_are_invisible(self, app, db, tenant, two_tenant_tasks):
+        """Rows without a tenant are not shared with every tenant"""
+        with app.test_request_context():
+            g.tenant = tenant
+            assert db.session.get(Task, two_tenant_tasks['legacy']) is None
+            assert Task.query.filter(Task.tenant_id.is_(None)).count() == 0
+
+    def test_counts_are_scoped(self, app, db, tenant, two_tenant_tasks):
+        """Query.count() selects from a subquery and is scoped as well"""
+        with app.test_request_context():
+            g.tenant = tenant
+            assert Task.query.count() == 1
+
+    def test_get_by_id_respects_scope(self, app, db, tenant, two_tenant_tasks):
+        """Primary key lookups cannot reach another tenant's rows"""
+        with app.test_request_context():
+            g.tenant = tenant
+            assert db.session.get(Task, two_tenant_tasks['other']) is None
+            assert db.session.get(Task, two_tenant_tasks['own']) is not None
+
+    def test_column_queries_are_scoped(self, app, db, tenant, two_tenant_tasks):
+        """Column-only selects are scoped as well"""
+        with app.test_request_context():
+            g.tenant = tenant
+            ids = {row.id for row in db.session.query(Task.id).all()}
+
+        assert ids == {two_tenant_tasks['own']}
+
+    def test_bulk_update_is_scoped(self, app, db, tenant, two_tenant_tasks):
+        """ORM bulk UPDATEs never touch other tenants"""
+        with app.test_request_context():
+            g.tenant = tenant
+            Task.query.update({Task.status: 'completed'}, synchronize_session=False)
+            db.session.commit()
+
+        db.session.expunge_all()
+        statuses = {t.title: t.status for t in Task.query.execution_options(**{SKIP_TENANT_SCOPE: True})}
+        assert statuses == {'own': 'completed', 'legacy': 'draft', 'other': 'draft'}
+
+    def test_no_scope_without_tenant_context(self, app, db, tenant, two_tenant_tasks):
+        """Background jobs and CLI commands (no request) see every tenant"""
+        assert Task.query.count() == 3
+
+        with app.test_request_context():
+            assert Task.query.count() == 3
+
+    def test_execution_option_opt_out(self, app, db, tenant, two_tenant_tasks):
+        """Single statements can opt out explicitly"""
+        with app.test_request_context():
+            g.tenant = tenant
+            assert Task.query.execution_options(**{SKIP_TENANT_SCOPE: True}).count() == 3
+
+    def test_disable_tenant_scope(self, app, db, tenant, two_tenant_tasks):
+        """Super-admin tooling can disable scoping for a request"""
+        with app.test_request_context():
+            g.tenant = tenant
+            disable_tenant_scope()
+            assert Task.query.count() == 3
+
+    def test_memberships_are_exempt(self, app, db, tenant, other_tenant, user):
+        """Memberships are resolved across tenants (tenant switcher)"""
+        tenant.add_member(user)
+        other_tenant.add_member(user)
+        db.session.commit()
+
+        with app.test_request_context():
+            g.tenant = tenant
+            assert TenantMembership.query.filter_by(user_id=user.id).count() == 2
+
+    def test_admin_tenant_tooling_is_unscoped(self, app, db, tenant, two_tenant_tasks):
+        """Requests to the super-admin tenant blueprint run without scoping"""
+        with app.test_request_context(f'/admin/tenants/{tenant.id}'):
+            app.preprocess_request()
+            g.tenant = tenant
+            assert Task.query.count() == 3
+
+
+@pytest.mark.unit
+class TestTenantStamp:
+    """Rows written without a tenant_id"""
+
+    def test_request_rows_get_current_tenant(self, app, db, tenant, other_tenant, user):
+        with app.test_request_context():
+            g.tenant = other_tenant
+            notification = Notification(user_id=user.id, notification_type='task_assigned', title='x')
+            db.session.add(notification)
+            db.session.commit()
+            assert notification.tenant_id == other_tenant.id
+
+    def test_rows_get_owner_tenant(self, db, tenant, other_tenant):
+        """Outside requests a row inherits the tenant of its owner"""
+        member = User(email='member@example.com', name='Member', current_tenant_id=other_tenant.id)
+        entity = Entity(name='Other GmbH', tenant_id=other_tenant.id)
+        task = Task(entity=entity, title='t', year=2026, due_date=date(2026, 3, 31), status='draft')
+        notification = Notification(user=member, notification_type='task_assigned', title='x')
+        db.session.add_all([member, task, notification])
+        db.session.commit()
+
+        assert task.tenant_id == other_tenant.id
+        assert notification.tenant_id == other_tenant.id
+
+    def test_rows_without_owner_get_default_tenant(self, app, db, tenant, other_tenant):
+        """Rows without owner go to the oldest active tenant and stay visible there"""
+        db.session.add(AuditLog(action='LOGIN', entity_type='User'))
+        db.session.commit()
+
+        with app.test_request_context():
+            g.tenant = tenant
+            assert AuditLog.query.filter_by(action='LOGIN').count() == 1
+        with app.test_request_context():
+            g.tenant = other_tenant
+            assert AuditLog.query.filter_by(action='LOGIN').count() == 0
+
+
+@pytest.mark.unit
+class TestSharedReferenceRows:
+    """Categories and presets without a tenant are shared with every tenant"""
+
+    @pytest.fixture
+    def presets(self, db, tenant, other_tenant):
+        for title, tenant_id in (('Own', tenant.id), ('Other', other_tenant.id), ('Shared', None)):
+            db.session.add(TaskPreset(title=title, tenant_id=tenant_id, is_active=True))
+        db.session.add(TaskCategory(code='SHARED', name='Shared', is_active=True))
+        db.session.commit()
+
+    def test_new_rows_stay_shared(self, app, db, tenant, presets):
+        with app.test_request_context():
+            g.tenant = tenant
+            db.session.add(TaskCategory(code='NEW', name='New', is_active=True))
+            db.session.commit()
+
+        categories = TaskCategory.query.execution_options(**{SKIP_TENANT_SCOPE: True})
+        assert {c.code: c.tenant_id for c in categories} == {'SHARED': None, 'NEW': None}
+
+    def test_every_tenant_sees_shared_rows(self, app, db, tenant, other_tenant, presets):
+        for current, own in ((tenant, 'Own'), (other_tenant, 'Other')):
+            with app.test_request_context():
+                g.tenant = current
+                assert {p.title for p in TaskPreset.query} == {own, 'Shared'}
+                assert [c.code for c in TaskCategory.query] == ['SHARED']
+
+    def test_bulk_statements_skip_other_tenants(self, app, db, tenant, presets):
+        with app.test_request_context():
+            g.tenant = tenant
+            assert TaskPreset.query.update({'is_active': False}) == 2
+            db.session.commit()
+
+        active = TaskPreset.query.filter_by(is_active=True).execution_options(**{SKIP_TENANT_SCOPE: True})
+        assert [p.title for p in active] == ['Other']
+
+@pytest.mark.unit
+class TestScopedEndpoints:
+    """Endpoints that used to read every tenant's rows"""
+
+    def test_presets_list_returns_tenant_and_shared_presets(self, db, authenticated_client_with_tenant,
+                                                           tenant, other_tenant):
+        for title, tenant_id in (('Own', tenant.id), ('Other', other_tenant.id), ('Shared', None)):
+            db.session.add(TaskPreset(title=title, tenant_id=tenant_id, is_active=True))
+        db.session.commit()
+
+        response = authenticated_client_with_tenant.get('/api/presets')
+
+        assert [p['title'] for p in response.get_json()] == ['Own', 'Shared']
+
+    def test_entities_of_other_tenants_are_hidden(self, app, db, tenant, other_tenant):
+        db.session.add_all([
+            Entity(name='Own GmbH', tenant_id=tenant.id),
+            Entity(name='Other GmbH', tenant_id=other_tenant.id),
+        ])
+        db.session.commit()
+
+        with app.test_request_context():
+            g.tenant = tenant
+            names = [e.name for e in Entity.query.filter_by(is_active=True).all()]
+
+        assert names == ['Own GmbH']
@@ -0,0 +1,284 @@
+"""
+Tests for per-tenant databases
+
+Tests for:
+- Session routing of tenant tables vs. shared tables
+- Bind selection in load_tenant_context
+- Mirroring of users into tenant databases
+- Online tenant moves and delta syncs
+- Id ranges per database
+"""
+
+from datetime import date
+
+import pytest
+import sqlalchemy as sa
+from flask import session
+from flask_login import login_user
+from werkzeug.exceptions import ServiceUnavailable
+
+from extensions import TENANT_BIND, tenant_bind
+from middleware.tenant import load_tenant_context
+from models import Tenant, Entity, Task, Comment, Team, TaskPreset, Notification, User, Job
+from services import JobService, TenantShardService, TenantMoveError
+
+
+@pytest.fixture(autouse=True)
+def own_app_context(app):
+    """Keep g.tenant and the session's bind out of the shared session app context."""
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def shard(app, db, tmp_path, monkeypatch):
+    """A tenant database 'eu1' in a temporary SQLite file (as if configured in TENANT_DATABASES)"""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'eu1.db'}")
+    db.engines['eu1'] = engine
+    monkeypatch.setitem(app.config, 'TENANT_DATABASES', {'eu1': str(engine.url)})
+    TenantShardService.create_schema('eu1')
+    yield 'eu1'
+    db.engines.pop('eu1')
+    engine.dispose()
+
+
+def count_rows(db, bind, table, **filters):
+    """Count rows directly in one database, bypassing session routing"""
+    table = db.metadata.tables[table]
+    query = sa.select(sa.func.count()).select_from(table).where(
+        *(table.c[key] == value for key, value in filters.items())
+    )
+    with TenantShardService.engine(bind).connect() as conn:
+        return conn.execute(query).scalar()
+
+
+def run_mirror_jobs():
+    """Run the queued tenants.mirror jobs (normally done by the job workers)"""
+    for job in Job.query.filter_by(type='tenants.mirror'):
+        JobService.handlers[job.type](job.payload, None)
+
+
+@pytest.fixture
+def tenant_data(db, tenant, user, entity, issue):
+    """Tasks with comments, a team with a member and a shared preset"""
+    task = Task(tenant_id=tenant.id, entity_id=entity.id, title='USt Q1', year=2026,
+                due_date=date(2026, 4, 10), status='draft', owner_id=user.id)
+    team = Team(name='Tax', tenant_id=tenant.id)
+    team.members.append(user)
+    db.session.add_all([task, team])
+    db.session.flush()
+    # Core INSERT keeps tenant_id NULL (the ORM would assign the default tenant)
+    db.session.execute(TaskPreset.__table__.insert().values(title='Global preset', is_active=True))
+    db.session.add(Comment(task_id=task.id, text='Belege fehlen', created_by_id=user.id))
+    db.session.commit()
+    return {'task': task.id}
+
+
+@pytest.mark.unit
+class TestTenantRouting:
+    """Tests for TenantRoutingSession"""
+
+    def test_tenant_tables_use_tenant_database(self, db, shard, tenant):
+        with tenant_bind(shard):
+            db.session.add(Entity(name='Shard GmbH', tenant_id=tenant.id))
+            db.session.commit()
+            assert Entity.query.count() == 1
+
+        assert Entity.query.count() == 0
+        assert count_rows(db, shard, 'entity', tenant_id=tenant.id) == 1
+
+    def test_shared_tables_use_default_database(self, db, shard, tenant, user):
+        with tenant_bind(shard):
+            assert User.query.filter_by(id=user.id).count() == 1
+            db.session.add(Notification(tenant_id=tenant.id, user_id=user.id,
+                                        notification_type='task_assigned', title='Hi'))
+            db.session.commit()
+
+        assert count_rows(db, None, 'notification') == 1
+        assert count_rows(db, shard, 'notification') == 0
+
+    def test_joins_with_users_run_on_tenant_database(self, db, shard, tenant, user):
+        """User rows are mirrored, so tenant queries can join them"""
+        run_mirror_jobs()
+        with tenant_bind(shard):
+            db.session.add(Team(name='Tax', tenant_id=tenant.id, manager_id=user.id))
+            db.session.commit()
+            names = [name for (name,) in db.session.query(User.name).join(
+                Team, Team.manager_id == User.id)]
+
+        assert names == [user.name]
+
+    def test_user_changes_are_mirrored(self, db, shard, user):
+        user.name = 'Renamed User'
+        db.session.add(User(email='new@example.com', name='New User', role='preparer'))
+        db.session.commit()
+
+        assert Job.query.filter_by(type='tenants.mirror').count() > 0
+        run_mirror_jobs()
+
+        with TenantShardService.engine(shard).connect() as conn:
+            names = set(conn.exec_driver_sql('SELECT name FROM user').scalars())
+        assert {'Renamed User', 'New User'} <= names
+
+    def test_mirror_job_is_part_of_the_transaction(self, db, shard, user):
+        queued = Job.query.filter_by(type='tenants.mirror').count()
+        user.name = 'Renamed User'
+        db.session.flush()
+        db.session.rollback()
+
+        assert Job.query.filter_by(type='tenants.mirror').count() == queued
+
+    def test_mirror_updates_rows_in_place(self, db, shard, tenant, user):
+        """Mirrored users referenced by tenant rows are updated, not replaced"""
+        run_mirror_jobs()
+        with tenant_bind(shard):
+            db.session.add(Team(name='Tax', tenant_id=tenant.id, manager_id=user.id))
+            db.session.commit()
+        user.name = 'Renamed User'
+        db.session.commit()
+
+        TenantShardService.mirror_rows(keys={'user': [user.id]})
+
+        with TenantShardService.engine(shard).connect() as conn:
+            conn.exec_driver_sql('PRAGMA foreign_keys = ON')
+            assert conn.exec_driver_sql('PRAGMA foreign_key_check').all() == []
+            assert conn.exec_driver_sql(
+                'SELECT name FROM user WHERE id = ?', (user.id,)
+            ).scalar() == 'Renamed User'
+
+
+@pytest.mark.unit
+class TestTenantBindSelection:
+    """Tests for select_tenant_bind in load_tenant_context"""
+
+    def _load(self, app, user, tenant, method='GET'):
+        with app.test_request_context(method=method):
+            login_user(user)
+            session['current_tenant_id'] = tenant.id
+            load_tenant_context()
+            return app.extensions['sqlalchemy'].session.info.get(TENANT_BIND)
+
+    def test_request_uses_tenant_bind(self, app, db, shard, tenant, tenant_with_user, user):
+        tenant.db_bind = shard
+        db.session.commit()
+
+        assert self._load(app, user, tenant) == shard
+
+    def test_default_tenant_uses_default_database(self, app, db, shard, tenant, tenant_with_user, user):
+        assert self._load(app, user, tenant) is None
+
+    def test_unknown_bind_is_unavailable(self, app, db, tenant, tenant_with_user, user):
+        tenant.db_bind = 'missing'
+        db.session.commit()
+
+        with pytest.raises(ServiceUnavailable):
+            self._load(app, user, tenant)
+
+    def test_writes_paused_while_moving(self, app, db, tenant, tenant_with_user, user):
+        tenant.is_moving = True
+        db.session.commit()
+
+        assert self._load(app, user, tenant) is None
+        with pytest.raises(ServiceUnavailable):
+            self._load(app, user, tenant, method='POST')
+
+
+@pytest.mark.unit
+class TestTenantMove:
+    """Tests for TenantShardService.sync_tenant / move"""
+
+    def test_move_copies_tenant_rows_and_purges_source(self, db, shard, tenant, tenant_data):
+        other = Tenant(name='Other', slug='other')
+        db.session.add(other)
+        db.session.flush()
+        db.session.add(Entity(name='Other GmbH', tenant_id=other.id))
+        db.session.commit()
+
+        stats = TenantShardService.move(tenant, shard, wait=0)
+
+        for table in ('task', 'entity', 'project', 'issue', 'team'):
+            assert count_rows(db, shard, table, tenant_id=tenant.id) == 1, table
+            assert count_rows(db, None, table, tenant_id=tenant.id) == 0, table
+        assert count_rows(db, shard, 'comment', task_id=tenant_data['task']) == 1
+        assert count_rows(db, shard, 'team_members') == 1
+        assert count_rows(db, None, 'comment') == 0
+        # Other tenants stay, shared rows are copied and kept
+        assert count_rows(db, None, 'entity', tenant_id=other.id) == 1
+        assert count_rows(db, shard, 'entity', tenant_id=other.id) == 0
+        assert count_rows(db, shard, 'task_preset') == count_rows(db, None, 'task_preset') == 1
+        assert stats['purged'] > 0
+
+        db.session.refresh(tenant)
+        assert tenant.db_bind == shard
+        assert not tenant.is_moving
+
+    def test_move_back_to_default_database(self, db, shard, tenant, tenant_data):
+        TenantShardService.move(tenant, shard, wait=0)
+        TenantShardService.move(tenant, None, wait=0)
+
+        assert count_rows(db, None, 'task', tenant_id=tenant.id) == 1
+        assert count_rows(db, shard, 'task', tenant_id=tenant.id) == 0
+        assert tenant.db_bind is None
+
+    def test_second_sync_only_writes_changes(self, db, shard, tenant, tenant_data, entity):
+        TenantShardService.sync_tenant(tenant.id, None, shard)
+
+        task = db.session.get(Task, tenant_data['task'])
+        task.title = 'USt Q1 (korrigiert)'
+        Comment.query.filter_by(task_id=task.id).delete()
+        db.session.add(Task(tenant_id=tenant.id, entity_id=entity.id, title='USt Q2', year=2026,
+                            due_date=date(2026, 7, 10), status='draft'))
+        db.session.commit()
+
+        delta = TenantShardService.sync_tenant(tenant.id, None, shard)
+
+        assert delta == {'inserted': 1, 'updated': 1, 'deleted': 1}
+        with tenant_bind(shard):
+            db.session.expunge_all()
+            assert {t.title for t in Task.query} == {'USt Q1 (korrigiert)', 'USt Q2'}
+            assert Comment.query.count() == 0
+
+    def test_id_collision_aborts_move(self, db, shard, tenant, tenant_data):
+        with TenantShardService.engine(shard).begin() as conn:
+            conn.execute(db.metadata.tables['task'].insert(), {
+                'id': tenant_data['task'], 'tenant_id': tenant.id + 1, 'entity_id': 1,
+                'title': 'Foreign', 'year': 2026, 'due_date': date(2026, 1, 1), 'status': 'draft'
+            })
+
+        with pytest.raises(TenantMoveError):
+            TenantShardService.move(tenant, shard, wait=0)
+
+        db.session.refresh(tenant)
+        assert tenant.db_bind is None
+        assert count_rows(db, None, 'task', tenant_id=tenant.id) == 1
+
+    def test_new_rows_use_the_database_id_range(self, db, shard, tenant, tenant_data):
+        TenantShardService.move(tenant, shard, wait=0)
+
+        with tenant_bind(shard):
+            entity = Entity(name='Shard GmbH', tenant_id=tenant.id)
+            db.session.add(entity)
+            db.session.commit()
+            entity_id = entity.id
+
+        start, end = TenantShardService.id_range(shard)
+        assert start <= entity_id <= end
+        assert TenantShardService.id_range(None)[1] < start
+
+    def test_move_keeps_sqlite_id_ranges(self, db, shard, tenant, tenant_data):
+        """Rows created in the tenant database would move the default database into its range"""
+        TenantShardService.move(tenant, shard, wait=0)
+        with tenant_bind(shard):
+            db.session.add(Entity(name='Shard GmbH', tenant_id=tenant.id))
+            db.session.commit()
+
+        with pytest.raises(TenantMoveError):
+            TenantShardService.move(tenant, None, wait=0)
+
+        db.session.refresh(tenant)
+        assert tenant.db_bind == shard
+        assert count_rows(db, None, 'entity', tenant_id=tenant.id) == 0
+
+    def test_move_to_same_database_is_rejected(self, db, tenant):
+        with pytest.raises(TenantMoveError):
+            TenantShardService.move(tenant, None, wait=0)